@@ -15,6 +15,7 @@
 #include <string>
 #include <cstdio>
 #include "ikarus_protocoll.h"
+#include "ikarus_protocol_check.h"  // Layout asserts generated from the Python protocol schema
 #include <cstring>   // für memcpy
 
 extern IKARUS_Firmware ikarus_firmware;
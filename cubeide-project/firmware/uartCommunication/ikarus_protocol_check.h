@@ -0,0 +1,101 @@
+/*
+ * ikarus_protocol_check.h
+ *
+ * GENERATED from testbed/Manager/applications/IKARUS/protocol/ikarus_protocol.json, do not edit.
+ * Regenerate with: python -m applications.IKARUS.protocol.headers --write
+ *
+ * Fails the build when a struct or enum of the UART protocol no longer matches the schema the Python
+ * codec is generated from.
+ */
+
+#ifndef UARTCOMMUNICATION_IKARUS_PROTOCOL_CHECK_H_
+#define UARTCOMMUNICATION_IKARUS_PROTOCOL_CHECK_H_
+
+#include <stddef.h>
+#include "Control/Control.hpp"
+#include "Controller/Controller.hpp"
+#include "estimation/estimation.hpp"
+#include "logging/logging_sample.h"
+#include "sensors/GY271.h"
+#include "sensors/IKARUS_Sensors.hpp"
+#include "sensors/IMU/bmi160.h"
+#include "uartCommunication/ikarus_protocoll.h"
+
+static_assert(IKARUS_MSG_START_BYTE == 170, "IKARUS_MSG_START_BYTE differs from ikarus_protocol.json");
+static_assert(IKARUS_MSG_MAX_PAYLOAD == 100, "IKARUS_MSG_MAX_PAYLOAD differs from ikarus_protocol.json");
+
+static_assert(IKARUS_MSG_ARMING == 0, "ikarus_msg_type_t: IKARUS_MSG_ARMING differs from ikarus_protocol.json");
+static_assert(IKARUS_MSG_THRUST == 1, "ikarus_msg_type_t: IKARUS_MSG_THRUST differs from ikarus_protocol.json");
+static_assert(IKARUS_MSG_PITCH == 2, "ikarus_msg_type_t: IKARUS_MSG_PITCH differs from ikarus_protocol.json");
+static_assert(IKARUS_MSG_ROLL == 3, "ikarus_msg_type_t: IKARUS_MSG_ROLL differs from ikarus_protocol.json");
+static_assert(IKARUS_MSG_YAW == 4, "ikarus_msg_type_t: IKARUS_MSG_YAW differs from ikarus_protocol.json");
+static_assert(IKARUS_MSG_MOTOR1 == 5, "ikarus_msg_type_t: IKARUS_MSG_MOTOR1 differs from ikarus_protocol.json");
+static_assert(IKARUS_MSG_MOTOR2 == 6, "ikarus_msg_type_t: IKARUS_MSG_MOTOR2 differs from ikarus_protocol.json");
+static_assert(IKARUS_MSG_MOTOR3 == 7, "ikarus_msg_type_t: IKARUS_MSG_MOTOR3 differs from ikarus_protocol.json");
+static_assert(IKARUS_MSG_MOTOR4 == 8, "ikarus_msg_type_t: IKARUS_MSG_MOTOR4 differs from ikarus_protocol.json");
+static_assert(IKARUS_MSG_SAMPLE_UPDATE == 10, "ikarus_msg_type_t: IKARUS_MSG_SAMPLE_UPDATE differs from ikarus_protocol.json");
+static_assert(IKARUS_MAG_CALIBRATE == 50, "ikarus_msg_type_t: IKARUS_MAG_CALIBRATE differs from ikarus_protocol.json");
+static_assert(IKARUS_SPECIAL_COMMAND == 100, "ikarus_msg_type_t: IKARUS_SPECIAL_COMMAND differs from ikarus_protocol.json");
+
+static_assert(MOTOR1_BEEP == 1, "IKARUS_SPECIAL_COMMANDS_T: MOTOR1_BEEP differs from ikarus_protocol.json");
+static_assert(MOTOR2_BEEP == 2, "IKARUS_SPECIAL_COMMANDS_T: MOTOR2_BEEP differs from ikarus_protocol.json");
+static_assert(MOTOR3_BEEP == 3, "IKARUS_SPECIAL_COMMANDS_T: MOTOR3_BEEP differs from ikarus_protocol.json");
+static_assert(MOTOR4_BEEP == 4, "IKARUS_SPECIAL_COMMANDS_T: MOTOR4_BEEP differs from ikarus_protocol.json");
+static_assert(MOTOR1_REVERSE_SPIN == 5, "IKARUS_SPECIAL_COMMANDS_T: MOTOR1_REVERSE_SPIN differs from ikarus_protocol.json");
+static_assert(MOTOR2_REVERSE_SPIN == 6, "IKARUS_SPECIAL_COMMANDS_T: MOTOR2_REVERSE_SPIN differs from ikarus_protocol.json");
+static_assert(MOTOR3_REVERSE_SPIN == 7, "IKARUS_SPECIAL_COMMANDS_T: MOTOR3_REVERSE_SPIN differs from ikarus_protocol.json");
+static_assert(MOTOR4_REVERSE_SPIN == 8, "IKARUS_SPECIAL_COMMANDS_T: MOTOR4_REVERSE_SPIN differs from ikarus_protocol.json");
+
+static_assert(sizeof(bmi160_acc) == 12, "bmi160_acc: size differs from ikarus_protocol.json");
+static_assert(offsetof(bmi160_acc, x) == 0, "bmi160_acc.x: offset differs from ikarus_protocol.json");
+static_assert(offsetof(bmi160_acc, y) == 4, "bmi160_acc.y: offset differs from ikarus_protocol.json");
+static_assert(offsetof(bmi160_acc, z) == 8, "bmi160_acc.z: offset differs from ikarus_protocol.json");
+
+static_assert(sizeof(bmi160_gyr) == 12, "bmi160_gyr: size differs from ikarus_protocol.json");
+static_assert(offsetof(bmi160_gyr, x) == 0, "bmi160_gyr.x: offset differs from ikarus_protocol.json");
+static_assert(offsetof(bmi160_gyr, y) == 4, "bmi160_gyr.y: offset differs from ikarus_protocol.json");
+static_assert(offsetof(bmi160_gyr, z) == 8, "bmi160_gyr.z: offset differs from ikarus_protocol.json");
+
+static_assert(sizeof(gy271_mag) == 12, "gy271_mag: size differs from ikarus_protocol.json");
+static_assert(offsetof(gy271_mag, x) == 0, "gy271_mag.x: offset differs from ikarus_protocol.json");
+static_assert(offsetof(gy271_mag, y) == 4, "gy271_mag.y: offset differs from ikarus_protocol.json");
+static_assert(offsetof(gy271_mag, z) == 8, "gy271_mag.z: offset differs from ikarus_protocol.json");
+
+static_assert(sizeof(ikarus_sensors_data_t) == 40, "ikarus_sensors_data_t: size differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_sensors_data_t, acc) == 0, "ikarus_sensors_data_t.acc: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_sensors_data_t, gyr) == 12, "ikarus_sensors_data_t.gyr: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_sensors_data_t, mag) == 24, "ikarus_sensors_data_t.mag: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_sensors_data_t, ultrasonic_front_distance) == 36, "ikarus_sensors_data_t.ultrasonic_front_distance: offset differs from ikarus_protocol.json");
+
+static_assert(sizeof(ikarus_estimation_state_t) == 24, "ikarus_estimation_state_t: size differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_estimation_state_t, roll) == 0, "ikarus_estimation_state_t.roll: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_estimation_state_t, pitch) == 4, "ikarus_estimation_state_t.pitch: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_estimation_state_t, yaw) == 8, "ikarus_estimation_state_t.yaw: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_estimation_state_t, roll_dot) == 12, "ikarus_estimation_state_t.roll_dot: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_estimation_state_t, pitch_dot) == 16, "ikarus_estimation_state_t.pitch_dot: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_estimation_state_t, yaw_dot) == 20, "ikarus_estimation_state_t.yaw_dot: offset differs from ikarus_protocol.json");
+
+static_assert(sizeof(ikarus_control_outputs_t) == 8, "ikarus_control_outputs_t: size differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_control_outputs_t, thrust1) == 0, "ikarus_control_outputs_t.thrust1: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_control_outputs_t, thrust2) == 2, "ikarus_control_outputs_t.thrust2: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_control_outputs_t, thrust3) == 4, "ikarus_control_outputs_t.thrust3: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_control_outputs_t, thrust4) == 6, "ikarus_control_outputs_t.thrust4: offset differs from ikarus_protocol.json");
+
+static_assert(sizeof(ikarus_control_external_input_t) == 12, "ikarus_control_external_input_t: size differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_control_external_input_t, roll) == 0, "ikarus_control_external_input_t.roll: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_control_external_input_t, pitch) == 4, "ikarus_control_external_input_t.pitch: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_control_external_input_t, yaw) == 8, "ikarus_control_external_input_t.yaw: offset differs from ikarus_protocol.json");
+
+static_assert(sizeof(ikarus_log_data_t) == 84, "ikarus_log_data_t: size differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_log_data_t, sensors) == 0, "ikarus_log_data_t.sensors: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_log_data_t, estimation) == 40, "ikarus_log_data_t.estimation: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_log_data_t, control_outputs) == 64, "ikarus_log_data_t.control_outputs: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_log_data_t, controller_inputs) == 72, "ikarus_log_data_t.controller_inputs: offset differs from ikarus_protocol.json");
+
+static_assert(sizeof(ikarus_motor_thrust_t) == 16, "ikarus_motor_thrust_t: size differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_motor_thrust_t, motor1) == 0, "ikarus_motor_thrust_t.motor1: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_motor_thrust_t, motor2) == 4, "ikarus_motor_thrust_t.motor2: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_motor_thrust_t, motor3) == 8, "ikarus_motor_thrust_t.motor3: offset differs from ikarus_protocol.json");
+static_assert(offsetof(ikarus_motor_thrust_t, motor4) == 12, "ikarus_motor_thrust_t.motor4: offset differs from ikarus_protocol.json");
+
+#endif /* UARTCOMMUNICATION_IKARUS_PROTOCOL_CHECK_H_ */
@@ -0,0 +1,207 @@
+import dataclasses
+import enum
+import json
+import os
+import struct
+
+import numpy as np
+
+from core.communication.serial.frames import FrameBatch, FrameFormat
+
+# ======================================================================================================================
+# IKARUS protocol codec
+#
+# ikarus_protocol.json is the single description of the UART protocol: frame constants, enums, the C structs and the
+# payload type of every message type. This module compiles it into NumPy dtypes and struct.Struct objects with the
+# firmware's memory layout (little endian, natural C alignment unless a struct is packed). headers.py checks the same
+# description against the firmware headers and generates static_asserts for the firmware build.
+# ======================================================================================================================
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), 'ikarus_protocol.json')
+
+# C type -> struct format character. Sizes and alignments are those of the Cortex-M7 (and of x86-64)
+PRIMITIVES = {
+    'uint8_t': 'B', 'int8_t': 'b', 'bool': '?', 'char': 'c',
+    'uint16_t': 'H', 'int16_t': 'h',
+    'uint32_t': 'I', 'int32_t': 'i', 'float': 'f',
+    'uint64_t': 'Q', 'int64_t': 'q', 'double': 'd',
+}
+
+
+class SchemaError(Exception):
+    ...
+
+
+# === LAYOUT ===========================================================================================================
+@dataclasses.dataclass(frozen=True)
+class Field:
+    name: str
+    type: str
+    count: int  # 1 for scalars, the array length otherwise
+    offset: int
+
+
+@dataclasses.dataclass(frozen=True)
+class StructLayout:
+    name: str
+    fields: tuple[Field, ...]
+    size: int
+    alignment: int
+    packed: bool
+    dtype: np.dtype
+    format: str  # struct format without byte order prefix, nested structs and arrays flattened
+
+    @property
+    def struct(self) -> struct.Struct:
+        return struct.Struct('<' + self.format)
+
+
+def _round_up(value: int, alignment: int) -> int:
+    return (value + alignment - 1) // alignment * alignment
+
+
+def _primitive_layout(type_name: str) -> StructLayout:
+    char = PRIMITIVES[type_name]
+    size = struct.calcsize('<' + char)
+    return StructLayout(name=type_name, fields=(Field('value', type_name, 1, 0),), size=size, alignment=size,
+                        packed=False, dtype=np.dtype([('value', '<' + char)]), format=char)
+
+
+def _struct_layout(name: str, description: dict, layouts: dict[str, StructLayout]) -> StructLayout:
+    packed = bool(description.get('packed', False))
+    fields = []
+    names, formats, offsets = [], [], []
+    format_ = ''
+    offset = 0
+    alignment = 1
+
+    for entry in description['fields']:
+        field_name, type_name = entry[0], entry[1]
+        count = int(entry[2]) if len(entry) > 2 else 1
+
+        if type_name in PRIMITIVES:
+            member = _primitive_layout(type_name)
+            member_dtype = member.dtype['value']
+        elif type_name in layouts:
+            member = layouts[type_name]
+            member_dtype = member.dtype
+        else:
+            raise SchemaError(f"{name}.{field_name}: unknown type \"{type_name}\" (structs must be defined before use)")
+
+        if not packed:
+            aligned = _round_up(offset, member.alignment)
+            format_ += 'x' * (aligned - offset)
+            offset = aligned
+            alignment = max(alignment, member.alignment)
+
+        fields.append(Field(field_name, type_name, count, offset))
+        names.append(field_name)
+        formats.append(member_dtype if count == 1 else (member_dtype, (count,)))
+        offsets.append(offset)
+        format_ += member.format * count
+        offset += member.size * count
+
+    size = offset if packed else _round_up(offset, alignment)
+    format_ += 'x' * (size - offset)
+    dtype = np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': size})
+    return StructLayout(name=name, fields=tuple(fields), size=size, alignment=alignment, packed=packed, dtype=dtype,
+                        format=format_)
+
+
+# === MESSAGES =========================================================================================================
+@dataclasses.dataclass(frozen=True)
+class MessageCodec:
+    msg_type: int
+    name: str
+    layout: StructLayout
+    struct: struct.Struct
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.layout.dtype
+
+    @property
+    def size(self) -> int:
+        return self.layout.size
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def encode(self, *values) -> bytes:
+        return self.struct.pack(*values)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def decode(self, payload: bytes | bytearray | memoryview) -> tuple:
+        return self.struct.unpack_from(payload)
+
+
+# === CODEC ============================================================================================================
+class ProtocolCodec:
+    schema: dict
+    frame_format: FrameFormat
+    layouts: dict[str, StructLayout]
+    enums: dict[str, type[enum.IntEnum]]
+    messages: dict[int, MessageCodec]
+    MessageType: type[enum.IntEnum]
+
+    # === INIT =========================================================================================================
+    def __init__(self, schema: dict, message_enum: str = 'ikarus_msg_type_t'):
+        self.schema = schema
+        self.frame_format = FrameFormat(start_byte=int(schema['frame']['start_byte']),
+                                        max_payload=int(schema['frame']['max_payload']))
+
+        self.layouts = {}
+        for name, description in schema['structs'].items():
+            self.layouts[name] = _struct_layout(name, description, self.layouts)
+
+        self.enums = {name: enum.IntEnum(name, description['values'])
+                      for name, description in schema['enums'].items()}
+        self.MessageType = self.enums[message_enum]
+
+        self.messages = {}
+        for message_name, type_name in schema['messages'].items():
+            msg_type = self.MessageType[message_name]
+            layout = self.layout(type_name)
+            if layout.size > self.frame_format.max_payload:
+                raise SchemaError(f"{message_name}: {type_name} ({layout.size} bytes) does not fit into a frame")
+            self.messages[msg_type] = MessageCodec(msg_type=msg_type, name=message_name, layout=layout,
+                                                   struct=layout.struct)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def from_file(cls, path: str = SCHEMA_FILE, **kwargs) -> 'ProtocolCodec':
+        with open(path) as file:
+            return cls(json.load(file), **kwargs)
+
+    # === METHODS ======================================================================================================
+    def layout(self, type_name: str) -> StructLayout:
+        if type_name in PRIMITIVES:
+            return _primitive_layout(type_name)
+        try:
+            return self.layouts[type_name]
+        except KeyError:
+            raise SchemaError(f"Unknown type \"{type_name}\"") from None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def dtype(self, type_name: str) -> np.dtype:
+        return self.layout(type_name).dtype
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def encode(self, msg_type: int, *values) -> bytes:
+        """
+        Payload of `msg_type` from its values, nested structs and arrays flattened in field order.
+        """
+        return self.messages[msg_type].struct.pack(*values)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def decode(self, msg_type: int, payload: bytes | bytearray | memoryview) -> tuple:
+        return self.messages[msg_type].struct.unpack_from(payload)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def records(self, batch: FrameBatch, msg_type: int) -> np.ndarray:
+        """
+        All payloads of `msg_type` in `batch` as one structured array.
+        """
+        return batch.payload(self.messages[msg_type].dtype, msg_type=msg_type)
+
+
+IKARUS_PROTOCOL = ProtocolCodec.from_file()
+MessageType = IKARUS_PROTOCOL.MessageType
+SpecialCommand = IKARUS_PROTOCOL.enums['IKARUS_SPECIAL_COMMANDS_T']
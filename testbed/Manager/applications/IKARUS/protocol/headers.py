@@ -0,0 +1,233 @@
+"""
+Checks ikarus_protocol.json against the firmware headers and generates the firmware's layout assertions.
+
+    python -m applications.IKARUS.protocol.headers            # check headers and generated file, exit 1 on mismatch
+    python -m applications.IKARUS.protocol.headers --write    # regenerate ikarus_protocol_check.h
+
+The check parses the typedefs, enums and defines named in the schema from the headers (a small regex parser that
+understands the plain C used there, not arbitrary C). ikarus_protocol_check.h holds static_asserts on sizeof() and
+offsetof() of every schema struct and on every enum value; it is included by ikarus_communication.cpp, so a header
+that drifts from the schema fails the firmware build.
+"""
+import argparse
+import os
+import re
+import sys
+
+from applications.IKARUS.protocol.codec import ProtocolCodec, SCHEMA_FILE, IKARUS_PROTOCOL
+
+FIRMWARE_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '../../../../../cubeide-project/firmware'))
+CHECK_HEADER = 'uartCommunication/ikarus_protocol_check.h'
+
+_COMMENTS = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+_DEFINE = re.compile(r'^\s*#define\s+(\w+)\s+([^\s/]+)', re.MULTILINE)
+_STRUCT = re.compile(r'typedef\s+struct\s*(?:\w+\s*)?\{(?P<body>[^{}]*)\}\s*(?P<name>\w+)\s*;')
+_ENUM = re.compile(r'typedef\s+enum\s*(?:\w+\s*)?\{(?P<body>[^{}]*)\}\s*(?P<name>\w+)\s*;')
+_MEMBER = re.compile(r'^(?:const\s+)?(?:struct\s+)?(?P<type>\w+)\s+(?P<name>\w+)\s*(?:\[(?P<count>\w+)\])?\s*(?:=.*)?$',
+                     re.DOTALL)
+_PACK_PUSH = re.compile(r'#pragma\s+pack\s*\(\s*push\s*,\s*1\s*\)')
+_PACK_POP = re.compile(r'#pragma\s+pack\s*\(\s*pop\s*\)')
+
+
+# === PARSER ===========================================================================================================
+class Header:
+    """
+    Structs, enums and defines of one header file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, encoding='utf-8', errors='replace') as file:
+            text = _COMMENTS.sub('', file.read())
+
+        self.defines = {name: value for name, value in _DEFINE.findall(text)}
+
+        packed_ranges = []
+        for push in _PACK_PUSH.finditer(text):
+            pop = _PACK_POP.search(text, push.end())
+            packed_ranges.append((push.end(), pop.start() if pop else len(text)))
+
+        self.structs: dict[str, dict] = {}
+        for match in _STRUCT.finditer(text):
+            packed = (any(start <= match.start() < end for start, end in packed_ranges)
+                      or '__attribute__((packed))' in match.group(0).replace(' ', ''))
+            fields = []
+            for member in match.group('body').split(';'):
+                member = ' '.join(member.split())
+                if not member:
+                    continue
+                parsed = _MEMBER.match(member)
+                if parsed is None:
+                    fields.append((member, None, None))
+                    continue
+                count = parsed.group('count')
+                fields.append((parsed.group('name'), parsed.group('type'), self._value(count) if count else 1))
+            self.structs[match.group('name')] = {'packed': packed, 'fields': fields}
+
+        self.enums: dict[str, dict[str, int]] = {}
+        for match in _ENUM.finditer(text):
+            values = {}
+            next_value = 0
+            for item in match.group('body').split(','):
+                item = item.strip()
+                if not item:
+                    continue
+                name, _, value = item.partition('=')
+                next_value = self._value(value.strip()) if value else next_value
+                values[name.strip()] = next_value
+                next_value += 1
+            self.enums[match.group('name')] = values
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _value(self, token: str) -> int | str:
+        token = self.defines.get(token, token)
+        try:
+            return int(token, 0)
+        except ValueError:
+            return token
+
+
+# === CHECK ============================================================================================================
+def check_headers(codec: ProtocolCodec = IKARUS_PROTOCOL, firmware_dir: str = FIRMWARE_DIR) -> list[str]:
+    """
+    Returns a description of every difference between the schema and the firmware headers.
+    """
+    schema = codec.schema
+    headers: dict[str, Header] = {}
+    errors = []
+
+    def header(relative: str) -> Header | None:
+        if relative not in headers:
+            path = os.path.join(firmware_dir, relative)
+            if not os.path.isfile(path):
+                errors.append(f"{relative}: header not found in {firmware_dir}")
+                headers[relative] = None
+            else:
+                headers[relative] = Header(path)
+        return headers[relative]
+
+    frame = schema['frame']
+    frame_header = header(frame['header'])
+    if frame_header is not None:
+        for define, expected in (('IKARUS_MSG_START_BYTE', frame['start_byte']),
+                                 ('IKARUS_MSG_MAX_PAYLOAD', frame['max_payload'])):
+            value = frame_header._value(define)
+            if value != expected:
+                errors.append(f"{frame['header']}: {define} is {value}, schema says {expected}")
+
+    for name, description in schema['enums'].items():
+        source = header(description['header'])
+        if source is None:
+            continue
+        if name not in source.enums:
+            errors.append(f"{description['header']}: enum {name} not found")
+            continue
+        for item, expected in description['values'].items():
+            value = source.enums[name].get(item)
+            if value != expected:
+                errors.append(f"{name}.{item}: header has {value}, schema says {expected}")
+
+    for name, description in schema['structs'].items():
+        source = header(description['header'])
+        if source is None:
+            continue
+        if name not in source.structs:
+            errors.append(f"{description['header']}: struct {name} not found")
+            continue
+        parsed = source.structs[name]
+        expected_fields = [(entry[0], entry[1], int(entry[2]) if len(entry) > 2 else 1)
+                           for entry in description['fields']]
+        if parsed['fields'] != expected_fields:
+            errors.append(f"{name}: header fields {_describe(parsed['fields'])}, schema fields "
+                          f"{_describe(expected_fields)}")
+        if parsed['packed'] != bool(description.get('packed', False)):
+            errors.append(f"{name}: packed is {parsed['packed']} in the header, {not parsed['packed']} in the schema")
+
+    return errors
+
+
+def _describe(fields: list[tuple]) -> str:
+    return '[' + ', '.join(f"{type_} {name}" + (f"[{count}]" if count != 1 else '') for name, type_, count in fields) + ']'
+
+
+# === GENERATOR ========================================================================================================
+def generate_check_header(codec: ProtocolCodec = IKARUS_PROTOCOL) -> str:
+    schema = codec.schema
+    includes = sorted({description['header'] for description in schema['structs'].values()}
+                      | {description['header'] for description in schema['enums'].values()}
+                      | {schema['frame']['header']})
+
+    lines = [
+        '/*',
+        ' * ikarus_protocol_check.h',
+        ' *',
+        ' * GENERATED from testbed/Manager/applications/IKARUS/protocol/ikarus_protocol.json, do not edit.',
+        ' * Regenerate with: python -m applications.IKARUS.protocol.headers --write',
+        ' *',
+        ' * Fails the build when a struct or enum of the UART protocol no longer matches the schema the Python',
+        ' * codec is generated from.',
+        ' */',
+        '',
+        '#ifndef UARTCOMMUNICATION_IKARUS_PROTOCOL_CHECK_H_',
+        '#define UARTCOMMUNICATION_IKARUS_PROTOCOL_CHECK_H_',
+        '',
+        '#include <stddef.h>',
+    ]
+    lines += [f'#include "{include}"' for include in includes]
+    lines.append('')
+
+    frame = schema['frame']
+    lines.append(f'static_assert(IKARUS_MSG_START_BYTE == {frame["start_byte"]}, '
+                 f'"IKARUS_MSG_START_BYTE differs from ikarus_protocol.json");')
+    lines.append(f'static_assert(IKARUS_MSG_MAX_PAYLOAD == {frame["max_payload"]}, '
+                 f'"IKARUS_MSG_MAX_PAYLOAD differs from ikarus_protocol.json");')
+    lines.append('')
+
+    for name, description in schema['enums'].items():
+        for item, value in description['values'].items():
+            lines.append(f'static_assert({item} == {value}, "{name}: {item} differs from ikarus_protocol.json");')
+        lines.append('')
+
+    for name, layout in codec.layouts.items():
+        lines.append(f'static_assert(sizeof({name}) == {layout.size}, '
+                     f'"{name}: size differs from ikarus_protocol.json");')
+        for field in layout.fields:
+            lines.append(f'static_assert(offsetof({name}, {field.name}) == {field.offset}, '
+                         f'"{name}.{field.name}: offset differs from ikarus_protocol.json");')
+        lines.append('')
+
+    lines.append('#endif /* UARTCOMMUNICATION_IKARUS_PROTOCOL_CHECK_H_ */')
+    return '\n'.join(lines) + '\n'
+
+
+# === MAIN =============================================================================================================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--schema', default=SCHEMA_FILE)
+    parser.add_argument('--firmware', default=FIRMWARE_DIR)
+    parser.add_argument('--write', action='store_true', help="regenerate the firmware check header")
+    args = parser.parse_args()
+
+    codec = ProtocolCodec.from_file(args.schema)
+    errors = check_headers(codec, args.firmware)
+
+    generated = generate_check_header(codec)
+    path = os.path.join(args.firmware, CHECK_HEADER)
+    if args.write:
+        with open(path, 'w') as file:
+            file.write(generated)
+        print(f"Wrote {path}")
+    else:
+        current = open(path).read() if os.path.isfile(path) else None
+        if current != generated:
+            errors.append(f"{CHECK_HEADER} is out of date, run with --write")
+
+    for error in errors:
+        print(f"ERROR: {error}")
+    if errors:
+        sys.exit(1)
+    print(f"{len(codec.layouts)} structs, {len(codec.messages)} message types match the firmware headers")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from applications.IKARUS.protocol.codec import IKARUS_PROTOCOL, MessageType, ProtocolCodec, SchemaError, \
+    SpecialCommand
+from applications.IKARUS.protocol.headers import FIRMWARE_DIR, Header, check_headers
+
+MANAGER_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '../../../..'))
+
+
+def make_schema(structs: dict, messages: dict | None = None, max_payload: int = 100) -> dict:
+    return {
+        'frame': {'header': 'frame.h', 'start_byte': 0xAA, 'max_payload': max_payload},
+        'enums': {'msg_t': {'header': 'frame.h', 'values': {name: i for i, name in enumerate(messages or {})}}},
+        'structs': {name: {'header': 'structs.h', **description} for name, description in structs.items()},
+        'messages': messages or {},
+    }
+
+
+def offsets(codec: ProtocolCodec, name: str) -> dict[str, int]:
+    return {field.name: field.offset for field in codec.layouts[name].fields}
+
+
+# ================================================================
+# Layout
+# ================================================================
+
+def test_log_data_layout_matches_firmware():
+    dtype = IKARUS_PROTOCOL.dtype('ikarus_log_data_t')
+    assert dtype.itemsize == 84
+    assert offsets(IKARUS_PROTOCOL, 'ikarus_log_data_t') == {
+        'sensors': 0, 'estimation': 40, 'control_outputs': 64, 'controller_inputs': 72}
+    assert offsets(IKARUS_PROTOCOL, 'ikarus_sensors_data_t') == {
+        'acc': 0, 'gyr': 12, 'mag': 24, 'ultrasonic_front_distance': 36}
+    assert {name: dtype.fields[name][1] for name in dtype.names} == offsets(IKARUS_PROTOCOL, 'ikarus_log_data_t')
+    assert IKARUS_PROTOCOL.layouts['ikarus_log_data_t'].struct.size == 84
+
+
+def test_packed_motor_thrust_layout():
+    layout = IKARUS_PROTOCOL.layouts['ikarus_motor_thrust_t']
+    assert layout.packed
+    assert layout.size == 16
+    assert layout.alignment == 1
+    assert IKARUS_PROTOCOL.messages[MessageType.IKARUS_MSG_THRUST].size == 16
+
+
+def test_special_command_encodes_to_two_bytes():
+    payload = IKARUS_PROTOCOL.encode(MessageType.IKARUS_SPECIAL_COMMAND, SpecialCommand.MOTOR3_BEEP)
+    assert payload == b'\x03\x00'
+    assert IKARUS_PROTOCOL.decode(MessageType.IKARUS_SPECIAL_COMMAND, payload) == (SpecialCommand.MOTOR3_BEEP,)
+
+
+def test_alignment_padding_packed_and_arrays():
+    codec = ProtocolCodec(make_schema({
+        'padded_t': {'fields': [['a', 'uint8_t'], ['b', 'uint32_t'], ['c', 'uint8_t']]},
+        'packed_t': {'packed': True, 'fields': [['a', 'uint8_t'], ['b', 'uint32_t'], ['c', 'uint8_t']]},
+        'array_t': {'fields': [['a', 'uint8_t'], ['b', 'uint16_t', 3]]},
+        'nested_t': {'fields': [['a', 'uint8_t'], ['inner', 'padded_t', 2]]},
+    }), message_enum='msg_t')
+
+    padded = codec.layouts['padded_t']
+    assert (padded.size, padded.alignment, padded.format) == (12, 4, 'BxxxIBxxx')
+    assert offsets(codec, 'padded_t') == {'a': 0, 'b': 4, 'c': 8}
+
+    packed = codec.layouts['packed_t']
+    assert (packed.size, packed.alignment, packed.format) == (6, 1, 'BIB')
+    assert offsets(codec, 'packed_t') == {'a': 0, 'b': 1, 'c': 5}
+
+    array = codec.layouts['array_t']
+    assert (array.size, array.format) == (8, 'BxHHH')
+    assert array.dtype['b'].shape == (3,)
+
+    nested = codec.layouts['nested_t']
+    assert (nested.size, nested.alignment) == (28, 4)
+    assert offsets(codec, 'nested_t') == {'a': 0, 'inner': 4}
+    assert nested.struct.size == nested.dtype.itemsize == 28
+
+
+def test_schema_errors():
+    with pytest.raises(SchemaError, match='unknown type'):
+        ProtocolCodec(make_schema({'a_t': {'fields': [['x', 'missing_t']]}}), message_enum='msg_t')
+
+    with pytest.raises(SchemaError, match='does not fit into a frame'):
+        ProtocolCodec(make_schema({'big_t': {'fields': [['x', 'uint8_t', 9]]}}, messages={'MSG_BIG': 'big_t'},
+                                  max_payload=8), message_enum='msg_t')
+
+
+# ================================================================
+# Headers
+# ================================================================
+
+def test_header_parser_reads_enums_structs_and_defines(tmp_path):
+    path = tmp_path / 'example.h'
+    path.write_text('#define COUNT 4  // samples\n'
+                    'typedef enum {\n  A,\n  B = 5,\n  C, /* after B */\n  D = 0x10\n} example_enum_t;\n'
+                    '#pragma pack(push, 1)\n'
+                    'typedef struct example_t {\n  uint8_t flag;\n  float values[COUNT];\n} example_t;\n'
+                    '#pragma pack(pop)\n')
+    header = Header(str(path))
+    assert header.enums['example_enum_t'] == {'A': 0, 'B': 5, 'C': 6, 'D': 16}
+    assert header.structs['example_t'] == {'packed': True, 'fields': [('flag', 'uint8_t', 1), ('values', 'float', 4)]}
+
+
+def test_firmware_headers_match_schema():
+    assert check_headers(IKARUS_PROTOCOL, FIRMWARE_DIR) == []
+
+
+def test_header_check_fails_on_changed_field(tmp_path):
+    firmware = tmp_path / 'firmware'
+    shutil.copytree(FIRMWARE_DIR, firmware)
+    path = firmware / 'logging' / 'logging_sample.h'
+    text = path.read_text()
+    assert 'ikarus_estimation_state_t estimation;' in text
+    path.write_text(text.replace('ikarus_estimation_state_t estimation;', 'ikarus_estimation_state_t estimate;'))
+
+    result = subprocess.run([sys.executable, '-m', 'applications.IKARUS.protocol.headers', '--firmware', str(firmware)],
+                            cwd=MANAGER_DIR, capture_output=True, text=True)
+    assert result.returncode != 0
+    assert 'ikarus_log_data_t' in result.stdout
@@ -0,0 +1,85 @@
+"""
+Benchmark: CSVLogger with 20,000 IKARUS samples (23 columns in four levels of nested dicts).
+
+    write dicts     write_data() once per sample dict, then close()
+    write array     write_data() of the samples as one structured array
+    read dicts      read_csv_file()
+    read array      read_csv_array(), straight into a structured array
+    read chunks     iter_csv_arrays() in chunks of 4096 rows
+
+The array rows are skipped on versions of csv_utils without them. Run from the Manager directory:
+
+    python -m benchmarks.bench_csv_logger
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from applications.IKARUS.protocol.codec import IKARUS_PROTOCOL
+from core.utils import csv_utils
+from core.utils.csv_utils import CSVLogger, read_csv_file
+
+N = 20000
+
+
+def _samples() -> np.ndarray:
+    records = np.zeros(N, dtype=IKARUS_PROTOCOL.dtype('ikarus_log_data_t'))
+    rng = np.random.default_rng(1)
+    for name in ('roll', 'pitch', 'yaw'):
+        records['estimation'][name] = rng.normal(0, 0.1, N)
+    records['sensors']['acc']['z'] = 9.81 + rng.normal(0, 0.01, N)
+    records['control_outputs']['thrust1'] = rng.integers(1000, 2000, N)
+    return records
+
+
+def _to_dict(record) -> dict:
+    def convert(value, dtype):
+        if dtype.names:
+            return {name: convert(value[name], dtype.fields[name][0]) for name in dtype.names}
+        return value.item()
+    return convert(record, record.dtype)
+
+
+def _timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    records = _samples()
+    rows = [_to_dict(record) for record in records]
+
+    with tempfile.TemporaryDirectory() as directory:
+        def write_dicts():
+            logger = CSVLogger()
+            logger.make_file('dicts.csv', directory, custom_text_header='IKARUS samples')
+            for row in rows:
+                logger.write_data(row)
+            logger.close()
+
+        def write_array():
+            logger = CSVLogger()
+            logger.make_file('array.csv', directory, custom_text_header='IKARUS samples')
+            logger.write_data(records)
+            logger.close()
+
+        path = os.path.join(directory, 'dicts.csv')
+        runs = [('write dicts', write_dicts),
+                ('read dicts', lambda: read_csv_file(path))]
+        if hasattr(csv_utils, 'read_csv_array'):
+            runs += [('write array', write_array),
+                     ('read array', lambda: csv_utils.read_csv_array(path)),
+                     ('read chunks', lambda: sum(len(chunk) for chunk in
+                                                 csv_utils.iter_csv_arrays(path, chunk_rows=4096)))]
+
+        print(f"{N} rows")
+        for name, run in runs:
+            elapsed = _timed(run)
+            print(f"{name:14s} {elapsed * 1e3:8.1f}ms {elapsed / N * 1e6:8.2f}us/row")
+
+
+if __name__ == '__main__':
+    main()
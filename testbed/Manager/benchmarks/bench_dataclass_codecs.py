@@ -0,0 +1,73 @@
+"""
+Benchmark: per-message cost of dataclass <-> dict conversion for the hot message types.
+
+Compares from_dict and the generic recursive asdict walk with the compiled codecs from
+core.utils.dataclass_utils. Run from the Manager directory:
+
+    python -m benchmarks.bench_dataclass_codecs
+"""
+import time
+import timeit
+
+from core.communication.device_server import DeviceInformation
+from core.communication.protocol import JSON_Message
+from core.utils.dataclass_utils import from_dict, decode_dataclass, encode_dataclass, get_dataclass_fields
+from extensions.gui.src.gui import GUI_UpdateMessage
+from extensions.gui.src.lib.objects.objects import UpdateMessage
+
+N = 20000
+
+
+def asdict_generic(obj):
+    # The recursive walker asdict_optimized used before it dispatched to the compiled encoders
+    if hasattr(obj, '__dataclass_fields__') and not isinstance(obj, type):
+        return {f.name: asdict_generic(getattr(obj, f.name)) for f in get_dataclass_fields(type(obj))}
+    elif isinstance(obj, (list, tuple)):
+        return type(obj)(asdict_generic(item) for item in obj)
+    elif isinstance(obj, dict):
+        return {key: asdict_generic(value) for key, value in obj.items()}
+    return obj
+
+
+def _gui_update() -> GUI_UpdateMessage:
+    message = GUI_UpdateMessage()
+    for i in range(20):
+        message.messages[f"/gui/widget_{i}"] = UpdateMessage(id=f"/gui/widget_{i}", important=False,
+                                                             data={'value': i * 0.5, 'text': f"{i}"})
+    return message
+
+
+def _per_message(fn, n: int = N) -> float:
+    return min(timeit.repeat(fn, number=n, repeat=3)) / n * 1e6
+
+
+def main():
+    message_dict = {'address': '', 'source': 'device', 'type': 'stream', 'time': time.time(), 'id': 1,
+                    'request_id': 0, 'request_response': False,
+                    'data': {'x': 1.0, 'y': 2.0, 'state': 'running'}}
+    information_dict = {'device_class': 'robot', 'device_type': 'bilbo', 'device_name': 'bilbo1',
+                        'device_id': 'bilbo1', 'address': '192.168.0.10', 'revision': 3}
+    message = decode_dataclass(JSON_Message, message_dict)
+    gui_update = _gui_update()
+
+    rows = [
+        ('JSON_Message decode', lambda: from_dict(JSON_Message, message_dict),
+         lambda: decode_dataclass(JSON_Message, message_dict)),
+        ('DeviceInformation decode', lambda: from_dict(DeviceInformation, information_dict),
+         lambda: decode_dataclass(DeviceInformation, information_dict)),
+        ('JSON_Message encode', lambda: asdict_generic(message), lambda: encode_dataclass(message)),
+        ('GUI_UpdateMessage encode (20 widgets)', lambda: asdict_generic(gui_update),
+         lambda: encode_dataclass(gui_update)),
+    ]
+
+    assert asdict_generic(gui_update) == encode_dataclass(gui_update)
+
+    print(f"{'':40s} {'before':>10s} {'after':>10s}")
+    for name, before, after in rows:
+        t_before = _per_message(before)
+        t_after = _per_message(after)
+        print(f"{name:40s} {t_before:8.2f}us {t_after:8.2f}us  x{t_before / t_after:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: GUI update frames for a page of 500 live widgets.
+
+Every tick each widget sends its full update data (as the widgets do from their update loops); 10 % of them have a
+changed value, and a few send an important update. Compares the previous path (one GUI_UpdateMessage per tick,
+asdict_optimized, json.dumps of the whole message) with UpdateAggregator (coalescing, per-widget deltas against the
+last sent state). Reported are the CPU time per frame (add + build + encode) and the encoded frame size. Run from the
+Manager directory:
+
+    python -m benchmarks.bench_gui_updates
+"""
+import dataclasses
+import json
+import random
+import time
+
+from core.utils.dataclass_utils import asdict_optimized
+from extensions.gui.src.lib.objects.objects import UpdateMessage
+from extensions.gui.src.lib.updates import UpdateAggregator
+
+WIDGETS = 500
+FRAMES = 400
+CHANGED = 0.1
+IMPORTANT_PER_FRAME = 5
+
+
+@dataclasses.dataclass
+class GUI_UpdateMessage:
+    messages: dict = dataclasses.field(default_factory=dict)
+    type: str = 'gui_update'
+
+
+def _widget_data(i: int) -> dict:
+    return {
+        'value': 0.0,
+        'title': f"Widget {i}",
+        'color': [0.2, 0.4, 0.6, 1.0],
+        'text_color': [1.0, 1.0, 1.0, 1.0],
+        'visible': True,
+        'increment': 0.1,
+        'min_value': -1.0,
+        'max_value': 1.0,
+        'precision': 2,
+    }
+
+
+def _ticks():
+    rng = random.Random(1)
+    state = {f"/gui/page/widget_{i}": _widget_data(i) for i in range(WIDGETS)}
+    uids = list(state)
+    ticks = []
+    for _ in range(FRAMES):
+        for uid in rng.sample(uids, int(WIDGETS * CHANGED)):
+            state[uid] = dict(state[uid], value=rng.random())
+        updates = [(uid, UpdateMessage(id=uid, important=False, data=dict(data))) for uid, data in state.items()]
+        updates += [(uid, UpdateMessage(id=uid, important=True, data={'row': rng.randrange(10), 'value': 1}))
+                    for uid in rng.sample(uids, IMPORTANT_PER_FRAME)]
+        ticks.append(updates)
+    return ticks
+
+
+def before(ticks) -> tuple[float, float]:
+    size = 0
+    start = time.process_time()
+    for updates in ticks:
+        message = GUI_UpdateMessage()
+        for uid, update in updates:
+            if uid in message.messages and update.important:
+                if not isinstance(message.messages[uid], list):
+                    message.messages[uid] = [message.messages[uid]]
+                message.messages[uid].append(update)
+            else:
+                message.messages[uid] = update
+        size += len(json.dumps(asdict_optimized(message)))
+    cpu = time.process_time() - start
+    return cpu / len(ticks), size / len(ticks)
+
+
+def after(ticks) -> tuple[float, float]:
+    aggregator = UpdateAggregator(max_important=1024)
+    size = 0
+    start = time.process_time()
+    for updates in ticks:
+        for uid, update in updates:
+            aggregator.add(uid, update)
+        message = aggregator.frame()
+        if message is not None:
+            size += len(json.dumps(message))
+    cpu = time.process_time() - start
+    return cpu / len(ticks), size / len(ticks)
+
+
+def main():
+    ticks = _ticks()
+    print(f"{WIDGETS} widgets, {CHANGED:.0%} changing per frame, {FRAMES} frames")
+    print(f"{'':20s} {'cpu/frame':>12s} {'bytes/frame':>12s}")
+    for name, run in (('GUI_UpdateMessage', before), ('UpdateAggregator', after)):
+        cpu, size = run(ticks)
+        print(f"{name:20s} {cpu * 1e3:10.2f}ms {size:12.0f}")
+
+
+if __name__ == '__main__':
+    main()
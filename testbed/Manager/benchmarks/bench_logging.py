@@ -0,0 +1,77 @@
+"""
+Benchmark: per-call cost of Logger in the calling thread.
+
+    disabled       logger.debug() on an INFO logger
+    console        logger.info(), console output to /dev/null
+    file + redir   logger.info() with a log file and a redirection enabled
+    buffer         handle_log() alone, i.e. formatting and appending to the full replay buffer
+
+For the last two cases the time until flushLogs() returns is reported as well (on versions without the log sink the
+records are already delivered when the call returns). Finally, the time to replay the full buffer into a new
+redirection. Run from the Manager directory:
+
+    python -m benchmarks.bench_logging
+"""
+import os
+import tempfile
+import time
+
+from core.utils import logging_utils
+from core.utils.logging_utils import Logger, addLogRedirection, removeLogRedirection, enable_file_logging, \
+    stop_file_logging, handle_log
+
+N = 20000
+
+
+def _per_call(function, n: int = N) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        function('Message %d', i)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    logger = Logger('bench_logging', 'INFO')
+    devnull = open(os.devnull, 'w')
+    logger.stream_handler.setStream(devnull)
+    flush = getattr(logging_utils, 'flushLogs', lambda timeout=None: True)
+
+    print(f"{'':14s} {'per call':>10s}")
+    print(f"{'disabled':14s} {_per_call(logger.debug) * 1e6:8.2f}us")
+    print(f"{'console':14s} {_per_call(logger.info) * 1e6:8.2f}us")
+    flush()
+
+    with tempfile.TemporaryDirectory() as directory:
+        received = []
+
+        def redirection(entry, msg, lg, level):
+            received.append(entry)
+
+        addLogRedirection(redirection)
+        enable_file_logging('bench', directory)
+        start = time.perf_counter()
+        per_call = _per_call(logger.info)
+        flush()
+        total = (time.perf_counter() - start) / N
+        stop_file_logging()
+        removeLogRedirection(redirection)
+    print(f"{'file + redir':14s} {per_call * 1e6:8.2f}us  ({total * 1e6:.2f}us until flushed)")
+
+    start = time.perf_counter()
+    per_call = _per_call(lambda msg, i: handle_log(msg, logger, logger.level))
+    flush()
+    total = (time.perf_counter() - start) / N
+    print(f"{'buffer':14s} {per_call * 1e6:8.2f}us  ({total * 1e6:.2f}us until flushed)")
+
+    # Replay into a new redirection from the full buffer (10,000 records by default)
+    for past_time in (0.001, 600):
+        replayed = []
+        start = time.perf_counter()
+        addLogRedirection(lambda entry, msg, lg, level: replayed.append(entry), past_time=past_time)
+        elapsed = time.perf_counter() - start
+        print(f"{f'replay {past_time}s':14s} {elapsed * 1e3:8.2f}ms  ({len(replayed)} records)")
+    devnull.close()
+
+
+if __name__ == '__main__':
+    main()
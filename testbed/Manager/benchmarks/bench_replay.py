@@ -0,0 +1,102 @@
+"""
+Benchmark: replaying 60 s of IKARUS samples (84 byte log records at 500 Hz) through events.
+
+    per record, sleep   Event.set() of every record after time.sleep() to its recorded time, the straightforward way
+                        to replay a log, for 2 s of recording time
+    TelemetryReplay     1x and 10x paced for 2 s of wall time, then the whole recording at max speed, without and with
+                        a subscriber that touches every batch
+
+Reported are the recording seconds replayed, the lateness of the emissions against their schedule (mean, 99th
+percentile, max) and the records per second delivered. Run from the Manager directory:
+
+    python -m benchmarks.bench_replay
+"""
+import time
+
+import numpy as np
+
+from applications.IKARUS.protocol.codec import IKARUS_PROTOCOL
+from core.utils.events import Event, PatternSubscriber
+from core.utils.replay import TelemetryReplay
+
+RATE = 500.0
+SECONDS = 60
+
+
+def _samples() -> tuple[np.ndarray, np.ndarray]:
+    n = int(RATE * SECONDS)
+    records = np.zeros(n, dtype=IKARUS_PROTOCOL.dtype('ikarus_log_data_t'))
+    records['estimation']['roll'] = np.sin(np.arange(n) / 500)
+    records['sensors']['acc']['z'] = 9.81
+    return np.arange(n) / RATE, records
+
+
+class _Consumer(PatternSubscriber):
+    # Stands in for a GUI or controller: reads one field of every batch
+    def __init__(self, event: Event):
+        self.records = 0
+        super().__init__(pattern=event.uid, id=f"bench:{event.uid}", save_matches=False)
+
+    def set_match(self, event, flags, data):
+        self.records += len(data.records)
+        float(data.records['estimation']['roll'].mean())
+
+
+def per_record(times, records, seconds: float = 2.0) -> tuple[float, np.ndarray, float]:
+    event = Event(id='bench_per_record', copy_on_read=True)
+    n = int(seconds * RATE)
+    lateness = np.empty(n)
+    start = time.perf_counter()
+    for i in range(n):
+        remaining = start + times[i] - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        lateness[i] = time.perf_counter() - start - times[i]
+        event.set(records[i])
+    return seconds, lateness, n / (time.perf_counter() - start)
+
+
+def replay(times, records, speed: float | None, wall: float | None, consumer: bool = False) \
+        -> tuple[float, np.ndarray | None, float]:
+    engine = TelemetryReplay(times, records, stream='log', speed=speed)
+    engine.logger.setLevel('WARNING')
+    subscriber = _Consumer(engine.events.stream) if consumer else None
+    engine.start()
+    if wall is None:
+        engine.wait()
+    else:
+        time.sleep(wall)
+        engine.pause()
+    stats = engine.stats
+    engine.close()
+    if subscriber is not None:
+        subscriber.stop()
+    jitter = np.array([stats.jitter_mean, stats.jitter_p99, stats.jitter_max]) if speed is not None else None
+    return stats.position, jitter, stats.records_per_second
+
+
+def main():
+    times, records = _samples()
+    print(f"{len(records)} records of {records.dtype.itemsize} bytes, {SECONDS} s at {RATE:g} Hz")
+    print(f"{'':24s} {'replayed':>9s} {'late mean':>10s} {'p99':>9s} {'max':>9s} {'records/s':>11s}")
+
+    runs = [('per record, sleep', lambda: per_record(times, records)),
+            ('TelemetryReplay 1x', lambda: replay(times, records, 1.0, 2.0)),
+            ('TelemetryReplay 10x', lambda: replay(times, records, 10.0, 2.0)),
+            ('TelemetryReplay max', lambda: replay(times, records, None, None)),
+            ('  with subscriber', lambda: replay(times, records, None, None, consumer=True))]
+
+    for name, run in runs:
+        replayed, lateness, rate = run()
+        if lateness is None:
+            late = f"{'-':>10s} {'-':>9s} {'-':>9s}"
+        elif len(lateness) == 3:
+            late = f"{lateness[0] * 1e3:8.3f}ms {lateness[1] * 1e3:7.3f}ms {lateness[2] * 1e3:7.3f}ms"
+        else:
+            late = (f"{lateness.mean() * 1e3:8.3f}ms {np.percentile(lateness, 99) * 1e3:7.3f}ms "
+                    f"{lateness.max() * 1e3:7.3f}ms")
+        print(f"{name:24s} {replayed:8.2f}s {late} {rate:11.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: IKARUS UART receive path over a pty loopback.
+
+Compares the byte-wise reader the IKARUS Communication class used (read(1) until 0xAA, then the rest of the frame,
+one decode per frame, prints left out) with SerialLink. The stand-in writes the log stream as fast as the pty
+takes it; reported are the received frames per second and the CPU time of the receiving thread per frame.
+Requires pyserial and a POSIX system. Run from the Manager directory:
+
+    python -m benchmarks.bench_serial_link
+"""
+import threading
+import time
+
+import serial
+
+from applications.IKARUS.gui.applications.communication import IKARUS_FRAME, IKARUS_MSG_SAMPLE_UPDATE, LOG_DTYPE
+from applications.IKARUS.protocol.codec import IKARUS_PROTOCOL
+from core.communication.serial.loopback import PtyLoopback
+from core.communication.serial.serial_link import SerialLink
+
+N = 20000
+
+
+def _stream() -> bytes:
+    sample = IKARUS_PROTOCOL.messages[IKARUS_MSG_SAMPLE_UPDATE]
+    values = [0.0] * 16 + [0] * 4 + [0.0] * 3
+    frames = []
+    for i in range(N):
+        values[10] = i  # estimation.roll
+        frames.append(IKARUS_FRAME.encode(IKARUS_MSG_SAMPLE_UPDATE, sample.encode(*values)))
+    return b''.join(frames)
+
+
+def _write(loopback: PtyLoopback, data: bytes):
+    for start in range(0, len(data), 4096):
+        loopback.write(data[start:start + 4096])
+
+
+def bytewise(data: bytes) -> tuple[float, float]:
+    size = IKARUS_FRAME.frame_size
+    decode = IKARUS_PROTOCOL.messages[IKARUS_MSG_SAMPLE_UPDATE].decode
+    received = 0
+    cpu = 0.0
+
+    with PtyLoopback() as loopback:
+        port = serial.Serial(loopback.port, baudrate=921600, timeout=0.1)
+
+        def reader():
+            nonlocal received, cpu
+            start = time.thread_time()
+            while received < N:
+                byte = port.read(1)
+                if not byte:
+                    break
+                if byte[0] == 0xAA:
+                    buffer = bytearray(byte)
+                    while len(buffer) < size:
+                        chunk = port.read(size - len(buffer))
+                        if not chunk:
+                            break
+                        buffer.extend(chunk)
+                    if len(buffer) == size:
+                        decode(buffer[3:])
+                        received += 1
+            cpu = time.thread_time() - start
+
+        thread = threading.Thread(target=reader)
+        t0 = time.perf_counter()
+        thread.start()
+        _write(loopback, data)
+        thread.join()
+        elapsed = time.perf_counter() - t0
+        port.close()
+    return received / elapsed, cpu / max(received, 1)
+
+
+def serial_link(data: bytes) -> tuple[float, float]:
+    received = 0
+    cpu = 0.0
+    done = threading.Event()
+
+    def on_frames(batch):
+        nonlocal received, cpu
+        batch.payload(LOG_DTYPE, msg_type=IKARUS_MSG_SAMPLE_UPDATE)
+        received += len(batch)
+        cpu = time.thread_time()
+        if received >= N:
+            done.set()
+
+    with PtyLoopback() as loopback:
+        link = SerialLink(loopback.port, baudrate=921600, format=IKARUS_FRAME)
+        link.callbacks.frames.register(on_frames)
+        link.start()
+        t0 = time.perf_counter()
+        _write(loopback, data)
+        done.wait(10)
+        elapsed = time.perf_counter() - t0
+        stats = link.stats
+        link.close()
+    assert stats.crc_errors == 0 and stats.resyncs == 0
+    return received / elapsed, cpu / max(received, 1)
+
+
+def main():
+    data = _stream()
+    print(f"{'':20s} {'frames/s':>12s} {'cpu/frame':>12s}")
+    for name, run in (('byte-wise read(1)', bytewise), ('SerialLink', serial_link)):
+        rate, cpu = run(data)
+        print(f"{name:20s} {rate:12.0f} {cpu * 1e6:10.2f}us")
+
+
+if __name__ == '__main__':
+    main()
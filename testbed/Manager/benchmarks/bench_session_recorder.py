@@ -0,0 +1,115 @@
+"""
+Benchmark: recording IKARUS samples (84 byte log records) at high rate.
+
+A device stream event delivers the samples in batches of 50 records, 10,000 records in total. Compared are:
+
+    CSVLogger        write_data() of the samples as nested dicts in the producer thread (the current way to keep
+                     samples), 1,000 records only
+    SessionRecorder  Event.set() of the batch with the recorder attached, per compression
+
+Reported are the producer time per record, the time until all records are on disk (per record), the file size per
+record and the time to read one second out of the middle of the recording. Run from the Manager directory:
+
+    python -m benchmarks.bench_session_recorder
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from applications.IKARUS.protocol.codec import IKARUS_PROTOCOL
+from core.communication.binary_stream import StreamBatch
+from core.utils.csv_utils import CSVLogger
+from core.utils.events import Event
+from core.utils.session_recorder import SessionRecorder, SessionReader, COMPRESSION, _compressor
+
+RECORDS = 10000
+BATCH = 50
+RATE = 5000.0  # Records per second, for the recorded time stamps
+
+
+def _batches() -> list[StreamBatch]:
+    dtype = IKARUS_PROTOCOL.dtype('ikarus_log_data_t')
+    rng = np.random.default_rng(1)
+    t0 = time.time()
+    batches = []
+    for start in range(0, RECORDS, BATCH):
+        records = np.zeros(BATCH, dtype=dtype)
+        records['estimation']['roll'] = np.sin(np.arange(start, start + BATCH) / 500)
+        records['sensors']['acc']['z'] = 9.81 + rng.normal(0, 0.01, BATCH)
+        records['control_outputs']['thrust1'] = 1200
+        batches.append(StreamBatch(stream='log', records=records, time=t0 + start / RATE))
+    return batches
+
+
+def _to_dict(record) -> dict:
+    def convert(value, dtype):
+        if dtype.names:
+            return {name: convert(value[name], dtype.fields[name][0]) for name in dtype.names}
+        return value.item()
+    return convert(record, record.dtype)
+
+
+def csv_logger(batches, directory) -> tuple[float, float, float, float | None]:
+    n = 1000
+    rows = [_to_dict(record) for batch in batches[:n // BATCH] for record in batch.records]
+    logger = CSVLogger()
+    logger.make_file('samples.csv', directory)
+    start = time.perf_counter()
+    for row in rows:
+        logger.write_data(row)
+    produced = time.perf_counter() - start
+    logger.close()
+    total = time.perf_counter() - start
+    return produced / n, total / n, os.path.getsize(os.path.join(directory, 'samples.csv')) / n, None
+
+
+def session_recorder(batches, directory, compression) -> tuple[float, float, float, float]:
+    file = os.path.join(directory, f"session_{compression}.bsrec")
+    event = Event(id=f"bench_stream_{compression}", copy_on_read=True)
+    recorder = SessionRecorder(file, compression=compression)
+    recorder.logger.setLevel('WARNING')
+    recorder.start()
+    recorder.recordEvents(event)
+
+    start = time.perf_counter()
+    for batch in batches:
+        event.set(batch)
+    produced = time.perf_counter() - start
+    recorder.close()
+    total = time.perf_counter() - start
+
+    with SessionReader(file) as reader:
+        channel = next(iter(reader.channels))
+        first, last = reader.time_range(channel)
+        middle = (first + last) / 2
+        start = time.perf_counter()
+        data = reader.read(channel, middle - 0.5, middle + 0.5)
+        seek = time.perf_counter() - start
+        assert len(data) and reader.read(channel).values.shape == (RECORDS,)
+    return produced / RECORDS, total / RECORDS, os.path.getsize(file) / RECORDS, seek
+
+
+def main():
+    batches = _batches()
+    print(f"{RECORDS} records of {batches[0].records.dtype.itemsize} bytes in batches of {BATCH}")
+    print(f"{'':24s} {'producer':>10s} {'on disk':>10s} {'bytes/rec':>10s} {'read 1 s':>10s}")
+    with tempfile.TemporaryDirectory() as directory:
+        runs = [('CSVLogger', lambda: csv_logger(batches, directory))]
+        for compression in COMPRESSION:
+            try:
+                _compressor(compression)
+            except ValueError:
+                continue  # Compression package not installed
+            runs.append((f"SessionRecorder {compression}",
+                         lambda c=compression: session_recorder(batches, directory, c)))
+
+        for name, run in runs:
+            produced, total, size, seek = run()
+            seek = f"{seek * 1e3:8.2f}ms" if seek is not None else f"{'-':>10s}"
+            print(f"{name:24s} {produced * 1e6:8.2f}us {total * 1e6:8.2f}us {size:10.1f} {seek}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: encode/decode throughput of the UDP base protocol, in messages per second.
+
+Compares the list based codec UDP_Base_Protocol used before with the struct/memoryview codec. Both encoding and
+decoding now include the CRC8, which the old codec did not compute. Run from the Manager directory:
+
+    python -m benchmarks.bench_udp_protocol
+"""
+import os
+import time
+import timeit
+
+import orjson
+
+from core.communication.wifi.udp.protocols.udp_base_protocol import UDP_Base_Protocol, UDP_Base_Message
+from core.utils.network.network import ipv4_to_bytes
+
+N = 20000
+P = UDP_Base_Protocol
+
+
+def encode_legacy(msg: UDP_Base_Message) -> bytes:
+    buffer = [0] * (len(msg.data) + P.protocol_overhead)
+    buffer[0] = P.header_0
+    buffer[1] = P.header_1
+    buffer[P.idx_src] = ipv4_to_bytes(msg.source)
+    buffer[P.idx_add] = ipv4_to_bytes(msg.address)
+    buffer[P.idx_protocol] = msg.data_protocol_id
+    buffer[P.idx_len] = len(msg.data).to_bytes(length=2, byteorder="little")
+    buffer[P.idx_payload: P.idx_payload + len(msg.data)] = msg.data
+    buffer[P.offset_crc + len(msg.data)] = 0x00
+    buffer[P.offset_footer + len(msg.data)] = P.footer
+    return bytes(buffer)
+
+
+def decode_legacy(data: bytes) -> UDP_Base_Message:
+    if data[0] != P.header_0 or data[1] != P.header_1:
+        return None
+    payload_len = int.from_bytes(data[P.idx_len], byteorder="little")
+    if len(data) != payload_len + P.protocol_overhead or data[payload_len + P.offset_footer] != P.footer:
+        return None
+    msg = UDP_Base_Message()
+    msg.data_protocol_id = data[P.idx_protocol]
+    msg.src = data[P.idx_src]
+    msg.add = list(data[P.idx_add])
+    msg.data = data[P.idx_payload:P.idx_payload + payload_len]
+    return msg
+
+
+def _message(payload: bytes) -> UDP_Base_Message:
+    msg = UDP_Base_Message()
+    msg.source = '192.168.0.10'
+    msg.address = '255.255.255.255'
+    msg.data_protocol_id = 2
+    msg.data = payload
+    return msg
+
+
+def _rate(fn, n: int = N) -> float:
+    return n / min(timeit.repeat(fn, number=n, repeat=3))
+
+
+def main():
+    discovery = orjson.dumps({'type': 'broadcast', 'event': None, 'address': '', 'source': '192.168.0.10',
+                              'data': {'address': '192.168.0.10', 'port': 8080},
+                              'meta': {'time': time.time(), 'id': 1, 'source': '192.168.0.10',
+                                       'address': '255.255.255.255', 'port': 37020}})
+    buffer = bytearray(P.max_payload + P.protocol_overhead)
+
+    print(f"{'':32s} {'before':>12s} {'after':>12s}")
+    for name, payload in [('32 B payload', bytes(range(32))), (f'discovery ({len(discovery)} B)', discovery),
+                          ('1 KB payload', os.urandom(1024))]:
+        msg = _message(payload)
+        frame = bytes(P.encode(msg))
+        assert decode_legacy(frame).data == P.decode(frame).data
+        assert encode_legacy(msg)[:-2] == frame[:-2]  # Identical up to the CRC
+
+        rows = [
+            ('encode', lambda: encode_legacy(msg), lambda: P.encode_into(msg, buffer)),
+            ('decode', lambda: decode_legacy(frame), lambda: P.decode(frame)),
+        ]
+        for operation, before, after in rows:
+            r_before = _rate(before)
+            r_after = _rate(after)
+            print(f"{operation + ' ' + name:32s} {r_before / 1e3:8.0f}k/s {r_after / 1e3:8.0f}k/s  x{r_after / r_before:.1f}")
+
+
+if __name__ == '__main__':
+    main()
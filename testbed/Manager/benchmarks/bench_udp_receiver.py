@@ -0,0 +1,102 @@
+"""
+Benchmark: idle CPU use and receive latency of the UDP receive path.
+
+Compares the former per-socket receive thread (non-blocking recvfrom + 1 ms sleep) with UDP_Receiver, which
+serves all sockets from one selector thread. Latency is measured from the kernel receive timestamp to the rx
+callback (Linux). Run from the Manager directory:
+
+    python -m benchmarks.bench_udp_receiver
+"""
+import socket
+import threading
+import time
+
+from core.communication.wifi.udp.udp_socket import UDP_Receiver, UDP_Socket
+
+PORTS = [47001, 47002, 47003, 47004]
+IDLE_TIME = 2.0
+N = 2000
+
+
+def poll_loop(sockets: list[socket.socket], stop: threading.Event, on_rx):
+    # The receive loop UDP_Socket used before, one thread per socket
+    def run(sock):
+        while not stop.is_set():
+            try:
+                data, address = sock.recvfrom(1028)
+                on_rx(data)
+            except BlockingIOError:
+                pass
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=run, args=(sock,), daemon=True) for sock in sockets]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def measure(name: str, start, stop):
+    received = []
+    latencies = []
+
+    def on_rx(data, *args):
+        latencies.append(time.perf_counter() - float(data))
+        received.append(data)
+
+    start(on_rx)
+    cpu_start = time.process_time()
+    time.sleep(IDLE_TIME)
+    idle_cpu = (time.process_time() - cpu_start) / IDLE_TIME * 100
+
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for i in range(N):
+        sender.sendto(repr(time.perf_counter()).encode(), ('127.0.0.1', PORTS[i % len(PORTS)]))
+        time.sleep(0.0002)
+    time.sleep(0.2)
+    stop()
+
+    latencies.sort()
+    print(f"{name:34s} idle CPU {idle_cpu:6.2f}%   received {len(received):5d}/{N}   "
+          f"latency p50 {latencies[len(latencies) // 2] * 1e6:7.1f}us  p99 {latencies[int(len(latencies) * 0.99)] * 1e6:7.1f}us")
+
+
+def main():
+    # Before
+    stop_event = threading.Event()
+    raw = []
+    for port in PORTS:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', port))
+        sock.setblocking(False)
+        raw.append(sock)
+
+    def stop_before():
+        stop_event.set()
+        time.sleep(0.01)
+        for sock in raw:
+            sock.close()
+
+    measure(f'poll threads ({len(PORTS)} sockets)', lambda on_rx: poll_loop(raw, stop_event, on_rx), stop_before)
+
+    # After
+    receiver = UDP_Receiver(measure_latency=True)
+    sockets = [UDP_Socket('127.0.0.1', port, receiver=receiver) for port in PORTS]
+
+    def start_after(on_rx):
+        for udp_socket in sockets:
+            udp_socket.callbacks.rx.register(on_rx)
+            udp_socket.start()
+
+    def stop_after():
+        for udp_socket in sockets:
+            udp_socket.close()
+        receiver.stop()
+
+    measure(f'UDP_Receiver ({len(PORTS)} sockets)', start_after, stop_after)
+    stats = receiver.stats()
+    print(f"{'':34s} wakeups {stats.wakeups}, max batch {stats.max_batch}, receiver CPU {stats.cpu_time * 1e3:.1f}ms, "
+          f"kernel->callback mean {stats.latency_mean * 1e6:.1f}us max {stats.latency_max * 1e6:.1f}us")
+
+
+if __name__ == '__main__':
+    main()
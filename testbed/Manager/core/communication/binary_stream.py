@@ -0,0 +1,105 @@
+import dataclasses
+import struct
+import time
+
+import numpy as np
+
+# ======================================================================================================================
+# Binary stream frames
+#
+#   | stream id (u8) | flags (u8) | record count (u16) | record count * itemsize bytes of packed records |
+#
+# All fields are little endian. The record layout of every stream is announced by the device in its handshake as
+#   "streams": {"<name>": {"id": <u8>, "fields": [["<field>", "<numpy dtype>", (<shape>)], ...]}, ...}
+# and decoded into NumPy structured arrays that reference the received frame without copying.
+# ======================================================================================================================
+STREAM_FRAME_HEADER = struct.Struct('<BBH')
+
+
+# === SCHEMA ===========================================================================================================
+@dataclasses.dataclass(frozen=True)
+class StreamSchema:
+    id: int
+    name: str
+    dtype: np.dtype
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def from_description(cls, name: str, description: dict) -> 'StreamSchema':
+        fields = []
+        for field in description['fields']:
+            if len(field) == 3:
+                fields.append((field[0], np.dtype(field[1]).newbyteorder('<'), tuple(field[2])))
+            else:
+                fields.append((field[0], np.dtype(field[1]).newbyteorder('<')))
+        return cls(id=int(description['id']), name=name, dtype=np.dtype(fields))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def encode(self, records: np.ndarray, flags: int = 0) -> bytes:
+        records = np.ascontiguousarray(records, dtype=self.dtype)
+        return STREAM_FRAME_HEADER.pack(self.id, flags, len(records)) + records.tobytes()
+
+
+# === BATCH ============================================================================================================
+@dataclasses.dataclass(frozen=True)
+class StreamBatch:
+    stream: str
+    records: np.ndarray
+    time: float
+    flags: int = 0
+
+    def __len__(self):
+        return len(self.records)
+
+
+# === DECODER ==========================================================================================================
+class StreamDecodeError(Exception):
+    ...
+
+
+class BinaryStreamDecoder:
+    schemas: dict[int, StreamSchema]
+
+    # === INIT =========================================================================================================
+    def __init__(self, schemas: list[StreamSchema] = None):
+        self.schemas = {}
+        for schema in schemas or []:
+            self.add(schema)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def from_handshake(cls, streams: dict | None) -> 'BinaryStreamDecoder | None':
+        """
+        Decoder for the "streams" entry of a device handshake. Raises ValueError if the entry is malformed.
+        """
+        if not streams:
+            return None
+        try:
+            schemas = [StreamSchema.from_description(name, description) for name, description in streams.items()]
+        except (AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Malformed stream description: {e!r}") from e
+        return cls(schemas)
+
+    # === METHODS ======================================================================================================
+    def add(self, schema: StreamSchema):
+        if schema.id in self.schemas:
+            raise ValueError(f"Stream id {schema.id} is already used by \"{self.schemas[schema.id].name}\"")
+        self.schemas[schema.id] = schema
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def decode(self, frame: bytes | bytearray | memoryview) -> StreamBatch:
+        if len(frame) < STREAM_FRAME_HEADER.size:
+            raise StreamDecodeError(f"Frame too short ({len(frame)} bytes)")
+
+        stream_id, flags, count = STREAM_FRAME_HEADER.unpack_from(frame, 0)
+        schema = self.schemas.get(stream_id)
+        if schema is None:
+            raise StreamDecodeError(f"Unknown stream id {stream_id}")
+
+        expected = STREAM_FRAME_HEADER.size + count * schema.dtype.itemsize
+        if len(frame) != expected:
+            raise StreamDecodeError(f"Stream \"{schema.name}\": expected {expected} bytes, got {len(frame)}")
+
+        # Zero-copy view into the frame. Read-only when the frame is bytes, so batches can be shared between listeners
+        records = np.frombuffer(frame, dtype=schema.dtype, count=count, offset=STREAM_FRAME_HEADER.size)
+        return StreamBatch(stream=schema.name, records=records, time=time.time(), flags=flags)
@@ -3,17 +3,21 @@ import dataclasses
 import queue
 import threading
 import time
-from typing import Any
+from concurrent.futures import Future, CancelledError
+from typing import Any, Hashable
 
+from core.communication.binary_stream import BinaryStreamDecoder, StreamDecodeError
 from core.communication.protocol import JSON_Message
 from core.communication.wifi.udp.protocols.udp_json_protocol import UDP_JSON_Message
 from core.communication.wifi.udp.udp import UDP_Broadcast, UDP
 from core.archive.settings import UDP_PORT_ADDRESS_STREAM, WS_SERVER_PORT
 from core.utils.callbacks import callback_definition, CallbackContainer
-from core.utils.dataclass_utils import asdict_optimized, from_dict
+from core.utils.dataclass_utils import asdict_optimized, decode_dataclass, from_dict, register_codecs
+from core.utils.dict_utils import unflatten_dict_baseline
 from core.utils.events import event_definition, Event, EventFlag
 from core.utils.exit import register_exit_callback
 from core.utils.logging_utils import Logger
+from core.utils.time import TimerWheel, TimerHandle, get_timer_wheel
 from core.utils.websockets import WebsocketServer, WebsocketServerClient
 
 # ======================================================================================================================
@@ -21,12 +25,126 @@ DEBUG = False
 
 
 # === REQUESTS =========================================================================================================
-class Request:
-    event: Event
-    id: int
+class PendingRequests:
+    """
+    Correlation table for in-flight requests of one device.
+
+    Every request gets a concurrent.futures.Future keyed by its (monotonic) message id. Responses resolve the future
+    from the message thread, timeouts are armed on a shared TimerWheel and fail the future with TimeoutError.
+    Cancelling a future removes it from the table and disarms its timeout. Any number of requests can be in flight
+    at the same time; use asyncio.wrap_future() to await them from a coroutine.
+    """
+    _pending: dict[int, tuple[Future, TimerHandle | None]]
+
+    def __init__(self, timer_wheel: TimerWheel = None):
+        self._timer_wheel = timer_wheel if timer_wheel is not None else get_timer_wheel()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add(self, request_id: int, timeout: float | None) -> Future:
+        future = Future()
+        handle = self._timer_wheel.schedule(timeout, self._expire, request_id) if timeout is not None else None
+        with self._lock:
+            self._pending[request_id] = (future, handle)
+        future.add_done_callback(lambda f: self._discard(request_id))
+        return future
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def resolve(self, request_id: int, data: Any) -> bool:
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+        if entry is None:
+            return False
+        future, handle = entry
+        if handle is not None:
+            handle.cancel()
+        if future.set_running_or_notify_cancel():
+            future.set_result(data)
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def fail_all(self, exception: BaseException):
+        with self._lock:
+            entries = list(self._pending.values())
+            self._pending.clear()
+        for future, handle in entries:
+            if handle is not None:
+                handle.cancel()
+            if future.set_running_or_notify_cancel():
+                future.set_exception(exception)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, request_id: int):
+        return request_id in self._pending
+
+    # === PRIVATE METHODS ==============================================================================================
+    def _expire(self, request_id: int):
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+        if entry is None:
+            return
+        future, _ = entry
+        if future.set_running_or_notify_cancel():
+            future.set_exception(TimeoutError(f"Request {request_id} timed out"))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _discard(self, request_id: int):
+        # Runs when a future completes in any way. Only cancellation leaves an entry behind
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+        if entry is not None and entry[1] is not None:
+            entry[1].cancel()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def gather(futures: dict[Hashable, Future], timeout: float = None) -> dict[Hashable, Any]:
+    """
+    Wait for a set of request futures and collect their results by key.
+
+    Failed, timed out or cancelled requests are returned as their exception instead of raising, so one
+    unresponsive device does not hide the answers of the others.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    results = {}
+    for key, future in futures.items():
+        remaining = max(deadline - time.monotonic(), 0.0) if deadline is not None else None
+        try:
+            results[key] = future.result(timeout=remaining)
+        except CancelledError as e:
+            results[key] = e
+        except Exception as e:
+            results[key] = e
+    return results
 
-    def __init__(self):
-        self.event = Event()
+
+# ----------------------------------------------------------------------------------------------------------------------
+def _lookup_path(data: dict, path: str, sep: str = '/'):
+    # Devices may answer with flat path keys or with the nested structure
+    if path in data:
+        return data[path]
+    for key in path.split(sep):
+        data = data[key]
+    return data
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def _per_path_results(values: dict[str, Any], data: dict) -> dict[str, bool]:
+    results = data.get('results')
+    if not isinstance(results, dict):
+        success = bool(data.get('success', False))
+        return {path: success for path in values}
+
+    per_path = {}
+    for path in values:
+        try:
+            per_path[path] = bool(_lookup_path(results, path))
+        except (KeyError, TypeError):
+            per_path[path] = False
+    return per_path
 
 
 # === DEVICE ===========================================================================================================
@@ -38,6 +156,11 @@ class DeviceInformation:
     device_id: str = ''
     address: str = ''
     revision: int = 0
+    # Record layouts of binary streams, announced by devices that support them (see core.communication.binary_stream)
+    streams: dict = dataclasses.field(default_factory=dict)
+
+
+register_codecs(DeviceInformation)
 
 
 # --- CALLBACKS ---
@@ -54,9 +177,11 @@ class DeviceCallbacks:
 # --- EVENTS ---
 @event_definition
 class DeviceEvents:
-    rx: Event
-    stream: Event
-    event: Event = Event(flags=EventFlag('event', str))
+    # Inbound messages are built fresh per message and never mutated, so they are shared instead of copied per set
+    rx: Event = Event(copy_on_read=True)
+    # JSON_Message for JSON streams, StreamBatch (a block of records) for binary streams
+    stream: Event = Event(copy_on_read=True)
+    event: Event = Event(flags=EventFlag('event', str), copy_on_read=True)
     timeout: Event
 
 
@@ -66,30 +191,43 @@ class Device:
 
     message_thread: threading.Thread
 
-    _readRequests: dict[int, Request]
+    pending: PendingRequests
+    stream_decoder: BinaryStreamDecoder | None
 
     _exit: bool = False
 
     # === INIT =========================================================================================================
-    def __init__(self, client: WebsocketServerClient, information: DeviceInformation):
+    def __init__(self, client: WebsocketServerClient, information: DeviceInformation,
+                 stream_decoder: BinaryStreamDecoder | None = None):
+        """
+        `stream_decoder` decodes the binary streams announced in the handshake, see
+        BinaryStreamDecoder.from_handshake(). Without one, the device's streams are only received as JSON.
+        """
         self.client = client
-
-        self.client.callbacks.disconnected.register(self._clientDisconnectedCallback)
-
         self.information = information
 
         self.callbacks = DeviceCallbacks()
         self.events = DeviceEvents()
 
-        self._readRequests = {}
+        self.pending = PendingRequests()
 
         self.logger = Logger(f"Device {self.information.device_id}")
 
+        self.stream_decoder = stream_decoder
+
+        self.client.callbacks.disconnected.register(self._clientDisconnectedCallback)
+        if self.stream_decoder is not None:
+            self.client.callbacks.binary.register(self._binaryMessageCallback)
+
         self.message_thread = threading.Thread(target=self._messageTask, daemon=True)
         self.message_thread.start()
 
         self._sendSyncMessage()
 
+        # Devices that announced stream schemas keep sending JSON streams until the server accepts binary mode
+        if self.stream_decoder is not None:
+            self.sendEvent('stream_mode', {'mode': 'binary'})
+
     # === PROPERTIES ===================================================================================================
     @property
     def address(self):
@@ -101,73 +239,92 @@ class Device:
 
     # ------------------------------------------------------------------------------------------------------------------
     def writeValue(self, value_name, value, request_response: bool = False, timeout: float = 0.1):
-        message = JSON_Message()
-        message.type = 'write'
-        message.address = ''
-        message.source = ''
+        message = self._buildWriteMessage(value_name, value)
         message.request_response = request_response
 
-        if isinstance(value_name, str):
-            params = value_name.split('/')
-
-            if len(params) == 1:
-                message.data = {
-                    value_name: value
-                }
-            elif len(params) == 2:
-                message.data = {
-                    params[0]: {
-                        params[1]: value
-                    }
-                }
-            else:
-                raise Exception("Levels >1 are not allowed for parameters")
+        if not request_response:
+            self._send(message=message)
+            return True
 
-        elif isinstance(value_name, dict):
-            message.data = value_name
+        try:
+            data = self.request(message, timeout=timeout).result()
+        except TimeoutError:
+            return Exception("Timeout")
+        return data['success']
 
-        request = None
-        if request_response:
-            request = self._addRequest(message_id=message.id)
+    # ------------------------------------------------------------------------------------------------------------------
+    def readValue(self, value_name, timeout: float = 0.1):
+        data = self.requestValue(value_name, timeout=timeout).result()
+        if data['success']:
+            return data['output']
+        else:
+            raise Exception(f"Cannot read value {value_name}")
 
-        self._send(message=message)
+    # ------------------------------------------------------------------------------------------------------------------
+    def writeValues(self, values: dict[str, Any], request_response: bool = True,
+                    timeout: float = 0.1) -> dict[str, bool | Exception]:
+        """
+        Write several parameters in one message.
+
+        `values` maps '/'-separated parameter paths of any depth to their new value, e.g.
+        {'control/gains/k1': 1.0, 'control/gains/k2': 0.5}. Returns the result per path. The device may answer
+        with a 'results' dict keyed by path; otherwise its overall 'success' applies to every path.
+        """
+        if not request_response:
+            self._send(message=self._buildWriteMessage(values, None))
+            return {path: True for path in values}
 
-        if request_response and request is not None:
-            if request.event.wait(timeout=timeout):
-                self._readRequests.pop(request.id)
-                data = request.event.get_data()
-                success = data['success']
-                return success
-            else:
-                self._readRequests.pop(request.id)
-                return Exception("Timeout")
-        else:
-            return True
+        try:
+            data = self.requestWriteValues(values, timeout=timeout).result()
+        except TimeoutError as e:
+            return {path: e for path in values}
+        return _per_path_results(values, data)
 
     # ------------------------------------------------------------------------------------------------------------------
-    def readValue(self, value_name, timeout: float = 0.1):
+    def requestWriteValues(self, values: dict[str, Any], timeout: float = 0.1) -> Future:
+        """
+        Send the write of writeValues() and return the Future of the device's response.
+        """
+        return self.request(self._buildWriteMessage(values, None), timeout=timeout)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def readValues(self, value_names: list[str], timeout: float = 0.1) -> dict[str, Any]:
+        """
+        Read several parameters in one round-trip. Returns the value per path, or an Exception for paths the
+        device could not read.
+        """
         message = JSON_Message()
         message.type = 'read'
         message.address = ''
         message.source = ''
-        message.request_response = True
         message.data = {
-            'value_name': value_name
+            'value_names': list(value_names)
         }
 
-        request = self._addRequest(message_id=message.id)
-        self._send(message=message)
-        if request.event.wait(timeout=timeout):
-            self._readRequests.pop(request.id)
-            data = request.event.get_data()
-            success = data['success']
-            if success:
-                return data['output']
-            else:
-                raise Exception(f"Cannot read value {value_name}")
-        else:
-            self._readRequests.pop(request.id)
-            raise TimeoutError
+        try:
+            data = self.request(message, timeout=timeout).result()
+        except TimeoutError as e:
+            return {name: e for name in value_names}
+
+        output = data.get('output') or {}
+        results = {}
+        for name in value_names:
+            try:
+                results[name] = _lookup_path(output, name)
+            except (KeyError, TypeError):
+                results[name] = Exception(f"Cannot read value {name}")
+        return results
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def requestValue(self, value_name, timeout: float = 0.1) -> Future:
+        message = JSON_Message()
+        message.type = 'read'
+        message.address = ''
+        message.source = ''
+        message.data = {
+            'value_name': value_name
+        }
+        return self.request(message, timeout=timeout)
 
     # ------------------------------------------------------------------------------------------------------------------
     def executeFunction(self,
@@ -177,52 +334,36 @@ class Device:
                         request_response: bool = False,
                         timeout: float = 1):
 
-        message = JSON_Message()
-        message.type = 'function'
-        message.address = ''
-        message.source = ''
-        message.request_response = request_response
-
-        message.data = {
-            'function_name': function_name,
-            'arguments': arguments
-        }
+        if not request_response:
+            self._send(message=self._buildFunctionMessage(function_name, arguments))
+            return True
 
         if DEBUG:
             response_timer = time.perf_counter()
 
-        if request_response:
-            request = self._addRequest(message_id=message.id)
-            message.request_id = request.id
-        else:
-            request = None
+        future = self.requestFunction(function_name, arguments, timeout=timeout)
+        try:
+            data = future.result()
+        except TimeoutError:
+            self.logger.error(f"Timeout for function request \"{function_name}\"")
+            raise
 
-        self._send(message=message)
+        if DEBUG:
+            response_time = (time.perf_counter() - response_timer) * 1000  # noqa
+            self.logger.debug(f"Got response for function \"{function_name}\"! Response time: {response_time:.0f} ms")
 
-        if request is not None:
-            if request.event.wait(timeout=timeout, stale_event_time=0.1):
-                if DEBUG:
-                    response_time = (time.perf_counter() - response_timer) * 1000  # noqa
-                    self.logger.debug(
-                        f"Got response for function \"{function_name}\"! Response time: {response_time:.0f} ms")
-
-                data = request.event.get_data()
-                success = data.get('success', None)
-                self._readRequests.pop(request.id)
-
-                if return_type is None:
-                    return success
-                else:
-                    if success:
-                        return data['output']
-                    else:
-                        return None
-            else:
-                self._readRequests.pop(request.id)
-                self.logger.error(f"Timeout for function request \"{function_name}\" ({request.id})")
-                raise TimeoutError
+        success = data.get('success', None)
+        if return_type is None:
+            return success
         else:
-            return True
+            if success:
+                return data['output']
+            else:
+                return None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def requestFunction(self, function_name, arguments, timeout: float = 1) -> Future:
+        return self.request(self._buildFunctionMessage(function_name, arguments), timeout=timeout)
 
     # ------------------------------------------------------------------------------------------------------------------
     def sendEvent(self, event: str, data: Any, request_response: bool = False, timeout: float = 1) -> bool:
@@ -230,25 +371,29 @@ class Device:
         message.type = 'event'
         message.address = ''
         message.source = ''
-        message.request_response = request_response
         message.event = event
 
         message.data = data
 
-        request = None
         if request_response:
-            request = self._addRequest(message_id=message.id)
+            self.request(message, timeout=timeout).result()
+        else:
+            self._send(message=message)
+        return True
 
-        self._send(message=message)
+    # ------------------------------------------------------------------------------------------------------------------
+    def request(self, message: JSON_Message, timeout: float | None = 1) -> Future:
+        """
+        Send a message that expects a response and return a future for the response data.
 
-        if request is not None:
-            if request.event.wait(timeout=timeout, stale_event_time=0.1):
-                self._readRequests.pop(request.id)
-                return True
-            else:
-                self._readRequests.pop(request.id)
-                raise TimeoutError
-        return True
+        The future fails with TimeoutError after `timeout` seconds and with ConnectionError if the device
+        disconnects. Several requests can be pipelined without waiting for each other.
+        """
+        message.request_response = True
+        message.request_id = message.id
+        future = self.pending.add(message.id, timeout)
+        self._send(message=message)
+        return future
 
     # === PRIVATE METHODS ==============================================================================================
     def _messageTask(self):
@@ -268,7 +413,7 @@ class Device:
     def _rxMessageCallback(self, message: dict, *args, **kwargs) -> None:
 
         # Parse into a TCP JSON Message
-        tcp_message = from_dict(JSON_Message, message)
+        tcp_message = decode_dataclass(JSON_Message, message)
 
         match tcp_message.type:
             case 'response':
@@ -284,12 +429,20 @@ class Device:
         self.callbacks.rx.call(tcp_message)
         self.events.rx.set(data=tcp_message)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def _binaryMessageCallback(self, data: bytes, *args, **kwargs) -> None:
+        try:
+            batch = self.stream_decoder.decode(data)
+        except StreamDecodeError as e:
+            self.logger.warning(f"Dropping binary frame: {e}")
+            return
+
+        self.callbacks.stream.call(batch)
+        self.events.stream.set(data=batch)
+
     # ------------------------------------------------------------------------------------------------------------------
     def _handleResponseMessage(self, message: JSON_Message):
-        if message.request_id in self._readRequests:
-            read_request = self._readRequests[message.request_id]
-            read_request.event.set(data=message.data)
-        else:
+        if not self.pending.resolve(message.request_id, message.data):
             self.logger.warning(f"Got a response for an unknown request: {message.request_id}")
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -303,11 +456,30 @@ class Device:
         self.events.stream.set(data=message)
 
     # ------------------------------------------------------------------------------------------------------------------
-    def _addRequest(self, message_id) -> Request:
-        read_request = Request()
-        read_request.id = message_id
-        self._readRequests[read_request.id] = read_request
-        return read_request
+    def _buildWriteMessage(self, value_name, value) -> JSON_Message:
+        message = JSON_Message()
+        message.type = 'write'
+        message.address = ''
+        message.source = ''
+
+        if isinstance(value_name, str):
+            message.data = unflatten_dict_baseline({value_name: value}, sep='/')
+        elif isinstance(value_name, dict):
+            message.data = unflatten_dict_baseline(value_name, sep='/')
+
+        return message
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _buildFunctionMessage(self, function_name, arguments) -> JSON_Message:
+        message = JSON_Message()
+        message.type = 'function'
+        message.address = ''
+        message.source = ''
+        message.data = {
+            'function_name': function_name,
+            'arguments': arguments
+        }
+        return message
 
     # ------------------------------------------------------------------------------------------------------------------
     def _sendSyncMessage(self):
@@ -315,6 +487,7 @@ class Device:
 
     # ------------------------------------------------------------------------------------------------------------------
     def _clientDisconnectedCallback(self):
+        self.pending.fail_all(ConnectionError(f"Device {self.information.device_id} disconnected"))
         self.callbacks.disconnected.call(self)
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -347,7 +520,7 @@ class DeviceServer:
     devices: dict[str, Device]
 
     # === INIT =========================================================================================================
-    def __init__(self, host, port=WS_SERVER_PORT, udp_port=UDP_PORT_ADDRESS_STREAM):
+    def __init__(self, host, port=WS_SERVER_PORT, udp_port=UDP_PORT_ADDRESS_STREAM, websocket_backend: str = 'threaded'):
         self.host = host
         self.port = port
         self.udp_port = udp_port
@@ -360,7 +533,7 @@ class DeviceServer:
         self._setupUdpBroadcast()
 
         # Create the WebSocket Server
-        self.websocket_server = WebsocketServer(host, port)
+        self.websocket_server = WebsocketServer(host, port, backend=websocket_backend)
         self.websocket_server.callbacks.new_client.register(self._clientConnectedCallback)
         self.websocket_server.callbacks.client_disconnected.register(self._clientDisconnectedCallback)
 
@@ -386,6 +559,50 @@ class DeviceServer:
         self.websocket_server.start()
         pass
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def gather(self, function_name, arguments, devices: list[str] = None, timeout: float = 1) -> dict[str, Any]:
+        """
+        Execute a function on several devices in parallel and collect the response data per device id.
+
+        All requests are sent before the first response is awaited, so the total time is bounded by the slowest
+        device instead of the sum. Devices that fail or time out map to the exception.
+        """
+        device_ids = list(self.devices.keys()) if devices is None else devices
+        futures = {}
+        for device_id in device_ids:
+            device = self.devices.get(device_id)
+            if device is None:
+                futures[device_id] = Future()
+                futures[device_id].set_exception(KeyError(f"Unknown device {device_id}"))
+                continue
+            futures[device_id] = device.requestFunction(function_name, arguments, timeout=timeout)
+        return gather(futures)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def broadcastWrite(self, values: dict[str, Any], devices: list[str] = None,
+                       timeout: float = 0.1) -> dict[str, dict[str, bool | Exception]]:
+        """
+        Apply the same parameter set to several devices (all connected ones by default) at once and return the
+        per-path results per device id.
+        """
+        device_ids = list(self.devices.keys()) if devices is None else devices
+        futures = {}
+        for device_id in device_ids:
+            device = self.devices.get(device_id)
+            if device is not None:
+                futures[device_id] = device.requestWriteValues(values, timeout=timeout)
+
+        results = {}
+        for device_id, data in gather(futures).items():
+            if isinstance(data, Exception):
+                results[device_id] = {path: data for path in values}
+            else:
+                results[device_id] = _per_path_results(values, data)
+        for device_id in device_ids:
+            if device_id not in results:
+                results[device_id] = {path: KeyError(f"Unknown device {device_id}") for path in values}
+        return results
+
     # ------------------------------------------------------------------------------------------------------------------
     def close(self):
         self.logger.info("Closing Device Server")
@@ -427,14 +644,16 @@ class DeviceServer:
     # ------------------------------------------------------------------------------------------------------------------
     def _clientMessageCallback(self, message: dict, client: WebsocketServerClient):
         try:
-            tcp_message = from_dict(JSON_Message, message)
+            tcp_message = decode_dataclass(JSON_Message, message)
         except Exception as e:
             self.logger.error(f"Error parsing message: {e}")
             return
 
         if tcp_message.type == 'event' and tcp_message.event == 'handshake':
+            # Handshakes are rare and untrusted: parse with type checks, unlike the hot JSON_Message path
             try:
                 device_information = from_dict(DeviceInformation, tcp_message.data)
+                stream_decoder = BinaryStreamDecoder.from_handshake(device_information.streams)
             except Exception as e:
                 self.logger.error(f"Error in device handshake: {e}")
                 return
@@ -444,7 +663,7 @@ class DeviceServer:
                 self.logger.warning(f"Device with ID {device_information.device_id} already registered")
                 return
 
-            new_device = Device(client, device_information)
+            new_device = Device(client, device_information, stream_decoder=stream_decoder)
             self.devices[device_information.device_id] = new_device
             self.callbacks.new_device.call(new_device)
             self.events.new_device.set(data=new_device, flags={'type': device_information.device_type})
@@ -1,6 +1,12 @@
 import dataclasses
+import itertools
 import time as t
 
+from core.utils.dataclass_utils import register_codecs
+
+# Monotonic message ids. Unlike id(self), these are never reused while a request is still pending
+_message_ids = itertools.count(1)
+
 
 @dataclasses.dataclass
 class JSON_Message:
@@ -16,5 +22,8 @@ class JSON_Message:
     data: dict = dataclasses.field(default_factory=dict)
 
     def __post_init__(self):
-        self.id = id(self)
+        self.id = next(_message_ids)
         self.time = t.time()
+
+
+register_codecs(JSON_Message)
@@ -0,0 +1,116 @@
+import dataclasses
+
+import numpy as np
+
+# ======================================================================================================================
+# Serial frames
+#
+#   | start (u8) | msg type (u8) | payload length (u8) | payload (max_payload bytes, zero padded) | checksum (u8) |
+#
+# Every frame has the same size. The checksum is the 8-bit sum of the start byte, the type, the length and the first
+# `payload length` payload bytes, as computed by ikarus_calc_crc() in the firmware.
+# ======================================================================================================================
+HEADER_SIZE = 3
+
+
+# === FORMAT ===========================================================================================================
+@dataclasses.dataclass(frozen=True)
+class FrameFormat:
+    start_byte: int = 0xAA
+    max_payload: int = 100
+
+    @property
+    def frame_size(self) -> int:
+        return HEADER_SIZE + self.max_payload + 1
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype([('start', 'u1'), ('msg_type', 'u1'), ('payload_length', 'u1'),
+                         ('payload', 'u1', (self.max_payload,)), ('crc', 'u1')])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def encode(self, msg_type: int, payload: bytes) -> bytes:
+        if len(payload) > self.max_payload:
+            raise ValueError(f"Payload too long ({len(payload)} > {self.max_payload} bytes)")
+        frame = bytearray(self.frame_size)
+        frame[0] = self.start_byte
+        frame[1] = msg_type
+        frame[2] = len(payload)
+        frame[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+        frame[-1] = sum(frame[:HEADER_SIZE + len(payload)]) & 0xFF
+        return bytes(frame)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def scan(self, buffer: np.ndarray) -> tuple[np.ndarray, int, int]:
+        """
+        Find the frames in `buffer` (uint8). A frame is accepted where the start byte is followed by a valid length and
+        a matching checksum; start bytes inside accepted frames are ignored.
+
+        Returns (offsets of the accepted frames, number of bytes that can be dropped from the front of the buffer,
+        number of checksum errors). Only an incomplete frame at the end of the buffer is kept for the next scan.
+        """
+        size = self.frame_size
+        length = len(buffer)
+        last = length - size  # Last offset at which a complete frame fits
+
+        candidates = np.flatnonzero(buffer[:max(last + 1, 0)] == self.start_byte)
+        accepted = candidates[:0]
+        crc_errors = 0
+
+        if len(candidates):
+            payload_length = buffer[candidates + 2].astype(np.intp)
+            length_ok = payload_length <= self.max_payload
+
+            # 8-bit sums over header and payload of every candidate from one cumulative sum of the buffer
+            cumulative = np.zeros(length + 1, dtype=np.uint32)
+            np.cumsum(buffer, dtype=np.uint32, out=cumulative[1:])
+            end = candidates + HEADER_SIZE + np.minimum(payload_length, self.max_payload)
+            checksum = (cumulative[end] - cumulative[candidates]) & 0xFF
+            valid = length_ok & (checksum == buffer[candidates + size - 1])
+
+            accepted = candidates[valid]
+            if len(accepted) > 1 and np.any(np.diff(accepted) < size):
+                accepted = self._removeOverlaps(accepted)
+
+            # Candidates that are neither accepted nor inside an accepted frame
+            rejected = candidates[~valid & length_ok]
+            if len(rejected):
+                index = np.searchsorted(accepted, rejected, side='right') - 1
+                inside = (index >= 0) & (rejected < accepted[np.maximum(index, 0)] + size)
+                crc_errors = int(np.count_nonzero(~inside)) if len(accepted) else len(rejected)
+
+        # Keep everything from the first start byte that might begin an incomplete frame at the end
+        end = int(accepted[-1]) + size if len(accepted) else 0
+        tail = np.flatnonzero(buffer[max(end, last + 1):] == self.start_byte)
+        consumed = max(end, last + 1) + int(tail[0]) if len(tail) else length
+        return accepted, consumed, crc_errors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _removeOverlaps(self, offsets: np.ndarray) -> np.ndarray:
+        # A start byte and checksum that match by chance inside a valid frame. Rare, so a plain loop is fine
+        kept = []
+        end = -1
+        for offset in offsets.tolist():
+            if offset >= end:
+                kept.append(offset)
+                end = offset + self.frame_size
+        return np.asarray(kept, dtype=offsets.dtype)
+
+
+# === BATCH ============================================================================================================
+@dataclasses.dataclass(frozen=True)
+class FrameBatch:
+    frames: np.ndarray  # Structured array with the fields of FrameFormat.dtype
+    time: float
+
+    def __len__(self):
+        return len(self.frames)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def payload(self, dtype: np.dtype, msg_type: int | None = None) -> np.ndarray:
+        """
+        Decode the payloads of all frames (optionally only those of `msg_type`) as records of `dtype` in one go.
+        """
+        frames = self.frames if msg_type is None else self.frames[self.frames['msg_type'] == msg_type]
+        dtype = np.dtype(dtype)
+        return np.ascontiguousarray(frames['payload'][:, :dtype.itemsize]).view(dtype).reshape(-1)
@@ -0,0 +1,48 @@
+import os
+import select
+import tty
+
+
+class PtyLoopback:
+    """
+    Pseudo-terminal stand-in for a UART device. `port` can be opened like a serial port (e.g. by SerialLink); bytes
+    written with write() arrive there as if sent by the device, and read() returns what the host sent.
+    Only available on POSIX systems.
+    """
+    port: str
+
+    def __init__(self):
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def write(self, data: bytes) -> int:
+        view = memoryview(data)
+        written = 0
+        while written < len(view):
+            written += os.write(self._master, view[written:])
+        return written
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def read(self, size: int = 65536, timeout: float = 0.1) -> bytes:
+        readable, _, _ = select.select([self._master], [], [], timeout)
+        if not readable:
+            return b''
+        return os.read(self._master, size)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def close(self):
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,225 @@
+import dataclasses
+import threading
+import time
+
+import numpy as np
+
+try:
+    import serial
+except ImportError:  # Optional, only needed for UART links
+    serial = None
+
+from core.communication.serial.frames import FrameBatch, FrameFormat
+from core.utils.callbacks import callback_definition, CallbackContainer
+from core.utils.events import event_definition, Event
+from core.utils.exit import register_exit_callback
+from core.utils.logging_utils import Logger
+
+# Text lines printed by the firmware between frames are plain ASCII. Any other byte (a broken frame, noise) is mapped
+# to 0x00 and discards the line it appears in
+_TEXT_TABLE = bytes(byte if 32 <= byte < 127 or byte == 0x0A else 0 for byte in range(256))
+_MAX_TEXT_LINE = 1024
+
+
+# === SERIAL LINK ======================================================================================================
+@dataclasses.dataclass
+class SerialLinkStats:
+    bytes: int = 0
+    reads: int = 0
+    frames: int = 0
+    crc_errors: int = 0
+    resyncs: int = 0  # Times bytes had to be skipped to reach the next frame
+    frames_per_second: float = 0.0
+
+
+@callback_definition
+class SerialLinkCallbacks:
+    frames: CallbackContainer
+    text: CallbackContainer
+
+
+@event_definition
+class SerialLinkEvents:
+    # FrameBatch, built fresh per read and never mutated
+    frames: Event = Event(copy_on_read=True)
+    text: Event = Event(copy_on_read=True)
+
+
+class SerialLink:
+    """
+    Reads a UART in large chunks into a receive buffer and hands out all complete frames of each read as one
+    FrameBatch.
+
+    A corrupted or truncated frame costs one checksum error and a resync to the next valid frame; text lines printed
+    by the firmware between frames are collected and emitted on the `text` callbacks and event. Callbacks run on the
+    reader thread and must not block.
+    """
+    port: str
+    baudrate: int
+    format: FrameFormat
+
+    _serial: 'serial.Serial | None' = None
+    _thread: threading.Thread | None = None
+    _exit: bool = False
+
+    # === INIT =========================================================================================================
+    def __init__(self, port: str, baudrate: int = 115200, format: FrameFormat = None, buffer_size: int = 65536,
+                 timeout: float = 0.1, name: str = None):
+        if serial is None:
+            raise ImportError("SerialLink requires pyserial")
+
+        self.port = port
+        self.baudrate = baudrate
+        self.format = format if format is not None else FrameFormat()
+        self.timeout = timeout
+        self.name = name if name is not None else f"serial_link_{port}"
+
+        if buffer_size < 2 * self.format.frame_size:
+            raise ValueError(f"Buffer of {buffer_size} bytes is too small for frames of {self.format.frame_size}")
+        self._buffer = np.empty(buffer_size, dtype=np.uint8)
+        self._fill = 0
+        self._text = bytearray()
+
+        self._stats = SerialLinkStats()
+        self._rate_time = time.monotonic()
+        self._rate_frames = 0
+        self._write_lock = threading.Lock()
+
+        self.callbacks = SerialLinkCallbacks()
+        self.events = SerialLinkEvents()
+        self.logger = Logger(f"Serial {port}")
+
+        register_exit_callback(self.close)
+
+    # === PROPERTIES ===================================================================================================
+    @property
+    def stats(self) -> SerialLinkStats:
+        return dataclasses.replace(self._stats)
+
+    # === METHODS ======================================================================================================
+    def start(self):
+        if self._thread is not None:
+            return
+        self._serial = serial.Serial(self.port, baudrate=self.baudrate, timeout=self.timeout)
+        self._exit = False
+        self._thread = threading.Thread(target=self._task, name=self.name, daemon=True)
+        self._thread.start()
+        self.logger.info(f"Opened {self.port} at {self.baudrate} baud")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def close(self, *args, **kwargs):
+        self._exit = True
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2 * self.timeout + 1)
+        self._thread = None
+        if self._serial is not None:
+            self._serial.close()
+            self._serial = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def write(self, data: bytes) -> int:
+        with self._write_lock:
+            return self._serial.write(data)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def send(self, msg_type: int, payload: bytes) -> bytes:
+        frame = self.format.encode(msg_type, payload)
+        self.write(frame)
+        return frame
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def reset_stats(self):
+        self._stats = SerialLinkStats()
+        self._rate_time = time.monotonic()
+        self._rate_frames = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def feed(self, data: bytes | bytearray | memoryview):
+        """
+        Process received bytes. Called by the reader thread; can be used directly to parse recorded data.
+        """
+        data = memoryview(data).cast('B')
+        while len(data):
+            count = min(len(data), len(self._buffer) - self._fill)
+            self._buffer[self._fill:self._fill + count] = data[:count]
+            self._fill += count
+            data = data[count:]
+            self._process()
+
+    # === PRIVATE METHODS ==============================================================================================
+    def _task(self):
+        while not self._exit:
+            try:
+                # Blocks for the first byte (or the timeout), then takes everything the driver has buffered
+                data = self._serial.read(max(1, min(self._serial.in_waiting, len(self._buffer) - self._fill)))
+            except (serial.SerialException, OSError, TypeError) as e:
+                if not self._exit:
+                    self.logger.error(f"Serial port closed: {e}")
+                break
+            if data:
+                self._stats.reads += 1
+                self._stats.bytes += len(data)
+                self.feed(data)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _process(self):
+        buffer = self._buffer[:self._fill]
+        offsets, consumed, crc_errors = self.format.scan(buffer)
+
+        self._collectSkipped(buffer, offsets, consumed)
+
+        if len(offsets):
+            size = self.format.frame_size
+            frames = buffer[offsets[:, None] + np.arange(size)].view(self.format.dtype).reshape(-1)
+            frames.flags.writeable = False
+            batch = FrameBatch(frames=frames, time=time.time())
+            self._stats.frames += len(frames)
+            self._rate_frames += len(frames)
+            self.callbacks.frames.call(batch)
+            self.events.frames.set(batch)
+
+        self._stats.crc_errors += crc_errors
+
+        # Move the incomplete frame at the end (if any) to the front
+        remaining = self._fill - consumed
+        if remaining:
+            self._buffer[:remaining] = self._buffer[consumed:self._fill]
+        self._fill = remaining
+
+        now = time.monotonic()
+        if now - self._rate_time >= 1.0:
+            self._stats.frames_per_second = self._rate_frames / (now - self._rate_time)
+            self._rate_time = now
+            self._rate_frames = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _collectSkipped(self, buffer: np.ndarray, offsets: np.ndarray, consumed: int):
+        # Gaps in front of, between and after the accepted frames up to `consumed`
+        size = self.format.frame_size
+        starts = np.concatenate(([0], offsets + size))
+        ends = np.concatenate((offsets, [consumed]))
+        gaps = np.flatnonzero(ends > starts)
+        if not len(gaps):
+            return
+
+        self._stats.resyncs += len(gaps)
+        for gap in gaps.tolist():
+            if starts[gap] > 0:
+                self._text.append(0)  # A frame in between ends the line
+            self._text += buffer[starts[gap]:ends[gap]].tobytes().translate(_TEXT_TABLE, b'\r')
+
+        while True:
+            index = self._text.find(b'\n')
+            if index < 0:
+                break
+            line = self._text[self._text.rfind(0, 0, index) + 1:index].decode('ascii').strip()
+            del self._text[:index + 1]
+            if line:
+                self.callbacks.text.call(line)
+                self.events.text.set(line)
+
+        broken = self._text.rfind(0)
+        if broken >= 0:
+            del self._text[:broken + 1]
+        if len(self._text) > _MAX_TEXT_LINE:
+            del self._text[:-_MAX_TEXT_LINE]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from core.communication.binary_stream import BinaryStreamDecoder, StreamDecodeError, StreamSchema
+
+HANDSHAKE_STREAMS = {
+    'imu': {'id': 1, 'fields': [['tick', 'uint32'], ['acc', 'float32', [3]]]},
+    'motors': {'id': 2, 'fields': [['speed', 'int16', [2]]]},
+}
+
+
+# ================================================================
+# Decoding
+# ================================================================
+
+def test_round_trip_from_handshake():
+    decoder = BinaryStreamDecoder.from_handshake(HANDSHAKE_STREAMS)
+    schema = decoder.schemas[1]
+    assert schema.name == 'imu'
+    assert schema.dtype.itemsize == 16
+
+    records = np.zeros(3, dtype=schema.dtype)
+    records['tick'] = [10, 11, 12]
+    records['acc'][1] = [1.0, -2.0, 9.81]
+
+    batch = decoder.decode(schema.encode(records, flags=5))
+    assert batch.stream == 'imu'
+    assert batch.flags == 5
+    assert len(batch) == 3
+    assert batch.records['tick'].tolist() == [10, 11, 12]
+    np.testing.assert_allclose(batch.records['acc'][1], [1.0, -2.0, 9.81], rtol=1e-6)
+    assert not batch.records.flags.writeable  # View into the received bytes
+
+
+def test_empty_frame_and_missing_handshake():
+    decoder = BinaryStreamDecoder.from_handshake(HANDSHAKE_STREAMS)
+    schema = decoder.schemas[2]
+    batch = decoder.decode(schema.encode(np.zeros(0, dtype=schema.dtype)))
+    assert batch.stream == 'motors' and len(batch) == 0
+
+    assert BinaryStreamDecoder.from_handshake(None) is None
+    assert BinaryStreamDecoder.from_handshake({}) is None
+
+
+def test_malformed_frames_raise():
+    decoder = BinaryStreamDecoder.from_handshake(HANDSHAKE_STREAMS)
+    schema = decoder.schemas[1]
+    frame = schema.encode(np.zeros(2, dtype=schema.dtype))
+
+    with pytest.raises(StreamDecodeError):
+        decoder.decode(frame[:3])  # Shorter than the header
+    with pytest.raises(StreamDecodeError):
+        decoder.decode(frame[:-1])  # Truncated record
+    with pytest.raises(StreamDecodeError):
+        decoder.decode(bytes([9]) + frame[1:])  # Unknown stream id
+
+
+def test_duplicate_stream_ids_are_rejected():
+    decoder = BinaryStreamDecoder.from_handshake(HANDSHAKE_STREAMS)
+    with pytest.raises(ValueError):
+        decoder.add(StreamSchema.from_description('other', {'id': 1, 'fields': [['x', 'uint8']]}))
@@ -0,0 +1,212 @@
+import queue
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from core.communication.binary_stream import BinaryStreamDecoder
+from core.communication.device_server import Device, DeviceInformation, DeviceServer, PendingRequests, gather
+from core.utils.callbacks import CallbackContainer
+from core.utils.exit import unregister_exit_callback
+from core.utils.time import TimerWheel
+
+
+# ================================================================
+# Helpers
+# ================================================================
+
+class FakeClientCallbacks:
+    def __init__(self):
+        self.disconnected = CallbackContainer()
+        self.binary = CallbackContainer()
+        self.message = CallbackContainer()
+
+
+class FakeClient:
+    """
+    Stands in for a WebsocketServerClient. Requests are answered by `respond(message) -> data`, or not at all if it
+    returns None.
+    """
+
+    def __init__(self, respond=None):
+        self.respond = respond
+        self.sent = []
+        self.rx_queue = queue.Queue()
+        self.connected = True
+        self.address = 'fake'
+        self.callbacks = FakeClientCallbacks()
+
+    def send(self, message: dict):
+        self.sent.append(message)
+        if message.get('request_response') and self.respond is not None:
+            data = self.respond(message)
+            if data is not None:
+                self.rx_queue.put({'type': 'response', 'request_id': message['id'], 'data': data})
+
+
+# ================================================================
+# Fixtures
+# ================================================================
+
+@pytest.fixture
+def server():
+    server = DeviceServer('127.0.0.1', port=0, udp_port=0)
+    yield server
+    server.close()
+    # Closed already, and logging at interpreter exit fails once pytest has closed its capture streams
+    unregister_exit_callback(server.close)
+    unregister_exit_callback(server.websocket_server.stop)
+
+
+@pytest.fixture
+def wheel():
+    wheel = TimerWheel(tick=0.005, name='test_timer_wheel')
+    yield wheel
+    wheel.stop()
+
+
+# ================================================================
+# PendingRequests
+# ================================================================
+
+def test_pending_resolve_sets_result(wheel):
+    pending = PendingRequests(timer_wheel=wheel)
+    future = pending.add(1, timeout=1.0)
+    assert 1 in pending
+
+    assert pending.resolve(1, {'success': True})
+    assert future.result(timeout=0) == {'success': True}
+    assert len(pending) == 0
+    assert not pending.resolve(1, {'success': True})  # Late duplicate
+
+
+def test_pending_timeout_fails_with_timeout_error(wheel):
+    pending = PendingRequests(timer_wheel=wheel)
+    future = pending.add(2, timeout=0.02)
+
+    with pytest.raises(TimeoutError):
+        future.result(timeout=1.0)
+    assert 2 not in pending
+    assert not pending.resolve(2, {})  # Response after the timeout
+
+
+def test_pending_fail_all_and_cancel(wheel):
+    pending = PendingRequests(timer_wheel=wheel)
+    futures = {i: pending.add(i, timeout=1.0) for i in range(3)}
+    futures[0].cancel()
+    assert 0 not in pending
+
+    pending.fail_all(ConnectionError("gone"))
+    assert len(pending) == 0
+    results = gather(futures, timeout=0.1)
+    assert isinstance(results[0], CancelledError)
+    assert all(isinstance(results[i], ConnectionError) for i in (1, 2))
+
+
+def test_pending_many_in_flight(wheel):
+    pending = PendingRequests(timer_wheel=wheel)
+    futures = {i: pending.add(i, timeout=0.05 if i % 2 else 1.0) for i in range(100)}
+    for i in range(0, 100, 2):
+        pending.resolve(i, i)
+
+    results = gather(futures, timeout=1.0)
+    assert all(results[i] == i for i in range(0, 100, 2))
+    assert all(isinstance(results[i], TimeoutError) for i in range(1, 100, 2))
+    time.sleep(0.02)
+    assert len(pending) == 0
+
+
+# ================================================================
+# Batched reads and writes
+# ================================================================
+
+def test_read_values_nested_and_flat_answers():
+    def respond(message):
+        assert message['data'] == {'value_names': ['a/b', 'c', 'a/missing', 'c/x']}
+        return {'success': True, 'output': {'a': {'b': 1}, 'c': 2.5}}
+
+    device = Device(FakeClient(respond), DeviceInformation(device_id='test_read'))
+    results = device.readValues(['a/b', 'c', 'a/missing', 'c/x'], timeout=1.0)
+    assert results['a/b'] == 1
+    assert results['c'] == 2.5
+    assert isinstance(results['a/missing'], Exception)
+    assert isinstance(results['c/x'], Exception)  # Path through a non-dict value
+    device.close()
+
+
+def test_read_values_timeout():
+    device = Device(FakeClient(), DeviceInformation(device_id='test_read_timeout'))
+    results = device.readValues(['a', 'b'], timeout=0.02)
+    assert all(isinstance(result, TimeoutError) for result in results.values())
+    device.close()
+
+
+def test_write_values_results_per_path():
+    def respond(message):
+        assert message['type'] == 'write'
+        assert message['data'] == {'gains': {'k1': 1.0, 'k2': 0.5}, 'mode': 2}
+        return {'success': False, 'results': {'gains': {'k1': True, 'k2': False}}}
+
+    client = FakeClient(respond)
+    device = Device(client, DeviceInformation(device_id='test_write'))
+    results = device.writeValues({'gains/k1': 1.0, 'gains/k2': 0.5, 'mode': 2}, timeout=1.0)
+    assert results == {'gains/k1': True, 'gains/k2': False, 'mode': False}
+
+    # Without a response the message is only sent
+    count = len(client.sent)
+    assert device.writeValues({'mode': 3}, request_response=False) == {'mode': True}
+    assert len(client.sent) == count + 1
+    device.close()
+
+
+def test_broadcast_write_skips_unknown_devices(server):
+    device = Device(FakeClient(lambda message: {'success': True}), DeviceInformation(device_id='test_broadcast'))
+    server.devices['test_broadcast'] = device
+    results = server.broadcastWrite({'mode': 1}, devices=['test_broadcast', 'gone'], timeout=1.0)
+    assert results['test_broadcast'] == {'mode': True}
+    assert isinstance(results['gone']['mode'], KeyError)
+    device.close()
+
+
+# ================================================================
+# Handshake
+# ================================================================
+
+def handshake(**information) -> dict:
+    return {'type': 'event', 'event': 'handshake', 'address': '', 'source': '', 'data': information}
+
+
+STREAM = {'id': 1, 'fields': [['t', '<f4'], ['pos', '<f4', [3]]]}
+
+
+@pytest.mark.parametrize('information', [
+    {'device_id': 'bad_dtype', 'streams': {'state': {'id': 1, 'fields': [['t', 'not a dtype']]}}},
+    {'device_id': 'duplicate_id', 'streams': {'a': STREAM, 'b': STREAM}},
+    {'device_id': 'not_a_dict', 'streams': {'state': 5}},
+    {'device_id': 'streams_list', 'streams': [STREAM]},
+    {'device_id': 7},
+])
+def test_malformed_handshake_is_rejected(server, information):
+    client = FakeClient()
+    server._clientConnectedCallback(client)
+
+    server._clientMessageCallback(handshake(**information), client)
+
+    assert server.devices == {}
+    assert len(client.callbacks.disconnected.callbacks) == 0
+    assert len(client.callbacks.binary.callbacks) == 0
+    assert len(client.callbacks.message.callbacks) == 1  # Still waiting for a valid handshake
+
+
+def test_handshake_with_streams_registers_device_with_decoder(server):
+    client = FakeClient()
+    server._clientConnectedCallback(client)
+
+    server._clientMessageCallback(handshake(device_id='streaming', streams={'state': STREAM}), client)
+
+    device = server.devices['streaming']
+    assert isinstance(device.stream_decoder, BinaryStreamDecoder)
+    assert device.stream_decoder.schemas[1].dtype.itemsize == 16
+    assert len(client.callbacks.binary.callbacks) == 1
+    assert len(client.callbacks.message.callbacks) == 0
+    device.close()
@@ -0,0 +1,109 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip('serial')
+
+from core.communication.serial.frames import FrameFormat
+from core.communication.serial.serial_link import SerialLink
+
+FORMAT = FrameFormat(start_byte=0xAA, max_payload=8)
+PAYLOAD = np.dtype([('a', '<u2'), ('b', '<f4')])
+
+
+def wait_true(pred, timeout=1.5, period=0.01):
+    """Spin until pred() returns True or timeout elapses."""
+    end = time.time() + timeout
+    while time.time() < end:
+        if pred():
+            return True
+        time.sleep(period)
+    return False
+
+
+def payload(a: int, b: float) -> bytes:
+    return np.array([(a, b)], dtype=PAYLOAD).tobytes()
+
+
+def make_link(**kwargs):
+    link = SerialLink('test', format=FORMAT, buffer_size=256, **kwargs)
+    batches, lines = [], []
+    link.callbacks.frames.register(batches.append)
+    link.callbacks.text.register(lines.append)
+    return link, batches, lines
+
+
+def received(batches) -> list[int]:
+    return [int(a) for batch in batches for a in batch.payload(PAYLOAD)['a']]
+
+
+# ================================================================
+# Frame parsing
+# ================================================================
+
+def test_frames_split_across_reads():
+    link, batches, _ = make_link()
+    data = b''.join(FORMAT.encode(1, payload(i, i / 2)) for i in range(5))
+    for start in range(0, len(data), 7):
+        link.feed(data[start:start + 7])
+
+    assert received(batches) == [0, 1, 2, 3, 4]
+    assert batches[0].payload(PAYLOAD)['b'][0] == 0.0
+    stats = link.stats
+    assert (stats.frames, stats.crc_errors, stats.resyncs) == (5, 0, 0)
+
+
+def test_resync_after_corrupted_and_truncated_frames():
+    link, batches, lines = make_link()
+    good = [FORMAT.encode(1, payload(i, 0.0)) for i in range(4)]
+    corrupted = bytearray(good[1])
+    corrupted[5] ^= 0xFF
+
+    link.feed(good[0] + bytes(corrupted) + good[2][:6] + b'\x01\x02' + good[3] + b'boot ok\n')
+    assert received(batches) == [0, 3]
+    assert link.stats.crc_errors >= 1
+    assert link.stats.resyncs >= 1
+    assert lines == ['boot ok']
+
+    # Text in front of a frame and a second frame type
+    link.feed(b'hello\n' + FORMAT.encode(2, payload(9, 0.0)))
+    assert lines == ['boot ok', 'hello']
+    assert received([batches[-1]]) == [9]
+    assert batches[-1].payload(PAYLOAD, msg_type=1).size == 0
+
+
+def test_large_input_in_a_small_buffer():
+    link, batches, _ = make_link()
+    link.feed(b''.join(FORMAT.encode(1, payload(i, 0.0)) for i in range(200)))
+    assert received(batches) == list(range(200))
+    assert link.stats.crc_errors == 0
+
+
+# ================================================================
+# Pseudo-terminal loopback
+# ================================================================
+
+@pytest.mark.skipif(os.name != 'posix', reason="PtyLoopback needs a POSIX system")
+def test_link_over_pty_loopback():
+    from core.communication.serial.loopback import PtyLoopback
+
+    with PtyLoopback() as device:
+        link = SerialLink(device.port, format=FORMAT, timeout=0.05)
+        batches, lines = [], []
+        link.callbacks.frames.register(batches.append)
+        link.callbacks.text.register(lines.append)
+        link.start()
+        try:
+            device.write(b'\x13\x37' + FORMAT.encode(1, payload(1, 0.0)) + b'ready\n')
+            device.write(FORMAT.encode(1, payload(2, 0.0))[:-3])  # Truncated by a device reset
+            device.write(b''.join(FORMAT.encode(1, payload(i, 0.0)) for i in range(3, 50)))
+            assert wait_true(lambda: len(received(batches)) >= 48)
+            assert received(batches) == [1] + list(range(3, 50))
+            assert lines == ['ready']
+
+            sent = link.send(3, b'\x01')
+            assert device.read(timeout=1.0) == sent
+        finally:
+            link.close()
@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from core.communication.wifi.udp.protocols.udp_base_protocol import CRC8_TABLE, UDP_Base_Message, \
+    UDP_Base_Protocol, crc8
+
+
+def crc8_reference(data, crc: int = 0) -> int:
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def make_message(data: bytes) -> UDP_Base_Message:
+    msg = UDP_Base_Message()
+    msg.source = '192.168.0.5'
+    msg.address = '10.0.0.7'
+    msg.data_protocol_id = 2
+    msg.data = data
+    return msg
+
+
+# ================================================================
+# CRC-8
+# ================================================================
+
+def test_crc8_check_value():
+    assert crc8(b'123456789') == 0xF4  # CRC-8/SMBUS
+    assert crc8(b'') == 0
+
+
+@pytest.mark.parametrize('length', [1, 23, 24, 100, 4095, 4096, 4097, 10000])
+def test_crc8_matches_table_loop(length):
+    data = os.urandom(length)
+    assert crc8(data) == crc8_reference(data)
+    assert crc8(memoryview(data)) == crc8_reference(data)
+    assert crc8(data, crc=0x5A) == crc8_reference(data, crc=0x5A)
+    # Chaining over two parts gives the CRC of the whole
+    assert crc8(data[length // 2:], crc8(data[:length // 2])) == crc8_reference(data)
+
+
+# ================================================================
+# Frames
+# ================================================================
+
+@pytest.mark.parametrize('payload', [b'', b'hello', os.urandom(3000)])
+def test_encode_decode_round_trip(payload):
+    frame = UDP_Base_Protocol.encode(make_message(payload))
+    assert len(frame) == len(payload) + UDP_Base_Protocol.protocol_overhead
+    assert UDP_Base_Protocol.check(frame)
+
+    msg = UDP_Base_Protocol.decode(frame)
+    assert bytes(msg.data) == payload
+    assert msg.data_protocol_id == 2
+    assert bytes(msg.src) == bytes([192, 168, 0, 5])
+    assert bytes(msg.add) == bytes([2, 0, 0, 7])  # The protocol ID takes the place of the first address byte
+
+
+def test_encode_into_offset():
+    buffer = bytearray(64)
+    written = UDP_Base_Protocol.encode_into(make_message(b'abc'), buffer, offset=10)
+    frame = buffer[10:10 + written]
+    assert frame == UDP_Base_Protocol.encode(make_message(b'abc'))
+    assert bytes(UDP_Base_Protocol.decode(frame).data) == b'abc'
+
+
+def test_corrupted_frames_are_rejected():
+    frame = UDP_Base_Protocol.encode(make_message(b'payload'))
+
+    corrupted = bytearray(frame)
+    corrupted[UDP_Base_Protocol.idx_payload] ^= 0x01
+    assert UDP_Base_Protocol.decode(corrupted) is None
+    assert not UDP_Base_Protocol.check(corrupted)
+
+    assert UDP_Base_Protocol.decode(frame[:-1]) is None
+    bad_footer = bytearray(frame)
+    bad_footer[-1] = 0
+    assert UDP_Base_Protocol.decode(bad_footer) is None
+
+
+def test_unchecked_crc_accepted_only_while_enabled(monkeypatch):
+    corrupted = bytearray(UDP_Base_Protocol.encode(make_message(b'payload')))
+    corrupted[UDP_Base_Protocol.idx_payload] ^= 0x01
+    corrupted[-2] = 0
+
+    # Older senders transmit a CRC of 0x00, which is not checked by default
+    assert UDP_Base_Protocol.accept_unchecked_crc
+    assert bytes(UDP_Base_Protocol.decode(corrupted).data) == bytes(corrupted[13:-2])
+    assert UDP_Base_Protocol.check(corrupted)
+
+    monkeypatch.setattr(UDP_Base_Protocol, 'accept_unchecked_crc', False)
+    assert UDP_Base_Protocol.decode(corrupted) is None
+    assert not UDP_Base_Protocol.check(corrupted)
+
+    # A payload whose real CRC is 0x00 still passes
+    payload = b'\x00\x00'
+    assert crc8(payload) == 0
+    frame = UDP_Base_Protocol.encode(make_message(payload))
+    assert bytes(UDP_Base_Protocol.decode(frame).data) == payload
+    assert UDP_Base_Protocol.check(frame)
+
+
+def test_payload_too_long():
+    with pytest.raises(ValueError):
+        UDP_Base_Protocol.encode_into(make_message(bytes(UDP_Base_Protocol.max_payload + 1)),
+                                      bytearray(UDP_Base_Protocol.max_payload + 20))
@@ -0,0 +1,173 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from core.communication.wifi.udp.udp_socket import UDP_Receiver, UDP_Socket
+from core.utils.exit import unregister_exit_callback
+
+
+def wait_true(pred, timeout=1.5, period=0.01):
+    """Spin until pred() returns True or timeout elapses."""
+    end = time.time() + timeout
+    while time.time() < end:
+        if pred():
+            return True
+        time.sleep(period)
+    return False
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Collector:
+    """Registered as rx callback of UDP_Sockets, records (data, port) per datagram and the threads it ran on."""
+
+    def __init__(self):
+        self.datagrams = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, data, address, port):
+        with self._lock:
+            self.datagrams.append((data, port))
+            self.threads.add(threading.current_thread())
+
+    def data(self, port: int = None) -> list[bytes]:
+        with self._lock:
+            return [data for data, p in self.datagrams if port is None or p == port]
+
+
+# ================================================================
+# Fixtures
+# ================================================================
+
+@pytest.fixture
+def receiver():
+    receiver = UDP_Receiver(max_batch=16, name='test_udp_receiver')
+    yield receiver
+    receiver.stop()
+    # Stopped already, and logging at interpreter exit fails once pytest has closed its capture streams
+    unregister_exit_callback(receiver.stop)
+
+
+@pytest.fixture
+def make_socket(receiver):
+    sockets = []
+
+    def make(port: int = None) -> UDP_Socket:
+        udp_socket = UDP_Socket('127.0.0.1', port or free_port(), receiver=receiver)
+        sockets.append(udp_socket)
+        return udp_socket
+
+    yield make
+    for udp_socket in sockets:
+        udp_socket.close()
+
+
+@pytest.fixture
+def sender():
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    yield lambda data, port: sender.sendto(data, ('127.0.0.1', port))
+    sender.close()
+
+
+# ================================================================
+# UDP_Receiver
+# ================================================================
+
+def test_one_receiver_serves_several_sockets(receiver, make_socket, sender):
+    collector = Collector()
+    sockets = [make_socket() for _ in range(3)]
+    for udp_socket in sockets:
+        udp_socket.callbacks.rx.register(collector)
+        udp_socket.start()
+
+    for i in range(10):
+        for udp_socket in sockets:
+            sender(f'{udp_socket.port}:{i}'.encode(), udp_socket.port)
+
+    assert wait_true(lambda: len(collector.data()) == 30)
+    for udp_socket in sockets:
+        assert collector.data(udp_socket.port) == [f'{udp_socket.port}:{i}'.encode() for i in range(10)]
+    assert collector.threads == {receiver._thread}  # No thread per socket
+
+
+def test_queued_datagrams_are_drained_in_batches(receiver, make_socket, sender):
+    collector = Collector()
+    udp_socket = make_socket()
+    udp_socket.callbacks.rx.register(collector)
+    # Bound but not started yet, so the kernel buffers the datagrams
+    for i in range(100):
+        sender(i.to_bytes(2, 'little'), udp_socket.port)
+    udp_socket.start()
+
+    assert wait_true(lambda: len(collector.data()) == 100)
+    assert [int.from_bytes(data, 'little') for data in collector.data()] == list(range(100))
+    stats = receiver.stats()
+    assert stats.datagrams == 100
+    assert stats.bytes == 200
+    assert stats.max_batch == 16
+    assert stats.wakeups >= 100 // 16
+
+    receiver.reset_stats()
+    assert receiver.stats().datagrams == 0
+
+
+def test_raising_callback_does_not_stop_the_receiver(receiver, make_socket, sender):
+    collector = Collector()
+
+    def fail_on_bad(data, address, port):
+        if data == b'bad':
+            raise ValueError("bad datagram")
+
+    udp_socket = make_socket()
+    udp_socket.callbacks.rx.register(fail_on_bad)
+    udp_socket.callbacks.rx.register(collector)
+    udp_socket.start()
+
+    sender(b'bad', udp_socket.port)
+    sender(b'good', udp_socket.port)
+
+    assert wait_true(lambda: collector.data() == [b'good'])
+    assert receiver._thread.is_alive()
+
+
+def test_sockets_can_be_removed_and_added_again(receiver, make_socket, sender):
+    collector = Collector()
+    udp_socket = make_socket()
+    udp_socket.callbacks.rx.register(collector)
+    udp_socket.start()
+    sender(b'first', udp_socket.port)
+    assert wait_true(lambda: collector.data() == [b'first'])
+
+    receiver.remove(udp_socket)
+    sender(b'while removed', udp_socket.port)  # Stays in the kernel buffer
+    time.sleep(0.05)
+    assert collector.data() == [b'first']
+
+    receiver.add(udp_socket)
+    assert wait_true(lambda: collector.data() == [b'first', b'while removed'])
+
+    # A closed socket is unregistered, and a new socket on the same port takes over
+    port = udp_socket.port
+    udp_socket.close()
+    replacement = make_socket(port)
+    replacement.callbacks.rx.register(collector)
+    replacement.start()
+    sender(b'replacement', port)
+    assert wait_true(lambda: collector.data() == [b'first', b'while removed', b'replacement'])
+    assert receiver._thread.is_alive()
+
+
+def test_stop_ends_the_receiver_thread(receiver, make_socket):
+    make_socket().start()
+    thread = receiver._thread
+    assert thread.is_alive()
+
+    receiver.stop()
+    assert not thread.is_alive()
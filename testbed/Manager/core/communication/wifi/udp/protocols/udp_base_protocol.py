@@ -1,14 +1,88 @@
+import functools
+import struct
 from typing import Union
 
 from core.communication.wifi.udp.protocols.protocol import Protocol, Message
 from core.utils.network.network import ipv4_to_bytes
 
 
+# === CRC8 =============================================================================================================
+def _crc8_table(polynomial: int = 0x07) -> bytes:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ polynomial) if crc & 0x80 else (crc << 1)
+        table.append(crc & 0xFF)
+    return bytes(table)
+
+
+# CRC-8/SMBUS: polynomial 0x07, initial value 0x00, not reflected
+CRC8_TABLE = _crc8_table()
+
+
+# The CRC is linear over GF(2): every bit of crc8(data) is the parity of a fixed selection of data bits, and which bits
+# are selected only depends on their distance from the end of the data. _crc8_bit_masks()[j] selects the data bits of
+# CRC bit j for data of up to _CRC8_SPAN bytes read as one big-endian integer, so the whole CRC takes eight ANDs and
+# popcounts on Python integers instead of a loop over the bytes.
+_CRC8_SPAN = 4096
+_CRC8_LOOP_BELOW = 24  # Below this length the plain table loop is faster
+_crc8_masks: tuple[int, ...] | None = None
+
+
+def _crc8_bit_masks() -> tuple[int, ...]:
+    global _crc8_masks
+    if _crc8_masks is None:
+        # contributions[bit]: CRC of the byte (1 << bit) followed by k zero bytes, stored at distance k from the end
+        contributions = []
+        for bit in range(8):
+            column = bytearray(_CRC8_SPAN)
+            crc = CRC8_TABLE[1 << bit]
+            for k in range(_CRC8_SPAN):
+                column[_CRC8_SPAN - 1 - k] = crc
+                crc = CRC8_TABLE[crc]
+            contributions.append(int.from_bytes(column, 'big'))
+
+        # Bit j of the contribution of data bit `bit` goes to position `bit` of mask j, in every byte at once
+        ones = int.from_bytes(b'\x01' * _CRC8_SPAN, 'big')
+        _crc8_masks = tuple(
+            sum((((contributions[bit] >> j) & ones) << bit) for bit in range(8)) for j in range(8)
+        )
+    return _crc8_masks
+
+
+def crc8(data, crc: int = 0) -> int:
+    if len(data) < _CRC8_LOOP_BELOW:
+        table = CRC8_TABLE
+        for byte in data:
+            crc = table[crc ^ byte]
+        return crc
+
+    m0, m1, m2, m3, m4, m5, m6, m7 = _crc8_bit_masks()
+    for start in range(0, len(data), _CRC8_SPAN):
+        block = data[start:start + _CRC8_SPAN]
+        value = int.from_bytes(block, 'big')
+        if crc:
+            # Feeding a CRC into the next block is the same as XORing it into the block's first byte
+            value ^= crc << (8 * (len(block) - 1))
+        crc = (((value & m0).bit_count() & 1) | (((value & m1).bit_count() & 1) << 1) |
+               (((value & m2).bit_count() & 1) << 2) | (((value & m3).bit_count() & 1) << 3) |
+               (((value & m4).bit_count() & 1) << 4) | (((value & m5).bit_count() & 1) << 5) |
+               (((value & m6).bit_count() & 1) << 6) | (((value & m7).bit_count() & 1) << 7))
+    return crc
+
+
+@functools.lru_cache(maxsize=256)
+def _ipv4_bytes(address: str) -> bytes:
+    return ipv4_to_bytes(address)
+
+
+# ======================================================================================================================
 class UDP_Base_Message(Message):
     data_protocol_id: int = 0
     source: str
     address: str
-    data: list
+    data: list | bytes | memoryview
 
     def __init__(self):
         self.data_protocol_id = 0
@@ -26,17 +100,21 @@ class UDP_Base_Protocol(Protocol):
     |   3       |   SRC[1]          |   Source ID                   |
     |   4       |   SRC[2]          |   Source ID                   |
     |   5       |   SRC[3]          |   Source ID                   |
-    |   6       |   ADD[0]          |   Address                     |
+    |   6       |   PROTOCOL        |   Protocol ID                 |
     |   7       |   ADD[1]          |   Address                     |
     |   8       |   ADD[2]          |   Address                     |
     |   9       |   ADD[3]          |   Address                     |
-    |   10       |   PROTOCOL        |   Protocol ID                 |
-    |   11       |   LEN[0]          |   Length of the payload       |
-    |   12       |   LEN[1]          |   Length of the payload       |
-    |   13       |   PAYLOAD[0]      |   Payload                     |
-    |   13+N-1   |   PAYLOAD[N-1]    |   Payload                     |
-    |   13+N     |   CRC8            |   CRC8 of the Payload         |
-    |   14+N     |   FOOTER          |   Footer                      |   0x5D
+    |   10      |   RESERVED        |                               |   0x00
+    |   11      |   LEN[0]          |   Length of the payload       |
+    |   12      |   LEN[1]          |   Length of the payload       |
+    |   13      |   PAYLOAD[0]      |   Payload                     |
+    |   13+N-1  |   PAYLOAD[N-1]    |   Payload                     |
+    |   13+N    |   CRC8            |   CRC8 of the Payload         |
+    |   14+N    |   FOOTER          |   Footer                      |   0x5D
+
+    The protocol ID takes the place of the first address byte, as it always has on the wire. Older senders always
+    transmit a CRC of 0x00; while accept_unchecked_crc is True, such frames are accepted without a check. With it set
+    to False, a CRC of 0x00 is only accepted if it is the actual CRC of the payload.
     """
     base = None
     identifier = 0
@@ -55,68 +133,98 @@ class UDP_Base_Protocol(Protocol):
     footer = 0x5D
 
     protocol_overhead = 15
+    max_payload = 0xFFFF
+
+    # Accept frames with a CRC of 0x00 unchecked, as sent by older peers. Set to False once none are left
+    accept_unchecked_crc = True
+
+    # header_0, header_1, source, protocol, address[1:4], reserved, payload length
+    header = struct.Struct('<BB4sB3sBH')
 
     def __init__(self):
         super().__init__()
 
     @classmethod
-    def decode(cls, data: Union[list, bytes, bytearray]) -> UDP_Base_Message:
-        check = cls.check(data)
+    def decode(cls, data: Union[bytes, bytearray, memoryview]) -> UDP_Base_Message:
+        """
+        The payload of the returned message is a memoryview into `data`.
+        """
+        view = memoryview(data)
+        length = len(view)
+        if length < cls.protocol_overhead:
+            return None
 
-        if not check:
+        header_0, header_1, source, protocol_id, _, _, payload_len = cls.header.unpack_from(view)
+        if (header_0 != cls.header_0 or header_1 != cls.header_1 or length != payload_len + cls.protocol_overhead
+                or view[length - 1] != cls.footer):
             # logger.debug(f"Corrupted UDP message received")
             return None
 
+        payload = view[cls.idx_payload:cls.idx_payload + payload_len]
+        crc = view[length - 2]
+        if (crc or not cls.accept_unchecked_crc) and crc != crc8(payload):
+            return None
+
         msg = UDP_Base_Message()
-        msg.data_protocol_id = data[cls.idx_protocol]
-        msg.src = data[cls.idx_src]
-        msg.add = list(data[cls.idx_add])
-        payload_len = int.from_bytes(data[cls.idx_len], byteorder="little")
-        msg.data = data[cls.idx_payload:cls.idx_payload + payload_len]
+        msg.data_protocol_id = protocol_id
+        msg.src = source
+        msg.add = view[cls.idx_add]
+        msg.data = payload
         return msg
 
     @classmethod
-    def encode(cls, msg: UDP_Base_Message, *args, **kwargs):
+    def encode(cls, msg: UDP_Base_Message, *args, **kwargs) -> bytearray:
         """
-        - Encode a TCP message from a given TCP_Message
-        :param msg: TCP_Message object
+        - Encode a UDP message from a given UDP_Base_Message
+        :param msg: UDP_Base_Message object
         :return: byte buffer of the message
         """
         assert (isinstance(msg, UDP_Base_Message))
-        buffer = [0] * (len(msg.data) + cls.protocol_overhead)
-        buffer[0] = cls.header_0
-        buffer[1] = cls.header_1
-        x = ipv4_to_bytes(msg.source)
-        y = ipv4_to_bytes(msg.address)
-        buffer[cls.idx_src] = ipv4_to_bytes(msg.source)
-        buffer[cls.idx_add] = ipv4_to_bytes(msg.address)
-
-        if hasattr(msg, 'data_protocol_id'):
-            buffer[cls.idx_protocol] = msg.data_protocol_id
-        else:
-            buffer[cls.idx_protocol] = 0
-
-        buffer[cls.idx_len] = len(msg.data).to_bytes(length=2, byteorder="little")
-        buffer[cls.idx_payload: cls.idx_payload + len(msg.data)] = msg.data
-        buffer[cls.offset_crc + len(msg.data)] = 0x00  # TODO
-        buffer[cls.offset_footer + len(msg.data)] = cls.footer
-        buffer = bytes(buffer)
+        buffer = bytearray(len(msg.data) + cls.protocol_overhead)
+        cls.encode_into(msg, buffer)
         return buffer
 
+    @classmethod
+    def encode_into(cls, msg: UDP_Base_Message, buffer: bytearray, offset: int = 0) -> int:
+        """
+        Pack the message into `buffer` at `offset`, which must have room for the whole message. Returns the number of
+        bytes written.
+        """
+        data = msg.data
+        payload_len = len(data)
+        if payload_len > cls.max_payload:
+            raise ValueError(f"UDP payload too long ({payload_len} bytes)")
+
+        cls.header.pack_into(buffer, offset, cls.header_0, cls.header_1, _ipv4_bytes(msg.source),
+                             getattr(msg, 'data_protocol_id', 0), _ipv4_bytes(msg.address)[1:], 0, payload_len)
+
+        start = offset + cls.idx_payload
+        end = start + payload_len
+        buffer[start:end] = data
+        buffer[end] = crc8(memoryview(buffer)[start:end])
+        buffer[end + 1] = cls.footer
+        return payload_len + cls.protocol_overhead
+
     @classmethod
     def check(cls, data):
+        if len(data) < cls.protocol_overhead:
+            return 0
         if not data[0] == cls.header_0:
             return 0
         if not data[1] == cls.header_1:
             return 0
 
-        payload_len = int.from_bytes(data[cls.idx_len], byteorder="little")
+        payload_len = data[11] | (data[12] << 8)
         if not len(data) == payload_len + cls.protocol_overhead:
             return 0
 
         if not data[payload_len + cls.offset_footer] == cls.footer:
             return 0
 
+        crc = data[payload_len + cls.offset_crc]
+        if (crc or not cls.accept_unchecked_crc) and crc != crc8(data[cls.idx_payload:cls.idx_payload + payload_len]):
+            return 0
+
         return 1
 
 
@@ -37,8 +37,8 @@ class UDP_JSON_Protocol(Protocol):
 
     # ------------------------------------------------------------------------------------------------------------------
     @classmethod
-    def decode(cls, data: bytes):
-        assert (isinstance(data, bytes))
+    def decode(cls, data: bytes | memoryview):
+        assert (isinstance(data, (bytes, bytearray, memoryview)))
         msg = cls.Message()
         msg_content = orjson.loads(data)
 
@@ -9,6 +9,7 @@ from core.utils.callbacks import callback_definition, CallbackContainer
 from core.utils.network.network import getIPAddressOfDevice
 import atexit
 from core.utils.logging_utils import Logger
+from core.utils.time import get_scheduler, PeriodicJob
 
 logger = Logger('UDP')
 logger.setLevel('INFO')
@@ -24,7 +25,7 @@ class UDP_Broadcast:
     message: UDP_JSON_Message = None
     port: int = None
     time: float = 1
-    _last_sent: float = 0
+    _job: PeriodicJob | None = None
 
 
 ########################################################################################################################
@@ -36,9 +37,10 @@ class UDP:
     _sockets: dict[int, UDP_Socket]
     _ports: list
     _broadcasts: list[UDP_Broadcast]
+    _resolved: dict[str, tuple[str | None, float]]
+    resolve_ttl: float = 30.0
 
-    _thread: threading.Thread
-    _exit: bool
+    _running: bool
 
     def __init__(self, address, port=None):
         atexit.register(self.close)
@@ -66,8 +68,10 @@ class UDP:
             self._sockets[port] = socket
 
         self._broadcasts = []
-        self._thread = threading.Thread(target=self._threadFunction)
-        self._exit = False
+        self._resolved = {}
+        # Per sending thread, reused for every message
+        self._tx_buffers = threading.local()
+        self._running = False
 
         self.callbacks = UDP_Callbacks()
 
@@ -80,16 +84,21 @@ class UDP:
         logger.info(f"Starting UDP on {self.address}")
         for socket in self._sockets.values():
             socket.start()
-        self._thread.start()
+        self._running = True
+        for broadcast in self._broadcasts:
+            self._scheduleBroadcast(broadcast)
 
     # ------------------------------------------------------------------------------------------------------------------
     def close(self):
+        self._running = False
+        for broadcast in getattr(self, '_broadcasts', []):
+            if broadcast._job is not None:
+                broadcast._job.cancel()
+                broadcast._job = None
+
         for socket in self._sockets.values():
             socket.close()
 
-        if hasattr(self, '_thread') and self._thread is not None and self._thread.is_alive():
-            self._thread.join()
-
     # ------------------------------------------------------------------------------------------------------------------
     def send(self, message, address='<broadcast>', port: int = None):
 
@@ -111,18 +120,17 @@ class UDP:
         if not isinstance(broadcast, UDP_Broadcast):
             raise Exception('broadcast must be a UDP_Broadcast')
         self._broadcasts.append(broadcast)
+        if self._running:
+            self._scheduleBroadcast(broadcast)
 
     # ------------------------------------------------------------------------------------------------------------------
-    def _threadFunction(self):
+    def _scheduleBroadcast(self, broadcast: UDP_Broadcast):
+        # Sent right away and then every broadcast.time seconds from the shared scheduler
+        broadcast._job = get_scheduler().every(broadcast.time, self._sendBroadcast, broadcast, delay=0,
+                                               name=f"udp_broadcast_{broadcast.port}")
 
-        while not self._exit:
-            current_time = time.time()
-            # Check the broadcasts
-            for broadcast in self._broadcasts:
-                if current_time > (broadcast.time + broadcast._last_sent):
-                    broadcast._last_sent = current_time
-                    self.send(message=broadcast.message, address='<broadcast>', port=broadcast.port)
-            time.sleep(0.01)
+    def _sendBroadcast(self, broadcast: UDP_Broadcast):
+        self.send(message=broadcast.message, address='<broadcast>', port=broadcast.port)
 
     # ------------------------------------------------------------------------------------------------------------------
     def _rxCallback(self, data, address, port, *args, **kwargs):
@@ -144,7 +152,7 @@ class UDP:
         source_address = self.address
 
         # Get the target address
-        target_address = getIPAddressOfDevice(address)
+        target_address = self._resolve(address)
 
         # Generate the payload
         data = message.encode(source_address=source_address, target_address=target_address, port=port)
@@ -162,12 +170,30 @@ class UDP:
             base_message.source = source_address
             base_message.address = target_address
             base_message.data = data
-            buffer = base_message.encode()
+
+            # Packed into this thread's buffer. The returned view is only valid until the next message is encoded
+            buffer = getattr(self._tx_buffers, 'buffer', None)
+            if buffer is None:
+                buffer = self._tx_buffers.buffer = bytearray(self.base_protocol.max_payload +
+                                                             self.base_protocol.protocol_overhead)
+            length = self.base_protocol.encode_into(base_message, buffer)
+            buffer = memoryview(buffer)[:length]
         else:
             buffer = data
 
         return buffer
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def _resolve(self, address):
+        # Hostname lookups are cached for resolve_ttl seconds
+        now = time.monotonic()
+        cached = self._resolved.get(address)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        target_address = getIPAddressOfDevice(address)
+        self._resolved[address] = (target_address, now + self.resolve_ttl)
+        return target_address
+
     # ------------------------------------------------------------------------------------------------------------------
     def _decodeMessage(self, data, *args, **kwargs):
         # Try to decode the message into a UDP Base Message
@@ -1,10 +1,13 @@
-import queue
+import dataclasses
+import selectors
 import socket
+import struct
 import threading
 import time
 from cobs import cobs
 
 from core.utils.callbacks import callback_definition, CallbackContainer
+from core.utils.exit import register_exit_callback
 from core.utils.logging_utils import Logger
 from core.utils.os_utils import getOS
 
@@ -17,23 +20,200 @@ class UDPSocketCallbacks:
     rx: CallbackContainer
 
 
+# Largest payload of an IPv4 UDP datagram
+MAX_DATAGRAM_SIZE = 65507
+
+# Kernel receive timestamps, used for latency measurement. Not exported by the socket module
+_SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35)
+_TIMESPEC = struct.Struct('@qq')
+
+
+# ======================================================================================================================
+@dataclasses.dataclass
+class UDPReceiverStats:
+    wakeups: int = 0  # Returns from select() with at least one readable socket
+    datagrams: int = 0
+    bytes: int = 0
+    max_batch: int = 0  # Most datagrams drained from one socket in one go
+    cpu_time: float = 0.0  # CPU seconds used by the receiver thread
+    # Kernel arrival -> callback dispatch. Only measured with measure_latency=True (Linux)
+    latency_samples: int = 0
+    latency_mean: float = 0.0
+    latency_max: float = 0.0
+
+
+class UDP_Receiver:
+    """
+    Receives on any number of UDP_Sockets from a single thread.
+
+    The thread sleeps in the selector (epoll on Linux) until a socket is readable, then drains up to `max_batch`
+    datagrams from it into the socket's preallocated buffer before serving the next one. There is no polling, so an
+    idle receiver uses no CPU, and datagrams are dispatched as soon as they arrive. Callbacks run on the receiver
+    thread and must not block.
+    """
+
+    def __init__(self, max_batch: int = 64, measure_latency: bool = False, name: str = 'udp_receiver'):
+        self.max_batch = max_batch
+        self.measure_latency = measure_latency and getOS() == 'Linux'
+        self.name = name
+
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._exit = False
+
+        # Wakes the thread up for stop() and for selectors that only pick up new sockets on the next select()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+        self._stats = UDPReceiverStats()
+        self._latency_sum = 0.0
+
+        register_exit_callback(self.stop)
+
+    # === METHODS ======================================================================================================
+    def add(self, udp_socket: 'UDP_Socket'):
+        if self.measure_latency:
+            udp_socket._socket.setsockopt(socket.SOL_SOCKET, _SO_TIMESTAMPNS, 1)
+        with self._lock:
+            self._selector.register(udp_socket._socket, selectors.EVENT_READ, udp_socket)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._task, name=self.name, daemon=True)
+                self._thread.start()
+        self._wake()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def remove(self, udp_socket: 'UDP_Socket'):
+        with self._lock:
+            try:
+                self._selector.unregister(udp_socket._socket)
+            except (KeyError, ValueError):
+                ...  # Not registered or already closed
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stop(self, *args, **kwargs):
+        self._exit = True
+        self._wake()
+        if self._thread is not None and self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stats(self) -> UDPReceiverStats:
+        return dataclasses.replace(self._stats)
+
+    def reset_stats(self):
+        self._stats = UDPReceiverStats(cpu_time=self._stats.cpu_time)
+        self._latency_sum = 0.0
+
+    # === PRIVATE METHODS ==============================================================================================
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\x00')
+        except OSError:
+            ...
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _task(self):
+        while not self._exit:
+            events = self._selector.select()
+            if self._exit:
+                break
+
+            cpu_start = time.thread_time()
+            readable = False
+            for key, _ in events:
+                if key.data is None:
+                    try:
+                        self._wake_r.recv(64)
+                    except BlockingIOError:
+                        ...
+                    continue
+                readable = True
+                self._drain(key.data)
+
+            if readable:
+                self._stats.wakeups += 1
+            self._stats.cpu_time += time.thread_time() - cpu_start
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _drain(self, udp_socket: 'UDP_Socket'):
+        sock = udp_socket._socket
+        buffer = udp_socket._buffer
+        view = udp_socket._buffer_view
+        stats = self._stats
+
+        count = 0
+        while count < self.max_batch:
+            try:
+                if self.measure_latency:
+                    n, ancdata, _, address = sock.recvmsg_into([buffer], 64)
+                else:
+                    n, address = sock.recvfrom_into(buffer)
+                    ancdata = None
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                break  # Closed in between
+
+            count += 1
+            stats.datagrams += 1
+            stats.bytes += n
+            if ancdata:
+                self._recordLatency(ancdata)
+
+            try:
+                udp_socket._onDatagram(bytes(view[:n]), address)
+            except Exception as e:
+                logger.error(f"Error in UDP rx callback on port {udp_socket.port}: {e}")
+
+        if count > stats.max_batch:
+            stats.max_batch = count
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _recordLatency(self, ancdata):
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == _SO_TIMESTAMPNS and len(data) >= _TIMESPEC.size:
+                seconds, nanoseconds = _TIMESPEC.unpack_from(data)
+                latency = time.time() - (seconds + nanoseconds * 1e-9)
+                stats = self._stats
+                stats.latency_samples += 1
+                self._latency_sum += latency
+                stats.latency_mean = self._latency_sum / stats.latency_samples
+                if latency > stats.latency_max:
+                    stats.latency_max = latency
+                return
+
+
+_default_receiver: UDP_Receiver | None = None
+_default_receiver_lock = threading.Lock()
+
+
+def get_udp_receiver() -> UDP_Receiver:
+    """Process-wide UDP_Receiver, created on first use."""
+    global _default_receiver
+    with _default_receiver_lock:
+        if _default_receiver is None:
+            _default_receiver = UDP_Receiver()
+        return _default_receiver
+
+
 ########################################################################################################################
 class UDP_Socket:
     _socket: socket.socket
     address: str
     port: int
     callbacks: UDPSocketCallbacks
-    _thread: threading.Thread
+    receiver: UDP_Receiver
 
     config: dict
     _exit: bool
 
     _filterBroadcastEcho: bool
-    _rx_queue: queue.Queue
-    _thread_timeout = 0.001
+    _buffer: bytearray
 
     # === INIT =========================================================================================================
-    def __init__(self, address, port, config: dict = None):
+    def __init__(self, address, port, config: dict = None, receiver: UDP_Receiver = None):
 
         self.address = address
 
@@ -49,6 +229,8 @@ class UDP_Socket:
         default_config = {
             'cobs': False,
             'filterBroadcastEcho': False,
+            'datagram_size': MAX_DATAGRAM_SIZE,  # Longer datagrams are truncated
+            'receive_buffer_size': None,  # SO_RCVBUF in bytes, for bursts. None keeps the OS default
         }
 
         self.config = {**default_config, **config}
@@ -65,19 +247,29 @@ class UDP_Socket:
                 self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
 
 
+        if self.config['receive_buffer_size']:
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.config['receive_buffer_size'])
+
         self._socket.settimeout(0)
 
         # set ip and port
         self._socket.bind((str(self.address), self.port))
         # self._socket.bind(("", self.port))  # FOR RASPBERRY PI
-        self._thread = threading.Thread(target=self._thread_fun)
+
+        # Received into by the receiver thread, reused for every datagram
+        self._buffer = bytearray(self.config['datagram_size'])
+        self._buffer_view = memoryview(self._buffer)
+
+        self.receiver = receiver if receiver is not None else get_udp_receiver()
+        self._started = False
         self._exit = False
 
     # === METHODS ======================================================================================================
     def start(self):
         logger.info(
             f"Starting UDP socket on {self.address}:{self.port} (Filter Broadcast Echo={self.config['filterBroadcastEcho']})")
-        self._thread.start()
+        self._started = True
+        self.receiver.add(self)
 
     # ------------------------------------------------------------------------------------------------------------------
     def send(self, data, address: str = '<broadcast>'):
@@ -104,25 +296,18 @@ class UDP_Socket:
         """
         self._exit = True
 
-        if hasattr(self, '_thread') and self._thread.is_alive():
-            self._thread.join()
+        if self._started:
+            self._started = False
+            self.receiver.remove(self)
+            logger.info(f"Closing UDP Server on {self.address}: {self.port}")
+        self._socket.close()
 
     # ------------------------------------------------------------------------------------------------------------------
-    def _thread_fun(self):
-        while not self._exit:
-
-            try:
-                data, address = self._socket.recvfrom(1028)
-                if len(data) > 0:
-                    if address[0] == self.address and self.config['filterBroadcastEcho']:
-                        ...
-                    else:
-                        for callback in self.callbacks.rx:
-                            callback(data, address, self.port)
-
-            except BlockingIOError:
-                pass
-
-            time.sleep(self._thread_timeout)
-
-        logger.info(f"Closing UDP Server on {self.address}: {self.port}")
+    def _onDatagram(self, data: bytes, address):
+        # Called by the receiver thread
+        if not data:
+            return
+        if address[0] == self.address and self.config['filterBroadcastEcho']:
+            return
+        for callback in self.callbacks.rx:
+            callback(data, address, self.port)
@@ -1,6 +1,33 @@
 import os
 import csv
 import enum
+import itertools
+from typing import Iterator
+
+import numpy as np
+
+from core.utils.dict_utils import cache_dict_paths_for_flatten, optimized_flatten_dict
+
+# ======================================================================================================================
+# File layout written by CSVLogger:
+#   <custom text header lines>
+#   index,<flattened key>,...        keys of nested dicts joined with '.'
+#   int,<type>,...                   'int', 'float', 'bool' or 'str'
+#   <rows>
+# ======================================================================================================================
+_CONVERTERS = {
+    'int': int,
+    'float': float,
+    'bool': lambda value: value.lower() in ('true', '1', 'yes'),
+}
+
+# Column type -> NumPy dtype of the array readers
+_DTYPES = {
+    'int': np.int64,
+    'float': np.float64,
+    'bool': np.bool_,
+    'str': object,
+}
 
 
 # ======================================================================================================================
@@ -17,36 +44,105 @@ def read_csv_file(file_path, meta_lines=1):
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"The file '{file_path}' does not exist.")
 
-    with open(file_path, mode='r', newline='', encoding='utf-8') as file:
-        lines = file.readlines()
-
-    meta = lines[:meta_lines]  # Extract metadata lines
-    csv_data_lines = lines[meta_lines:]  # Remaining lines are CSV data
-
     data = []
-    if csv_data_lines:
-        reader = csv.reader(csv_data_lines)
-        headers = next(reader)
+    with open(file_path, mode='r', newline='', encoding='utf-8') as file:
+        meta = _read_meta(file, meta_lines)
+        reader = csv.reader(file)
+        headers = next(reader, None)
+        if headers is None:
+            return {'meta': meta, 'data': data}
         types = next(reader)
 
-        def convert_value(value, dtype):
-            if dtype == 'int':
-                return int(value)
-            elif dtype == 'float':
-                return float(value)
-            elif dtype == 'bool':
-                return value.lower() in ('true', '1', 'yes')
-            else:  # default to string
-                return value
-
+        # Conversion and nesting are resolved once per column instead of once per cell
+        columns = [(_CONVERTERS.get(dtype), header.split('.')) for header, dtype in zip(headers, types)]
         for row in reader:
-            converted_row = {
-                headers[i]: convert_value(row[i], types[i]) for i in range(len(headers))
-            }
-            data.append(_reconstruct_dict(converted_row))
+            nested = {}
+            for (convert, path), value in zip(columns, row):
+                d = nested
+                for part in path[:-1]:
+                    d = d.setdefault(part, {})
+                if convert is not None:
+                    value = convert(value) if value != '' else None  # Empty: key was missing in the logged row
+                d[path[-1]] = value
+            data.append(nested)
 
     return {'meta': meta, 'data': data}
 
+
+def read_csv_header(file_path, meta_lines=1) -> tuple[list[str], list[str], list[str]]:
+    """
+    Reads the metadata lines, the column names and the column types of a CSV file written by CSVLogger.
+    """
+    with open(file_path, mode='r', newline='', encoding='utf-8') as file:
+        meta = _read_meta(file, meta_lines)
+        reader = csv.reader(file)
+        return meta, next(reader), next(reader)
+
+
+def iter_csv_arrays(file_path, chunk_rows: int = 65536, meta_lines=1,
+                    columns: list[str] | None = None) -> Iterator[np.ndarray]:
+    """
+    Reads a CSV file written by CSVLogger in chunks of up to `chunk_rows` rows. Every chunk is a structured array with
+    one field per (flattened) column, typed by the type row of the file; 'str' columns are object arrays.
+
+    :param columns: Flattened column names to read, all columns if None.
+    """
+    with open(file_path, mode='r', newline='', encoding='utf-8') as file:
+        _read_meta(file, meta_lines)
+        header_lines = list(itertools.islice(file, 2))
+        if len(header_lines) < 2:
+            return
+        headers, types = list(csv.reader(header_lines))
+
+        use = list(range(len(headers))) if columns is None else [headers.index(column) for column in columns]
+        dtype = np.dtype([(headers[i], _DTYPES.get(types[i], object)) for i in use])
+        converters = {i: _CONVERTERS['bool'] for i in use if types[i] == 'bool'}
+
+        while True:
+            lines = list(itertools.islice(file, chunk_rows))
+            if not lines:
+                return
+            try:
+                yield np.loadtxt(lines, dtype=dtype, delimiter=',', quotechar='"', usecols=use,
+                                 converters=converters or None, comments=None, ndmin=1, encoding=None)
+            except ValueError:
+                # Empty cells (keys missing from a row) cannot be parsed by loadtxt
+                yield _parse_rows(lines, dtype, use, [types[i] for i in use])
+
+
+def read_csv_array(file_path, meta_lines=1, columns: list[str] | None = None) -> np.ndarray:
+    """
+    Reads a whole CSV file written by CSVLogger into one structured array, see iter_csv_arrays.
+    """
+    chunks = list(iter_csv_arrays(file_path, meta_lines=meta_lines, columns=columns))
+    if not chunks:
+        return np.empty(0)
+    return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+
+def _read_meta(file, meta_lines: int) -> list[str]:
+    meta = []
+    for _ in range(meta_lines):
+        line = file.readline()
+        if not line:
+            break
+        meta.append(line)
+    return meta
+
+
+def _parse_rows(lines: list[str], dtype: np.dtype, use: list[int], types: list[str]) -> np.ndarray:
+    # Slow path: empty cells become NaN (float), 0 (int), False (bool) or '' (str)
+    missing = {'float': np.nan, 'int': 0, 'bool': False}
+    array = np.empty(len(lines), dtype=dtype)
+    rows = list(csv.reader(lines))
+    for name, i, type_ in zip(dtype.names, use, types):
+        convert = _CONVERTERS.get(type_)
+        default = missing.get(type_, '')
+        array[name] = [(convert(row[i]) if convert is not None else row[i]) if i < len(row) and row[i] != ''
+                       else default for row in rows]
+    return array
+
+
 def _reconstruct_dict(flat_dict, sep='.'):
     """
     Reconstructs a nested dictionary from a flattened dictionary.
@@ -66,13 +162,11 @@ def _reconstruct_dict(flat_dict, sep='.'):
 
 # ======================================================================================================================
 class CSVLogger:
-    def __init__(self):
+    def __init__(self, buffer_rows: int = 1000):
         """
-        Initializes a CSVLogger instance and creates the specified file in the folder.
-        If the file already exists, it is deleted and a new one is created.
-        :param file: Name of the CSV file.
-        :param folder: Directory where the file will be created.
-        :param custom_text_header: Text to be added at the top of the CSV file (optional).
+        Initializes a CSVLogger instance. Rows are collected and written in blocks of `buffer_rows`; call flush() to
+        write them earlier.
+        :param buffer_rows: Number of rows collected before they are written to the file.
         """
         self.file_path = None
         self.file = None
@@ -81,10 +175,24 @@ class CSVLogger:
         self.fieldtypes = None
         self.is_closed = False
         self.index = 0  # Initialize the index column
+        self.buffer_rows = buffer_rows
+
+        self._paths = None  # Flattened key -> key path, cached from the first row
+        self._rows = []
 
     def make_file(self, file, folder="./", custom_text_header=None):
+        """
+        Creates the specified file in the folder. If the file already exists, it is deleted and a new one is created.
+        :param file: Name of the CSV file.
+        :param folder: Directory where the file will be created.
+        :param custom_text_header: Text to be added at the top of the CSV file (optional).
+        """
 
         self.index = 0  # Initialize the index column
+        self.fieldnames = None
+        self.fieldtypes = None
+        self._paths = None
+        self._rows = []
 
         self.file_path = os.path.join(folder, file)
         # Ensure the folder exists
@@ -96,6 +204,7 @@ class CSVLogger:
 
         # Open the file for writing
         self.file = open(self.file_path, mode='w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
 
         # Write custom text header if provided
         if custom_text_header:
@@ -106,50 +215,59 @@ class CSVLogger:
 
     def write_data(self, data):
         """
-        Appends data to the CSV file. The data should be a dictionary or a list of dictionaries.
-        Automatically writes the header if this is the first data being written.
-        :param data: A dictionary or a list of dictionaries to append to the CSV file.
+        Appends data to the CSV file. The data should be a dictionary, a list of dictionaries or a NumPy structured
+        array (nested fields are flattened like nested dictionaries). The header is taken from the first data written;
+        later rows are flattened along the cached key paths of the header, missing keys are left empty.
+        :param data: A dictionary, a list of dictionaries or a structured array to append to the CSV file.
         """
         if self.is_closed:
             raise RuntimeError("CSVLogger is already closed; cannot log more data.")
 
+        if isinstance(data, np.ndarray):
+            self._write_array(data)
+            return
+
         if not isinstance(data, list):
             data = [data]
-
-        # Flatten data to handle nested dictionaries
-        flattened_data = [self._flatten_dict(d) for d in data]
-
-        for i, row in enumerate(flattened_data):
-            flattened_data[i] = {'index': self.index, **row}
-            self.index += 1
-
-        if self.fieldnames is None:
-            # Extract fieldnames and fieldtypes from the first dictionary
-
-            self.fieldnames = list(flattened_data[0].keys())
-            self.fieldtypes = [self._infer_type(flattened_data[0][key]) for key in
-                                         list(flattened_data[0].keys())]
-
-
-            self.writer = csv.writer(self.file)
-            self.writer.writerow(self.fieldnames)
-            self.writer.writerow(self.fieldtypes)
-
-
-        for row in flattened_data:
-            self.writer.writerow([row.get(field, '') for field in self.fieldnames])
+        if not data:
+            return
+
+        if self._paths is None:
+            flat, paths = cache_dict_paths_for_flatten(data[0])
+            self._write_header(list(flat), ['int'] + [self._infer_type(value) for value in flat.values()])
+            self._paths = paths
+
+        paths = self._paths
+        rows = self._rows
+        index = self.index
+        for d in data:
+            rows.append([index, *optimized_flatten_dict(d, paths).values()])
+            index += 1
+        self.index = index
+
+        if len(rows) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the collected rows to the file.
+        """
+        if self._rows and self.writer is not None:
+            self.writer.writerows(self._rows)
+            self._rows = []
+            self.file.flush()
 
     def close(self):
         """
-        Closes the CSV file.
+        Writes the remaining rows and closes the CSV file.
         """
         if not self.is_closed:
             if self.file:
+                self.flush()
                 self.file.close()
             self.is_closed = True
         self.file = None
 
-
     def log_event(self, data):
         """
         Appends a single event's data to the CSV file. A shorthand for append_data.
@@ -157,24 +275,47 @@ class CSVLogger:
         """
         self.write_data(data)
 
-    def _flatten_dict(self, d, parent_key='', sep='.'):
-        """
-        Recursively flattens a dictionary, adding hierarchical keys with a separator.
-        :param d: Dictionary to flatten
-        :param parent_key: Key under which current dictionary is nested
-        :param sep: Separator for hierarchical keys
-        :return: Flattened dictionary
-        """
-        items = []
-        for k, v in d.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
-            if isinstance(v, dict):
-                items.extend(self._flatten_dict(v, new_key, sep=sep).items())
-            elif isinstance(v, enum.IntEnum):
-                items.append((new_key, int(v)))  # Store IntEnum as its int value
+    def _write_header(self, keys: list[str], types: list[str]):
+        self.fieldnames = ['index'] + keys
+        self.fieldtypes = types
+        self.writer.writerow(self.fieldnames)
+        self.writer.writerow(self.fieldtypes)
+
+    def _write_array(self, records: np.ndarray):
+        columns = self._array_columns(records)
+        if self._paths is None:
+            self._write_header(list(columns), ['int'] + [self._array_type(column) for column in columns.values()])
+            self._paths = {key: key.split('.') for key in columns}
+
+        n = len(records)
+        values = [columns[key].tolist() if key in columns else [None] * n for key in self._paths]
+        self.flush()
+        self.writer.writerows(zip(range(self.index, self.index + n), *values))
+        self.index += n
+
+    def _array_columns(self, records: np.ndarray, prefix: str = '') -> dict[str, np.ndarray]:
+        columns = {}
+        for name in records.dtype.names:
+            column = records[name]
+            if column.dtype.names:
+                columns.update(self._array_columns(column, f"{prefix}{name}."))
+            elif column.ndim > 1:
+                raise ValueError(f"Field \"{prefix}{name}\" is an array; only scalar fields can be written as columns")
             else:
-                items.append((new_key, v))
-        return dict(items)
+                columns[f"{prefix}{name}"] = column
+        return columns
+
+    @staticmethod
+    def _array_type(column: np.ndarray) -> str:
+        match column.dtype.kind:
+            case 'b':
+                return 'bool'
+            case 'i' | 'u':
+                return 'int'
+            case 'f':
+                return 'float'
+            case _:
+                return 'str'
 
     def _infer_type(self, value):
         """
@@ -198,4 +339,3 @@ class CSVLogger:
         Ensures the CSV file is properly closed when the logger is destroyed.
         """
         self.close()
-
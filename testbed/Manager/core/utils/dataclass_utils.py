@@ -781,13 +781,9 @@ def asdict_optimized(obj):
     Returns:
         A dictionary representation of the dataclass.
     """
-    if is_dataclass(obj):
-        result = {}
-        for f in get_dataclass_fields(type(obj)):
-            value = getattr(obj, f.name)
-            # Recursively convert nested dataclasses or collections
-            result[f.name] = asdict_optimized(value)
-        return result
+    if is_dataclass(obj) and not isinstance(obj, type):
+        # Compiled per-type encoder, see get_codec()
+        return encode_dataclass(obj)
     elif isinstance(obj, (list, tuple)):
         # Preserve the original type (list or tuple) for sequences
         return type(obj)(asdict_optimized(item) for item in obj)
@@ -997,6 +993,202 @@ def _compile_hint_copier(hint: Any):
     return _compile_field_copier(hint, shallow=False)
 
 
+# ======================================================================================================================
+# ======================================================================================================================
+# Compiled dataclass codecs
+# - Generates one encoder (instance -> dict) and one decoder (dict -> instance) per dataclass type, on first use.
+# - Field access is unrolled into straight-line code, so there is no per-field loop, hint lookup or type dispatch.
+# - Encoding matches asdict_optimized: nested dataclasses, lists, tuples and dicts are converted recursively.
+# - Decoding matches from_dict for the common cases (defaults, default factories, nested and Optional dataclasses,
+#   lists/dicts of dataclasses, IntEnums) but does NOT validate field types. Use from_dict where input is untrusted
+#   and type errors must be reported.
+# ======================================================================================================================
+_ATOMIC_TYPES = frozenset(_ATOMIC)
+_MISSING = object()
+
+
+@dataclasses.dataclass(frozen=True)
+class DataclassCodec:
+    cls: type
+    encode: Any
+    decode: Any
+
+
+_codecs: Dict[type, DataclassCodec] = {}
+_encoders: Dict[type, Any] = {}
+
+
+def get_codec(cls: type) -> DataclassCodec:
+    codec = _codecs.get(cls)
+    if codec is None:
+        if not (isinstance(cls, type) and is_dataclass(cls)):
+            raise TypeError(f"{cls!r} is not a dataclass type")
+        codec = DataclassCodec(cls=cls, encode=_compile_encoder(cls), decode=_compile_decoder(cls))
+        _encoders[cls] = codec.encode
+        _codecs[cls] = codec
+    return codec
+
+
+def register_codecs(*classes: type) -> None:
+    """
+    Compile the codecs of the given dataclass types up front, so the first message does not pay for it.
+    """
+    for cls in classes:
+        get_codec(cls)
+
+
+def encode_dataclass(obj: Any) -> dict:
+    encoder = _encoders.get(obj.__class__)
+    if encoder is None:
+        encoder = get_codec(obj.__class__).encode
+    return encoder(obj)
+
+
+def decode_dataclass(cls: Type[T], data: Mapping) -> T:
+    codec = _codecs.get(cls)
+    if codec is None:
+        codec = get_codec(cls)
+    return codec.decode(data)
+
+
+# ------------------------------- encoder -------------------------------
+def _encode_value(v: Any) -> Any:
+    cls = v.__class__
+    if cls in _ATOMIC_TYPES:
+        return v
+    encoder = _encoders.get(cls)
+    if encoder is not None:
+        return encoder(v)
+    if cls is dict:
+        return {key: _encode_value(value) for key, value in v.items()}
+    if cls is list:
+        return [_encode_value(item) for item in v]
+    if is_dataclass(v) and not isinstance(v, type):
+        return get_codec(cls).encode(v)
+    if isinstance(v, dict):
+        return {key: _encode_value(value) for key, value in v.items()}
+    if isinstance(v, (list, tuple)):
+        return cls(_encode_value(item) for item in v)
+    return v
+
+
+def _compile_encoder(cls: type):
+    names = [f.name for f in fields(cls)]
+    items = ', '.join(f"'{name}': _e(obj.{name})" for name in names)
+    source = f"def encode(obj):\n    return {{{items}}}\n"
+    namespace = {'_e': _encode_value}
+    exec(source, namespace)
+    encoder = namespace['encode']
+    encoder.__qualname__ = f"encode_{cls.__name__}"
+    return encoder
+
+
+# ------------------------------- decoder -------------------------------
+def _compile_value_decoder(hint: Any):
+    """
+    Returns a converter for raw values of the given hint, or None if the raw value is used as-is.
+    """
+    if isinstance(hint, type):
+        if is_dataclass(hint):
+            def _decode_nested(v, _cls=hint):
+                return decode_dataclass(_cls, v) if isinstance(v, Mapping) else v
+
+            return _decode_nested
+        if issubclass(hint, IntEnum):
+            return hint
+        return None
+
+    origin = get_origin(hint)
+    args = get_args(hint)
+
+    if is_union(hint):
+        non_none = [a for a in args if a is not type(None)]
+        if len(non_none) == 1:
+            return _compile_value_decoder(non_none[0])
+        # Only unions that contain exactly one dataclass can be decoded without trial and error
+        dataclass_args = [a for a in non_none if isinstance(a, type) and is_dataclass(a)]
+        if len(dataclass_args) == 1:
+            return _compile_value_decoder(dataclass_args[0])
+        return None
+
+    if origin in (list, List, Sequence) and args:
+        item = _compile_value_decoder(args[0])
+        if item is None:
+            return None
+        return lambda v: [item(e) for e in v] if isinstance(v, list) else v
+
+    if origin in (dict, Dict, Mapping) and len(args) == 2:
+        item = _compile_value_decoder(args[1])
+        if item is None:
+            return None
+        return lambda v: {key: item(value) for key, value in v.items()} if isinstance(v, Mapping) else v
+
+    return None
+
+
+def _compile_decoder(cls: type):
+    try:
+        hints = get_type_hints(cls)
+    except Exception:
+        hints = {}
+
+    namespace: Dict[str, Any] = {'_cls': cls, '_MISSING': _MISSING, 'MissingValueError': MissingValueError}
+    body = []
+    init_args = []
+    post_init = []
+
+    for i, f in enumerate(fields(cls)):
+        converter = _compile_value_decoder(hints.get(f.name, Any))
+        body.append(f"    v{i} = data.get('{f.name}', _MISSING)")
+
+        if f.default is not dataclasses.MISSING:
+            namespace[f"_d{i}"] = f.default
+            missing = f"v{i} = _d{i}"
+        elif f.default_factory is not dataclasses.MISSING:
+            namespace[f"_f{i}"] = f.default_factory
+            missing = f"v{i} = _f{i}()"
+        elif f.init:
+            missing = f"raise MissingValueError('{f.name}')"
+        else:
+            missing = None
+
+        if converter is not None:
+            namespace[f"_c{i}"] = converter
+            present = f"v{i} = _c{i}(v{i}) if v{i} is not None else v{i}"
+        else:
+            present = None
+
+        if missing is not None:
+            body.append(f"    if v{i} is _MISSING:")
+            body.append(f"        {missing}")
+            if present is not None:
+                body.append("    else:")
+                body.append(f"        {present}")
+        elif present is not None:
+            body.append(f"    if v{i} is not _MISSING:")
+            body.append(f"        {present}")
+
+        if f.init:
+            init_args.append(f"{f.name}=v{i}")
+        elif not is_frozen(cls):
+            post_init.append((i, f.name, missing is None))
+
+    body.append(f"    obj = _cls({', '.join(init_args)})")
+    for i, name, may_be_missing in post_init:
+        if may_be_missing:
+            body.append(f"    if v{i} is not _MISSING:")
+            body.append(f"        obj.{name} = v{i}")
+        else:
+            body.append(f"    obj.{name} = v{i}")
+    body.append("    return obj")
+
+    source = "def decode(data):\n" + "\n".join(body) + "\n"
+    exec(source, namespace)
+    decoder = namespace['decode']
+    decoder.__qualname__ = f"decode_{cls.__name__}"
+    return decoder
+
+
 # Example usage and simple test of the implemented functions
 
 if __name__ == "__main__":
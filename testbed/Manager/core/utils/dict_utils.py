@@ -1,3 +1,4 @@
+import copy
 import enum
 import time
 
@@ -88,6 +89,32 @@ def optimized_deepcopy(d, structure=None):
         return new_dict
 
 
+# ======================================================================================================================
+class FrozenDict(dict):
+    """
+    Read-only dict used to share one snapshot between many readers.
+
+    Only the top level is guarded; nested containers are shared as well and must be treated as read-only.
+    It still is a dict for isinstance checks and JSON encoding. copy()/deepcopy() return plain, mutable dicts.
+    """
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenDict is read-only. Use copy() or deepcopy() to get a mutable dict.")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
 # ======================================================================================================================
 def cache_dict_paths_for_flatten(d, parent_path=None, parent_key='', sep='.'):
     """
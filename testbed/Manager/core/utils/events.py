@@ -1,22 +1,24 @@
 from __future__ import annotations
 
+import asyncio
 import enum
+import itertools
 import queue
 import threading
 from copy import deepcopy
 import time
 from dataclasses import is_dataclass, dataclass
-from functools import partial
-from typing import Callable, Any, Optional, Union, Literal, TypeAlias, Iterator
+from typing import Callable, Any, Optional, Union, Literal, TypeAlias, Iterator, AsyncIterator
 from collections import deque
 import weakref
 import fnmatch
+import re
 
 # === CUSTOM MODULES ===================================================================================================
 from core.utils.callbacks import callback_definition, CallbackContainer, Callback
 from core.utils.dataclass_utils import deepcopy_dataclass
-from core.utils.dict_utils import optimized_deepcopy
-from core.utils.exit import register_exit_callback
+from core.utils.dict_utils import optimized_deepcopy, FrozenDict
+from core.utils.exit import register_exit_callback, unregister_exit_callback
 from core.utils.logging_utils import Logger
 from core.utils.signature import check_signature
 from core.utils.singleton import _SingletonMeta
@@ -50,6 +52,288 @@ def _check_id(id: str):
     return True
 
 
+# === DISPATCHERS ======================================================================================================
+@dataclass
+class DispatcherStats:
+    submitted: int = 0
+    executed: int = 0
+    dropped: int = 0
+    errors: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    workers: int = 0
+
+
+class CallbackDispatcher:
+    """
+    Base class for the engines that execute Subscriber/SubscriberListener callbacks.
+
+    A dispatcher receives a callable via submit() and decides where it runs. Implementations must never let an
+    exception of the callable escape into the producer (the thread that called Event.set()).
+    """
+    name: str = 'dispatcher'
+
+    def __init__(self):
+        self._stats = DispatcherStats()
+        self._stats_lock = threading.Lock()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def submit(self, func: Callable, *args, **kwargs) -> bool:
+        """Schedule func(*args, **kwargs). Returns False if the call was dropped."""
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stats(self) -> DispatcherStats:
+        with self._stats_lock:
+            return DispatcherStats(**vars(self._stats))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def reset_stats(self):
+        with self._stats_lock:
+            workers = self._stats.workers
+            self._stats = DispatcherStats(workers=workers)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def shutdown(self, wait: bool = False):
+        ...
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _run(self, func: Callable, args, kwargs):
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            with self._stats_lock:
+                self._stats.errors += 1
+            logger.error(f"Error in callback {getattr(func, '__qualname__', func)} ({self.name}): {e}")
+        else:
+            with self._stats_lock:
+                self._stats.executed += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name} {self.stats()}>"
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class InlineDispatcher(CallbackDispatcher):
+    """Runs the callback synchronously in the thread that triggered it."""
+    name = 'inline'
+
+    def submit(self, func: Callable, *args, **kwargs) -> bool:
+        with self._stats_lock:
+            self._stats.submitted += 1
+        self._run(func, args, kwargs)
+        return True
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class ThreadPoolDispatcher(CallbackDispatcher):
+    """
+    Bounded worker pool fed by a bounded FIFO queue.
+
+    overflow:
+      - 'block':       block the producer until there is room (default). Callbacks that submit to their own pool
+                       are never blocked, the queue grows past max_queue for them instead
+      - 'drop_oldest': discard the oldest queued call to make room (suits telemetry, where newer values supersede
+                       older ones)
+      - 'drop_newest': discard the call that is being submitted
+    Dropped calls are counted in the stats and logged as a warning (at most once per second).
+
+    Callbacks should not block. If they do (e.g. waiting for another event or a device response) and every worker
+    has been stuck in a callback for `stall_timeout` seconds, the next submit adds a worker, up to
+    `max_extra_workers` beyond `max_workers`, so the queued calls keep running. Extra workers exit after being idle
+    for EXTRA_WORKER_IDLE_TIME seconds.
+    """
+    name = 'pool'
+
+    EXTRA_WORKER_IDLE_TIME = 5.0
+    DROP_WARNING_INTERVAL = 1.0
+
+    def __init__(self,
+                 max_workers: int = 8,
+                 max_queue: int = 10000,
+                 overflow: Literal['drop_oldest', 'drop_newest', 'block'] = 'block',
+                 name: str | None = None,
+                 max_extra_workers: int = 0,
+                 stall_timeout: float = 0.5):
+        super().__init__()
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        if max_queue < 1:
+            raise ValueError("max_queue must be >= 1")
+        if overflow not in ('drop_oldest', 'drop_newest', 'block'):
+            raise ValueError(f"Invalid overflow policy: {overflow}")
+
+        if name is not None:
+            self.name = name
+
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.max_extra_workers = max_extra_workers
+        self.stall_timeout = stall_timeout
+
+        self._queue: deque[tuple[Callable, tuple, dict]] = deque()
+        self._cv = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._worker_ids = itertools.count()
+        self._idle = 0
+        self._last_progress = time.monotonic()  # Last time a worker took or finished a call
+        self._last_drop_warning = 0.0
+        self._drops_since_warning = 0
+        self._shutdown = False
+
+        register_exit_callback(self.shutdown)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def submit(self, func: Callable, *args, **kwargs) -> bool:
+        with self._cv:
+            if self._shutdown:
+                return False
+
+            with self._stats_lock:
+                self._stats.submitted += 1
+
+            if len(self._queue) >= self.max_queue:
+                if self.overflow == 'drop_newest':
+                    self._dropped_locked()
+                    return False
+                elif self.overflow == 'drop_oldest':
+                    self._queue.popleft()
+                    self._dropped_locked()
+                elif threading.current_thread() not in self._threads:
+                    while len(self._queue) >= self.max_queue and not self._shutdown:
+                        self._grow_if_stalled_locked()
+                        self._cv.wait(self.stall_timeout)
+                    if self._shutdown:
+                        return False
+
+            self._queue.append((func, args, kwargs))
+
+            depth = len(self._queue)
+            with self._stats_lock:
+                self._stats.queue_depth = depth
+                if depth > self._stats.max_queue_depth:
+                    self._stats.max_queue_depth = depth
+
+            # Workers are spawned lazily, only if the idle ones cannot keep up with the queue
+            if depth > self._idle and len(self._threads) < self.max_workers:
+                self._spawn_worker()
+            else:
+                self._grow_if_stalled_locked()
+
+            self._cv.notify()
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def shutdown(self, wait: bool = False):
+        with self._cv:
+            self._shutdown = True
+            self._queue.clear()
+            self._cv.notify_all()
+        unregister_exit_callback(self.shutdown)
+        if wait:
+            for thread in list(self._threads):
+                if thread is not threading.current_thread():
+                    thread.join()
+
+    # === PRIVATE METHODS ==============================================================================================
+    def _spawn_worker(self, extra: bool = False):
+        thread = threading.Thread(target=self._worker, args=(extra,),
+                                  name=f"{self.name}_worker_{next(self._worker_ids)}", daemon=True)
+        self._threads.append(thread)
+        with self._stats_lock:
+            self._stats.workers = len(self._threads)
+        thread.start()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _grow_if_stalled_locked(self):
+        if (self._idle or not self._queue or len(self._threads) >= self.max_workers + self.max_extra_workers
+                or time.monotonic() - self._last_progress < self.stall_timeout):
+            return
+        self._spawn_worker(extra=True)
+        self._last_progress = time.monotonic()  # Give the new worker a chance before adding another one
+        logger.warning(f"All {len(self._threads) - 1} workers of dispatcher {self.name} are blocked in callbacks "
+                       f"for more than {self.stall_timeout} s, added a worker")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _dropped_locked(self):
+        with self._stats_lock:
+            self._stats.dropped += 1
+        self._drops_since_warning += 1
+        now = time.monotonic()
+        if now - self._last_drop_warning >= self.DROP_WARNING_INTERVAL:
+            logger.warning(f"Queue of dispatcher {self.name} is full ({self.max_queue} calls), "
+                           f"dropped {self._drops_since_warning} calls ({self.overflow})")
+            self._last_drop_warning = now
+            self._drops_since_warning = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _worker(self, extra: bool = False):
+        while True:
+            with self._cv:
+                while not self._queue and not self._shutdown:
+                    self._idle += 1
+                    notified = self._cv.wait(self.EXTRA_WORKER_IDLE_TIME if extra else None)
+                    self._idle -= 1
+                    if extra and not notified and not self._queue:
+                        self._threads.remove(threading.current_thread())
+                        with self._stats_lock:
+                            self._stats.workers = len(self._threads)
+                        return
+                if self._shutdown:
+                    return
+                func, args, kwargs = self._queue.popleft()
+                self._last_progress = time.monotonic()
+                with self._stats_lock:
+                    self._stats.queue_depth = len(self._queue)
+                if self.overflow == 'block':
+                    self._cv.notify_all()
+            self._run(func, args, kwargs)
+            self._last_progress = time.monotonic()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class SerialDispatcher(ThreadPoolDispatcher):
+    """Single worker: callbacks run one after another, in submission order."""
+    name = 'serial'
+
+    def __init__(self,
+                 max_queue: int = 1000,
+                 overflow: Literal['drop_oldest', 'drop_newest', 'block'] = 'block',
+                 name: str | None = None):
+        super().__init__(max_workers=1, max_queue=max_queue, overflow=overflow, name=name)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class ThreadPerCallbackDispatcher(CallbackDispatcher):
+    """Legacy behavior: every callback gets a fresh thread. Unbounded, only kept as a fallback."""
+    name = 'thread'
+
+    def submit(self, func: Callable, *args, **kwargs) -> bool:
+        with self._stats_lock:
+            self._stats.submitted += 1
+        threading.Thread(target=self._run, args=(func, args, kwargs), daemon=True).start()
+        return True
+
+
+DispatcherSpec: TypeAlias = Union[CallbackDispatcher, Literal['inline', 'pool', 'serial', 'thread'], None]
+
+
+def _resolve_dispatcher(spec: DispatcherSpec, default: CallbackDispatcher) -> CallbackDispatcher:
+    if spec is None or spec == 'pool':
+        return default
+    if isinstance(spec, CallbackDispatcher):
+        return spec
+    if spec == 'inline':
+        return InlineDispatcher()
+    if spec == 'serial':
+        return SerialDispatcher()
+    if spec == 'thread':
+        return ThreadPerCallbackDispatcher()
+    raise ValueError(f"Invalid dispatcher: {spec}")
+
+
 # === EVENT FLAG =======================================================================================================
 class EventFlag:
     id: str
@@ -119,6 +403,153 @@ def pred_flag_contains(flag_key: str, match_value: Any) -> Predicate:
     return _pred
 
 
+# === EVENT HISTORY ====================================================================================================
+@dataclass
+class EventHistoryStats:
+    entries: int = 0
+    capacity: int = 0
+    appended: int = 0
+    evicted_capacity: int = 0
+    evicted_age: int = 0
+
+
+class EventHistory:
+    """
+    Fixed-capacity ring buffer of (timestamp, flags, payload) entries.
+
+    Timestamps are monotonic, so a parallel timestamp array allows O(log n) lookup of the start of a time window.
+    The physical arrays grow on demand up to `capacity`; after that the oldest entry is overwritten. Not thread-safe,
+    the owning Event guards it with its history lock.
+    """
+    __slots__ = ('capacity', '_ts', '_entries', '_start', '_count', '_stats')
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("History capacity must be >= 1")
+        self.capacity = capacity
+        self._ts: list[float] = []
+        self._entries: list[tuple[float, dict[str, Any], Any] | None] = []
+        self._start = 0
+        self._count = 0
+        self._stats = EventHistoryStats(capacity=capacity)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def append(self, ts: float, flags: dict[str, Any], payload: Any):
+        size = len(self._ts)
+        if self._count == size:
+            if size < self.capacity:
+                self._linearize()
+                self._ts.append(ts)
+                self._entries.append((ts, flags, payload))
+                self._count += 1
+                self._stats.appended += 1
+                return
+            # Full: overwrite the oldest entry
+            self._start = (self._start + 1) % size
+            self._count -= 1
+            self._stats.evicted_capacity += 1
+
+        i = (self._start + self._count) % size
+        self._ts[i] = ts
+        self._entries[i] = (ts, flags, payload)
+        self._count += 1
+        self._stats.appended += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def bisect(self, cutoff: float) -> int:
+        """Logical index of the first entry with timestamp >= cutoff."""
+        ts, start, size = self._ts, self._start, len(self._ts)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ts[(start + mid) % size] < cutoff:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def prune(self, cutoff: float):
+        """Evict all entries older than cutoff."""
+        n = self.bisect(cutoff)
+        if n == 0:
+            return
+        size = len(self._ts)
+        for k in range(n):
+            self._entries[(self._start + k) % size] = None  # release payloads
+        self._start = (self._start + n) % size
+        self._count -= n
+        self._stats.evicted_age += n
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def window(self, cutoff: float) -> Iterator[tuple[float, dict[str, Any], Any]]:
+        """Entries with timestamp >= cutoff, newest first."""
+        entries, start, size = self._entries, self._start, len(self._entries)
+        for k in range(self._count - 1, self.bisect(cutoff) - 1, -1):
+            yield entries[(start + k) % size]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def resize(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("History capacity must be >= 1")
+        self._linearize()
+        if self._count > capacity:
+            drop = self._count - capacity
+            self._stats.evicted_capacity += drop
+            del self._ts[:drop]
+            del self._entries[:drop]
+            self._count = capacity
+        self.capacity = capacity
+        self._stats.capacity = capacity
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def clear(self):
+        self._ts.clear()
+        self._entries.clear()
+        self._start = 0
+        self._count = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stats(self) -> EventHistoryStats:
+        stats = EventHistoryStats(**vars(self._stats))
+        stats.entries = self._count
+        return stats
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _linearize(self):
+        # Rotate the ring so that logical index 0 is physical index 0 and drop unused slots
+        start, count = self._start, self._count
+        size = len(self._ts)
+        if start == 0 and count == size:
+            return
+        idx = [(start + k) % size for k in range(count)]
+        self._ts = [self._ts[i] for i in idx]
+        self._entries = [self._entries[i] for i in idx]
+        self._start = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("history index out of range")
+        return self._entries[(self._start + index) % len(self._entries)]
+
+    def __iter__(self):
+        for k in range(self._count):
+            yield self[k]
+
+    def __reversed__(self):
+        for k in range(self._count - 1, -1, -1):
+            yield self[k]
+
+    def __repr__(self):
+        return f"<EventHistory {self._count}/{self.capacity}>"
+
+
 # === EVENT ============================================================================================================
 @callback_definition
 class EventCallbacks:
@@ -131,23 +562,40 @@ class Event:
     data_type: type | None
     flags: dict[str, EventFlag]
     copy_data_on_set = True
+    copy_on_read = False
     data_is_static_dict: bool
     custom_data_copy_function = None
     max_history_time: float = 10.0  # Seconds
+    max_history_entries: int = 1000
+    max_history_time_limit: float = 60.0  # Upper bound for windows requested by subscribers
 
     parent: EventContainer | None = None
     data: Any
     callbacks: EventCallbacks
-    history: deque[tuple[float, dict[str, Any], Any]]
+    history: EventHistory
     dict_copy_cache = None
 
+    # Copy-on-write snapshot of the subscribers bound to this event. Written by the EventLoop under its lock,
+    # read without any lock in set().
+    _subscribers: tuple[Subscriber, ...] = ()
+
     # === INIT =========================================================================================================
     def __init__(self,
                  id: str = None,
                  data_type: type | None = None,
                  flags: EventFlag | list[EventFlag] = None,
                  copy_data_on_set: bool = True,
-                 data_is_static_dict: bool = False, ):
+                 data_is_static_dict: bool = False,
+                 copy_on_read: bool = False,
+                 max_history_entries: int | None = None, ):
+        """
+        max_history_entries: Capacity of the history ring buffer. Bounds the memory of the event independent of
+            max_history_time and of the stale windows requested by subscribers.
+        copy_on_read: Store the payload passed to set() as an immutable snapshot instead of copying it. The snapshot
+            is shared by data, history and all subscribers; dicts are wrapped in a FrozenDict. A copy is only made
+            when a consumer asks for a mutable value via get_data(copy=True). The producer hands the payload over
+            and must not mutate it after set(). Takes precedence over copy_data_on_set.
+        """
 
         if id is None:
             id = generate_uuid()
@@ -174,12 +622,16 @@ class Event:
 
         self.data_type = data_type
         self.copy_data_on_set = copy_data_on_set
+        self.copy_on_read = copy_on_read
         self.data_is_static_dict = data_is_static_dict
 
-        self.history: deque[tuple[float, dict[str, Any], Any]] = deque()
+        if max_history_entries is not None:
+            self.max_history_entries = max_history_entries
+        self.history = EventHistory(capacity=self.max_history_entries)
         self._history_lock = threading.Lock()
 
-        active_event_loop.add_event(self)
+        self._event_loop = active_event_loop
+        self._event_loop.add_event(self)
 
     # === PROPERTIES ===================================================================================================
     @property
@@ -202,11 +654,13 @@ class Event:
            discard_match_data: bool = True,
            timeout=None,
            spawn_new_threads=True,
-           max_rate=None) -> SubscriberListener:
+           max_rate=None,
+           dispatcher: DispatcherSpec = None) -> SubscriberListener:
         """
         Always return a SubscriberListener as the handle.
         If once=True, the underlying Subscriber is once=True and the listener will
         auto-stop after the first delivery.
+        The callback runs on the event loop's worker pool unless another dispatcher is given.
         """
         sub = Subscriber(
             id=f"{self.uid}_subscriber",
@@ -222,6 +676,7 @@ class Event:
             spawn_new_threads=spawn_new_threads,
             auto_stop_on_first=once,  # NEW: stop listener after first emit when once=True
             timeout=timeout,
+            dispatcher=dispatcher,
         )
         listener.start()
         return listener
@@ -237,6 +692,20 @@ class Event:
                                 )
         return subscriber.wait(timeout=timeout, stale_event_time=stale_event_time)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    async def wait_async(self, predicate: Predicate = None, timeout: float = None,
+                         stale_event_time: float = None) -> tuple[Any | _TimeoutSentinel, SubscriberMatch | None]:
+        """asyncio counterpart of wait(). Suspends the calling task instead of blocking a thread."""
+        subscriber = Subscriber(events=(self, predicate) if predicate is not None else self,
+                                timeout=timeout,
+                                stale_event_time=stale_event_time,
+                                once=True,
+                                )
+        try:
+            return await subscriber.wait_async(timeout=timeout, stale_event_time=stale_event_time)
+        finally:
+            subscriber.stop()
+
     # ------------------------------------------------------------------------------------------------------------------
     def set(self, data=None, flags: dict = None) -> None:
 
@@ -267,21 +736,29 @@ class Event:
                         f"but got {type(data).__name__} instead."
                     )
 
-        # Make a copy of the data
-        if self.copy_data_on_set:
+        # Make a copy of the data, or freeze it once and share the snapshot between all readers
+        if self.copy_on_read:
+            payload = self._freeze_payload(data)
+        elif self.copy_data_on_set:
             payload = self._copy_payload(data)
         else:
             payload = data
 
         self.data = payload
 
-        now = time.monotonic()
-        flags = dict(flags)
-        with self._history_lock:
-            self.history.append((now, flags, payload))
-            self._prune_history(now)
-
-        self.callbacks.set.call(data=payload, flags=flags)
+        if self.max_history_time > 0:
+            now = time.monotonic()
+            flags = dict(flags)
+            with self._history_lock:
+                self.history.append(now, flags, payload)
+                self._prune_history(now)
+
+        # Fast path: nobody is listening, so there is nothing to dispatch and no lock to take
+        subscribers = self._subscribers
+        if self.callbacks.set.callbacks:
+            self.callbacks.set.call(data=payload, flags=flags)
+        if subscribers:
+            self._event_loop._event_set(payload, event=self, flags=flags, subscribers=subscribers)
 
     # ------------------------------------------------------------------------------------------------------------------
     def get_data(self, copy: bool = True) -> Any:
@@ -299,9 +776,7 @@ class Event:
         cutoff = now - window
         with self._history_lock:
             self._prune_history(now)
-            for ts, flags, data in reversed(self.history):
-                if ts < cutoff:
-                    break
+            for ts, flags, data in self.history.window(cutoff):
                 if predicate is None or predicate(flags, data):
                     return True
         return False
@@ -315,21 +790,44 @@ class Event:
         cutoff = now - window
         with self._history_lock:
             self._prune_history(now)
-            for ts, flags, data in reversed(self.history):
-                if ts < cutoff:
-                    break
+            for ts, flags, data in self.history.window(cutoff):
                 if predicate is None or predicate(flags, data):
                     return flags, data
         return None
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def extend_history_window(self, window: float) -> float:
+        """
+        Make sure the history covers at least `window` seconds, as needed for stale-event replay. The window is
+        capped at max_history_time_limit; the number of entries stays bounded by the ring buffer capacity.
+        Returns the effective max_history_time.
+        """
+        if window is not None and window > self.max_history_time:
+            if window > self.max_history_time_limit:
+                logger.debug(f"Requested history window of {window} s for {self} exceeds the limit of "
+                             f"{self.max_history_time_limit} s")
+                window = self.max_history_time_limit
+            self.max_history_time = max(self.max_history_time, window)
+        return self.max_history_time
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def history_stats(self) -> EventHistoryStats:
+        with self._history_lock:
+            return self.history.stats()
+
     # === PRIVATE METHODS ==============================================================================================
     def _prune_history(self, now: float | None = None) -> None:
         if now is None:
             now = time.monotonic()
-        cutoff = now - self.max_history_time
-        dq = self.history
-        while dq and dq[0][0] < cutoff:
-            dq.popleft()
+        self.history.prune(now - self.max_history_time)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _freeze_payload(data) -> Any:
+        # Dataclasses are shared as they are: freezing them would copy every field and change their type
+        if type(data) is dict:
+            return FrozenDict(data)
+        return data
 
     # ------------------------------------------------------------------------------------------------------------------`
     def _copy_payload(self, data) -> Any:
@@ -544,6 +1042,37 @@ class SubscriberMatch:
         return gm.causal_events() if hasattr(gm, "causal_events") else []
 
 
+class _AsyncWaitQueue:
+    """
+    Stand-in for the per-waiter queue.Queue that delivers into an asyncio loop. Subscriber._fire() pushes from
+    whatever thread set the event; the item is handed over with call_soon_threadsafe.
+    """
+    __slots__ = ('_loop', '_queue', '_maxsize')
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = 0):
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._maxsize = maxsize
+
+    def put_nowait(self, item):
+        try:
+            self._loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            pass  # loop already closed; the waiter is gone
+
+    def get_nowait(self):
+        # Overflow is handled on the loop side (drop-oldest), the producer never sees a full queue
+        raise queue.Empty
+
+    async def get(self):
+        return await self._queue.get()
+
+    def _put(self, item):
+        if self._maxsize and self._queue.qsize() >= self._maxsize:
+            self._queue.get_nowait()
+        self._queue.put_nowait(item)
+
+
 class SubscriberType(enum.StrEnum):
     AND = "AND"
     OR = "OR"
@@ -688,6 +1217,9 @@ class Subscriber:
         self._wait_queue_maxsize = max(0, queue_maxsize)
         self._wq_lock = threading.RLock()
 
+        # Guards the match state (containers, matches). Events of different subscribers never share a lock.
+        self._match_lock = threading.RLock()
+
         if event_loop is None:
             event_loop = active_event_loop
         self._event_loop = event_loop
@@ -727,20 +1259,9 @@ class Subscriber:
             timeout = self.timeout
 
         # 1) Fast path: return a recent match within the stale window (if requested)
-        window = stale_event_time if stale_event_time is not None else self.stale_event_time
-        if window and window > 0:
-            now = time.monotonic()
-            cutoff = now - window
-            # Read-mostly; fine to snapshot without a separate lock
-            recent = None
-            for m in reversed(self.matches):
-                if m.time >= cutoff:
-                    recent = m
-                    break
-                # matches are time-ordered; we can break once older than cutoff
-                # but only if we know they are sorted; they are appended in _fire() -> yes
-            if recent is not None:
-                return recent.data, recent
+        recent = self._recent_match(stale_event_time)
+        if recent is not None:
+            return recent.data, recent
 
         # 2) Slow path: set up a one-off queue and block until push or timeout
         q = queue.Queue(maxsize=self._wait_queue_maxsize)
@@ -764,6 +1285,71 @@ class Subscriber:
             with self._wq_lock:
                 self._wait_queues.discard(q)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    async def wait_async(self,
+                         timeout: float | None = None,
+                         stale_event_time: float | None = None) -> tuple[Any | _TimeoutSentinel, SubscriberMatch | None]:
+        """
+        asyncio counterpart of wait(). The waiting task is registered like any other waiter and woken through
+        its event loop, so no thread is held while waiting.
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        recent = self._recent_match(stale_event_time)
+        if recent is not None:
+            return recent.data, recent
+
+        waiter = _AsyncWaitQueue(asyncio.get_running_loop(), maxsize=self._wait_queue_maxsize)
+        with self._wq_lock:
+            if self._abort:
+                return None, None
+            self._wait_queues.add(waiter)
+
+        try:
+            try:
+                item = await asyncio.wait_for(waiter.get(), timeout)
+            except asyncio.TimeoutError:
+                self.callbacks.timeout.call()
+                return TIMEOUT, None
+
+            if item is self._SENTINEL:
+                return TIMEOUT, None
+            return item
+        finally:
+            with self._wq_lock:
+                self._wait_queues.discard(waiter)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def stream(self, maxsize: int = 100) -> AsyncIterator[SubscriberMatch]:
+        """
+        Async iterator over all future matches:
+
+            async for match in Subscriber(events=device.events.stream).stream():
+                ...
+
+        Matches are buffered per iterator; if the consumer falls behind by more than `maxsize`, the oldest are
+        dropped. The iteration ends when the subscriber is stopped (or fired once with once=True).
+        """
+        waiter = _AsyncWaitQueue(asyncio.get_running_loop(), maxsize=maxsize)
+        with self._wq_lock:
+            if self._abort:
+                return
+            self._wait_queues.add(waiter)
+
+        try:
+            while True:
+                item = await waiter.get()
+                if item is self._SENTINEL:
+                    return
+                _, match = item
+                yield match
+                if self.once:
+                    return
+        finally:
+            with self._wq_lock:
+                self._wait_queues.discard(waiter)
+
     # ------------------------------------------------------------------------------------------------------------------
     def on(self,
            callback: Callback | Callable,
@@ -771,6 +1357,7 @@ class Subscriber:
            timeout=None,
            max_rate=None,
            discard_match_data: bool = True,
+           dispatcher: DispatcherSpec = None,
            **kwargs) -> SubscriberListener:
         """
         Always return a SubscriberListener as the handle.
@@ -788,6 +1375,7 @@ class Subscriber:
             auto_stop_on_first=once,  # NEW: stop listener after first emit when once=True
             discard_match_data=discard_match_data,
             timeout=timeout,
+            dispatcher=dispatcher,
         )
         listener.start()
         return listener
@@ -803,6 +1391,17 @@ class Subscriber:
                 self._nonblocking_push(q, self._SENTINEL)
 
     # === PRIVATE METHODS ==============================================================================================
+    def _recent_match(self, stale_event_time: float | None) -> SubscriberMatch | None:
+        window = stale_event_time if stale_event_time is not None else self.stale_event_time
+        if not window or window <= 0:
+            return None
+        # Read-mostly; fine to snapshot without a separate lock. Matches are appended in time order.
+        matches = self.matches
+        if matches and matches[-1].time >= time.monotonic() - window:
+            return matches[-1]
+        return None
+
+    # ------------------------------------------------------------------------------------------------------------------
     def set_match(self, event: Event | Subscriber, flags: dict[str, Any] | None, data: Any):
 
         container = self._get_event_container_by_event(event)
@@ -810,8 +1409,6 @@ class Subscriber:
         if container is None:
             raise ValueError(f"Event {event} is not known.")
 
-        event_uid = event.uid
-
         if isinstance(event, Subscriber):
             event_data = data.data
             trace_data = data
@@ -819,17 +1416,24 @@ class Subscriber:
             event_data = data
             trace_data = None
 
-        container.finished = True
-        container.payload = _EventPayload(data=event_data, trace_data=trace_data, flags=flags)
+        with self._match_lock:
+            if self._abort:
+                return
+            container.finished = True
+            container.payload = _EventPayload(data=event_data, trace_data=trace_data, flags=flags)
+
+            self.logger.debug(f"Match: {event.uid}, flags: {flags}, data: {data}")
 
-        self.logger.debug(f"Match: {event_uid}, flags: {flags}, data: {data}")
+            if not self._is_satisfied():
+                return
+            data, match = self._collect_match()
 
-        if self._is_satisfied():
-            self._fire()
+        # Delivery happens outside the match lock: it may unsubscribe (EventLoop lock) or run parent subscribers
+        self._fire(data, match)
 
     # ------------------------------------------------------------------------------------------------------------------
-    def _fire(self):
-
+    def _collect_match(self) -> tuple[Any, SubscriberMatch]:
+        """Build the match from the current state and reset it. Must be called with _match_lock held."""
         self.logger.debug("Subscriber satisfied. Gathering data and flags.")
 
         # Gather matched data/flags
@@ -862,10 +1466,9 @@ class Subscriber:
         )
         self.logger.debug(f"Match: {matched_event}. Data: {match}")
 
-        # Once semantics: prevent future matches and unsubscribe from loop
+        # Once semantics: prevent future matches
         if self.once:
             self._abort = True
-            self._unsubscribe()
 
         # Save for stale-window replay and prune old ones
         if self._save_matches:
@@ -877,6 +1480,14 @@ class Subscriber:
             for container in self.events:
                 container.reset()
 
+        return data, match
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _fire(self, data, match: SubscriberMatch):
+        # Once semantics: unsubscribe from loop
+        if self.once:
+            self._unsubscribe()
+
         # Broadcast to all current waiters (non-blocking, drop-oldest)
         with self._wq_lock:
             for q in list(self._wait_queues):
@@ -908,17 +1519,17 @@ class Subscriber:
     # ------------------------------------------------------------------------------------------------------------------
     def _execute_callback(self, data, match_data, input_match_data: bool = True,
                           execute_callback_in_thread: bool = True):
-        for callback in self.callbacks.finished.callbacks:
-            if execute_callback_in_thread:
+        for callback in list(self.callbacks.finished.callbacks):
+            # Propagation to parent subscribers only updates their match state. It never blocks, so it runs
+            # inline instead of costing a dispatcher slot per nesting level.
+            if execute_callback_in_thread and not _is_child_propagation(callback):
                 if input_match_data:
-                    threading.Thread(target=callback,
-                                     kwargs={'data': data, 'match': match_data},
-                                     daemon=True).start()
+                    self._event_loop.dispatcher.submit(callback, data=data, match=match_data)
                 else:
-                    threading.Thread(target=callback, args=(), daemon=True).start()
+                    self._event_loop.dispatcher.submit(callback)
             else:
                 if input_match_data:
-                    callback(data, match_data)
+                    callback(data=data, match=match_data)
                 else:
                     callback()
 
@@ -977,6 +1588,10 @@ class Subscriber:
         return f"<Subscriber {self.id} {[event.__repr__() for event in self.events]}>"
 
 
+def _is_child_propagation(callback: Callback) -> bool:
+    return getattr(callback.function, '__func__', None) is Subscriber._child_subscriber_callback
+
+
 # === Pattern Subscriber ===============================================================================================
 class PatternSubscriber(Subscriber):
     pattern: str
@@ -992,41 +1607,41 @@ class PatternSubscriber(Subscriber):
 
         self.pattern = pattern
         self.global_predicate = predicate
+        # Identity lookup for attached events; a broad pattern can hold thousands of them
+        self._containers_by_event: dict[Event, _SubscriberEventContainer] = {}
         super().__init__(events=[], id=id, **kwargs)
 
     def add_event(self, event: Event):
         # already attached?
-        if any(c.event is event for c in self.events):
+        if event in self._containers_by_event:
             return
 
         self.logger.debug(f"Add event: {event.uid} to pattern {self.pattern}")
-        self.events.append(_SubscriberEventContainer(event=event, predicate=self.global_predicate))
+        container = _SubscriberEventContainer(event=event, predicate=self.global_predicate)
+        self.events.append(container)
+        self._containers_by_event[event] = container
 
         # ensure event -> subscriber dispatch
-        active_event_loop.register_pattern_binding(self, event)
+        self._event_loop.register_pattern_binding(self, event)
 
         # stale-window replay
         if self.stale_event_time and self.stale_event_time > 0:
             now = time.monotonic()
-            if getattr(event, "max_history_time", 0) < self.stale_event_time:
-                event.max_history_time = self.stale_event_time
+            event.extend_history_window(self.stale_event_time)
             match = event.first_match_in_window(self.global_predicate, self.stale_event_time, now=now)
             if match is not None:
                 flags, data = match
                 self.set_match(event, flags, data)
 
     def remove_event(self, event: Event):
-        idx = next((i for i, c in enumerate(self.events) if c.event is event), None)
-        if idx is None:
+        container = self._containers_by_event.pop(event, None)
+        if container is None:
             return
-        self.events.pop(idx)
+        self.events.remove(container)
+        self._event_loop.unbind(event, self)
 
-        loop = active_event_loop
-        subs = loop.subscribers_by_event.get(event)
-        if subs:
-            subs.discard(self)
-            if not subs:
-                loop.subscribers_by_event.pop(event, None)
+    def _get_event_container_by_event(self, event: Event | Subscriber) -> _SubscriberEventContainer | None:
+        return self._containers_by_event.get(event)
 
     def __repr__(self):
         return f"<PatternSubscriber {self.id} pattern={self.pattern} events={[c.event.uid for c in self.events]}>"
@@ -1043,6 +1658,7 @@ class SubscriberListener:
     _spawn_new_threads: bool
     _timeout: float | None
     _exit: bool = False
+    _owns_dispatcher: bool = False
     _thread: threading.Thread | None = None
 
     _auto_stop_on_first: bool = False
@@ -1054,6 +1670,8 @@ class SubscriberListener:
     _discard_match_data: bool
     _discard_data: bool
 
+    dispatcher: CallbackDispatcher
+
     def __init__(self,
                  subscriber: Subscriber,
                  callback: Callable | Callback,
@@ -1062,7 +1680,13 @@ class SubscriberListener:
                  auto_stop_on_first: bool = False,
                  timeout: float | None = None,
                  discard_data: bool = False,
-                 discard_match_data: bool = True):
+                 discard_match_data: bool = True,
+                 dispatcher: DispatcherSpec = None):
+        """
+        dispatcher: Where the callback is executed. None keeps the old switch: the event loop's worker pool if
+        spawn_new_threads is set, otherwise inline in the listener thread. 'serial' gives this listener its own
+        ordered worker, 'inline'/'pool'/'thread' or a CallbackDispatcher instance select the engine explicitly.
+        """
 
         # Check if the callback does accept the correct arguments
         # check_signature(callback, kwarg_names=["data", "match"])
@@ -1080,6 +1704,13 @@ class SubscriberListener:
         self._discard_data = discard_data
         self._timeout = timeout
 
+        if dispatcher is None and not spawn_new_threads:
+            dispatcher = 'inline'
+        self.dispatcher = _resolve_dispatcher(dispatcher, default=subscriber._event_loop.dispatcher)
+        # Only a worker created from the 'serial' spec belongs to this listener; passed in dispatchers may be shared
+        self._owns_dispatcher = dispatcher == 'serial'
+        self._spawn_new_threads = not isinstance(self.dispatcher, InlineDispatcher)
+
         self.logger = Logger(f"Subscriber {self.subscriber.id} listener", "DEBUG")
 
         self._stop_event = Event(id=f"{id(self)}_stop")
@@ -1103,6 +1734,7 @@ class SubscriberListener:
     def stop(self, *args, **kwargs):
         """Public stop: signal + join if called from another thread."""
         self._request_stop()
+        unregister_exit_callback(self.stop)
         # Only join if we're NOT on the worker thread
         if self._thread is not None and self._thread.is_alive() and threading.current_thread() is not self._thread:
             self._thread.join()
@@ -1141,24 +1773,19 @@ class SubscriberListener:
             # Strip the stop event from the compound subscriber
             result = trace.trace_data[self.subscriber]
 
-            self._execute_callback(result.data, result, spawn_thread=self._spawn_new_threads)
+            self._execute_callback(result.data, result)
 
             if self._auto_stop_on_first:
                 self._request_stop()
 
     # ------------------------------------------------------------------------------------------------------------------
 
-    def _execute_callback(self, data, result, spawn_thread: bool):
+    def _execute_callback(self, data, result):
         # Build call signature once
         args = [] if self._discard_data else [data]
         kwargs = {} if self._discard_match_data else {"match": result}
 
-        func = partial(self.callback, *args, **kwargs)
-
-        if spawn_thread:
-            threading.Thread(target=func, daemon=True).start()
-        else:
-            func()
+        self.dispatcher.submit(self.callback, *args, **kwargs)
 
     # ------------------------------------------------------------------------------------------------------------------
     def _request_stop(self):
@@ -1169,6 +1796,9 @@ class SubscriberListener:
         except Exception:
             pass  # safe: may already be stopping
 
+        if self._owns_dispatcher:
+            self.dispatcher.shutdown()
+
 
 # === UTILITIES ========================================================================================================
 # Internal marker classes for inline building when you want to write AND(…), OR(…) inside other calls.
@@ -1326,6 +1956,206 @@ def wait_for_events(events,
         _stop_subscriber_tree(root)
 
 
+# === PATTERN INDEX ====================================================================================================
+_GLOB_CHARS = frozenset('*?[')
+_glob_cache: dict[str, Callable[[str], Any]] = {}
+
+
+def _compile_glob(pattern: str) -> Callable[[str], Any]:
+    matcher = _glob_cache.get(pattern)
+    if matcher is None:
+        matcher = re.compile(fnmatch.translate(pattern)).match
+        _glob_cache[pattern] = matcher
+    return matcher
+
+
+def _split_pattern(pattern: str) -> tuple[tuple[str, ...], Callable[[str], Any] | None]:
+    """
+    Split a glob pattern into its literal leading uid segments and a matcher for the full uid.
+    The matcher is None if the pattern has no wildcards at all (exact match).
+    """
+    segments = pattern.split(':')
+    literal = []
+    for segment in segments:
+        if not _GLOB_CHARS.isdisjoint(segment):
+            return tuple(literal), _compile_glob(pattern)
+        literal.append(segment)
+    return tuple(literal), None
+
+
+class _TrieNode:
+    __slots__ = ('children', 'events', 'exact', 'wildcards')
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.events: weakref.WeakSet[Event] = weakref.WeakSet()
+        self.exact: set[PatternSubscriber] = set()
+        self.wildcards: dict[PatternSubscriber, Callable[[str], Any]] = {}
+
+    def child(self, segment: str) -> _TrieNode:
+        node = self.children.get(segment)
+        if node is None:
+            node = _TrieNode()
+            self.children[segment] = node
+        return node
+
+    def walk(self) -> Iterator[_TrieNode]:
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children.values())
+
+    def empty(self) -> bool:
+        return not (self.children or self.events or self.exact or self.wildcards)
+
+
+class _PatternIndex:
+    """
+    Segment trie over event uids (split on ':') that pairs PatternSubscribers with Events.
+
+    Events are stored at the node of their full uid. Patterns are stored at the node of their literal leading
+    segments; only patterns on the path of an event's uid are tested against it, and only events below a pattern's
+    literal prefix are tested against the pattern. Not thread-safe, guarded by EventLoop._subscribers_lock.
+
+    Nodes left empty by a removal are pruned, so uids that come and go (e.g. per-connection device ids) do not grow
+    the trie. Events that are garbage collected without being removed leave their uid in _collected, from where it is
+    pruned on the next change of the index.
+    """
+
+    def __init__(self):
+        self._events = _TrieNode()
+        self._patterns = _TrieNode()
+        self._event_uids: weakref.WeakKeyDictionary[Event, str] = weakref.WeakKeyDictionary()
+        self._collected: list[str] = []  # Appended to by finalizers on any thread, list.append is atomic
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_event(self, event: Event) -> str:
+        self._prune_collected()
+        uid = event.uid
+        node = self._events
+        for segment in uid.split(':'):
+            node = node.child(segment)
+        node.events.add(event)
+        self._event_uids[event] = uid
+        weakref.finalize(event, self._collected.append, uid)
+        return uid
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def remove_event(self, event: Event):
+        self._prune_collected()
+        uid = self._event_uids.pop(event, None)
+        if uid is None:
+            return
+        path = self._path(self._events, uid.split(':'))
+        if path is None:
+            return
+        path[-1][1].events.discard(event)
+        self._prune(path)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def indexed_uid(self, event: Event) -> str | None:
+        return self._event_uids.get(event)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_pattern(self, ps: PatternSubscriber):
+        self._prune_collected()
+        literal, matcher = _split_pattern(ps.pattern)
+        node = self._patterns
+        for segment in literal:
+            node = node.child(segment)
+        if matcher is None:
+            node.exact.add(ps)
+        else:
+            node.wildcards[ps] = matcher
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def remove_pattern(self, ps: PatternSubscriber):
+        self._prune_collected()
+        literal, _ = _split_pattern(ps.pattern)
+        path = self._path(self._patterns, literal)
+        if path is None:
+            return
+        node = path[-1][1]
+        node.exact.discard(ps)
+        node.wildcards.pop(ps, None)
+        self._prune(path)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def patterns_for(self, uid: str) -> list[PatternSubscriber]:
+        matches = []
+        node = self._patterns
+        for segment in uid.split(':'):
+            matches.extend(ps for ps, matcher in node.wildcards.items() if matcher(uid))
+            node = node.children.get(segment)
+            if node is None:
+                return matches
+        matches.extend(ps for ps, matcher in node.wildcards.items() if matcher(uid))
+        matches.extend(node.exact)
+        return matches
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def events_for(self, pattern: str) -> list[Event]:
+        literal, matcher = _split_pattern(pattern)
+        node = self._events
+        for segment in literal:
+            node = node.children.get(segment)
+            if node is None:
+                return []
+        if matcher is None:
+            return list(node.events)
+        return [ev for n in node.walk() for ev in list(n.events) if matcher(self._event_uids.get(ev, ev.uid))]
+
+    # === PRIVATE METHODS ==============================================================================================
+    @staticmethod
+    def _path(root: _TrieNode, segments) -> list[tuple[str | None, _TrieNode]] | None:
+        path = [(None, root)]
+        node = root
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                return None
+            path.append((segment, node))
+        return path
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _prune(path: list[tuple[str | None, _TrieNode]]):
+        # Walk back up and drop the nodes that were left empty, never the root
+        for i in range(len(path) - 1, 0, -1):
+            segment, node = path[i]
+            if not node.empty():
+                return
+            del path[i - 1][1].children[segment]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _prune_collected(self):
+        while self._collected:
+            path = self._path(self._events, self._collected.pop().split(':'))
+            if path is not None:
+                self._prune(path)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+async def wait_for_events_async(events,
+                                *,
+                                timeout: float | None = None,
+                                stale_event_time: float | None = None,
+                                event_loop: EventLoop | None = None) -> tuple[Any | _TimeoutSentinel,
+                                                                              SubscriberMatch | None]:
+    """asyncio counterpart of wait_for_events()."""
+    root = _compile_expr_to_subscriber(events,
+                                       stale_event_time=stale_event_time,
+                                       event_loop=event_loop,
+                                       once=True,
+                                       id=None)
+    root.once = True
+    try:
+        return await root.wait_async(timeout=timeout, stale_event_time=stale_event_time)
+    finally:
+        _stop_subscriber_tree(root)
+
+
 # === EVENT LOOP =======================================================================================================
 class EventLoop(metaclass=_SingletonMeta):
     """
@@ -1336,16 +2166,37 @@ class EventLoop(metaclass=_SingletonMeta):
     """
     subscribers: list[Subscriber]
     events: weakref.WeakSet
+    dispatcher: CallbackDispatcher
 
-    def __init__(self):
+    # Extra workers of the default dispatcher for callbacks that block, on top of its 8 workers: 64 threads in total
+    # before calls start to queue, instead of the unbounded thread-per-callback of before
+    DISPATCHER_EXTRA_WORKERS = 56
+
+    def __init__(self, dispatcher: CallbackDispatcher | None = None):
         self.events = weakref.WeakSet()
         self.subscribers: list[Subscriber] = []
 
         self.logger = Logger(f"EventLoop", "DEBUG")
 
+        if dispatcher is None:
+            # Threaded callbacks used to get a thread each: nothing is dropped, and callbacks that block (waiting for
+            # another event or a device response) get extra workers instead of starving the pool
+            dispatcher = ThreadPoolDispatcher(name='event_loop', max_extra_workers=self.DISPATCHER_EXTRA_WORKERS)
+        self.dispatcher = dispatcher
+
         self.subscribers_by_event: dict[Event, set[Subscriber]] = {}
         self._subscribers_lock = threading.RLock()
         self._pattern_subscribers: set[PatternSubscriber] = set()
+        self._pattern_index = _PatternIndex()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def set_dispatcher(self, dispatcher: DispatcherSpec):
+        """Replace the default dispatcher used for threaded callbacks. Already queued calls still finish."""
+        self.dispatcher = _resolve_dispatcher(dispatcher, default=self.dispatcher)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def dispatcher_stats(self) -> DispatcherStats:
+        return self.dispatcher.stats()
 
     # ------------------------------------------------------------------------------------------------------------------
     def add_event(self, event: Event):
@@ -1353,14 +2204,31 @@ class EventLoop(metaclass=_SingletonMeta):
             if event in self.events:
                 return
             self.events.add(event)
-            event.callbacks.set.register(Callback(
-                function=self._event_set,
-                inputs={'event': event}
-            ))
 
             # attach to any pattern subscribers that match this event's UID
-            for ps in list(self._pattern_subscribers):
-                self._attach_pattern_if_match(ps, event)
+            uid = self._pattern_index.add_event(event)
+            for ps in self._pattern_index.patterns_for(uid):
+                self._attach_pattern(ps, event)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def update_event_uid(self, event: Event):
+        """
+        Re-index an event whose uid changed (e.g. after it was added to an EventContainer). Pattern subscribers
+        that match the new uid are attached, the ones that only matched the old uid are detached.
+        """
+        with self._subscribers_lock:
+            old_uid = self._pattern_index.indexed_uid(event)
+            if old_uid is None or old_uid == event.uid:
+                return
+            self._pattern_index.remove_event(event)
+            uid = self._pattern_index.add_event(event)
+
+            matching = self._pattern_index.patterns_for(uid)
+            for ps in self._pattern_index.patterns_for(old_uid):
+                if ps not in matching:
+                    ps.remove_event(event)
+            for ps in matching:
+                self._attach_pattern(ps, event)
 
     # ------------------------------------------------------------------------------------------------------------------
     def add_subscriber(self, subscriber: Subscriber):
@@ -1371,14 +2239,15 @@ class EventLoop(metaclass=_SingletonMeta):
             if isinstance(subscriber, PatternSubscriber):
                 # Track pattern subscribers for future events & attach all current matches
                 self._pattern_subscribers.add(subscriber)
-                for ev in list(self.events):
-                    self._attach_pattern_if_match(subscriber, ev)
+                self._pattern_index.add_pattern(subscriber)
+                for ev in self._pattern_index.events_for(subscriber.pattern):
+                    self._attach_pattern(subscriber, ev)
             else:
                 # Wire explicit events for non-pattern subscribers
                 for cont in subscriber.events:
                     ev = cont.event
                     if isinstance(ev, Event):
-                        self.subscribers_by_event.setdefault(ev, set()).add(subscriber)
+                        self.bind(ev, subscriber)
 
             # --- Stale prefill for this subscriber ---
             if subscriber.stale_event_time and subscriber.stale_event_time > 0:
@@ -1390,8 +2259,7 @@ class EventLoop(metaclass=_SingletonMeta):
                     if isinstance(ev, Subscriber):
                         continue
                     # extend history window on the Event if needed
-                    if getattr(ev, "max_history_time", 0) < subscriber.stale_event_time:
-                        ev.max_history_time = subscriber.stale_event_time
+                    ev.extend_history_window(subscriber.stale_event_time)
                     pred = cont.predicate
                     match = ev.first_match_in_window(pred, subscriber.stale_event_time, now=now)
                     if match is not None:
@@ -1423,8 +2291,27 @@ class EventLoop(metaclass=_SingletonMeta):
 
     # ------------------------------------------------------------------------------------------------------------------
     def register_pattern_binding(self, ps: PatternSubscriber, ev: Event):
+        self.bind(ev, ps)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def bind(self, event: Event, subscriber: Subscriber):
+        """Route set() of `event` to `subscriber` and republish the event's subscriber snapshot."""
         with self._subscribers_lock:
-            self.subscribers_by_event.setdefault(ev, set()).add(ps)
+            subs = self.subscribers_by_event.setdefault(event, set())
+            if subscriber not in subs:
+                subs.add(subscriber)
+                event._subscribers = tuple(subs)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def unbind(self, event: Event, subscriber: Subscriber):
+        with self._subscribers_lock:
+            subs = self.subscribers_by_event.get(event)
+            if subs is None or subscriber not in subs:
+                return
+            subs.discard(subscriber)
+            if not subs:
+                self.subscribers_by_event.pop(event, None)
+            event._subscribers = tuple(subs)
 
     # ------------------------------------------------------------------------------------------------------------------
     def _unsafe_removeWaiter(self, waiter: Subscriber):
@@ -1432,42 +2319,36 @@ class EventLoop(metaclass=_SingletonMeta):
             self.subscribers.remove(waiter)
         for cont in getattr(waiter, "events", ()):
             ev = cont.event
-            s = self.subscribers_by_event.get(ev)
-            if s is not None:
-                s.discard(waiter)
-                if not s:
-                    self.subscribers_by_event.pop(ev, None)
+            if isinstance(ev, Event):
+                self.unbind(ev, waiter)
         if isinstance(waiter, PatternSubscriber):
             self._pattern_subscribers.discard(waiter)
+            self._pattern_index.remove_pattern(waiter)
 
     # ------------------------------------------------------------------------------------------------------------------
-    def _event_set(self, data, event: Event, flags, *args, **kwargs):
-        with self._subscribers_lock:
-            watchers = list(self.subscribers_by_event.get(event, ()))
-            for waiter in watchers:
-                if waiter._abort:
-                    continue
-
-                matched_any_pos = False
-
-                for cont in waiter.events:
-                    if cont.event is not event:
-                        continue
-                    pred = cont.predicate
-
-                    if pred is None:
-                        ok = True
-                    else:
-                        # IMPORTANT: predicate signature is (flags, data)
-                        ok = pred(flags, data)  # type: ignore
+    def _event_set(self, data, event: Event, flags, subscribers: tuple[Subscriber, ...] | None = None,
+                   *args, **kwargs):
+        # Works on the event's immutable subscriber snapshot; no loop-wide lock on the hot path. Each subscriber
+        # guards its own match state.
+        if subscribers is None:
+            subscribers = event._subscribers
+        for waiter in subscribers:
+            if waiter._abort:
+                continue
 
-                    if ok:
-                        matched_any_pos = True
-                        if not cont.finished:
-                            waiter.set_match(event, flags, data)
+            if isinstance(waiter, PatternSubscriber):
+                containers = (waiter._get_event_container_by_event(event),)
+            else:
+                containers = waiter.events
 
-                if not matched_any_pos:
+            for cont in containers:
+                if cont is None or cont.event is not event:
                     continue
+                pred = cont.predicate
+
+                # IMPORTANT: predicate signature is (flags, data)
+                if (pred is None or pred(flags, data)) and not cont.finished:
+                    waiter.set_match(event, flags, data)
 
     # ------------------------------------------------------------------------------------------------------------------
     @staticmethod
@@ -1478,10 +2359,14 @@ class EventLoop(metaclass=_SingletonMeta):
     # ------------------------------------------------------------------------------------------------------------------
     def _attach_pattern_if_match(self, ps: PatternSubscriber, ev: Event):
         if self._check_pattern(ev.uid, ps.pattern):
-            # Let the PatternSubscriber attach and sync its internal state
-            ps.add_event(ev)
-            # And also register it in the reverse index so it gets _event_set callbacks
-            self.subscribers_by_event.setdefault(ev, set()).add(ps)
+            self._attach_pattern(ps, ev)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _attach_pattern(self, ps: PatternSubscriber, ev: Event):
+        # Let the PatternSubscriber attach and sync its internal state
+        ps.add_event(ev)
+        # And also register it in the reverse index so it gets _event_set callbacks
+        self.bind(ev, ps)
 
     # ------------------------------------------------------------------------------------------------------------------
     def _snapshot_match_for_subscriber(
@@ -1643,6 +2528,7 @@ class EventContainer:
             raise ValueError(f"Event {event.id} already has a parent.")
         self.events[event.id] = event
         event.parent = self
+        active_event_loop.update_event_uid(event)
 
 
 # === EVENT CONTAINER DECORATOR ========================================================================================
@@ -1702,10 +2588,15 @@ def event_definition(cls):
             flags=flags,
             copy_data_on_set=template.copy_data_on_set,
             data_is_static_dict=template.data_is_static_dict,
+            copy_on_read=template.copy_on_read,
         )
         # Copy non-ctor attributes
         clone.custom_data_copy_function = template.custom_data_copy_function
         clone.max_history_time = template.max_history_time
+        clone.max_history_time_limit = template.max_history_time_limit
+        if clone.max_history_entries != template.max_history_entries:
+            clone.max_history_entries = template.max_history_entries
+            clone.history.resize(template.max_history_entries)
         return clone
 
     def _ensure_container_bits(self):
@@ -1722,6 +2613,7 @@ def event_definition(cls):
                     raise ValueError(f"Event {event.id} already has a parent.")
                 _self.events[event.id] = event
                 event.parent = _self
+                active_event_loop.update_event_uid(event)
 
             # Bind as a method on the instance
             setattr(self, "add_event", _add_event.__get__(self, self.__class__))
@@ -74,9 +74,21 @@ def register_exit_callback(callback, priority=1):
 
         if DEBUG_OUTPUTS:
             print(f"[ExitHandler] adding {fn!r} (prio={priority}) from {src}:{line}")
+        # Drop the entries of garbage-collected owners, so short-lived objects do not grow the registry
+        _global_exit_callbacks[:] = [entry for entry in _global_exit_callbacks if entry[1]() is not None]
         _global_exit_callbacks.append((priority, callback_ref))
 
 
+def unregister_exit_callback(callback):
+    """
+    Remove a callback registered with register_exit_callback, e.g. when its owner was shut down before the exit.
+    Unknown callbacks are ignored.
+    """
+    with _global_exit_callbacks_lock:
+        _global_exit_callbacks[:] = [entry for entry in _global_exit_callbacks
+                                     if entry[1]() is not None and entry[1]() != callback]
+
+
 class _CallbackTimeout(Exception):
     pass
 
@@ -170,6 +182,11 @@ def _global_exit_handler(signum=None, frame=None):
 
     _execute_exit_callbacks(signum, frame)
 
+    # Deliver log records still queued for the log sink thread (files, redirections) before the hard exit
+    logging_utils = sys.modules.get('core.utils.logging_utils')
+    if logging_utils is not None:
+        logging_utils.flushLogs(timeout=1)
+
     # Always do an immediate, hard exit so no threads are left running.
     if DEBUG_OUTPUTS:
         print(f"[EXIT HANDLER]: EXIT PROGRAM")
@@ -550,14 +550,24 @@ New in this version:
   from the last `seconds` seconds into the provided redirection function, subject
   to the same filtering as live redirection (redirect_all / minimum_level and the
   logger's current level).
+- Log calls below the logger's level return before doing any work, unless a
+  redirection or log file asks for all levels.
+- The buffer, redirections and log files are fed by a background thread in
+  batches (see handle_log). Redirection functions are therefore called from that
+  thread. Console output stays synchronous. flushLogs() waits for the queue.
 """
 
 import inspect
 import logging
 import os
 import atexit
+import collections
+import itertools
+import queue
+import sys
 import threading
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from dataclasses import dataclass
 from typing import Callable
 
@@ -599,22 +609,48 @@ custom_loggers = {}
 _show_log_file = False
 _show_log_level = False
 
+# Level number -> name, for the file/redirection entries
+_LEVEL_NAMES = {v: k for k, v in LOG_LEVELS.items()}
+
+# True while a redirection with redirect_all or a log file with log_all_levels exists. Only then do log calls below
+# the logger's level have to reach handle_log; otherwise Logger drops them right away.
+_capture_all = False
+
 # === MODULE-WIDE LOG BUFFER (for replay to new redirections) ====================
-# Each buffered item is a dict:
-# {
-#   't': datetime,
-#   'entry': str,          # formatted single-line entry used for files/redirection
-#   'msg': str,            # original log message passed by user
-#   'logger_name': str,    # Logger.name
-#   'level': int           # numeric level
-# }
-_log_buffer = []
-_buffer_lock = threading.Lock()
+class LogRecord:
+    """
+    One buffered log record.
+
+    Attributes:
+        t (float): Time of the log call (time.time()).
+        entry (str): Formatted single-line entry used for files/redirection.
+        msg (str): Original log message passed by the user.
+        logger_name (str): Logger.name.
+        level (int): Numeric level.
+    """
+    __slots__ = ('t', 'entry', 'msg', 'logger_name', 'level')
+
+    def __init__(self, t: float, entry: str, msg: str, logger_name: str, level: int):
+        self.t = t
+        self.entry = entry
+        self.msg = msg
+        self.logger_name = logger_name
+        self.level = level
+
 
 # Defaults: keep up to 10,000 entries and up to 10 minutes of history (whichever prunes first)
 _buffer_max_items = 10000
 _buffer_max_seconds = 600  # 10 minutes
 
+# Records in chronological order. The maxlen drops the oldest record on append; expired records are popped from the
+# left. Only the log sink appends, while holding the sink lock.
+_log_buffer: collections.deque[LogRecord] = collections.deque(maxlen=_buffer_max_items)
+_buffer_lock = threading.Lock()
+# Number of records the sink has appended to the buffer so far, counted under the sink lock
+_buffer_appended = 0
+# Records copied per buffer lock acquisition when replaying to a new redirection
+_REPLAY_SLICE = 256
+
 
 def setLogBufferLimits(max_items: int | None = None, max_seconds: int | None = None):
     """
@@ -626,40 +662,57 @@ def setLogBufferLimits(max_items: int | None = None, max_seconds: int | None = N
         max_seconds (int | None): Maximum age (in seconds) of records to retain.
                                   If None, leaves unchanged.
     """
-    global _buffer_max_items, _buffer_max_seconds
-    if max_items is not None and max_items > 0:
-        _buffer_max_items = max_items
+    global _buffer_max_items, _buffer_max_seconds, _log_buffer
     if max_seconds is not None and max_seconds >= 0:
         _buffer_max_seconds = max_seconds
+    if max_items is not None and max_items > 0 and max_items != _buffer_max_items:
+        _buffer_max_items = max_items
+        with _sink_lock, _buffer_lock:
+            _log_buffer = collections.deque(_log_buffer, maxlen=max_items)
 
 
-def _buffer_prune_locked(now: datetime | None = None):
+def _buffer_prune_locked(now: float | None = None):
     """
-    Prune the buffer by age and size. Caller must hold _buffer_lock.
+    Drop records older than the age limit (the size limit is kept by the deque). Caller must hold _buffer_lock.
     """
-    global _log_buffer
-    if now is None:
-        now = datetime.now()
-
-    # Age-based prune
-    if _buffer_max_seconds >= 0:
-        cutoff = now - timedelta(seconds=_buffer_max_seconds)
-        # Find first index >= cutoff
-        first_valid_idx = 0
-        for i, item in enumerate(_log_buffer):
-            if item['t'] >= cutoff:
-                first_valid_idx = i
-                break
-        else:
-            # All entries older than cutoff
-            _log_buffer = []
-            return
-        if first_valid_idx > 0:
-            _log_buffer = _log_buffer[first_valid_idx:]
+    if _buffer_max_seconds < 0:
+        return
+    cutoff = (time.time() if now is None else now) - _buffer_max_seconds
+    buffer = _log_buffer
+    while buffer and buffer[0].t < cutoff:
+        buffer.popleft()
 
-    # Size-based prune
-    if _buffer_max_items > 0 and len(_log_buffer) > _buffer_max_items:
-        _log_buffer = _log_buffer[-_buffer_max_items:]
+
+def _buffer_position_since_locked(earliest: float) -> int:
+    """
+    Returns the position of the first buffered record from `earliest` on. Positions count the records appended so
+    far (see _buffer_appended), so they stay valid while records are dropped from the left. Caller must hold
+    _buffer_lock.
+    """
+    # Recent records are at the right end: count them from there
+    count = 0
+    for record in reversed(_log_buffer):
+        if record.t < earliest:
+            break
+        count += 1
+    return _buffer_appended - count
+
+
+def _buffer_slice_locked(position: int, count: int) -> tuple[int, list[LogRecord]]:
+    """
+    Returns up to `count` buffered records from `position` on, together with the position of the first of them.
+    Records that were dropped from the buffer in the meantime are skipped. Caller must hold _buffer_lock.
+    """
+    first = _buffer_appended - len(_log_buffer)
+    position = max(position, first)
+    offset = position - first
+    end = min(offset + count, len(_log_buffer))
+    if offset <= len(_log_buffer) - end:
+        return position, list(itertools.islice(_log_buffer, offset, end))
+    # Closer to the right end, where a replay usually is: walk from there instead of over the older records
+    records = list(itertools.islice(reversed(_log_buffer), len(_log_buffer) - end, len(_log_buffer) - offset))
+    records.reverse()
+    return position, records
 
 
 # === SET LOGGING SETTINGS =============================================================================================
@@ -681,11 +734,13 @@ def setLoggingSettings(show_log_file=False, show_log_level=False):
 @atexit.register
 def cleanup(*args, **kwargs):
     """
-    Closes all open log files when the program exits.
+    Writes out queued log records and closes all open log files when the program exits.
     """
     global log_files
+    flushLogs(timeout=1)
     for filename, data in log_files.items():
-        data['file'].close()
+        with data['lock']:
+            data['file'].close()
 
 
 @dataclass
@@ -697,10 +752,13 @@ class LogRedirection:
         func (callable): The function to call for redirection.
         minium_level (int): Minimum level a message must have to be redirected (if not redirect_all).
         redirect_all (bool): If True, redirect all logs; otherwise respect levels.
+        added_seq (int): Sequence number of the first record the redirection receives live. Records logged before
+                         it was added are not delivered to it.
     """
     func: Callable
     minium_level: int = logging.NOTSET
     redirect_all: bool = False
+    added_seq: int = 0
 
 
 def addLogRedirection(func, redirect_all: bool = False, minimum_level: int | str = logging.NOTSET,
@@ -717,34 +775,58 @@ def addLogRedirection(func, redirect_all: bool = False, minimum_level: int | str
         past_time (float | int | None): If provided and > 0, immediately feed this redirection
                                         with buffered logs from the last `past_time` seconds that
                                         match this redirection's criteria.
+
+    Without past_time the redirection only receives records logged after the call, including ones still waiting
+    in the sink queue. With past_time it receives the replayed records and then everything the sink delivers after
+    them, each record exactly once and in order. The replay calls `func` on the calling thread without holding the
+    sink lock, so `func` may log or call flushLogs().
     """
     global redirections
     if isinstance(minimum_level, str):
         minimum_level = LOG_LEVELS.get(minimum_level, logging.NOTSET)
 
     redir = LogRedirection(func, minium_level=minimum_level, redirect_all=redirect_all)
-    redirections.append(redir)
 
-    # If asked, replay recent buffered logs into this redirection
-    if past_time is not None and past_time > 0:
-        now = datetime.now()
-        earliest = now - timedelta(seconds=float(past_time))
+    if past_time is None or past_time <= 0:
+        with _sink_lock:
+            redir.added_seq = next(_log_seq)
+            redirections.append(redir)
+            _update_capture_all()
+        return
+
+    # Replay from a cursor in slices of _REPLAY_SLICE records: each slice is taken under the buffer lock and replayed
+    # without it. The records the sink delivers meanwhile are replayed as well; the redirection goes live once the
+    # cursor has caught up with the buffer while the sink is held.
+    now = time.time()
+    with _buffer_lock:
+        # prune first to keep things tight
+        _buffer_prune_locked(now=now)
+        cursor = _buffer_position_since_locked(now - float(past_time))
+
+    while True:
         with _buffer_lock:
-            # prune first to keep things tight
-            _buffer_prune_locked(now=now)
-            # Gather matching items (preserve chronological order)
-            snapshot = [item for item in _log_buffer if item['t'] >= earliest]
-
-        # Emit to this redirection if criteria match
-        for item in snapshot:
-            level = item['level']
-            logger_obj = custom_loggers.get(item['logger_name'])
+            cursor, records = _buffer_slice_locked(cursor, _REPLAY_SLICE)
+
+        if not records:
+            with _sink_lock:
+                with _buffer_lock:
+                    if cursor >= _buffer_appended:
+                        redirections.append(redir)
+                        _update_capture_all()
+                        return
+            continue
+
+        # Emit matching records in chronological order
+        for record in records:
+            level = record.level
+            logger_obj = custom_loggers.get(record.logger_name)
             if logger_obj is None:
                 # If the original custom Logger no longer exists, skip
                 continue
             if redir.redirect_all or (level >= logger_obj.level and level >= redir.minium_level):
                 # Call with the same signature as live redirection
-                redir.func(item['entry'], item['msg'], logger_obj, level)
+                redir.func(record.entry, record.msg, logger_obj, level)
+        cursor += len(records)
 
 
 def removeLogRedirection(func):
@@ -756,6 +838,13 @@ def removeLogRedirection(func):
     """
     global redirections
     redirections[:] = [redir for redir in redirections if redir.func != func]
+    _update_capture_all()
+
+
+def _update_capture_all():
+    global _capture_all
+    _capture_all = (any(redir.redirect_all for redir in redirections)
+                    or any(data['all_levels'] for data in log_files.values()))
 
 
 def enable_file_logging(filename, path='./', custom_header: str = '', log_all_levels=False):
@@ -783,6 +872,7 @@ def enable_file_logging(filename, path='./', custom_header: str = '', log_all_le
             'all_levels': log_all_levels,
             'lock': threading.Lock()
         }
+        _update_capture_all()
         print(f"File logging enabled. Logging to file: {log_filename}")
     except IOError as e:
         print(f"Failed to open log file {log_filename}: {e}")
@@ -798,67 +888,158 @@ def stop_file_logging(filename=None):
     """
     global log_files
 
+    # Write out what was logged before the call
+    flushLogs(timeout=1)
+
     if filename is not None:
         if filename in log_files:
-            log_files[filename]['file'].close()
-            log_files.pop(filename)
+            data = log_files.pop(filename)
+            with data['lock']:
+                data['file'].close()
             print(f"File logging stopped for {filename}.")
     else:
         for filename, data in log_files.items():
-            data['file'].close()
+            with data['lock']:
+                data['file'].close()
             print(f"File logging stopped for {filename}.")
         log_files = {}
+    _update_capture_all()
 
 
 def handle_log(log, logger: 'Logger', level):
     """
-    Handles a log message by formatting it and sending it to any enabled redirections and file loggers.
+    Handles a log message by queueing it for the buffer, any enabled redirections and file loggers.
+
+    The entry is formatted and delivered by the log sink thread, so this only takes a timestamp and appends to a
+    queue. Use flushLogs() to wait until everything logged so far has been delivered.
 
     Parameters:
         log (str): The log message.
         logger (Logger): The logger instance issuing the log.
         level (int or str): The numeric or string log level.
     """
-    global log_files
-
     # Convert level from string to numeric value if necessary
     if isinstance(level, str):
         level = LOG_LEVELS.get(level, logging.NOTSET)
 
-    # Create reverse mapping to get level name from numeric level
-    reversed_levels = {v: k for k, v in LOG_LEVELS.items()}
-    level_name = reversed_levels.get(level, "NOTSET")
+    if _sink_thread is None:
+        _start_sink()
+    _sink_queue.put((next(_log_seq), time.time(), logger, level, log))
 
-    now = datetime.now()
-    current_time = now.strftime("%Y-%m-%d:%H-%M-%S-%f")[:-3]
-    log_entry = f"{current_time}\t{logger.name}\t{level_name}\t{log}\n"
 
-    # Buffer the entry for potential future replay
-    with _buffer_lock:
-        _log_buffer.append({
-            't': now,
-            'entry': log_entry,
-            'msg': log,
-            'logger_name': logger.name,
-            'level': level
-        })
-        _buffer_prune_locked(now=now)
+def flushLogs(timeout: float | None = None) -> bool:
+    """
+    Waits until all records logged before the call have been delivered to the buffer, redirections and log files.
+
+    Returns:
+        bool: False if the timeout expired first.
+    """
+    if _sink_thread is None or threading.current_thread() is _sink_thread:
+        return True
+    done = threading.Event()
+    _sink_queue.put(done)
+    return done.wait(timeout)
+
+
+# === LOG SINK =========================================================================================================
+# One daemon thread takes the queued records in batches of up to _SINK_BATCH, formats the entries, appends them to the
+# replay buffer, calls the redirections and writes each log file once per batch (one write() and one flush()).
+_sink_queue = queue.SimpleQueue()
+_sink_lock = threading.Lock()  # Held while a batch is delivered
+_sink_start_lock = threading.Lock()
+_sink_thread: threading.Thread | None = None
+_SINK_BATCH = 1024
+# Sequence numbers of the queued records, to tell which ones were logged before a redirection was added
+_log_seq = itertools.count()
+
+# Timestamp prefix of the current second, "%Y-%m-%d:%H-%M-%S"
+_stamp_second = None
+_stamp_prefix = ''
+
+
+def _start_sink():
+    global _sink_thread
+    with _sink_start_lock:
+        if _sink_thread is None:
+            thread = threading.Thread(target=_sink_loop, name='log_sink', daemon=True)
+            thread.start()
+            _sink_thread = thread
+
+
+def _sink_loop():
+    while True:
+        batch = [_sink_queue.get()]
+        try:
+            while len(batch) < _SINK_BATCH:
+                batch.append(_sink_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        records = [item for item in batch if type(item) is tuple]
+        try:
+            if records:
+                with _sink_lock:
+                    _deliver(records)
+        except Exception as e:
+            print(f"Log sink failed to deliver {len(records)} records: {e}")
+        finally:
+            for item in batch:
+                if type(item) is not tuple:
+                    item.set()
+
+
+def _timestamp(t: float) -> str:
+    global _stamp_second, _stamp_prefix
+    second, ms = divmod(int(t * 1000), 1000)
+    if second != _stamp_second:
+        _stamp_prefix = time.strftime("%Y-%m-%d:%H-%M-%S", time.localtime(second))
+        _stamp_second = second
+    return f"{_stamp_prefix}-{ms:03d}"
+
+
+def _deliver(records: list[tuple]):
+    global _buffer_appended
+    files = list(log_files.items())
+    file_entries = {filename: [] for filename, _ in files}
+    buffered = []
+
+    for seq, t, logger, level, log in records:
+        log_entry = f"{_timestamp(t)}\t{logger.name}\t{_LEVEL_NAMES.get(level, 'NOTSET')}\t{log}\n"
+        buffered.append(LogRecord(t, log_entry, log, logger.name, level))
+
+        # Process redirections: if a redirection is set to redirect_all, send all logs;
+        # otherwise, only send logs that meet or exceed the logger's threshold.
+        for redir in redirections:
+            if seq < redir.added_seq:
+                continue
+            if redir.redirect_all or (level >= logger.level and level >= redir.minium_level):
+                try:
+                    redir.func(log_entry, log, logger, level)
+                except Exception as e:
+                    print(f"Log redirection {redir.func} failed: {e}")
 
-    # Process redirections: if a redirection is set to redirect_all, send all logs;
-    # otherwise, only send logs that meet or exceed the logger's threshold.
-    for redir in redirections:
-        if redir.redirect_all or (level >= logger.level and level >= redir.minium_level):
-            redir.func(log_entry, log, logger, level)
+        for filename, log_file_data in files:
+            if level >= logger.level or log_file_data['all_levels']:
+                file_entries[filename].append(log_entry)
+
+    # Buffer the entries for potential future replay
+    with _buffer_lock:
+        _log_buffer.extend(buffered)
+        _buffer_appended += len(buffered)
+        _buffer_prune_locked(now=buffered[-1].t)
 
     # Write log entries to file(s) if file logging is enabled
-    try:
-        for filename, log_file_data in log_files.items():
+    for filename, log_file_data in files:
+        entries = file_entries[filename]
+        if not entries:
+            continue
+        try:
             with log_file_data['lock']:
-                if level >= logger.level or log_file_data['all_levels']:
-                    log_file_data['file'].write(log_entry)
+                if not log_file_data['file'].closed:
+                    log_file_data['file'].write(''.join(entries))
                     log_file_data['file'].flush()
-    except IOError as e:
-        print(f"Failed to write to log file: {e}")
+        except IOError as e:
+            print(f"Failed to write to log file: {e}")
 
 
 def disableAllOtherLoggers(module_name=None):
@@ -964,10 +1145,12 @@ class CustomFormatter(logging.Formatter):
             for lvl, raw_color in LOGGING_COLORS.items()
         }
         self.DEFAULT_FORMAT = self.str_format
+        self._formatters = {lvl: logging.Formatter(fmt, "%H:%M:%S") for lvl, fmt in self.FORMATS.items()}
+        self._default_formatter = logging.Formatter(self.DEFAULT_FORMAT, "%H:%M:%S")
 
     def setFileName(self, filename):
         """
-        Sets the filename to be included in log records.
+        Sets the filename to be included in log records. If not set, the caller's file of the record is shown.
 
         Parameters:
             filename (str): The filename to display in the log.
@@ -978,9 +1161,9 @@ class CustomFormatter(logging.Formatter):
         """
         Formats the log record with the appropriate colors and formatting.
         """
-        log_fmt = self.FORMATS.get(record.levelno, self.DEFAULT_FORMAT)
-        formatter = logging.Formatter(log_fmt, "%H:%M:%S")
-        record.filename = self._filename
+        formatter = self._formatters.get(record.levelno, self._default_formatter)
+        if self._filename is not None:
+            record.filename = self._filename
         record.levelname = f'[{record.levelname}]'
         record.filename = f'({record.filename})'
         record.name = f'[{record.name}]'
@@ -1060,14 +1243,35 @@ class Logger:
         Internal helper to remap a log call from original_level to a mapped
         level (if configured), then emit the log and handle redirections/file output.
         """
-        self.formatter.setFileName(self.getFileName())
         # Determine mapped level (defaults to the original)
         mapped_level = self._level_map.get(original_level, original_level)
+        # Nothing to do below the logger's level unless a redirection or log file wants all levels
+        if mapped_level < self._logger.level and not _capture_all:
+            return
         # Emit via underlying logger
-        self._logger.log(mapped_level, msg, *args, **kwargs)
+        self._emit(mapped_level, msg, args, **kwargs)
         # Handle redirections and file output
         handle_log(msg, logger=self, level=mapped_level)
 
+    def _emit(self, level, msg, args, exc_info=None, extra=None, stack_info=False, stacklevel=1):
+        """
+        logging.Logger._log, except that the caller's frame is only looked up when the
+        formatter shows the file (or a stack is requested).
+        """
+        logger = self._logger
+        if not logger.isEnabledFor(level):
+            return
+        if _show_log_file or stack_info:
+            # findCaller skips logging's own frames; the next three are _emit, _mapped_log and debug()/info()/...
+            filename, lineno, func, sinfo = logger.findCaller(stack_info, stacklevel + 3)
+        else:
+            filename, lineno, func, sinfo = '(unknown file)', 0, '(unknown function)', None
+        if exc_info and not isinstance(exc_info, tuple):
+            exc_info = sys.exc_info() if not isinstance(exc_info, BaseException) else \
+                (type(exc_info), exc_info, exc_info.__traceback__)
+        record = logger.makeRecord(logger.name, level, filename, lineno, msg, args, exc_info, func, extra, sinfo)
+        logger.handle(record)
+
     def debug(self, msg, *args, **kwargs):
         """
         Logs a debug-level message.
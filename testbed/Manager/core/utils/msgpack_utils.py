@@ -0,0 +1,42 @@
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # Optional, only needed for binary websocket encodings
+    msgpack = None
+
+MSGPACK_AVAILABLE = msgpack is not None
+
+# NumPy arrays are packed as raw typed buffers instead of lists of numbers:
+#   {"__ndarray__": "<f4", "shape": [n, m], "data": <bin>}
+# The dtype string uses NumPy's notation with explicit byte order, so the receiver can view `data` as a typed array.
+NDARRAY_KEY = '__ndarray__'
+
+
+def msgpackDefault(obj):
+    """
+    Custom serializer for msgpack, usable as `default` of msgpack.packb.
+    Handles numpy arrays and scalars.
+    """
+    if isinstance(obj, np.ndarray):
+        array = np.ascontiguousarray(obj)
+        if array.dtype.hasobject:
+            return array.tolist()
+        return {NDARRAY_KEY: array.dtype.str, 'shape': list(array.shape), 'data': array.tobytes()}
+    if isinstance(obj, np.generic):  # e.g. np.int32, np.float64
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj)}")
+
+
+def _object_hook(obj: dict):
+    if NDARRAY_KEY in obj:
+        return np.frombuffer(obj['data'], dtype=np.dtype(obj[NDARRAY_KEY])).reshape(obj['shape'])
+    return obj
+
+
+def msgpackEncode(obj) -> bytes:
+    return msgpack.packb(obj, default=msgpackDefault, use_bin_type=True)
+
+
+def msgpackDecode(data: bytes):
+    return msgpack.unpackb(data, object_hook=_object_hook, raw=False, strict_map_key=False)
@@ -0,0 +1,349 @@
+import dataclasses
+import threading
+import time
+
+import numpy as np
+
+from core.communication.binary_stream import StreamBatch
+from core.communication.serial.frames import FrameBatch, FrameFormat
+from core.utils.csv_utils import read_csv_array
+from core.utils.events import event_definition, Event
+from core.utils.exit import register_exit_callback
+from core.utils.logging_utils import Logger
+from core.utils.session_recorder import SessionReader, KIND_RECORDS
+from core.utils.time import IntervalTimer
+
+# Number of ticks the jitter percentiles are computed over
+JITTER_WINDOW = 4096
+
+
+# === REPLAY ===========================================================================================================
+@dataclasses.dataclass
+class TelemetryReplayStats:
+    batches: int = 0
+    records: int = 0
+    position: float = 0.0  # Seconds of recording time since the first record
+    duration: float = 0.0  # Seconds of recording time of the whole replay
+    records_per_second: float = 0.0  # From start() or the last resume() until now or the last pause
+    # Lateness of the ticks against their schedule, paced replays only
+    jitter_mean: float = 0.0
+    jitter_p99: float = 0.0
+    jitter_max: float = 0.0
+    late_ticks: int = 0  # Ticks more than one interval late
+
+
+@event_definition
+class TelemetryReplayEvents:
+    # StreamBatch per tick, like Device.events.stream of a binary stream
+    stream: Event = Event(copy_on_read=True)
+    finished: Event
+
+
+class TelemetryReplay:
+    """
+    Feeds recorded telemetry back through events, for developing controllers and GUIs without the device.
+
+    The records are loaded in bulk (see from_csv, from_session and from_frames) and handed out on a thread that ticks
+    every `interval` seconds of wall time. Each tick emits the records of the next `interval * speed` seconds of
+    recording time as one StreamBatch on events.stream and on the events added with connect(); StreamBatch.time is
+    the recorded time of the last record of the batch. Ticks are paced by an IntervalTimer, so a slow consumer delays
+    the following ticks but does not stretch the replay. With speed None the ticks (one interval of recording time
+    each) are emitted back to back, which makes the replay a load test for everything behind the events.
+    """
+    times: np.ndarray
+    records: np.ndarray
+    stream: str
+    interval: float
+    loop: bool
+
+    _speed: float | None
+    _cursor: int = 0  # Index of the next record to emit
+    _position: float = 0.0
+    _thread: threading.Thread | None = None
+    _exit: bool = False
+
+    # === INIT =========================================================================================================
+    def __init__(self, times: np.ndarray, records: np.ndarray, stream: str = 'replay', speed: float | None = 1.0,
+                 interval: float = 0.02, loop: bool = False, name: str = 'telemetry_replay'):
+        """
+        :param times: Recorded time of every record in seconds, ascending.
+        :param records: Structured array with one record per entry of `times`.
+        :param speed: Replay speed, 1.0 for real time, None for as fast as possible.
+        :param interval: Wall time between two ticks in seconds.
+        :param loop: Start over at the first record when the last one was emitted.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if len(times) != len(records):
+            raise ValueError(f"{len(times)} times for {len(records)} records")
+        if len(times) > 1 and np.any(np.diff(times) < 0):
+            order = np.argsort(times, kind='stable')
+            times, records = times[order], records[order]
+
+        self.times = times
+        self.records = records.view()
+        self.records.flags.writeable = False  # Batches are views into the records and shared between consumers
+        self.stream = stream
+        self.interval = interval
+        self.loop = loop
+        self.name = name
+        self._speed = self._checkSpeed(speed)
+
+        self._t0 = float(times[0]) if len(times) else 0.0
+        self._duration = float(times[-1]) - self._t0 if len(times) else 0.0
+        self._targets = []
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._generation = 0  # Incremented by seek() to drop a tick that was computed before
+
+        self._stats = TelemetryReplayStats(duration=self._duration)
+        self._jitter = np.zeros(JITTER_WINDOW)
+        self._ticks = 0
+        self._rate_time = time.perf_counter()
+        self._rate_end = None
+        self._rate_records = 0
+
+        self.events = TelemetryReplayEvents()
+        self.logger = Logger('TelemetryReplay', 'INFO')
+
+        register_exit_callback(self.close)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def from_csv(cls, file: str, time_column: str | None = None, rate: float | None = None,
+                 dtype: np.dtype | None = None, columns: list[str] | None = None, meta_lines: int = 1,
+                 **kwargs) -> 'TelemetryReplay':
+        """
+        Replay a CSV file written by CSVLogger. The times are taken from `time_column` (seconds) or, for files without
+        one, spread evenly at `rate` records per second. With `dtype` the flattened columns ('estimation.roll') are put
+        back into records of that (nested) layout, e.g. the dtype of the logged device records; otherwise the records
+        have one field per column.
+        """
+        if (time_column is None) == (rate is None):
+            raise ValueError("Give either time_column or rate")
+        if columns is not None and time_column is not None and time_column not in columns:
+            columns = [*columns, time_column]
+        flat = read_csv_array(file, meta_lines=meta_lines, columns=columns)
+        times = flat[time_column].astype(np.float64) if time_column is not None else np.arange(len(flat)) / rate
+        records = _nest(flat, np.dtype(dtype)) if dtype is not None else flat
+        return cls(times, records, **kwargs)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def from_session(cls, file: str, channel: str, start: float | None = None, end: float | None = None,
+                     **kwargs) -> 'TelemetryReplay':
+        """
+        Replay a records channel of a SessionRecorder recording, e.g. "<device uid>/<stream>" or the samples event of
+        a serial device.
+        """
+        with SessionReader(file) as reader:
+            if channel not in reader.channels:
+                raise ValueError(f"No channel \"{channel}\" in {file}, channels: {list(reader.channels)}")
+            if reader.channels[channel].kind != KIND_RECORDS:
+                raise ValueError(f"Channel \"{channel}\" does not hold records")
+            data = reader.read(channel, start, end)
+        kwargs.setdefault('stream', channel.rsplit('/', 1)[-1])
+        return cls(data.times, data.values, **kwargs)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def from_frames(cls, file: str, format: FrameFormat, dtype: np.dtype, rate: float, msg_type: int | None = None,
+                    **kwargs) -> 'TelemetryReplay':
+        """
+        Replay a raw dump of received serial frames, decoding the payloads of `msg_type` as `dtype` records in one go.
+        Raw frames carry no time, so the records are spread evenly at `rate` records per second.
+        """
+        buffer = np.fromfile(file, dtype=np.uint8)
+        offsets, _, crc_errors = format.scan(buffer)
+        frames = buffer[offsets[:, None] + np.arange(format.frame_size)].view(format.dtype).reshape(-1)
+        records = FrameBatch(frames=frames, time=0.0).payload(dtype, msg_type=msg_type)
+        replay = cls(np.arange(len(records)) / rate, records, **kwargs)
+        if crc_errors:
+            replay.logger.warning(f"{file}: skipped {crc_errors} corrupted frames")
+        return replay
+
+    # === PROPERTIES ===================================================================================================
+    @property
+    def speed(self) -> float | None:
+        return self._speed
+
+    @property
+    def position(self) -> float:
+        return self._position
+
+    @property
+    def duration(self) -> float:
+        return self._duration
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    @property
+    def stats(self) -> TelemetryReplayStats:
+        stats = dataclasses.replace(self._stats, position=self._position)
+        jitter = self._jitter[:min(self._ticks, JITTER_WINDOW)]
+        if len(jitter):
+            stats.jitter_mean = float(jitter.mean())
+            stats.jitter_p99 = float(np.percentile(jitter, 99))
+        elapsed = (self._rate_end or time.perf_counter()) - self._rate_time
+        if elapsed > 0:
+            stats.records_per_second = self._rate_records / elapsed
+        return stats
+
+    # === METHODS ======================================================================================================
+    def connect(self, event: Event, raw: bool = False):
+        """
+        Also set `event` on every tick, e.g. the stream event of a device the GUI is bound to. With `raw` the event
+        gets the records array instead of the StreamBatch, like CommunicationEvents.samples.
+        """
+        self._targets.append((event, raw))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._exit = False
+        self._resetRate()
+        self._running.set()
+        self._thread = threading.Thread(target=self._task, name=self.name, daemon=True)
+        self._thread.start()
+        speed = 'max speed' if self._speed is None else f"{self._speed:g}x"
+        self.logger.info(f"Replaying {len(self.records)} records ({self._duration:.1f} s) at {speed}")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def pause(self):
+        if self._running.is_set():
+            self._running.clear()
+            self._rate_end = time.perf_counter()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def resume(self):
+        if not self._running.is_set():
+            self._resetRate()
+            self._running.set()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def seek(self, position: float):
+        """
+        Continue at `position` seconds of recording time after the first record.
+        """
+        position = min(max(position, 0.0), self._duration)
+        with self._lock:
+            self._cursor = int(np.searchsorted(self.times, self._t0 + position, side='left'))
+            self._position = position
+            self._generation += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setSpeed(self, speed: float | None):
+        self._speed = self._checkSpeed(speed)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Wait until the last record was emitted (never for looping replays). Returns False on timeout.
+        """
+        thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def close(self, *args, **kwargs):
+        self._exit = True
+        self._running.set()  # Wake a paused thread
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 1)
+        self._thread = None
+
+    # === PRIVATE METHODS ==============================================================================================
+    def _task(self):
+        timer = IntervalTimer(self.interval, raise_race_condition_error=False)
+        n = len(self.times)
+        while not self._exit:
+            if not self._running.is_set():
+                self._running.wait(0.1)
+                timer.reset()
+                continue
+
+            speed = self._speed
+            with self._lock:
+                generation = self._generation
+                start = self._cursor
+                position = self._position + self.interval * (speed or 1.0)
+                end = int(np.searchsorted(self.times, self._t0 + position, side='right'))
+
+            if speed is not None:
+                timer.sleep_until_next()
+                self._addJitter(time.perf_counter() - timer.previous_time)
+
+            with self._lock:
+                if generation != self._generation or not self._running.is_set():
+                    continue  # seek() or pause() while waiting for the tick
+                self._cursor = end
+                self._position = min(position, self._duration)
+
+            if end > start:
+                self._emit(start, end)
+
+            if end >= n:
+                if not self.loop:
+                    break
+                self.seek(0.0)
+
+        self._exit = True
+        self.pause()
+        if self._cursor >= n:
+            self.logger.info(f"Replay finished: {self._stats.records} records in {self._stats.batches} batches")
+            self.events.finished.set(self.stats)
+        # Cleared last, so that wait() does not return before finished was set
+        self._thread = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _emit(self, start: int, end: int):
+        records = self.records[start:end]
+        batch = StreamBatch(stream=self.stream, records=records, time=float(self.times[end - 1]))
+        self.events.stream.set(batch)
+        for event, raw in self._targets:
+            event.set(records if raw else batch)
+
+        self._stats.batches += 1
+        self._stats.records += end - start
+        self._rate_records += end - start
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _addJitter(self, lateness: float):
+        self._jitter[self._ticks % JITTER_WINDOW] = lateness
+        self._ticks += 1
+        if lateness > self._stats.jitter_max:
+            self._stats.jitter_max = lateness
+        if lateness > self.interval:
+            self._stats.late_ticks += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _resetRate(self):
+        self._rate_time = time.perf_counter()
+        self._rate_end = None
+        self._rate_records = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _checkSpeed(speed: float | None) -> float | None:
+        if speed is not None and speed <= 0:
+            raise ValueError(f"Speed must be positive or None for max speed, got {speed}")
+        return speed
+
+
+# === HELPERS ==========================================================================================================
+def _nest(flat: np.ndarray, dtype: np.dtype, prefix: str = '', out: np.ndarray | None = None) -> np.ndarray:
+    # Fill the (nested) fields of `dtype` from the flattened columns of a CSV array, column by column
+    if out is None:
+        out = np.zeros(len(flat), dtype=dtype)
+    for name in dtype.names:
+        field = dtype.fields[name][0]
+        key = f"{prefix}{name}"
+        if field.names:
+            _nest(flat, field, f"{key}.", out[name])
+        elif key in flat.dtype.names:
+            out[name] = flat[key]
+    return out
@@ -0,0 +1,648 @@
+import dataclasses
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from dataclasses import is_dataclass
+from typing import Any, Callable, Iterator
+
+import numpy as np
+
+from core.utils.dataclass_utils import asdict_optimized
+from core.utils.events import Event, PatternSubscriber
+from core.utils.exit import register_exit_callback
+from core.utils.logging_utils import Logger, addLogRedirection, removeLogRedirection
+from core.utils import msgpack_utils
+from core.utils.msgpack_utils import MSGPACK_AVAILABLE, msgpackDecode, msgpackDefault
+
+try:
+    import zstandard
+except ImportError:  # Optional, only needed for zstd compressed recordings
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # Optional, only needed for lz4 compressed recordings
+    lz4_frame = None
+
+# ======================================================================================================================
+# Session recordings
+#
+#   file:  | FILE_MAGIC | chunk ... | index chunk | footer |
+#   chunk: | CHUNK_HEADER | body (compressed as given in the header) |
+#
+# Every recorded source is a channel with a name and a kind:
+#   records  NumPy structured records (device stream batches, decoded log frames). The body holds the time column
+#            (float64) followed by one contiguous column per field.
+#   objects  Any other payload (event data with flags, log records). The body holds the time column followed by the
+#            msgpack encoded list of payloads.
+# A channel is defined by a chunk on the DEFINITION channel before its first data chunk, so a recording stays readable
+# when the process dies before the index is written; the reader then rebuilds the index by scanning the chunks.
+# The index lists channel, record count, file offset and first/last time of every data chunk and is what time range
+# queries use to skip chunks. Times are time.time() of the recording machine.
+# ======================================================================================================================
+FILE_MAGIC = b'BSREC001'
+FOOTER_MAGIC = b'BSRECEND'
+CHUNK_MAGIC = b'CHNK'
+
+# magic, channel, kind, compression, record count, body size uncompressed, body size stored, first time, last time
+CHUNK_HEADER = struct.Struct('<4sHBBIIIdd')
+FOOTER = struct.Struct('<Q8s')  # offset of the index chunk, magic
+
+DEFINITION_CHANNEL = 0xFFFE
+INDEX_CHANNEL = 0xFFFF
+
+KIND_RECORDS = 0
+KIND_OBJECTS = 1
+KIND_META = 2
+
+INDEX_DTYPE = np.dtype([('channel', '<u2'), ('count', '<u4'), ('offset', '<u8'), ('t_first', '<f8'),
+                        ('t_last', '<f8')])
+
+COMPRESSION = {'none': 0, 'zlib': 1, 'zstd': 2, 'lz4': 3}
+LOG_CHANNEL = 'log'
+
+
+# === COMPRESSION ======================================================================================================
+def _compressor(compression: str) -> Callable[[bytes], bytes] | None:
+    match compression:
+        case 'none' | None:
+            return None
+        case 'zlib':
+            return lambda data: zlib.compress(data, 1)
+        case 'zstd':
+            if zstandard is None:
+                raise ValueError("zstd compression needs the zstandard package")
+            return zstandard.ZstdCompressor(level=3).compress
+        case 'lz4':
+            if lz4_frame is None:
+                raise ValueError("lz4 compression needs the lz4 package")
+            return lz4_frame.compress
+        case _:
+            raise ValueError(f"Unknown compression \"{compression}\", use one of {list(COMPRESSION)}")
+
+
+def _decompress(compression: int, data: bytes) -> bytes:
+    if compression == COMPRESSION['none']:
+        return data
+    if compression == COMPRESSION['zlib']:
+        return zlib.decompress(data)
+    if compression == COMPRESSION['zstd']:
+        if zstandard is None:
+            raise ValueError("Recording is zstd compressed, install the zstandard package to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == COMPRESSION['lz4']:
+        if lz4_frame is None:
+            raise ValueError("Recording is lz4 compressed, install the lz4 package to read it")
+        return lz4_frame.decompress(data)
+    raise ValueError(f"Unknown compression id {compression}")
+
+
+# === ENCODING =========================================================================================================
+def _dtype_to_json(dtype: np.dtype) -> list:
+    # Packed field list: the columns are stored without the padding of the source layout
+    fields = []
+    for name in dtype.names:
+        field = dtype.fields[name][0]
+        base, shape = (field.subdtype if field.subdtype is not None else (field, ()))
+        fields.append([name, _dtype_to_json(base) if base.names else base.str, list(shape)])
+    return fields
+
+
+def _dtype_from_json(fields: list) -> np.dtype:
+    return np.dtype([(name, _dtype_from_json(base) if isinstance(base, list) else base, tuple(shape))
+                     for name, base, shape in fields])
+
+
+def _object_default(obj):
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict_optimized(obj)
+    try:
+        return msgpackDefault(obj)
+    except TypeError:
+        return repr(obj)
+
+
+def _encode_objects(values: list) -> bytes:
+    return msgpack_utils.msgpack.packb(values, default=_object_default, use_bin_type=True)
+
+
+# === CHANNELS =========================================================================================================
+@dataclasses.dataclass(frozen=True)
+class ChannelInfo:
+    id: int
+    name: str
+    kind: int
+    dtype: np.dtype | None = None  # Records channels only
+
+    def to_json(self) -> dict:
+        description = {'id': self.id, 'name': self.name, 'kind': self.kind}
+        if self.dtype is not None:
+            description['dtype'] = _dtype_to_json(self.dtype)
+        return description
+
+    @classmethod
+    def from_json(cls, description: dict) -> 'ChannelInfo':
+        dtype = _dtype_from_json(description['dtype']) if 'dtype' in description else None
+        return cls(id=description['id'], name=description['name'], kind=description['kind'], dtype=dtype)
+
+
+class _ChannelBuffer:
+    __slots__ = ('info', 'source_dtype', 'times', 'values', 'count', 'opened')
+
+    def __init__(self, info: ChannelInfo, source_dtype: np.dtype | None = None):
+        self.info = info
+        self.source_dtype = source_dtype  # Layout of the recorded records, info.dtype is its packed form
+        self.times = []
+        self.values = []
+        self.count = 0
+        self.opened = 0.0
+
+    def add(self, t: float, value):
+        if not self.count:
+            self.opened = time.monotonic()
+        if self.info.kind == KIND_RECORDS:
+            self.times.append(np.full(len(value), t))
+            self.values.append(value)
+            self.count += len(value)
+        else:
+            self.times.append(t)
+            self.values.append(value)
+            self.count += 1
+
+    def body(self) -> tuple[bytes, float, float]:
+        if self.info.kind == KIND_RECORDS:
+            times = np.concatenate(self.times)
+            records = np.concatenate(self.values) if len(self.values) > 1 else self.values[0]
+            if records.dtype != self.info.dtype:
+                records = records.astype(self.info.dtype)
+            columns = [times.tobytes()]
+            columns += [np.ascontiguousarray(records[name]).tobytes() for name in self.info.dtype.names]
+            body = b''.join(columns)
+        else:
+            times = np.asarray(self.times, dtype=np.float64)
+            body = times.tobytes() + _encode_objects(self.values)
+        first, last = float(times.min()), float(times.max())
+        self.times = []
+        self.values = []
+        self.count = 0
+        return body, first, last
+
+
+# === RECORDER =========================================================================================================
+@dataclasses.dataclass
+class SessionRecorderStats:
+    records: int = 0  # Records written (each record of a stream batch counts)
+    chunks: int = 0
+    raw_bytes: int = 0  # Chunk bodies before compression
+    bytes_written: int = 0
+    queued: int = 0  # Items waiting for the writer thread
+    dropped: int = 0  # Items not recorded: queue full, write error or not fitting the channel they were recorded to
+
+
+class SessionRecorder:
+    """
+    Records events, device streams and log records of a session into one chunked, indexed binary file.
+
+    Producers only put (channel, time, payload) on a queue; a background thread buffers the items per channel and
+    writes a chunk when a channel has `chunk_records` records or its oldest buffered record is `chunk_interval`
+    seconds old. Read recordings with SessionReader.
+
+    The queue holds at most `max_queued` items; items recorded while it is full are dropped and counted in
+    stats.dropped. When writing fails (e.g. disk full), the error is logged once, the file is closed and everything
+    recorded afterwards is counted as dropped.
+    """
+    file: str
+    compression: str
+    chunk_records: int
+    chunk_interval: float
+    max_queued: int
+
+    _channels: dict[str, _ChannelBuffer]
+    _index: list[tuple]
+    _subscribers: list[PatternSubscriber]
+    _log_redirection: Callable | None = None
+    _thread: threading.Thread | None = None
+    _exit: bool = False
+    _write_error: OSError | None = None
+
+    # === INIT =========================================================================================================
+    def __init__(self, file: str, compression: str = 'zlib', chunk_records: int = 4096, chunk_interval: float = 1.0,
+                 max_queued: int = 65536):
+        self.file = file
+        self.compression = compression
+        self.chunk_records = chunk_records
+        self.chunk_interval = chunk_interval
+        self.max_queued = max_queued
+
+        self._compress = _compressor(compression)
+        self._compression_id = COMPRESSION['none'] if self._compress is None else COMPRESSION[compression]
+
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._channels = {}
+        self._index = []
+        self._subscribers = []
+        self._file = None
+
+        self._stats = SessionRecorderStats()
+        self.logger = Logger('SessionRecorder', 'INFO')
+
+        register_exit_callback(self.close)
+
+    # === PROPERTIES ===================================================================================================
+    @property
+    def stats(self) -> SessionRecorderStats:
+        stats = dataclasses.replace(self._stats)
+        stats.queued = self._queue.qsize()
+        return stats
+
+    # === METHODS ======================================================================================================
+    def start(self):
+        folder = os.path.dirname(self.file)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._file = open(self.file, 'wb', buffering=1 << 20)
+        self._file.write(FILE_MAGIC)
+        self._thread = threading.Thread(target=self._task, name='session_recorder', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Recording session to {self.file}")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def close(self, *args, **kwargs):
+        if self._exit:
+            return
+        self._exit = True
+
+        for subscriber in self._subscribers:
+            subscriber.stop()
+        self._subscribers = []
+        if self._log_redirection is not None:
+            removeLogRedirection(self._log_redirection)
+            self._log_redirection = None
+
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self.logger.info(f"Recorded {self._stats.records} records in {self._stats.chunks} chunks "
+                             f"({self._stats.bytes_written / 1e6:.1f} MB) to {self.file}")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def record(self, channel: str, data, t: float | None = None):
+        """
+        Record one payload. A structured NumPy array is recorded as that many records of a records channel; anything
+        else is one entry of an objects channel. Safe to call from any thread, never blocks: the payload is dropped
+        when the queue is full or writing has failed.
+        """
+        if self._write_error is not None:
+            self._stats.dropped += 1
+            return
+        try:
+            self._queue.put_nowait((channel, time.time() if t is None else t, data))
+        except queue.Full:
+            self._stats.dropped += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def recordEvents(self, pattern: str | Event, predicate: Callable | None = None):
+        """
+        Record every set() of the events whose uid matches `pattern`, including events created later. Each event
+        becomes a channel named by its uid; stream batches of device stream events become records channels named
+        "<uid>/<stream>".
+        """
+        if isinstance(pattern, Event):
+            pattern = pattern.uid
+        self._subscribers.append(_RecordingSubscriber(self, pattern, predicate=predicate))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def recordLogs(self, minimum_level: int | str = 'DEBUG'):
+        """
+        Record the log records that pass their logger's level and `minimum_level` into the "log" channel as
+        [logger name, level, message]. The time is the time the log sink delivered the record.
+        """
+        def redirection(entry, msg, logger, level):
+            self.record(LOG_CHANNEL, [logger.name, level, str(msg)])
+
+        if self._log_redirection is not None:
+            removeLogRedirection(self._log_redirection)
+        self._log_redirection = redirection
+        addLogRedirection(redirection, minimum_level=minimum_level)
+
+    # === PRIVATE METHODS ==============================================================================================
+    def _task(self):
+        running = True
+        while running:
+            try:
+                items = [self._queue.get(timeout=self.chunk_interval / 2)]
+            except queue.Empty:
+                items = []
+            try:
+                while len(items) < 8192:
+                    items.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            for item in items:
+                if item is None:
+                    running = False
+                    continue
+                if self._write_error is not None:
+                    # Writing failed: keep draining the queue until close(), counting what arrives
+                    self._stats.dropped += 1
+                    continue
+                try:
+                    self._add(*item)
+                except OSError as e:
+                    self._stats.dropped += 1
+                    self._writeFailed(e)
+                except Exception as e:
+                    self._stats.dropped += 1
+                    self.logger.warning(f"Cannot record to channel \"{item[0]}\": {e}")
+
+            if self._write_error is None:
+                try:
+                    self._writeDue(final=not running)
+                    self._file.flush()
+                except OSError as e:
+                    self._writeFailed(e)
+
+        if self._write_error is None:
+            try:
+                self._writeIndex()
+                self._file.close()
+            except OSError as e:
+                self._writeFailed(e)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _writeFailed(self, error: OSError):
+        if self._write_error is not None:
+            return
+        self._write_error = error
+        lost = sum(buffer.count for buffer in self._channels.values())
+        self._stats.dropped += lost
+        self.logger.error(f"Writing to {self.file} failed: {error}. Dropping {lost} buffered and all further records")
+        try:
+            self._file.close()
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _add(self, name: str, t: float, data):
+        buffer = self._channels.get(name)
+        if buffer is None:
+            if isinstance(data, np.ndarray) and data.dtype.names:
+                info = ChannelInfo(id=len(self._channels), name=name, kind=KIND_RECORDS,
+                                   dtype=_dtype_from_json(_dtype_to_json(data.dtype)))
+                buffer = _ChannelBuffer(info, source_dtype=data.dtype)
+            else:
+                if not MSGPACK_AVAILABLE:
+                    raise ValueError("Recording non-NumPy payloads needs the msgpack package")
+                info = ChannelInfo(id=len(self._channels), name=name, kind=KIND_OBJECTS)
+                buffer = _ChannelBuffer(info)
+            self._channels[name] = buffer
+            self._writeChunk(DEFINITION_CHANNEL, KIND_META, json.dumps(info.to_json()).encode(), 0, 0.0, 0.0,
+                             compress=False)
+        elif buffer.info.kind == KIND_RECORDS and getattr(data, 'dtype', None) != buffer.source_dtype:
+            raise ValueError(f"records of type {getattr(data, 'dtype', type(data))} differ from the channel's "
+                             f"{buffer.source_dtype}")
+
+        buffer.add(t, data)
+        if buffer.count >= self.chunk_records:
+            self._flushChannel(buffer)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _writeDue(self, final: bool = False):
+        now = time.monotonic()
+        for buffer in self._channels.values():
+            if buffer.count and (final or now - buffer.opened >= self.chunk_interval):
+                self._flushChannel(buffer)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _flushChannel(self, buffer: _ChannelBuffer):
+        count = buffer.count
+        body, first, last = buffer.body()
+        offset = self._writeChunk(buffer.info.id, buffer.info.kind, body, count, first, last)
+        self._index.append((buffer.info.id, count, offset, first, last))
+        self._stats.records += count
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _writeChunk(self, channel: int, kind: int, body: bytes, count: int, first: float, last: float,
+                    compress: bool = True) -> int:
+        stored = self._compress(body) if compress and self._compress is not None else body
+        compression = self._compression_id if stored is not body else COMPRESSION['none']
+        offset = self._file.tell()
+        self._file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, channel, kind, compression, count, len(body), len(stored),
+                                           first, last))
+        self._file.write(stored)
+        self._stats.chunks += 1
+        self._stats.raw_bytes += len(body)
+        self._stats.bytes_written += CHUNK_HEADER.size + len(stored)
+        return offset
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _writeIndex(self):
+        index = np.array(self._index, dtype=INDEX_DTYPE)
+        channels = json.dumps([buffer.info.to_json() for buffer in self._channels.values()]).encode()
+        body = struct.pack('<I', len(channels)) + channels + index.tobytes()
+        offset = self._writeChunk(INDEX_CHANNEL, KIND_META, body, len(index), 0.0, 0.0, compress=False)
+        self._file.write(FOOTER.pack(offset, FOOTER_MAGIC))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class _RecordingSubscriber(PatternSubscriber):
+    """
+    Pattern subscriber that hands every match straight to the recorder in the thread that set the event, instead of
+    storing it for waiters.
+    """
+
+    def __init__(self, recorder: SessionRecorder, pattern: str, predicate: Callable | None = None):
+        self.recorder = recorder
+        super().__init__(pattern=pattern, predicate=predicate, id=f"recorder:{pattern}", save_matches=False)
+
+    def set_match(self, event: Event | PatternSubscriber, flags: dict | None, data: Any):
+        records = getattr(data, 'records', None)
+        if isinstance(records, np.ndarray) and hasattr(data, 'stream'):
+            # StreamBatch of a device stream event
+            self.recorder.record(f"{event.uid}/{data.stream}", records, t=getattr(data, 'time', None))
+        elif isinstance(data, np.ndarray) and data.dtype.names:
+            self.recorder.record(event.uid, data)
+        else:
+            self.recorder.record(event.uid, [flags or {}, data])
+
+
+# === READER ===========================================================================================================
+@dataclasses.dataclass(frozen=True)
+class ChannelData:
+    times: np.ndarray
+    values: np.ndarray | list  # Structured array for records channels, list of payloads otherwise
+
+    def __len__(self):
+        return len(self.times)
+
+
+class SessionReader:
+    """
+    Reads a recording written by SessionRecorder. Time range queries only read the chunks whose time span overlaps
+    the range. Recordings that were not closed properly are indexed by scanning their chunks.
+    """
+    file: str
+    channels: dict[str, ChannelInfo]
+    index: np.ndarray
+    complete: bool  # False if the index had to be rebuilt
+
+    # === INIT =========================================================================================================
+    def __init__(self, file: str):
+        self.file = file
+        self._file = open(file, 'rb')
+        if self._file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            self._file.close()
+            raise ValueError(f"{file} is not a session recording")
+
+        self.complete = self._readIndex()
+        if not self.complete:
+            self._scan()
+        self._channels_by_id = {info.id: info for info in self.channels.values()}
+
+    # === METHODS ======================================================================================================
+    def close(self):
+        self._file.close()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def time_range(self, channel: str | None = None) -> tuple[float, float] | None:
+        index = self.index if channel is None else self.index[self.index['channel'] == self.channels[channel].id]
+        if not len(index):
+            return None
+        return float(index['t_first'].min()), float(index['t_last'].max())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def chunks(self, channel: str, start: float | None = None, end: float | None = None) -> Iterator[ChannelData]:
+        """
+        The data of `channel` between `start` and `end` (inclusive), one chunk at a time.
+        """
+        info = self.channels[channel]
+        index = self.index[self.index['channel'] == info.id]
+        if start is not None:
+            index = index[index['t_last'] >= start]
+        if end is not None:
+            index = index[index['t_first'] <= end]
+
+        for entry in index:
+            data = self._readChunk(info, int(entry['offset']))
+            if (start is not None and entry['t_first'] < start) or (end is not None and entry['t_last'] > end):
+                mask = np.ones(len(data.times), dtype=bool)
+                if start is not None:
+                    mask &= data.times >= start
+                if end is not None:
+                    mask &= data.times <= end
+                values = data.values[mask] if isinstance(data.values, np.ndarray) else \
+                    [value for value, keep in zip(data.values, mask) if keep]
+                data = ChannelData(times=data.times[mask], values=values)
+            if len(data):
+                yield data
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def read(self, channel: str, start: float | None = None, end: float | None = None) -> ChannelData:
+        info = self.channels[channel]
+        parts = list(self.chunks(channel, start, end))
+        if not parts:
+            empty = np.empty(0, dtype=info.dtype) if info.kind == KIND_RECORDS else []
+            return ChannelData(times=np.empty(0), values=empty)
+        times = np.concatenate([part.times for part in parts])
+        if info.kind == KIND_RECORDS:
+            values = np.concatenate([part.values for part in parts])
+        else:
+            values = [value for part in parts for value in part.values]
+        # Chunks of one channel are written in order, but a payload may carry its own (earlier) time
+        order = np.argsort(times, kind='stable')
+        if np.any(order != np.arange(len(order))):
+            times = times[order]
+            values = values[order] if isinstance(values, np.ndarray) else [values[i] for i in order]
+        return ChannelData(times=times, values=values)
+
+    # === PRIVATE METHODS ==============================================================================================
+    def _readHeader(self, offset: int) -> tuple | None:
+        self._file.seek(offset)
+        header = self._file.read(CHUNK_HEADER.size)
+        if len(header) < CHUNK_HEADER.size:
+            return None
+        fields = CHUNK_HEADER.unpack(header)
+        if fields[0] != CHUNK_MAGIC:
+            return None
+        return fields
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _readBody(self, offset: int) -> tuple[tuple, bytes] | None:
+        header = self._readHeader(offset)
+        if header is None:
+            return None
+        _, channel, kind, compression, count, size, stored, first, last = header
+        body = self._file.read(stored)
+        if len(body) < stored:
+            return None
+        return header, _decompress(compression, body)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _readChunk(self, info: ChannelInfo, offset: int) -> ChannelData:
+        header, body = self._readBody(offset)
+        count = header[4]
+        times = np.frombuffer(body, dtype=np.float64, count=count)
+        if info.kind == KIND_RECORDS:
+            values = np.empty(count, dtype=info.dtype)
+            position = times.nbytes
+            for name in info.dtype.names:
+                column = values[name]
+                column[...] = np.frombuffer(body, dtype=column.dtype, count=column.size,
+                                            offset=position).reshape(column.shape)
+                position += column.nbytes
+        else:
+            values = msgpackDecode(body[times.nbytes:])
+        return ChannelData(times=times, values=values)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _readIndex(self) -> bool:
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+        if size < len(FILE_MAGIC) + FOOTER.size:
+            return False
+        self._file.seek(size - FOOTER.size)
+        offset, magic = FOOTER.unpack(self._file.read(FOOTER.size))
+        if magic != FOOTER_MAGIC:
+            return False
+        chunk = self._readBody(offset)
+        if chunk is None or chunk[0][1] != INDEX_CHANNEL:
+            return False
+        body = chunk[1]
+        length, = struct.unpack_from('<I', body)
+        self.channels = {description['name']: ChannelInfo.from_json(description)
+                         for description in json.loads(body[4:4 + length])}
+        self.index = np.frombuffer(body, dtype=INDEX_DTYPE, offset=4 + length)
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _scan(self):
+        self.channels = {}
+        index = []
+        offset = len(FILE_MAGIC)
+        while True:
+            header = self._readHeader(offset)
+            if header is None:
+                break
+            _, channel, kind, compression, count, size, stored, first, last = header
+            if offset + CHUNK_HEADER.size + stored > os.fstat(self._file.fileno()).st_size:
+                break  # Chunk cut off by the end of the file
+            if channel == DEFINITION_CHANNEL:
+                _, body = self._readBody(offset)
+                info = ChannelInfo.from_json(json.loads(body))
+                self.channels[info.name] = info
+            elif channel != INDEX_CHANNEL:
+                index.append((channel, count, offset, first, last))
+            offset += CHUNK_HEADER.size + stored
+        self.index = np.array(index, dtype=INDEX_DTYPE)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
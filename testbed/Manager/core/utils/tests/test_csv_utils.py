@@ -0,0 +1,94 @@
+import numpy as np
+
+from core.utils.csv_utils import CSVLogger, read_csv_file, read_csv_array, iter_csv_arrays, read_csv_header
+
+
+# ================================================================
+# Helpers
+# ================================================================
+
+def make_records(n):
+    dtype = np.dtype([('pos', [('x', 'f4'), ('y', 'f4')]), ('count', 'u2'), ('ok', '?')])
+    records = np.zeros(n, dtype=dtype)
+    records['pos']['x'] = np.arange(n) * 0.5
+    records['pos']['y'] = -np.arange(n)
+    records['count'] = np.arange(n)
+    records['ok'] = np.arange(n) % 2 == 0
+    return records
+
+
+# ================================================================
+# CSVLogger writes
+# ================================================================
+
+def test_dict_rows_round_trip(tmp_path):
+    logger = CSVLogger(buffer_rows=2)
+    logger.make_file('dicts.csv', str(tmp_path), custom_text_header='header')
+    for i in range(5):
+        logger.write_data({'a': i, 'b': {'c': i * 0.5, 'd': 'text, "quoted"'}})
+    logger.close()
+
+    result = read_csv_file(str(tmp_path / 'dicts.csv'))
+    assert result['meta'] == ['header\n']
+    assert [row['index'] for row in result['data']] == list(range(5))
+    assert result['data'][3] == {'index': 3, 'a': 3, 'b': {'c': 1.5, 'd': 'text, "quoted"'}}
+
+
+def test_missing_keys_are_empty_cells(tmp_path):
+    logger = CSVLogger()
+    logger.make_file('missing.csv', str(tmp_path), custom_text_header='header')
+    logger.write_data({'a': 1, 'b': {'c': 2.0}})
+    logger.write_data({'a': 2})
+    logger.close()
+
+    data = read_csv_file(str(tmp_path / 'missing.csv'))['data']
+    assert data[1]['b']['c'] is None
+    array = read_csv_array(str(tmp_path / 'missing.csv'))
+    assert np.isnan(array['b.c'][1])
+
+
+def test_array_write_round_trip(tmp_path):
+    records = make_records(10)
+    logger = CSVLogger()
+    logger.make_file('array.csv', str(tmp_path), custom_text_header='header')
+    logger.write_data(records[:4])
+    logger.write_data(records[4:])
+    logger.close()
+
+    meta, headers, types = read_csv_header(str(tmp_path / 'array.csv'))
+    assert headers == ['index', 'pos.x', 'pos.y', 'count', 'ok']
+    assert types == ['int', 'float', 'float', 'int', 'bool']
+
+    array = read_csv_array(str(tmp_path / 'array.csv'))
+    assert np.array_equal(array['index'], np.arange(10))
+    assert np.array_equal(array['pos.x'], records['pos']['x'])
+    assert np.array_equal(array['ok'], records['ok'])
+
+
+def test_array_after_dict_header_keeps_all_rows(tmp_path):
+    # Fields of the array that are missing from the header written by a dict must not shorten the rows
+    logger = CSVLogger()
+    logger.make_file('mixed.csv', str(tmp_path), custom_text_header='header')
+    logger.write_data({'a': 1, 'b': 2, 'count': 3})
+    logger.write_data(np.zeros(10, dtype=[('count', 'u2')]))
+    logger.close()
+
+    data = read_csv_file(str(tmp_path / 'mixed.csv'))['data']
+    assert len(data) == 11
+    assert data[-1] == {'index': 10, 'a': None, 'b': None, 'count': 0}
+
+
+# ================================================================
+# Array readers
+# ================================================================
+
+def test_iter_csv_arrays_chunks_and_columns(tmp_path):
+    logger = CSVLogger()
+    logger.make_file('chunks.csv', str(tmp_path), custom_text_header='header')
+    logger.write_data(make_records(25))
+    logger.close()
+
+    chunks = list(iter_csv_arrays(str(tmp_path / 'chunks.csv'), chunk_rows=10, columns=['count']))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert chunks[0].dtype.names == ('count',)
+    assert np.array_equal(np.concatenate(chunks)['count'], np.arange(25))
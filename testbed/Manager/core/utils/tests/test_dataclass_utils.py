@@ -0,0 +1,71 @@
+import dataclasses
+import enum
+from dataclasses import dataclass, field
+from typing import Optional
+
+import pytest
+
+from core.utils.dataclass_utils import asdict_optimized, decode_dataclass, encode_dataclass, get_codec, \
+    MissingValueError
+
+
+# ================================================================
+# Test types
+# ================================================================
+
+class Mode(enum.IntEnum):
+    IDLE = 0
+    RUN = 1
+
+
+@dataclass
+class Point:
+    x: float = 0.0
+    y: float = 0.0
+
+
+@dataclass
+class Message:
+    name: str
+    mode: Mode = Mode.IDLE
+    origin: Point = field(default_factory=Point)
+    target: Optional[Point] = None
+    path: list[Point] = field(default_factory=list)
+    tags: dict[str, Point] = field(default_factory=dict)
+    data: dict = field(default_factory=dict)
+
+
+# ================================================================
+# Compiled codecs
+# ================================================================
+
+def test_codec_round_trip_nested():
+    message = Message(name='m', mode=Mode.RUN, origin=Point(1, 2), target=Point(3, 4),
+                      path=[Point(5, 6), Point(7, 8)], tags={'a': Point(9, 10)}, data={'raw': [1, (2, 3)]})
+    encoded = encode_dataclass(message)
+    assert encoded == dataclasses.asdict(message)
+    assert encoded['path'][1] == {'x': 7, 'y': 8}
+
+    decoded = decode_dataclass(Message, encoded)
+    assert decoded == message
+    assert isinstance(decoded.mode, Mode)
+    assert isinstance(decoded.tags['a'], Point)
+
+
+def test_codec_defaults_and_missing_fields():
+    decoded = get_codec(Message).decode({'name': 'only name', 'mode': 1})
+    assert decoded == Message(name='only name', mode=Mode.RUN)
+    assert decoded.path is not Message(name='other').path  # Default factories give fresh objects
+
+    with pytest.raises(MissingValueError):
+        decode_dataclass(Message, {'mode': 0})
+
+    with pytest.raises(TypeError):
+        get_codec(dict)
+
+
+def test_asdict_optimized_matches_asdict():
+    message = Message(name='m', path=[Point(1, 2)])
+    assert asdict_optimized(message) == dataclasses.asdict(message)
+    assert asdict_optimized([message, (Point(),)]) == [dataclasses.asdict(message), ({'x': 0.0, 'y': 0.0},)]
+    assert asdict_optimized(Message) is Message  # Dataclass types are returned unchanged
@@ -25,6 +25,10 @@ from core.utils.events import (
     pred_data_equals,
     pred_data_dict_key_equals,
     pred_data_in,
+    ThreadPoolDispatcher,
+    SerialDispatcher,
+    InlineDispatcher,
+    wait_for_events_async,
 )
 from core.utils.logging_utils import Logger
 
@@ -152,6 +156,36 @@ def test_history_pruning_respects_max_history_time():
     assert len(e.history) == 0
 
 
+def test_history_ring_buffer_is_bounded_and_window_lookup_is_exact():
+    from core.utils.events import EventHistory
+
+    h = EventHistory(capacity=8)
+    for i in range(20):
+        h.append(float(i), {}, i)
+    assert len(h) == 8
+    assert [p for (_, _, p) in h] == list(range(12, 20))
+    assert h.stats().evicted_capacity == 12
+
+    h.prune(cutoff=15.0)
+    assert [p for (_, _, p) in h] == list(range(15, 20))
+    assert h.stats().evicted_age == 3
+
+    # refill past the wrap point, then check window lookup against a linear scan
+    for i in range(20, 26):
+        h.append(float(i), {}, i)
+    for cutoff in (0.0, 17.5, 18.0, 25.0, 30.0):
+        expected = [p for (ts, _, p) in reversed(list(h)) if ts >= cutoff]
+        assert [p for (_, _, p) in h.window(cutoff)] == expected
+
+
+def test_stale_subscriber_window_is_capped():
+    e = Event(id="e25")
+    e.max_history_time_limit = 30.0
+    sub = Subscriber(events=[e], stale_event_time=3600)
+    assert e.max_history_time == 30.0
+    sub.stop()
+
+
 # ================================================================
 # Copy semantics (copy on set vs aliasing) with new get_data()
 # ================================================================
@@ -174,6 +208,24 @@ def test_copy_data_on_set_false_allows_aliasing():
     assert stored == {"k": ["a", "b"]}
 
 
+def test_copy_on_read_shares_frozen_snapshot_and_copies_on_demand():
+    e = Event(id="e24", copy_on_read=True)
+    src = {"k": [1, 2]}
+    e.set(data=src)
+
+    shared = e.get_data(copy=False)
+    assert shared == src
+    assert isinstance(shared, dict)
+    assert e.history[-1][2] is shared
+    with pytest.raises(TypeError):
+        shared["k"] = []
+
+    mutable = e.get_data(copy=True)
+    mutable["k"].append(3)
+    assert type(mutable) is dict
+    assert shared == {"k": [1, 2]}
+
+
 # ================================================================
 # Subscriber basics (single event), once semantics & callback shape
 # ================================================================
@@ -491,6 +543,285 @@ def test_listener_receives_snapshot_that_matched_not_overwrite():
     listener.stop()
 
 
+
+# ================================================================
+# Callback dispatchers (pool / serial / inline) and backpressure stats
+# ================================================================
+
+def test_thread_pool_dispatcher_bounds_workers_and_counts_drops():
+    gate = threading.Event()
+    done = []
+    d = ThreadPoolDispatcher(max_workers=2, max_queue=3, overflow="drop_oldest")
+
+    for i in range(10):
+        d.submit(lambda i=i: (gate.wait(1.0), done.append(i)))
+
+    stats = d.stats()
+    assert stats.workers <= 2
+    assert stats.dropped > 0
+    assert stats.max_queue_depth <= 3
+
+    gate.set()
+    assert wait_true(lambda: d.stats().queue_depth == 0 and len(done) == 10 - d.stats().dropped)
+    d.shutdown(wait=True)
+
+
+def test_serial_dispatcher_preserves_order():
+    out = []
+    d = SerialDispatcher()
+    for i in range(50):
+        d.submit(out.append, i)
+    assert wait_true(lambda: len(out) == 50)
+    assert out == list(range(50))
+    d.shutdown(wait=True)
+
+
+def test_listener_with_inline_dispatcher_runs_in_listener_thread():
+    e = Event(id="e21")
+    threads = []
+    hit = threading.Event()
+
+    def cb(data):
+        threads.append(threading.current_thread())
+        hit.set()
+
+    listener = e.on(callback=cb, dispatcher="inline")
+    assert isinstance(listener.dispatcher, InlineDispatcher)
+    e.set(data=1)
+    assert hit.wait(1.0) is True
+    assert threads[0] is listener._thread
+    assert listener.dispatcher.stats().executed == 1
+    listener.stop()
+
+
+def test_stopping_a_listener_keeps_a_shared_serial_dispatcher():
+    e = Event(id="e21b")
+    shared = SerialDispatcher()
+    out = []
+    first = e.on(callback=lambda data: out.append(('first', data)), dispatcher=shared)
+    second = e.on(callback=lambda data: out.append(('second', data)), dispatcher=shared)
+
+    first.stop()
+    e.set(data=1)
+    assert wait_true(lambda: out == [('second', 1)])
+    second.stop()
+    shared.shutdown(wait=True)
+
+    own = e.on(callback=lambda data: None, dispatcher="serial")
+    own.stop()
+    assert own.dispatcher._shutdown
+
+
+def test_blocking_callbacks_do_not_starve_the_pool():
+    d = ThreadPoolDispatcher(max_workers=2, max_queue=2, overflow="block", max_extra_workers=4, stall_timeout=0.05)
+    release = threading.Event()
+    done = []
+
+    # Two callbacks block until the fourth one runs; with a fixed pool of two workers this never happens
+    for _ in range(2):
+        d.submit(lambda: (release.wait(2.0), done.append('blocked')))
+    d.submit(lambda: done.append('queued'))
+    time.sleep(0.1)
+    d.submit(release.set)
+
+    assert wait_true(lambda: sorted(done) == ['blocked', 'blocked', 'queued'])
+    stats = d.stats()
+    assert stats.dropped == 0
+    assert 2 < stats.workers <= 6
+    d.shutdown(wait=True)
+
+
+
+# ================================================================
+# Pattern index: trie lookup agrees with fnmatch, container re-indexing
+# ================================================================
+
+def test_pattern_index_agrees_with_fnmatch():
+    import fnmatch
+    from core.utils.events import _PatternIndex
+
+    class _PS:
+        def __init__(self, pattern):
+            self.pattern = pattern
+
+    uids = ["a", "a:b", "a:b:c", "a:bc", "ab:c", "x:y:z", "robot1:stream", "robot12:stream"]
+    patterns = ["a", "a:*", "a:b*", "*:c", "a:?", "robot1:*", "robot1*", "*", "x:y:z", "[ar]*:c"]
+
+    index = _PatternIndex()
+    events = {uid: Event() for uid in uids}
+    for uid, ev in events.items():
+        ev.id = uid  # bypass id validation: uids with ':' stand in for container-scoped events
+        index.add_event(ev)
+    subs = [_PS(p) for p in patterns]
+    for ps in subs:
+        index.add_pattern(ps)
+
+    for uid in uids:
+        expected = {ps.pattern for ps in subs if fnmatch.fnmatchcase(uid, ps.pattern)}
+        assert {ps.pattern for ps in index.patterns_for(uid)} == expected
+    for ps in subs:
+        expected = {uid for uid in uids if fnmatch.fnmatchcase(uid, ps.pattern)}
+        assert {ev.uid for ev in index.events_for(ps.pattern)} == expected
+
+
+def test_pattern_index_prunes_empty_nodes():
+    import gc
+    from core.utils.events import _PatternIndex
+
+    class _PS:
+        def __init__(self, pattern):
+            self.pattern = pattern
+
+    index = _PatternIndex()
+    for connection in range(20):
+        ev = Event()
+        ev.id = f"robot:conn{connection}:stream"
+        other = Event()
+        other.id = f"robot:conn{connection}:status"
+        ps = _PS(f"robot:conn{connection}:*")
+        index.add_event(ev)
+        index.add_event(other)
+        index.add_pattern(ps)
+        index.remove_event(ev)
+        index.remove_event(other)
+        index.remove_pattern(ps)
+        assert index._events.empty()
+        assert index._patterns.empty()
+
+    # Events that are garbage collected without being removed are pruned on the next change
+    ev = Event()
+    ev.id = "robot:gone:stream"
+    index.add_event(ev)
+    del ev
+    gc.collect()
+    index.add_pattern(_PS("robot:*"))
+    assert index._events.empty()
+
+
+def test_pattern_subscriber_attaches_after_event_joins_container():
+    ps = PatternSubscriber(pattern="robotP:*")
+
+    @event_definition
+    class RobotEvents(EventContainer):
+        stream: Event
+
+    robot = RobotEvents(id="robotP")
+    assert any(c.event is robot.stream for c in ps.events)
+
+    data, match = ps.wait(timeout=0.01)
+    assert data is TIMEOUT
+    threading.Thread(target=lambda: (time.sleep(0.05), robot.stream.set(data=7)), daemon=True).start()
+    data, match = ps.wait(timeout=1.0)
+    assert data == 7
+    ps.stop()
+
+
+
+# ================================================================
+# Event.set fast path: per-event subscriber snapshots, no loop-wide lock
+# ================================================================
+
+def test_event_set_does_not_take_event_loop_lock():
+    from core.utils.events import active_event_loop
+
+    idle = Event(id="e22")
+    busy = Event(id="e23")
+    sub = Subscriber(events=[busy])
+    assert idle._subscribers == ()
+    assert busy._subscribers == (sub,)
+
+    locked = threading.Event()
+    release = threading.Event()
+
+    def hold_lock():
+        with active_event_loop._subscribers_lock:
+            locked.set()
+            release.wait(2.0)
+
+    threading.Thread(target=hold_lock, daemon=True).start()
+    assert locked.wait(1.0)
+
+    done = threading.Event()
+
+    def producer():
+        idle.set(data=1)
+        busy.set(data=2)
+        done.set()
+
+    threading.Thread(target=producer, daemon=True).start()
+    try:
+        assert done.wait(1.0) is True
+        data, match = sub.wait(stale_event_time=1.0, timeout=0.1)
+        assert data == 2
+    finally:
+        release.set()
+
+    sub.stop()
+    assert busy._subscribers == ()
+
+
+
+# ================================================================
+# asyncio front end
+# ================================================================
+
+def test_async_waits_share_one_loop_thread():
+    import asyncio
+
+    e = Event(id="e26", flags=[EventFlag("id", int)])
+    n = 200
+
+    async def main():
+        waits = [e.wait_async(predicate=pred_flag_equals("id", i), timeout=2.0) for i in range(n)]
+        tasks = [asyncio.ensure_future(w) for w in waits]
+        await asyncio.sleep(0.05)
+        threads_before = threading.active_count()
+
+        def producer():
+            for i in range(n):
+                e.set(data=i, flags={"id": i})
+
+        threading.Thread(target=producer, daemon=True).start()
+        results = await asyncio.gather(*tasks)
+        return threads_before, results
+
+    threads_before, results = asyncio.run(main())
+    assert [data for data, _ in results] == list(range(n))
+    assert threads_before < n
+
+
+def test_async_stream_and_wait_for_events():
+    import asyncio
+
+    a = Event(id="e27")
+    b = Event(id="e28")
+
+    async def main():
+        sub = Subscriber(events=[a])
+        received = []
+
+        async def consume():
+            async for match in sub.stream():
+                received.append(match.data)
+                if len(received) == 3:
+                    break
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        for i in range(3):
+            a.set(data=i)
+        await asyncio.wait_for(task, 1.0)
+        sub.stop()
+
+        asyncio.get_running_loop().call_later(0.02, b.set, "B")
+        data, match = await wait_for_events_async(OR(a, b), timeout=1.0)
+        return received, data
+
+    received, data = asyncio.run(main())
+    assert received == [0, 1, 2]
+    assert data == "B"
+
+
 if __name__ == '__main__':
     logger = Logger("TEST EVENTS")
     logger.info("-----")
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from core.utils import logging_utils
+from core.utils.logging_utils import Logger, addLogRedirection, removeLogRedirection, flushLogs
+
+
+# ================================================================
+# Redirections
+# ================================================================
+
+def test_replay_can_flush_and_log_without_deadlock():
+    logger = Logger('test_replay_flush')
+    for i in range(5):
+        logger.info(f"replay {i}")
+    assert flushLogs(timeout=1.0)
+
+    received = []
+    flushed = []
+
+    def redirection(entry, msg, lg, level):
+        if lg is not logger:
+            return
+        received.append(msg)
+        if msg == 'replay 0':
+            logger.info("logged during replay")
+            flushed.append(flushLogs(timeout=1.0))
+
+    thread = threading.Thread(target=addLogRedirection, args=(redirection,), kwargs={'past_time': 60}, daemon=True)
+    thread.start()
+    thread.join(timeout=2.0)
+    assert not thread.is_alive()
+
+    logger.info("live")
+    assert flushLogs(timeout=1.0)
+    removeLogRedirection(redirection)
+    assert flushed == [True]
+    assert received == [f"replay {i}" for i in range(5)] + ["logged during replay", "live"]
+
+
+def test_records_queued_before_redirection_are_not_delivered():
+    logger = Logger('test_redirection_seq')
+    stalled = threading.Event()
+    release = threading.Event()
+
+    def stall(entry, msg, lg, level):
+        if msg == 'stall':
+            stalled.set()
+            release.wait(2.0)
+
+    # Keep the sink busy so the next records stay queued while the redirection is added
+    addLogRedirection(stall)
+    logger.info("stall")
+    assert stalled.wait(1.0)
+    for i in range(3):
+        logger.info(f"before {i}")
+
+    received = []
+
+    def redirection(entry, msg, lg, level):
+        received.append(msg)
+
+    adder = threading.Thread(target=addLogRedirection, args=(redirection,), daemon=True)
+    adder.start()
+    time.sleep(0.05)
+    release.set()
+    adder.join(timeout=2.0)
+    logger.info("after")
+    assert flushLogs(timeout=1.0)
+    removeLogRedirection(stall)
+    removeLogRedirection(redirection)
+
+    assert 'after' in received
+    assert not any(msg.startswith('before') or msg == 'stall' for msg in received)
+
+
+def test_replay_spanning_several_slices_is_complete_and_holds_no_lock():
+    logger = Logger('test_replay_slices')
+    count = 3 * logging_utils._REPLAY_SLICE + 10
+    for i in range(count):
+        logger.info(f"replay {i}")
+    assert flushLogs(timeout=1.0)
+
+    received = []
+    locked = []
+
+    def redirection(entry, msg, lg, level):
+        if lg is logger:
+            received.append(msg)
+            locked.append(logging_utils._buffer_lock.locked())
+
+    addLogRedirection(redirection, past_time=60)
+    removeLogRedirection(redirection)
+    assert received == [f"replay {i}" for i in range(count)]
+    assert not any(locked)
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from core.utils.replay import TelemetryReplay
+from core.utils.session_recorder import SessionRecorder
+
+SAMPLE = np.dtype([('tick', '<u4'), ('value', '<f4')])
+
+
+def wait_true(pred, timeout=1.5, period=0.01):
+    """Spin until pred() returns True or timeout elapses."""
+    end = time.time() + timeout
+    while time.time() < end:
+        if pred():
+            return True
+        time.sleep(period)
+    return False
+
+
+def make_records(count: int) -> np.ndarray:
+    records = np.zeros(count, dtype=SAMPLE)
+    records['tick'] = np.arange(count)
+    records['value'] = np.arange(count) / 2
+    return records
+
+
+class Collector:
+    """Stands in for an event connected with TelemetryReplay.connect()."""
+
+    def __init__(self):
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def set(self, data=None, flags=None):
+        with self._lock:
+            self.batches.append(data)
+
+    def ticks(self) -> list[int]:
+        with self._lock:
+            return [int(tick) for batch in self.batches for tick in batch.records['tick']]
+
+
+def make_replay(count: int = 100, rate: float = 100.0, **kwargs) -> tuple[TelemetryReplay, Collector]:
+    replay = TelemetryReplay(np.arange(count) / rate, make_records(count), **kwargs)
+    collector = Collector()
+    replay.connect(collector)
+    return replay, collector
+
+
+# ================================================================
+# Playback
+# ================================================================
+
+def test_max_speed_replays_everything_in_order():
+    replay, collector = make_replay(speed=None, interval=0.05)
+    replay.start()
+    assert replay.wait(timeout=2.0)
+
+    assert collector.ticks() == list(range(100))
+    assert len(collector.batches) == 20  # One second of recording in ticks of 0.05 s
+    assert collector.batches[-1].time == pytest.approx(0.99)
+    assert replay.paused
+
+    stats = replay.events.finished.get_data(copy=False)
+    assert stats.records == 100
+    assert stats.batches == len(collector.batches)
+
+
+def test_unsorted_times_are_sorted():
+    records = make_records(4)
+    replay = TelemetryReplay(np.array([0.3, 0.1, 0.2, 0.0]), records, speed=None)
+    assert replay.records['tick'].tolist() == [3, 1, 2, 0]
+    assert replay.duration == pytest.approx(0.3)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        TelemetryReplay(np.arange(3), make_records(2))
+    with pytest.raises(ValueError):
+        TelemetryReplay(np.arange(3), make_records(3), speed=0)
+
+
+# ================================================================
+# Seek and pause
+# ================================================================
+
+def test_seek_before_start():
+    replay, collector = make_replay(speed=None)
+    replay.seek(0.5)
+    assert replay.position == 0.5
+    replay.start()
+    assert replay.wait(timeout=2.0)
+    assert collector.ticks() == list(range(50, 100))
+
+
+def test_pause_resume_and_seek_while_running():
+    replay, collector = make_replay(count=200, speed=1.0, interval=0.01)
+    replay.start()
+    assert wait_true(lambda: len(collector.ticks()) >= 5)
+
+    replay.pause()
+    time.sleep(0.03)  # A tick that was already computed is dropped
+    count = len(collector.ticks())
+    position = replay.position
+    time.sleep(0.1)
+    assert len(collector.ticks()) == count
+    assert replay.position == position
+    assert replay.paused
+
+    replay.seek(1.9)
+    replay.resume()
+    assert replay.wait(timeout=2.0)
+    ticks = collector.ticks()
+    assert ticks[:count] == list(range(count))
+    assert ticks[count] == 190
+    assert ticks[-1] == 199
+    assert replay.stats.jitter_max >= 0.0
+
+
+def test_loop_starts_over():
+    replay, collector = make_replay(count=20, speed=None, loop=True)
+    replay.start()
+    assert wait_true(lambda: len(collector.ticks()) >= 50)
+    replay.close()
+    ticks = collector.ticks()
+    assert ticks[:40] == list(range(20)) * 2
+
+
+# ================================================================
+# Sources
+# ================================================================
+
+def test_from_session(tmp_path):
+    file = str(tmp_path / 'session.bsrec')
+    recorder = SessionRecorder(file)
+    recorder.start()
+    for i in range(5):
+        recorder.record('robot/samples', make_records(10)[i * 2:i * 2 + 2], t=10.0 + i)
+    recorder.close()
+
+    replay = TelemetryReplay.from_session(file, 'robot/samples', speed=None)
+    assert replay.stream == 'samples'
+    assert replay.duration == pytest.approx(4.0)
+    assert replay.records['tick'].tolist() == list(range(10))
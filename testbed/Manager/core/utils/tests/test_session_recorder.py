@@ -0,0 +1,178 @@
+import numpy as np
+import pytest
+
+from core.utils.logging_utils import Logger, flushLogs
+from core.utils.msgpack_utils import MSGPACK_AVAILABLE
+from core.utils.session_recorder import LOG_CHANNEL, SessionReader, SessionRecorder
+
+SAMPLE = np.dtype([('tick', '<u4'), ('pos', '<f8', (2,))])
+
+needs_msgpack = pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="objects channels need msgpack")
+
+
+def samples(start: int, count: int) -> np.ndarray:
+    records = np.zeros(count, dtype=SAMPLE)
+    records['tick'] = np.arange(start, start + count)
+    records['pos'][:, 0] = records['tick'] / 10
+    return records
+
+
+def record_session(file: str, compression: str = 'zlib') -> SessionRecorder:
+    recorder = SessionRecorder(file, compression=compression, chunk_records=10)
+    recorder.start()
+    for i in range(10):
+        recorder.record('robot/state', samples(i * 5, 5), t=100.0 + i)
+    if MSGPACK_AVAILABLE:
+        for i in range(3):
+            recorder.record('events', {'n': i, 'name': f'e{i}'}, t=100.5 + i)
+    recorder.close()
+    return recorder
+
+
+# ================================================================
+# Recording and reading
+# ================================================================
+
+@pytest.mark.parametrize('compression', ['none', 'zlib'])
+def test_records_round_trip(tmp_path, compression):
+    file = str(tmp_path / 'session.bsrec')
+    recorder = record_session(file, compression)
+    assert recorder.stats.records == 50 + (3 if MSGPACK_AVAILABLE else 0)
+
+    with SessionReader(file) as reader:
+        assert reader.complete
+        data = reader.read('robot/state')
+        assert data.values['tick'].tolist() == list(range(50))
+        np.testing.assert_allclose(data.values['pos'][:, 0], np.arange(50) / 10)
+        assert data.times[0] == 100.0 and data.times[-1] == 109.0
+        assert reader.time_range('robot/state') == (100.0, 109.0)
+        assert len(list(reader.chunks('robot/state'))) == 5  # chunk_records=10
+
+
+def test_time_range_query(tmp_path):
+    file = str(tmp_path / 'session.bsrec')
+    record_session(file)
+
+    with SessionReader(file) as reader:
+        data = reader.read('robot/state', start=102.0, end=104.0)
+        assert sorted(set(data.times.tolist())) == [102.0, 103.0, 104.0]
+        assert data.values['tick'].tolist() == list(range(10, 25))
+        assert len(reader.read('robot/state', start=200.0)) == 0
+
+
+@needs_msgpack
+def test_objects_round_trip(tmp_path):
+    file = str(tmp_path / 'session.bsrec')
+    record_session(file)
+
+    with SessionReader(file) as reader:
+        data = reader.read('events', start=101.0)
+        assert data.values == [{'n': 1, 'name': 'e1'}, {'n': 2, 'name': 'e2'}]
+        assert data.times.tolist() == [101.5, 102.5]
+
+
+def test_mismatched_records_are_dropped(tmp_path):
+    file = str(tmp_path / 'session.bsrec')
+    recorder = SessionRecorder(file)
+    recorder.start()
+    recorder.record('robot/state', samples(0, 3))
+    recorder.record('robot/state', np.zeros(2, dtype=[('other', '<i2')]))
+    recorder.close()
+    assert recorder.stats.dropped == 1
+
+    with SessionReader(file) as reader:
+        assert len(reader.read('robot/state')) == 3
+
+
+def test_full_queue_drops_instead_of_growing(tmp_path):
+    recorder = SessionRecorder(str(tmp_path / 'session.bsrec'), max_queued=2)
+    for i in range(5):
+        recorder.record('robot/state', samples(i, 1))
+    assert recorder.stats.queued == 2
+    assert recorder.stats.dropped == 3
+
+
+class _FailingFile:
+    """Wraps the recording file and fails every write after the first `writes`, like a full disk."""
+
+    def __init__(self, file, writes: int):
+        self.file = file
+        self.writes = writes
+
+    def write(self, data):
+        if self.writes <= 0:
+            raise OSError(28, 'No space left on device')
+        self.writes -= 1
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def test_write_error_is_logged_once_and_records_are_dropped(tmp_path):
+    recorder = SessionRecorder(str(tmp_path / 'session.bsrec'), chunk_records=10)
+    errors = []
+    recorder.logger.error = lambda msg, *args, **kwargs: errors.append(msg)
+    recorder.start()
+    recorder._file = _FailingFile(recorder._file, writes=2)  # The first channel definition chunk only
+
+    recorder.record('robot/state', samples(0, 25))
+    recorder.record('robot/state', samples(25, 5))
+    recorder.close()
+
+    assert not recorder._thread.is_alive()
+    assert recorder._file.closed
+    assert len(errors) == 1
+    assert recorder.stats.dropped == 2
+    assert recorder.stats.records == 0
+
+
+# ================================================================
+# Recovery
+# ================================================================
+
+def test_truncated_recording_is_rebuilt_from_chunks(tmp_path):
+    file = str(tmp_path / 'session.bsrec')
+    record_session(file)
+
+    # Cut the file in the middle of the last data chunks, as if the process died while writing
+    with SessionReader(file) as reader:
+        offsets = sorted(reader.index['offset'].tolist())
+    with open(file, 'r+b') as f:
+        f.truncate(offsets[-1] + 10)
+
+    with SessionReader(file) as reader:
+        assert not reader.complete
+        data = reader.read('robot/state')
+        assert len(data) > 0
+        assert data.values['tick'].tolist() == list(range(len(data)))
+
+
+def test_not_a_recording(tmp_path):
+    file = tmp_path / 'other.bin'
+    file.write_bytes(b'no recording')
+    with pytest.raises(ValueError):
+        SessionReader(str(file))
+
+
+# ================================================================
+# Logs
+# ================================================================
+
+@needs_msgpack
+def test_record_logs(tmp_path):
+    file = str(tmp_path / 'session.bsrec')
+    logger = Logger('test_session_logs')
+    recorder = SessionRecorder(file)
+    recorder.start()
+    logger.info("before recording")
+    recorder.recordLogs(minimum_level='INFO')
+    logger.info("recorded")
+    logger.debug("below the logger's level")
+    assert flushLogs(timeout=1.0)
+    recorder.close()
+
+    with SessionReader(file) as reader:
+        messages = [message for name, level, message in reader.read(LOG_CHANNEL).values
+                    if name == 'test_session_logs']
+    assert messages == ['recorded']
@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+from core.utils.time import Scheduler, TimerWheel, setInterval, clearInterval
+
+
+def wait_true(pred, timeout=1.5, period=0.01):
+    """Spin until pred() returns True or timeout elapses."""
+    end = time.time() + timeout
+    while time.time() < end:
+        if pred():
+            return True
+        time.sleep(period)
+    return False
+
+
+# ================================================================
+# TimerWheel
+# ================================================================
+
+def test_timer_wheel_fires_and_cancels():
+    wheel = TimerWheel(tick=0.005, name='test_wheel_fire')
+    fired = []
+    wheel.schedule(0.02, fired.append, 'a')
+    wheel.schedule(0.0, fired.append, 'b')
+    wheel.schedule(0.02, fired.append, 'c').cancel()
+    wheel.schedule(0.01, lambda: 1 / 0)  # Logged, does not stop the wheel
+
+    assert wait_true(lambda: fired == ['b', 'a'])
+    time.sleep(0.03)
+    assert fired == ['b', 'a']
+    wheel.stop()
+
+
+def test_timer_wheel_idles_when_empty_and_restarts():
+    wheel = TimerWheel(tick=0.005, name='test_wheel_idle')
+    fired = []
+    wheel.schedule(0.01, fired.append, 1)
+    assert wait_true(lambda: fired == [1])
+
+    # Nothing left: the wheel must not advance while idle
+    assert wait_true(lambda: wheel._count == 0)
+    cursor = wheel._cursor
+    time.sleep(0.05)
+    assert wheel._cursor == cursor
+
+    start = time.monotonic()
+    wheel.schedule(0.03, fired.append, 2)
+    assert wait_true(lambda: fired == [1, 2])
+    assert time.monotonic() - start >= 0.025
+    wheel.stop()
+
+
+# ================================================================
+# Scheduler
+# ================================================================
+
+def test_scheduler_coalesces_missed_runs():
+    scheduler = Scheduler(name='test_scheduler_coalesce')
+    runs = []
+
+    def slow():
+        runs.append(time.monotonic())
+        if len(runs) == 1:
+            time.sleep(0.1)  # Misses about 10 runs
+
+    job = scheduler.every(0.01, slow, delay=0.0)
+    assert wait_true(lambda: len(runs) >= 3)
+    job.cancel()
+    stats = job.stats
+    assert stats.overruns >= 1
+    assert stats.coalesced >= 8
+    assert runs[1] - runs[0] >= 0.1  # The missed runs were merged, not caught up
+    scheduler.stop()
+
+
+def test_scheduler_catches_up_without_coalescing_and_survives_errors():
+    scheduler = Scheduler(name='test_scheduler_catch_up')
+    runs = []
+
+    def slow():
+        runs.append(time.monotonic())
+        if len(runs) == 1:
+            time.sleep(0.05)
+        if len(runs) == 2:
+            raise RuntimeError("logged, the job keeps running")
+
+    job = scheduler.every(0.01, slow, delay=0.0, coalesce=False)
+    assert wait_true(lambda: len(runs) >= 6)
+    job.cancel()
+    assert job.stats.coalesced == 0
+    assert runs[5] - runs[1] < 0.04  # The missed runs were run back to back
+    scheduler.stop()
+
+
+def test_scheduler_rejects_jobs_after_stop():
+    scheduler = Scheduler(name='test_scheduler_stopped')
+    scheduler.every(0.01, lambda: None)
+    scheduler.stop()
+    with pytest.raises(RuntimeError):
+        scheduler.every(0.01, lambda: None)
+
+
+def test_set_interval_passes_all_kwargs_to_the_callback():
+    calls = []
+
+    def cb(*args, **kwargs):
+        calls.append((args, kwargs))
+
+    job = setInterval(cb, 0.01, 1, name='payload', delay=2, coalesce=False)
+    assert wait_true(lambda: len(calls) >= 1)
+    clearInterval(job)
+    assert calls[0] == ((1,), {'name': 'payload', 'delay': 2, 'coalesce': False})
+    assert job.name == cb.__qualname__
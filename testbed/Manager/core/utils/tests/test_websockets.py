@@ -0,0 +1,472 @@
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import core.utils.websockets as websockets
+from core.utils.exit import unregister_exit_callback
+from core.utils.websockets import (DROP_NEWEST, DROP_OLDEST, NEVER_DROP, BinaryFrame, OutboundQueue, WebsocketClient,
+                                   WebsocketServer, WebsocketServerClient, _CLOSE, message_class)
+
+
+def put(q: OutboundQueue, message: dict) -> bool:
+    return q.put(message, message_class(message))
+
+
+def drain(q: OutboundQueue) -> list:
+    messages = []
+    while (message := q.get_nowait()) is not None:
+        messages.append(message)
+    return messages
+
+
+def wait_true(pred, timeout=3.0, period=0.01):
+    """Spin until pred() returns True or timeout elapses."""
+    end = time.time() + timeout
+    while time.time() < end:
+        if pred():
+            return True
+        time.sleep(period)
+    return False
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Loopback:
+    """
+    A started WebsocketServer on a free local port and the clients connected to it with connect() or start().
+    """
+
+    def __init__(self, backend: str, **kwargs):
+        self.port = free_port()
+        self.server = WebsocketServer('127.0.0.1', self.port, heartbeats=False, backend=backend, **kwargs)
+        self.server.start()
+        self.clients: list[WebsocketClient] = []
+
+    def connect(self, **kwargs) -> WebsocketClient:
+        return self.start(WebsocketClient('127.0.0.1', self.port, backend='asyncio', **kwargs))
+
+    def start(self, client: WebsocketClient) -> WebsocketClient:
+        client.received = []
+        client.callbacks.message.register(client.received.append)
+        count = len(self.server.clients)
+        client.connect()
+        assert wait_true(lambda: client.connected and len(self.server.clients) > count)
+        self.clients.append(client)
+        return client
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+            # Closed already, and logging at interpreter exit fails once pytest has closed its capture streams
+            unregister_exit_callback(client.close)
+        self.server.stop()
+        unregister_exit_callback(self.server.stop)
+
+
+@pytest.fixture(params=['threaded', 'asyncio'])
+def loopback(request):
+    loopbacks = []
+
+    def create(**kwargs) -> Loopback:
+        loopbacks.append(Loopback(request.param, **kwargs))
+        return loopbacks[-1]
+
+    yield create
+    for lb in loopbacks:
+        lb.close()
+
+
+# ================================================================
+# OutboundQueue drop policies
+# ================================================================
+
+def test_full_queue_drops_oldest_update():
+    q = OutboundQueue(max_size=3)
+    for i in range(5):
+        assert put(q, {'type': 'gui_update', 'seq': i})
+
+    assert [message['seq'] for message in drain(q)] == [2, 3, 4]
+    stats = q.stats()
+    assert stats.dropped == {'gui_update': 2}
+    assert stats.max_depth == 3
+    assert stats.sent == 3
+
+
+def test_structural_messages_are_never_dropped():
+    q = OutboundQueue(max_size=2)
+    put(q, {'type': 'add', 'id': 'a'})
+    put(q, {'type': 'update', 'id': 'a'})
+    put(q, {'type': 'update', 'id': 'b'})  # Evicts the first update, not the add
+    assert put(q, {'type': 'remove', 'id': 'a'})  # Queued above the limit
+    assert len(q) == 3
+
+    assert [(m['type'], m['id']) for m in drain(q)] == [('add', 'a'), ('update', 'b'), ('remove', 'a')]
+    assert q.stats().dropped == {'update': 1}
+
+
+def test_update_is_dropped_when_nothing_else_can_be():
+    q = OutboundQueue(max_size=2)
+    put(q, {'type': 'add', 'id': 'a'})
+    put(q, {'type': 'init'})
+    assert not put(q, {'type': 'update', 'id': 'a'})
+    assert [m['type'] for m in drain(q)] == ['add', 'init']
+    assert q.stats().dropped == {'update': 1}
+
+
+def test_custom_policies_and_unlisted_types():
+    q = OutboundQueue(max_size=1, policies={'telemetry': DROP_OLDEST}, default_policy=NEVER_DROP, hard_limit=10)
+    put(q, {'type': 'telemetry', 'n': 1})
+    put(q, {'type': 'telemetry', 'n': 2})
+    put(q, {'type': 'event'})  # Unlisted: never dropped
+    assert q.put(b'raw')  # Messages without a type use the default policy as well
+    assert drain(q) == [{'type': 'telemetry', 'n': 2}, {'type': 'event'}, b'raw']
+
+
+def test_unclassified_flood_stays_within_max_size():
+    q = OutboundQueue(max_size=10)
+    for i in range(100):
+        q.put({'type': 'response', 'n': i}, 'response')  # e.g. device JSON_Message types
+        q.put(b'pre-encoded')
+        q.put({'__hb__': 'ping'})
+    assert len(q) == 10
+    assert q.default_policy == DROP_NEWEST
+    stats = q.stats()
+    assert stats.max_depth == 10
+    assert stats.dropped == {'response': 96, 'None': 194}
+    assert not stats.overflowed
+    assert [m['n'] for m in drain(q) if isinstance(m, dict) and 'n' in m] == [0, 1, 2, 3]  # The oldest are kept
+
+
+def test_never_drop_overflow_closes_the_queue():
+    q = OutboundQueue(max_size=2, hard_limit=4)
+    woken = []
+    q.on_put = lambda: woken.append(True)
+    for i in range(4):
+        assert put(q, {'type': 'add', 'id': i})
+    assert not put(q, {'type': 'add', 'id': 4})
+
+    stats = q.stats()
+    assert stats.overflowed
+    assert stats.dropped == {'add': 1}
+    assert q.get_nowait() is _CLOSE  # The writer closes the connection
+    assert woken[-1]
+    assert not put(q, {'type': 'update'})
+
+
+def test_close_wakes_up_the_writer():
+    q = OutboundQueue()
+    woken = []
+    q.on_put = lambda: woken.append(True)
+    results = []
+    writer = threading.Thread(target=lambda: results.append(q.get(timeout=2.0)))
+    writer.start()
+    q.close()
+    writer.join(timeout=2.0)
+
+    assert results == [_CLOSE]
+    assert woken == [True]
+    assert not put(q, {'type': 'update'})
+    assert q.get(timeout=0.01) is _CLOSE
+
+
+# ================================================================
+# Transport writers
+# ================================================================
+
+def test_writer_drops_unencodable_message_and_keeps_running(loopback):
+    lb = loopback()
+    client = lb.connect()
+
+    lb.server.sendToClient(lb.server.clients[0], {'type': 'bad', 'data': object()})  # Encoded by the writer
+    lb.server.sendToClient(lb.server.clients[0], {'type': 'good'})
+
+    assert wait_true(lambda: client.received == [{'type': 'good'}])
+    assert client.connected
+
+
+# ================================================================
+# Server and client round trip
+# ================================================================
+
+def test_round_trip_callbacks_and_events(loopback):
+    lb = loopback()
+    server = lb.server
+    new_clients, messages = [], []
+    server.callbacks.new_client.register(lambda c: new_clients.append(c))
+    server.callbacks.message.register(lambda c, data: messages.append((c, data)))
+
+    client = lb.connect()
+    assert client.encoding == 'json'
+    assert wait_true(lambda: len(new_clients) == 1)
+    server_client = server.clients[0]
+    assert isinstance(server_client, WebsocketServerClient)
+    assert new_clients == [server_client]
+    assert server.events.new_client.get_data(copy=False) is server_client
+    assert server_client.address == '127.0.0.1'
+
+    received = []
+    server_client.callbacks.message.register(lambda data, c: received.append(data))
+    for i in range(3):
+        client.send({'type': 'hello', 'n': i})
+
+    assert wait_true(lambda: len(received) == 3)
+    assert [data['n'] for c, data in messages] == [0, 1, 2]
+    assert all(c is server_client for c, data in messages)
+    assert received == [data for c, data in messages]
+    assert server.events.message.get_data() == {'type': 'hello', 'n': 2}
+    assert server_client.events.message.get_data() == {'type': 'hello', 'n': 2}
+
+    server_client.send({'type': 'reply'})
+    assert wait_true(lambda: client.received == [{'type': 'reply'}])
+    assert client.events.message.get_data() == {'type': 'reply'}
+
+
+def test_rx_queue_keeps_application_messages_in_order(loopback):
+    lb = loopback()
+    client = lb.connect()
+    server_client = lb.server.clients[0]
+    pong_ts = server_client.last_pong_ts
+
+    client.send({'type': 'a'})
+    client.send({'__hb__': 'pong', 't': 0})  # Heartbeats only refresh the client's pong time
+    client.send('not json')  # Dropped
+    client.send({'type': 'b'})
+
+    messages = [server_client.rx_queue.get(timeout=2.0) for _ in range(2)]
+    assert messages == [{'type': 'a'}, {'type': 'b'}]
+    assert server_client.rx_queue.empty()
+    assert server_client.last_pong_ts > pong_ts
+
+
+def test_binary_frames_bypass_rx_queue(loopback):
+    lb = loopback()
+    client = lb.connect()
+    server_client = lb.server.clients[0]
+    frames = []
+    server_client.callbacks.binary.register(lambda data: frames.append(data))
+
+    client.send(BinaryFrame(b'\x01\x02\x03'))
+
+    assert wait_true(lambda: frames == [b'\x01\x02\x03'])
+    assert server_client.rx_queue.empty()
+
+
+def test_client_close_is_reported_by_the_server(loopback):
+    lb = loopback()
+    client = lb.connect()
+    server_client = lb.server.clients[0]
+    left, disconnected = [], []
+    lb.server.callbacks.client_disconnected.register(lambda c: left.append(c))
+    server_client.callbacks.disconnected.register(lambda: disconnected.append(True))
+
+    client.close()
+
+    assert wait_true(lambda: disconnected == [True])
+    assert left == [server_client]
+    assert lb.server.clients == []
+    assert not server_client.connected
+    assert not server_client.outbound.put({'type': 'update'})  # Closed with the connection
+    assert not client.connected
+
+
+def test_server_stop_disconnects_clients(loopback):
+    lb = loopback()
+    client = lb.connect()
+    disconnected = []
+    client.callbacks.disconnected.register(lambda: disconnected.append(True))
+
+    lb.server.stop()
+
+    assert wait_true(lambda: disconnected == [True])
+    assert not client.connected
+
+
+# ================================================================
+# Broadcast
+# ================================================================
+
+def test_broadcast_is_encoded_once_for_all_clients(loopback, monkeypatch):
+    lb = loopback()
+    clients = [lb.connect() for _ in range(3)]
+    encoded = []
+    encode_broadcast = websockets._encode_broadcast
+
+    def encode(message, encoding):
+        encoded.append(encode_broadcast(message, encoding))
+        return encoded[-1]
+
+    monkeypatch.setattr(websockets, '_encode_broadcast', encode)
+
+    assert lb.server.broadcast({'type': 'gui_update', 'value': 1}) == 3
+
+    assert len(encoded) == 1
+    assert all(wait_true(lambda c=c: c.received == [{'type': 'gui_update', 'value': 1}]) for c in clients)
+    stats = lb.server.broadcast_stats()
+    assert stats.broadcasts == 1
+    assert stats.messages_out == 3
+    assert stats.last_bytes == len(encoded[0])
+    assert stats.bytes_out == 3 * len(encoded[0])
+    assert stats.skipped == 0
+
+
+def test_broadcast_encodes_numpy_values(loopback):
+    lb = loopback()
+    client = lb.connect()
+
+    lb.server.broadcast({'type': 'update', 'array': np.arange(4, dtype=np.int64).reshape(2, 2),
+                         'scalar': np.float32(1.5), 'flag': np.bool_(True)})
+
+    assert wait_true(lambda: len(client.received) == 1)
+    assert client.received[0] == {'type': 'update', 'array': [[0, 1], [2, 3]], 'scalar': 1.5, 'flag': True}
+
+
+def test_slow_client_is_skipped_without_blocking_the_others(loopback):
+    lb = loopback()
+    client = lb.connect()
+    # A client whose transport never drains its queue
+    slow = WebsocketServerClient({'id': -1, 'handler': None, 'address': ('slow', 0)}, lb.server)
+    slow.outbound = OutboundQueue(max_size=5)
+    lb.server.clients.append(slow)
+
+    start = time.perf_counter()
+    results = [lb.server.broadcast({'type': 'event', 'n': i}) for i in range(20)]
+    assert time.perf_counter() - start < 1.0
+
+    assert results == [2] * 5 + [1] * 15
+    assert len(slow.outbound) == 5
+    assert slow.outbound.stats().dropped == {'event': 15}
+    assert wait_true(lambda: [message['n'] for message in client.received] == list(range(20)))
+
+    stats = lb.server.broadcast_stats()
+    assert stats.broadcasts == 20
+    assert stats.messages_out == 25
+    assert stats.skipped == 15
+    assert stats.bytes_out == (sum(len(websockets.jsonEncode({'type': 'event', 'n': i})) for i in range(20))
+                               + sum(len(websockets.jsonEncode({'type': 'event', 'n': i})) for i in range(5)))
+    lb.server.clients.remove(slow)
+
+
+def test_broadcast_stats_measure_encoding_and_reset(loopback):
+    lb = loopback()
+    lb.connect()
+
+    lb.server.broadcast({'type': 'update', 'data': list(range(1000))})
+    lb.server.broadcast('{"type": "update"}')  # Pre-encoded
+
+    stats = lb.server.broadcast_stats()
+    assert stats.broadcasts == 2
+    assert stats.last_bytes == len(b'{"type": "update"}')
+    assert stats.bytes_out == len(websockets.jsonEncode({'type': 'update', 'data': list(range(1000))})) + 18
+    assert stats.encode_time >= stats.last_encode_time > 0
+
+    lb.server.reset_broadcast_stats()
+    assert lb.server.broadcast_stats() == websockets.BroadcastStats()
+
+
+# ================================================================
+# Encodings and compression
+# ================================================================
+
+def negotiated_extensions(client: WebsocketClient) -> str:
+    return client._connection.websocket.response.headers.get('Sec-WebSocket-Extensions', '')
+
+
+def test_msgpack_is_negotiated_per_connection(loopback):
+    lb = loopback()
+    client = lb.connect(encoding='msgpack')
+    server_client = lb.server.clients[0]
+    assert client.encoding == 'msgpack'
+    assert server_client.encoding == 'msgpack'
+
+    client.send({'type': 'hello', 'values': [1, 2.5, 'x']})
+    assert server_client.rx_queue.get(timeout=2.0) == {'type': 'hello', 'values': [1, 2.5, 'x']}
+
+    server_client.send({'type': 'reply'})
+    assert wait_true(lambda: client.received == [{'type': 'reply'}])
+
+
+def test_json_is_used_when_the_peer_does_not_opt_in(loopback, monkeypatch):
+    lb = loopback()
+    plain = lb.connect()
+    assert plain.encoding == 'json'
+    assert lb.server.clients[0].encoding == 'json'
+
+    # A server without msgpack support ignores the offer
+    client = WebsocketClient('127.0.0.1', lb.port, backend='asyncio', encoding='msgpack')
+    monkeypatch.setattr(websockets, 'SUBPROTOCOLS', ('json',))
+    lb.start(client)
+    assert client.encoding == 'json'
+    assert lb.server.clients[1].encoding == 'json'
+
+    client.send({'type': 'hello'})
+    assert lb.server.clients[1].rx_queue.get(timeout=2.0) == {'type': 'hello'}
+
+
+def test_broadcast_uses_the_encoding_of_each_connection(loopback):
+    lb = loopback()
+    json_client = lb.connect()
+    msgpack_client = lb.connect(encoding='msgpack')
+    array = np.linspace(0, 1, 5, dtype=np.float32)
+
+    assert lb.server.broadcast({'type': 'update', 'array': array}) == 2
+
+    assert wait_true(lambda: len(json_client.received) == 1 and len(msgpack_client.received) == 1)
+    assert json_client.received[0] == {'type': 'update', 'array': array.tolist()}
+    received = msgpack_client.received[0]['array']
+    assert isinstance(received, np.ndarray)
+    assert received.dtype == np.float32
+    np.testing.assert_array_equal(received, array)
+    # One payload per encoding
+    stats = lb.server.broadcast_stats()
+    assert stats.last_bytes == stats.bytes_out
+    assert stats.last_bytes == (len(websockets.jsonEncode({'type': 'update', 'array': array}))
+                                + len(websockets.msgpackEncode({'type': 'update', 'array': array})))
+
+
+def test_numpy_round_trip_through_msgpack(loopback):
+    lb = loopback()
+    client = lb.connect(encoding='msgpack')
+    server_client = lb.server.clients[0]
+    array = np.arange(12, dtype=np.int16).reshape(3, 4)
+
+    client.send({'type': 'data', 'array': array, 'scalar': np.float64(0.25)})
+    message = server_client.rx_queue.get(timeout=2.0)
+    assert message['array'].dtype == np.int16
+    np.testing.assert_array_equal(message['array'], array)
+    assert message['scalar'] == 0.25
+
+    server_client.send(message)
+    assert wait_true(lambda: len(client.received) == 1)
+    np.testing.assert_array_equal(client.received[0]['array'], array)
+
+
+@pytest.mark.parametrize('encoding', ['json', 'msgpack'])
+def test_deflate_compression(loopback, encoding):
+    lb = loopback(compression='deflate')
+    client = lb.connect(encoding=encoding, compression='deflate')
+    server_client = lb.server.clients[0]
+    assert 'permessage-deflate' in negotiated_extensions(client)
+
+    large = {'type': 'update', 'text': 'abc' * 1000}  # Compressed
+    small = {'type': 'update', 'n': 1}  # Below the size that is worth compressing
+    for message in (large, small):
+        client.send(message)
+        assert server_client.rx_queue.get(timeout=2.0) == message
+        lb.server.broadcast(message)
+    assert wait_true(lambda: client.received == [large, small])
+
+
+def test_deflate_is_only_used_when_both_sides_enable_it(loopback):
+    lb = loopback()
+    client = lb.connect(compression='deflate')
+    assert 'permessage-deflate' not in negotiated_extensions(client)
+
+    lb.server.broadcast({'type': 'update', 'text': 'abc' * 1000})
+    assert wait_true(lambda: client.received == [{'type': 'update', 'text': 'abc' * 1000}])
@@ -1,4 +1,9 @@
 import ctypes
+import dataclasses
+import functools
+import heapq
+import itertools
+import math
 from typing import Callable
 import time
 import threading
@@ -6,9 +11,12 @@ import threading
 # === OWN PACKAGES =====================================================================================================
 from core.utils.callbacks import callback_definition, CallbackContainer, Callback
 from core.utils.exit import register_exit_callback
+from core.utils.logging_utils import Logger
 from core.utils.os_utils import getOS
 from threading import Timer as ThreadTimer
 
+logger = Logger('time')
+
 if getOS() == "Windows":
     winmm = ctypes.WinDLL('winmm')
     # Declare argument/return types just to be safe
@@ -402,33 +410,346 @@ class TimeoutTimer:
 
 
 # ======================================================================================================================
-def setInterval(callback: Callback | Callable, interval: float, *args, **kwargs) -> Timer:
+class TimerHandle:
+    __slots__ = ('deadline', 'callback', 'args', 'kwargs', 'rounds', 'cancelled')
+
+    def __init__(self, deadline: float, callback: Callable, args: tuple, kwargs: dict):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.rounds = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel for large numbers of one-shot timeouts (e.g. pending requests).
+
+    Scheduling and cancelling are O(1). A single thread advances the wheel every `tick` seconds and fires the
+    expired timers, so timeouts have a resolution of one tick. Cancelled timers are dropped lazily when their slot
+    comes up. The thread idles while the wheel is empty. Callbacks run on the wheel thread and must not block.
+    """
+
+    def __init__(self, tick: float = 0.01, slots: int = 512, name: str = 'timer_wheel'):
+        self.tick = tick
+        self.slots = slots
+        self.name = name
+
+        self._wheel: list[list[TimerHandle]] = [[] for _ in range(slots)]
+        self._cv = threading.Condition()
+        self._count = 0  # Timers in the wheel, including cancelled ones that were not dropped yet
+        self._cursor = 0
+        self._next_tick = time.monotonic()
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+        register_exit_callback(self.stop)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def schedule(self, delay: float, callback: Callable, *args, **kwargs) -> TimerHandle:
+        handle = TimerHandle(time.monotonic() + max(delay, 0.0), callback, args, kwargs)
+        with self._cv:
+            if self._thread is None:
+                self._start_locked()
+            elif self._count == 0:
+                self._next_tick = time.monotonic() + self.tick  # The thread was idle, restart the ticks from now
+            ticks = max(1, int((handle.deadline - self._next_tick) / self.tick) + 1)
+            handle.rounds = (ticks - 1) // self.slots
+            self._wheel[(self._cursor + ticks - 1) % self.slots].append(handle)
+            self._count += 1
+            self._cv.notify()
+        return handle
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stop(self, *args, **kwargs):
+        with self._cv:
+            self._stop_event.set()
+            self._cv.notify()
+        if self._thread is not None and self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    # === PRIVATE METHODS ==============================================================================================
+    def _start_locked(self):
+        self._next_tick = time.monotonic() + self.tick
+        self._thread = threading.Thread(target=self._task, name=self.name, daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _task(self):
+        while True:
+            with self._cv:
+                while self._count == 0 and not self._stop_event.is_set():
+                    self._cv.wait()
+                if self._stop_event.is_set():
+                    return
+
+            remaining = self._next_tick - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+
+            with self._cv:
+                slot = self._wheel[self._cursor]
+                expired = [h for h in slot if h.rounds == 0 and not h.cancelled]
+                pending = [h for h in slot if h.rounds > 0 and not h.cancelled]
+                for h in pending:
+                    h.rounds -= 1
+                self._wheel[self._cursor] = pending
+                self._count -= len(slot) - len(pending)
+                self._cursor = (self._cursor + 1) % self.slots
+                self._next_tick += self.tick
+
+            for handle in expired:
+                try:
+                    handle.callback(*handle.args, **handle.kwargs)
+                except Exception as e:
+                    logger.error(f"Timer callback {getattr(handle.callback, '__qualname__', handle.callback)} "
+                                 f"failed: {e}", exc_info=True)
+
+
+_default_timer_wheel: TimerWheel | None = None
+_default_timer_wheel_lock = threading.Lock()
+
+
+def get_timer_wheel() -> TimerWheel:
+    """Process-wide TimerWheel, created on first use."""
+    global _default_timer_wheel
+    with _default_timer_wheel_lock:
+        if _default_timer_wheel is None:
+            _default_timer_wheel = TimerWheel()
+        return _default_timer_wheel
+
+
+# ======================================================================================================================
+@dataclasses.dataclass
+class JobStats:
+    runs: int = 0
+    overruns: int = 0  # Runs that took longer than the interval
+    coalesced: int = 0  # Missed runs that were dropped because the job fell behind
+    jitter_mean: float = 0.0  # Start time - scheduled time, in seconds
+    jitter_max: float = 0.0
+    duration_mean: float = 0.0
+    duration_max: float = 0.0
+
+
+class PeriodicJob:
+    """
+    Handle of a job registered with Scheduler.every().
+    """
+    OVERRUN_WARNING_INTERVAL = 5.0
+
+    def __init__(self, scheduler: 'Scheduler', interval: float, callback: Callable, args: tuple, kwargs: dict,
+                 name: str, coalesce: bool):
+        self.scheduler = scheduler
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name
+        self.coalesce = coalesce
+
+        self.next_run = 0.0
+        self.cancelled = False
+        self._stats = JobStats()
+        self._jitter_sum = 0.0
+        self._duration_sum = 0.0
+        self._running = threading.Lock()
+        self._overruns_since_warning = 0
+        self._last_overrun_warning = -math.inf
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def cancel(self, wait: bool = True):
+        """
+        Stop the job. With wait=True, a run that is currently in progress is finished before this returns.
+        """
+        self.cancelled = True
+        if wait and threading.current_thread() is not self.scheduler._thread:
+            with self._running:
+                pass
+
+    # Same interface as Timer, for setInterval/clearInterval
+    stop = cancel
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def stats(self) -> JobStats:
+        return dataclasses.replace(self._stats)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _run(self, scheduled: float):
+        start = time.monotonic()
+        with self._running:
+            if self.cancelled:
+                return
+            try:
+                self.callback(*self.args, **self.kwargs)
+            except Exception as e:
+                logger.error(f"Error in periodic job {self.name}: {e}", exc_info=True)
+        end = time.monotonic()
+
+        stats = self._stats
+        stats.runs += 1
+        jitter = start - scheduled
+        duration = end - start
+        self._jitter_sum += jitter
+        self._duration_sum += duration
+        stats.jitter_mean = self._jitter_sum / stats.runs
+        stats.duration_mean = self._duration_sum / stats.runs
+        stats.jitter_max = max(stats.jitter_max, jitter)
+        stats.duration_max = max(stats.duration_max, duration)
+        if duration > self.interval:
+            stats.overruns += 1
+            self._overruns_since_warning += 1
+            if end - self._last_overrun_warning >= self.OVERRUN_WARNING_INTERVAL:
+                logger.warning(f"Periodic job {self.name} took {duration * 1000:.1f} ms for an interval of "
+                               f"{self.interval * 1000:.1f} ms ({self._overruns_since_warning} overruns), "
+                               f"delaying the other jobs of scheduler {self.scheduler.name}")
+                self._last_overrun_warning = end
+                self._overruns_since_warning = 0
+
+        # Next run on the original grid. Runs that are already due again are either caught up one after the other or,
+        # with coalescing, merged into a single run
+        self.next_run = scheduled + self.interval
+        if self.coalesce and self.next_run <= end:
+            missed = int((end - self.next_run) / self.interval) + 1
+            stats.coalesced += missed
+            self.next_run += missed * self.interval
+
+
+class Scheduler:
+    """
+    Runs periodic jobs from a single thread, ordered by a heap of monotonic deadlines.
+
+    The thread sleeps until the earliest deadline and runs every job that is due within `slack` seconds in the same
+    wakeup, so jobs with close deadlines share one wakeup. Jobs run one after the other on that thread and must not
+    block, since they delay each other; a job that takes longer than its interval is logged as an overrun (at most
+    every PeriodicJob.OVERRUN_WARNING_INTERVAL seconds per job). Blocking work belongs on its own thread or executor.
+    Per-job jitter, duration and overruns are available through PeriodicJob.stats and Scheduler.stats().
+    """
+
+    def __init__(self, name: str = 'scheduler', slack: float = 0.001):
+        self.name = name
+        self.slack = slack
+
+        self._heap: list[tuple[float, int, PeriodicJob]] = []
+        self._jobs: list[PeriodicJob] = []
+        self._counter = itertools.count()
+        self._cv = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._exit = False
+
+        register_exit_callback(self.stop)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def every(self, interval: float, callback: Callable, *args, delay: float | None = None, name: str | None = None,
+              coalesce: bool = True, **kwargs) -> PeriodicJob:
+        """
+        Run `callback(*args, **kwargs)` every `interval` seconds, the first time after `delay` (default: interval).
+        Raises RuntimeError once the scheduler has been stopped.
+        """
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        job = PeriodicJob(self, interval, callback, args, kwargs,
+                          name=name or getattr(callback, '__qualname__', repr(callback)), coalesce=coalesce)
+        job.next_run = time.monotonic() + (interval if delay is None else delay)
+        with self._cv:
+            if self._exit:
+                raise RuntimeError(f"Scheduler {self.name} is stopped, cannot add job {job.name}")
+            self._jobs.append(job)
+            heapq.heappush(self._heap, (job.next_run, next(self._counter), job))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._task, name=self.name, daemon=True)
+                self._thread.start()
+            self._cv.notify()
+        return job
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stats(self) -> dict[str, JobStats]:
+        with self._cv:
+            return {job.name: job.stats for job in self._jobs}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stop(self, *args, **kwargs):
+        with self._cv:
+            self._exit = True
+            self._cv.notify()
+        if self._thread is not None and self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    # === PRIVATE METHODS ==============================================================================================
+    def _task(self):
+        while True:
+            with self._cv:
+                while not self._exit:
+                    # Drop cancelled jobs as they come up
+                    while self._heap and self._heap[0][2].cancelled:
+                        self._jobs.remove(heapq.heappop(self._heap)[2])
+                    if self._heap:
+                        timeout = self._heap[0][0] - time.monotonic()
+                        if timeout <= 0:
+                            break
+                        self._cv.wait(timeout)
+                    else:
+                        self._cv.wait()
+                if self._exit:
+                    return
+
+                horizon = time.monotonic() + self.slack
+                due = []
+                while self._heap and self._heap[0][0] <= horizon:
+                    due.append(heapq.heappop(self._heap))
+
+            for scheduled, _, job in due:
+                if not job.cancelled:
+                    job._run(scheduled)
+
+            with self._cv:
+                for _, _, job in due:
+                    if job.cancelled:
+                        self._jobs.remove(job)
+                    else:
+                        heapq.heappush(self._heap, (job.next_run, next(self._counter), job))
+
+
+_default_scheduler: Scheduler | None = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """Process-wide Scheduler, created on first use."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = Scheduler()
+        return _default_scheduler
+
+
+# ======================================================================================================================
+def setInterval(callback: Callback | Callable, interval: float, *args, **kwargs) -> PeriodicJob:
     """
-    JS-like setInterval for Python using the existing Timer class.
-    Returns a Timer object you can cancel via .stop() or clearInterval().
+    JS-like setInterval for Python, running on the shared Scheduler.
+    Returns a PeriodicJob you can cancel via .stop() or clearInterval().
+
+    All intervals share the scheduler thread and run one after the other, so a callback must not block; a slow
+    callback delays every other interval. Blocking work belongs on its own thread.
 
     :param callback: Function (or Callback) to invoke every `interval` seconds.
     :param interval: Interval in seconds (float).
     :param args: Positional args passed to the callback.
     :param kwargs: Keyword args passed to the callback.
-    :return: Timer (call .stop() to cancel).
+    :return: PeriodicJob (call .stop() to cancel).
     """
-
-    def _runner():
-        try:
-            callback(*args, **kwargs)
-        except Exception:
-            import traceback
-            traceback.print_exc()
-
-    t = Timer(timeout=interval, repeat=True, callback=_runner)
-    t.start()
-    return t
+    # Bind the arguments first, so that callback kwargs such as `name` or `delay` are not taken by Scheduler.every()
+    return get_scheduler().every(interval, functools.partial(callback, *args, **kwargs),
+                                 name=getattr(callback, '__qualname__', repr(callback)))
 
 
-def clearInterval(timer: Timer) -> None:
+def clearInterval(timer: PeriodicJob | Timer) -> None:
     """
-    JS-like clearInterval. Stops the provided Timer.
+    JS-like clearInterval. Stops the provided job.
     """
     if timer is not None:
         timer.stop()
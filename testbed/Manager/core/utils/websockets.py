@@ -1,13 +1,19 @@
 # from __future__ import annotations
 
+import collections
 import dataclasses
 import queue
+import socket
 import time
 import logging
 from websocket_server import WebsocketServer as ws_server
+from websocket_server.websocket_server import WebSocketHandler as ws_handler
+import struct
 import websocket
 import threading
 import json
+import asyncio
+import zlib
 
 # === CUSTOM PACKAGES ==================================================================================================
 from core.utils.events import event_definition, Event
@@ -15,6 +21,596 @@ from core.utils.exit import register_exit_callback
 from core.utils.callbacks import CallbackContainer, callback_definition
 from core.utils.json_utils import jsonEncode
 from core.utils.logging_utils import Logger
+from core.utils.msgpack_utils import msgpackEncode, msgpackDecode, MSGPACK_AVAILABLE
+
+logger = Logger('websockets')
+
+
+# ======================================================================================================================
+_OPCODE_CONTINUATION = 0x0
+_OPCODE_TEXT = 0x1
+_OPCODE_BINARY = 0x2
+_OPCODE_CLOSE = 0x8
+_OPCODE_PING = 0x9
+_OPCODE_PONG = 0xA
+
+
+def _frame(payload: bytes, opcode: int = _OPCODE_TEXT, compressed: bool = False) -> bytes:
+    b1 = 0x80 | opcode | (0x40 if compressed else 0)  # RSV1 marks a permessage-deflate payload
+    n = len(payload)
+    if n <= 125:
+        header = struct.pack('>BB', b1, n)
+    elif n <= 0xFFFF:
+        header = struct.pack('>BBH', b1, 126, n)
+    else:
+        header = struct.pack('>BBQ', b1, 127, n)
+    return header + payload
+
+
+def _unmask(payload: bytes, mask: bytes) -> bytes:
+    # XOR the whole payload at once instead of byte by byte
+    n = len(payload)
+    if n == 0:
+        return b''
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, 'little') ^ int.from_bytes(key, 'little')).to_bytes(n, 'little')
+
+
+# ======================================================================================================================
+# Encodings and compression
+#
+# Both are chosen per connection during the opening handshake:
+#   - Encoding: the client offers a subprotocol ("Sec-WebSocket-Protocol: msgpack"). 'json' (text frames) is used when
+#               it offers none. With 'msgpack' messages travel as binary frames and NumPy arrays as raw typed buffers,
+#               see core.utils.msgpack_utils.
+#   - Compression: permessage-deflate (RFC 7692), if the server enables it and the client offers it. Browsers always
+#                  offer it. The server compresses without context takeover, so every message is deflated on its own.
+# ======================================================================================================================
+ENCODING_JSON = 'json'
+ENCODING_MSGPACK = 'msgpack'
+
+SUBPROTOCOLS = (ENCODING_MSGPACK, ENCODING_JSON) if MSGPACK_AVAILABLE else (ENCODING_JSON,)
+
+_DEFLATE_TAIL = b'\x00\x00\xff\xff'
+_DEFLATE_LEVEL = 1
+_DEFLATE_MIN_SIZE = 256  # Smaller messages are sent uncompressed, which RFC 7692 allows per message
+
+
+class BinaryFrame(bytes):
+    """
+    Payload that is already encoded and goes out as a binary frame. Plain bytes are treated as encoded JSON text.
+    """
+
+
+def _select_subprotocol(header: str | None) -> str | None:
+    if not header:
+        return None
+    offered = [protocol.strip() for protocol in header.split(',')]
+    return next((protocol for protocol in offered if protocol in SUBPROTOCOLS), None)
+
+
+def _accept_deflate(header: str | None) -> bool:
+    # Accept the first permessage-deflate offer that does not restrict the server's window size
+    if not header:
+        return False
+    for offer in header.split(','):
+        params = [param.strip() for param in offer.split(';')]
+        if params[0] != 'permessage-deflate':
+            continue
+        if not any(param.startswith('server_max_window_bits') and param != 'server_max_window_bits=15'
+                   for param in params[1:]):
+            return True
+    return False
+
+
+def _deflate(payload: bytes) -> bytes:
+    compressor = zlib.compressobj(_DEFLATE_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    data = compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    return data[:-4] if data.endswith(_DEFLATE_TAIL) else data
+
+
+def _encode_outbound(message, encoding: str = ENCODING_JSON) -> tuple[bytes, bool]:
+    """
+    Returns the payload and whether it is sent as a binary frame.
+    """
+    if isinstance(message, BinaryFrame):
+        return message, True
+    if isinstance(message, bytes):
+        return message, False
+    if isinstance(message, str):
+        return message.encode('utf-8'), False
+    if encoding == ENCODING_MSGPACK:
+        return msgpackEncode(message), True
+    return jsonEncode(message), False
+
+
+def _encode_broadcast(message, encoding: str) -> bytes:
+    payload, binary = _encode_outbound(message, encoding)
+    return BinaryFrame(payload) if binary else payload
+
+
+# ======================================================================================================================
+# Outbound queues
+#
+# Every connection owns a bounded OutboundQueue that producers put messages into without blocking. The transport
+# drains it on its own thread/task, so a slow client only delays itself. What happens when the queue is full depends
+# on the message class (the 'type' field of dict messages):
+#   - 'drop_oldest': the oldest queued droppable message is discarded. Suits state updates, where newer ones supersede
+#                    older ones ('gui_update', 'update', heartbeats).
+#   - 'drop_newest': the new message is discarded. The default for everything not listed, including pre-encoded
+#                    str/bytes payloads.
+#   - 'never_drop':  queued above the limit, for messages that change structure ('add', 'remove', 'init'). Dropping
+#                    one would leave the client out of sync, so once the queue reaches its hard limit it is closed
+#                    instead, which closes the connection; the client resyncs when it reconnects.
+# ======================================================================================================================
+_CLOSE = object()
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+NEVER_DROP = 'never_drop'
+
+DEFAULT_MESSAGE_POLICIES = {
+    'gui_update': DROP_OLDEST,
+    'update': DROP_OLDEST,
+    '__hb__': DROP_OLDEST,
+    'add': NEVER_DROP,
+    'remove': NEVER_DROP,
+    'init': NEVER_DROP,
+}
+
+
+def message_class(message) -> str | None:
+    if isinstance(message, dict):
+        return message.get('type')
+    return None
+
+
+@dataclasses.dataclass
+class OutboundQueueStats:
+    depth: int = 0
+    max_depth: int = 0
+    sent: int = 0
+    dropped: dict[str, int] = dataclasses.field(default_factory=dict)
+    overflowed: bool = False  # Closed because never-drop messages reached the hard limit
+
+
+class OutboundQueue:
+    def __init__(self, max_size: int = 1000, policies: dict[str, str] = None, default_policy: str = DROP_NEWEST,
+                 hard_limit: int | None = None):
+        """
+        Droppable messages keep the queue at `max_size`. Never-drop messages may exceed it up to `hard_limit`
+        (default: twice max_size), after which the queue is closed.
+        """
+        self.max_size = max_size
+        self.hard_limit = 2 * max_size if hard_limit is None else max(hard_limit, max_size)
+        self.policies = dict(DEFAULT_MESSAGE_POLICIES if policies is None else policies)
+        self.default_policy = default_policy
+
+        # Called after every successful put, e.g. to wake up an asyncio writer
+        self.on_put = None
+
+        self._items: collections.deque[tuple[str | None, object]] = collections.deque()
+        self._cv = threading.Condition()
+        self._closed = False
+        self._stats = OutboundQueueStats()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def put(self, message, message_class: str | None = None) -> bool:
+        """
+        Queue a message without blocking. Returns False if the message was dropped or the queue is closed.
+        """
+        policy = self.policies.get(message_class, self.default_policy)
+        with self._cv:
+            if self._closed:
+                return False
+
+            accepted = True
+            depth = len(self._items)
+            if depth >= self.max_size:
+                if policy == DROP_OLDEST:
+                    if not self._evict_oldest_droppable():
+                        self._count_drop(message_class)
+                        return False
+                elif policy != NEVER_DROP:
+                    self._count_drop(message_class)
+                    return False
+                elif depth >= self.hard_limit:
+                    # Too far behind to be kept in sync: close the queue, and with it the connection
+                    self._count_drop(message_class)
+                    self._stats.overflowed = True
+                    self._closed = True
+                    self._cv.notify_all()
+                    accepted = False
+
+            if accepted:
+                self._items.append((message_class, message))
+                if len(self._items) > self._stats.max_depth:
+                    self._stats.max_depth = len(self._items)
+                self._cv.notify()
+
+        if self.on_put is not None:
+            self.on_put()
+        return accepted
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get(self, timeout: float = None):
+        """
+        Blocking get for writer threads. Returns _CLOSE once the queue is closed, None on timeout.
+        """
+        with self._cv:
+            while not self._items and not self._closed:
+                if not self._cv.wait(timeout):
+                    return None
+            return self._pop_locked()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_nowait(self):
+        """
+        Returns the next message, _CLOSE once the queue is closed, or None if it is empty.
+        """
+        with self._cv:
+            if not self._items and not self._closed:
+                return None
+            return self._pop_locked()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def close(self):
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+        if self.on_put is not None:
+            self.on_put()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stats(self) -> OutboundQueueStats:
+        with self._cv:
+            return OutboundQueueStats(depth=len(self._items), max_depth=self._stats.max_depth, sent=self._stats.sent,
+                                      dropped=dict(self._stats.dropped), overflowed=self._stats.overflowed)
+
+    def __len__(self):
+        return len(self._items)
+
+    # === PRIVATE METHODS ==============================================================================================
+    def _pop_locked(self):
+        if self._closed:
+            return _CLOSE
+        _, message = self._items.popleft()
+        self._stats.sent += 1
+        return message
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _evict_oldest_droppable(self) -> bool:
+        for i, (queued_class, _) in enumerate(self._items):
+            if self.policies.get(queued_class, self.default_policy) == DROP_OLDEST:
+                del self._items[i]
+                self._count_drop(queued_class)
+                return True
+        return False
+
+    def _count_drop(self, message_class: str | None):
+        key = str(message_class)
+        self._stats.dropped[key] = self._stats.dropped.get(key, 0) + 1
+
+
+class _WebsocketHandler(ws_handler):
+    """
+    Frame reader of the websocket_server package with binary frame support. The stock handler drops binary
+    frames without consuming their payload, which desynchronizes the connection. The handshake additionally
+    negotiates the encoding and permessage-deflate.
+    """
+    encoding: str = ENCODING_JSON
+    deflate: bool = False
+    _inflater = None
+
+    def handshake(self):
+        headers = self.read_http_headers()
+
+        if headers.get('upgrade', '').lower() != 'websocket' or 'sec-websocket-key' not in headers:
+            self.keep_alive = False
+            return
+
+        extra_headers = ''
+        protocol = _select_subprotocol(headers.get('sec-websocket-protocol'))
+        if protocol is not None:
+            self.encoding = protocol
+            extra_headers += f'Sec-WebSocket-Protocol: {protocol}\r\n'
+        if self.server.compression == 'deflate' and _accept_deflate(headers.get('sec-websocket-extensions')):
+            self.deflate = True
+            # Kept for the whole connection, so it also works if the client compresses with context takeover
+            self._inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+            extra_headers += 'Sec-WebSocket-Extensions: permessage-deflate; server_no_context_takeover\r\n'
+
+        response = self.make_handshake_response(headers['sec-websocket-key'])
+        response = response[:-2] + extra_headers + '\r\n'
+        with self._send_lock:
+            self.handshake_done = self.request.send(response.encode())
+        self.valid_client = True
+        self.server._new_client_(self)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def read_next_message(self):
+        try:
+            b1, b2 = self.read_bytes(2)
+        except ConnectionResetError:
+            self.keep_alive = 0
+            return
+        except (OSError, ValueError):
+            b1, b2 = 0, 0
+
+        opcode = b1 & 0x0F
+        compressed = b1 & 0x40
+        masked = b2 & 0x80
+        payload_length = b2 & 0x7F
+
+        if opcode == _OPCODE_CLOSE:
+            self.keep_alive = 0
+            return
+        if not masked:
+            self.keep_alive = 0
+            return
+
+        if payload_length == 126:
+            payload_length = struct.unpack(">H", self.rfile.read(2))[0]
+        elif payload_length == 127:
+            payload_length = struct.unpack(">Q", self.rfile.read(8))[0]
+
+        mask = self.read_bytes(4)
+        payload = _unmask(self.read_bytes(payload_length), mask)
+        if compressed and self._inflater is not None:
+            payload = self._inflater.decompress(payload + _DEFLATE_TAIL)
+
+        if opcode == _OPCODE_TEXT:
+            self.server._message_received_(self, payload.decode('utf8'))
+        elif opcode == _OPCODE_BINARY:
+            self.server._binary_received_(self, payload)
+        elif opcode == _OPCODE_PING:
+            self.server._ping_received_(self, payload.decode('utf8'))
+        elif opcode == _OPCODE_PONG:
+            self.server._pong_received_(self, payload.decode('utf8'))
+        elif opcode == _OPCODE_CONTINUATION:
+            ...  # Fragmented messages are not used by the devices
+        else:
+            self.keep_alive = 0
+
+
+class _WebsocketServerBackend(ws_server):
+    def __init__(self, *args, compression: str | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compression = compression
+        self.RequestHandlerClass = _WebsocketHandler
+        self.binary_received = lambda client, server, data: None
+
+    def set_fn_binary_received(self, fn):
+        self.binary_received = fn
+
+    def _binary_received_(self, handler, data: bytes):
+        self.binary_received(self.handler_to_client(handler), self, data)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def attach_outbound(self, client: dict, outbound: 'OutboundQueue'):
+        # One writer thread per connection, next to the reader thread websocket_server already runs
+        threading.Thread(target=self._writer, args=(client['handler'], outbound), daemon=True).start()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _writer(handler, outbound: 'OutboundQueue'):
+        while True:
+            message = outbound.get()
+            if message is _CLOSE:
+                if outbound.stats().overflowed:
+                    # The reader thread notices the closed socket and reports the disconnect
+                    try:
+                        handler.request.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+                return
+            try:
+                payload, binary = _encode_outbound(message, handler.encoding)
+            except Exception as e:
+                logger.error(f"Cannot encode message for {handler.client_address}, dropping it: {e}")
+                continue
+            opcode = _OPCODE_BINARY if binary else _OPCODE_TEXT
+            if handler.deflate and len(payload) >= _DEFLATE_MIN_SIZE:
+                frame = _frame(_deflate(payload), opcode, compressed=True)
+            else:
+                frame = _frame(payload, opcode)
+            try:
+                with handler._send_lock:
+                    handler.request.sendall(frame)
+            except Exception:
+                # The reader thread notices the broken connection and reports the disconnect
+                outbound.close()
+                return
+
+
+# ======================================================================================================================
+# Asyncio transport
+#
+# Serves all connections from a single event loop thread using the `websockets` package, instead of one thread per
+# connection. It implements the part of the websocket_server API that WebsocketServer uses, so the front end stays
+# the same for both backends. Outbound messages are drained from the connection's OutboundQueue by a writer task.
+# Callbacks of inbound messages run on the event loop thread and must not block.
+# ======================================================================================================================
+class _AsyncioConnection:
+    def __init__(self, websocket, client_id: int):
+        self.websocket = websocket
+        self.outbound: OutboundQueue | None = None
+        self.client = {'id': client_id, 'handler': self, 'address': tuple(websocket.remote_address[:2])}
+        self.encoding = websocket.subprotocol or ENCODING_JSON
+
+        self._ready = asyncio.Event()
+        self._writer_task: asyncio.Task | None = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def attach(self, outbound: 'OutboundQueue'):
+        # Loop thread only
+        loop = asyncio.get_running_loop()
+        self.outbound = outbound
+        outbound.on_put = lambda: loop.call_soon_threadsafe(self._ready.set)
+        self._writer_task = asyncio.create_task(self._writer())
+        self._writer_task.add_done_callback(self._writerDone)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def enqueue(self, message, message_class: str | None = None) -> bool:
+        # Any thread
+        if message is _CLOSE:
+            # Closing must not depend on room in the queue
+            self.outbound.close()
+            return True
+        return self.outbound.put(message, message_class)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stop(self):
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+        if self.outbound is not None:
+            self.outbound.close()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def _writer(self):
+        from websockets.exceptions import ConnectionClosed  # Only needed for this backend
+        while True:
+            message = self.outbound.get_nowait()
+            if message is None:
+                self._ready.clear()
+                # Re-check after clearing, a put may have happened in between
+                message = self.outbound.get_nowait()
+                if message is None:
+                    await self._ready.wait()
+                    continue
+            if message is _CLOSE:
+                await self.websocket.close()
+                return
+            try:
+                payload, binary = _encode_outbound(message, self.encoding)
+            except Exception as e:
+                logger.error(f"Cannot encode message for {self.client['address']}, dropping it: {e}")
+                continue
+            try:
+                await self.websocket.send(payload, text=not binary)
+            except ConnectionClosed:
+                # The reader notices the closed connection and reports the disconnect
+                self.outbound.close()
+                return
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _writerDone(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            self.outbound.close()
+            logger.error(f"Writer of {self.client['address']} failed: {task.exception()!r}")
+
+
+class _AsyncioWebsocketServerBackend:
+    def __init__(self, host, port, compression: str | None = None):
+        from websockets.asyncio.server import serve  # Only needed for this backend
+        self._serve = serve
+
+        self.host = host
+        self.port = port
+        self.compression = compression
+        self.clients: list[dict] = []
+
+        self.new_client = lambda client, server: None
+        self.client_left = lambda client, server: None
+        self.message_received = lambda client, server, message: None
+        self.binary_received = lambda client, server, data: None
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopped: asyncio.Event | None = None
+        # Set once the socket is bound (or binding failed), the threaded backend binds in its constructor
+        self.listening = threading.Event()
+        self._id_counter = 0
+
+    # === API OF websocket_server ======================================================================================
+    def set_fn_new_client(self, fn):
+        self.new_client = fn
+
+    def set_fn_client_left(self, fn):
+        self.client_left = fn
+
+    def set_fn_message_received(self, fn):
+        self.message_received = fn
+
+    def set_fn_binary_received(self, fn):
+        self.binary_received = fn
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run_forever(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self.listening.set()
+            # Connections still in their opening handshake outlive the server, finish them before closing the loop
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def send_message(self, client: dict, message):
+        connection: _AsyncioConnection = client['handler']
+        if connection.outbound is None or not connection.enqueue(message):
+            raise ConnectionError("Connection is closed")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def attach_outbound(self, client: dict, outbound: 'OutboundQueue'):
+        # Called from new_client, which runs on the loop thread
+        client['handler'].attach(outbound)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def disconnect_clients_gracefully(self):
+        for client in list(self.clients):
+            try:
+                self.send_message(client, _CLOSE)
+            except ConnectionError:
+                pass
+
+    def server_close(self):
+        ...
+
+    def shutdown(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    # === PRIVATE METHODS ==============================================================================================
+    async def _run(self):
+        self._stopped = asyncio.Event()
+        async with self._serve(self._handler, self.host, self.port, compression=self.compression, max_size=None,
+                               ping_interval=None, select_subprotocol=self._select_subprotocol):
+            self.listening.set()
+            await self._stopped.wait()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _select_subprotocol(websocket, offered: list[str]) -> str | None:
+        # Unlike the default of `websockets`, clients that offer no subprotocol are accepted and use JSON
+        return next((protocol for protocol in offered if protocol in SUBPROTOCOLS), None)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def _handler(self, websocket):
+        self._id_counter += 1
+        connection = _AsyncioConnection(websocket, self._id_counter)
+        self.clients.append(connection.client)
+
+        self.new_client(connection.client, self)
+        try:
+            async for message in websocket:
+                if isinstance(message, str):
+                    self.message_received(connection.client, self, message)
+                else:
+                    self.binary_received(connection.client, self, message)
+        except Exception:
+            ...  # Connection closed with an error, handled like a normal disconnect
+        finally:
+            connection.stop()
+            try:
+                self.clients.remove(connection.client)
+            except ValueError:
+                pass
+            self.client_left(connection.client, self)
 
 
 # ======================================================================================================================
@@ -22,6 +618,7 @@ from core.utils.logging_utils import Logger
 class WebsocketServerClient_Callbacks:
     disconnected: CallbackContainer
     message: CallbackContainer
+    binary: CallbackContainer
 
 
 @event_definition
@@ -37,6 +634,7 @@ class WebsocketServerClient:
     connected: bool
 
     rx_queue: queue.Queue
+    encoding: str
     # Heartbeat tracking (server-side)
     last_pong_ts: float
 
@@ -48,6 +646,10 @@ class WebsocketServerClient:
         self.server = server
         self.connected = True
         self.rx_queue = queue.Queue()
+        # Negotiated in the handshake by the transport
+        self.encoding = getattr(client['handler'], 'encoding', ENCODING_JSON)
+        # Drained by the server's transport, see OutboundQueue
+        self.outbound = OutboundQueue(max_size=server.max_send_queue, policies=server.message_policies)
         # initialize to "now" so a brand-new client isn't reaped before first pong
         self.last_pong_ts = time.time()
 
@@ -67,6 +669,11 @@ class WebsocketServerClient:
         self.callbacks.message.call(message, self)
         self.events.message.set(data=message)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def onBinary(self, data: bytes):
+        # Binary frames bypass rx_queue and are handled on the connection thread
+        self.callbacks.binary.call(data)
+
     # ------------------------------------------------------------------------------------------------------------------
     def send(self, message):
         self.server.sendToClient(self.client, message)
@@ -74,6 +681,7 @@ class WebsocketServerClient:
     # ------------------------------------------------------------------------------------------------------------------
     def onDisconnect(self):
         self.connected = False
+        self.outbound.close()
         self.callbacks.disconnected.call()
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -82,6 +690,17 @@ class WebsocketServerClient:
 
 
 # ======================================================================================================================
+@dataclasses.dataclass
+class BroadcastStats:
+    broadcasts: int = 0
+    messages_out: int = 0  # Per client
+    bytes_out: int = 0
+    skipped: int = 0  # Clients skipped because they were still busy with a previous message
+    encode_time: float = 0.0  # Total seconds spent encoding
+    last_encode_time: float = 0.0
+    last_bytes: int = 0
+
+
 @callback_definition
 class SyncWebsocketServer_Callbacks:
     new_client: CallbackContainer
@@ -102,11 +721,34 @@ class WebsocketServer:
 
     clients: list[WebsocketServerClient]
 
-    _server: ws_server | None
+    _server: ws_server | _AsyncioWebsocketServerBackend | None
+
+    def __init__(self, host, port, heartbeats: bool = True, backend: str = 'threaded', max_send_queue: int = 1000,
+                 message_policies: dict[str, str] = None, compression: str | None = None):
+        """
+        backend:
+          - 'threaded': websocket_server package, one reader and one writer thread per connection (default)
+          - 'asyncio':  single event loop thread for all connections
+
+        Each client gets an OutboundQueue of `max_send_queue` messages. `message_policies` adds to or overrides
+        DEFAULT_MESSAGE_POLICIES, which decide per message type what happens when a client falls behind. Unlisted
+        types are dropped once the queue is full; a client whose never-drop messages reach twice the limit is
+        disconnected.
+
+        compression: 'deflate' accepts permessage-deflate from clients that offer it. The encoding (JSON or msgpack)
+        is always picked by the client, see SUBPROTOCOLS.
+        """
+        if backend not in ('threaded', 'asyncio'):
+            raise ValueError(f"Unknown websocket backend: {backend}")
+        if compression not in (None, 'deflate'):
+            raise ValueError(f"Unknown websocket compression: {compression}")
 
-    def __init__(self, host, port, heartbeats: bool = True):
         self.host = host
         self.port = port
+        self.backend = backend
+        self.max_send_queue = max_send_queue
+        self.compression = compression
+        self.message_policies = {**DEFAULT_MESSAGE_POLICIES, **(message_policies or {})}
         self._server = None
         self.clients = []  # Store the connected clients
         self.running = False
@@ -125,6 +767,9 @@ class WebsocketServer:
         self._hb_stop = threading.Event()
         self._hb_thread: threading.Thread | None = None
 
+        self._broadcast_stats = BroadcastStats()
+        self._broadcast_stats_lock = threading.Lock()
+
         # Exit handling
         register_exit_callback(self.stop)
 
@@ -134,10 +779,16 @@ class WebsocketServer:
         Start the WebSocket server in a separate thread (non-blocking).
         """
         if not self.running:
-            self._server = ws_server(host=self.host, port=self.port)
+            if self.backend == 'asyncio':
+                self._server = _AsyncioWebsocketServerBackend(self.host, self.port, compression=self.compression)
+            else:
+                self._server = _WebsocketServerBackend(host=self.host, port=self.port, compression=self.compression)
             self.running = True
             self.thread = threading.Thread(target=self._run_server, daemon=True)
             self.thread.start()
+            if self.backend == 'asyncio':
+                # Clients connecting right after start() would be refused and only retry after their backoff
+                self._server.listening.wait(timeout=5)
 
             if self.heartbeats:
                 # start heartbeat loop
@@ -154,6 +805,7 @@ class WebsocketServer:
         self._server.set_fn_new_client(self._on_new_client)
         self._server.set_fn_client_left(self._on_client_left)
         self._server.set_fn_message_received(self._on_message_received)
+        self._server.set_fn_binary_received(self._on_binary_received)
 
         try:
             self._server.run_forever()
@@ -165,6 +817,7 @@ class WebsocketServer:
     # ------------------------------------------------------------------------------------------------------------------
     def _on_new_client(self, client, server):
         websocket_client = WebsocketServerClient(client, self)
+        self._server.attach_outbound(client, websocket_client.outbound)
         self.clients.append(websocket_client)  # Add a client to the list
         self.logger.info(f"New client connected: {client['address']}")
         self.callbacks.new_client.call(websocket_client)
@@ -200,7 +853,10 @@ class WebsocketServer:
 
         # Best effort: ask underlying server to close this socket if available
         try:
-            self._server.client_left(websocket_client.client)
+            if isinstance(self._server, _AsyncioWebsocketServerBackend):
+                self._server.send_message(websocket_client.client, _CLOSE)
+            else:
+                self._server.client_left(websocket_client.client)
         except Exception:
             # Fall back to just firing callbacks
             pass
@@ -211,24 +867,50 @@ class WebsocketServer:
 
     # ------------------------------------------------------------------------------------------------------------------
     def _on_message_received(self, client, server, message):
-        # Parse JSON first
+        websocket_client = next((c for c in self.clients if c.client == client), None)
+        if not websocket_client:
+            return
+
+        # Heartbeat pongs are the most frequent message, recognize them without parsing
+        if message.startswith('{"__hb__"'):
+            websocket_client.mark_pong()
+            return
+
         try:
             data = json.loads(message)
         except Exception as e:
             self.logger.debug(f"Non-JSON message from {client['address']}, dropping: {e}")
             return
 
+        self._handle_message(websocket_client, data)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _on_binary_received(self, client, server, data: bytes):
         websocket_client = next((c for c in self.clients if c.client == client), None)
         if not websocket_client:
             return
 
+        if websocket_client.encoding != ENCODING_MSGPACK:
+            # Raw binary payloads, e.g. device streams
+            websocket_client.onBinary(data)
+            return
+
+        try:
+            message = msgpackDecode(data)
+        except Exception as e:
+            self.logger.debug(f"Invalid msgpack message from {client['address']}, dropping: {e}")
+            return
+        self._handle_message(websocket_client, message)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _handle_message(self, websocket_client: WebsocketServerClient, data):
         # Handle internal heartbeat quietly (do NOT expose to callbacks/events)
         if isinstance(data, dict) and data.get("__hb__") == "pong":
             websocket_client.mark_pong()
             return
 
         # Normal application message flow
-        self.logger.debug(f"Message received from {client['address']}: {data}")
+        self.logger.debug(f"Message received from {websocket_client.client['address']}: {data}")
         self.callbacks.message.call(websocket_client, data)
         self.events.message.set(data=data)
         websocket_client.onMessage(data)
@@ -238,37 +920,74 @@ class WebsocketServer:
         """
         Send a message to all connected clients.
         """
-        if isinstance(message, dict):
-            message = json.dumps(message)
-        for client in list(self.clients):
-            try:
-                self._server.send_message(client.client, message)
-            except Exception:
-                # If send fails, reap the client
-                self._force_client_disconnect(client, reason="send error")
+        self.broadcast(message)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def broadcast(self, message, clients: list[WebsocketServerClient] = None) -> int:
+        """
+        Send one message to several clients (all by default), encoding it exactly once per encoding in use.
+
+        Dicts are encoded with jsonEncode (orjson, numpy aware) or msgpack, depending on what the clients negotiated.
+        str and bytes are sent as they are. The same buffer is queued for every client, so a slow client never holds up
+        the others. Returns the number of clients that accepted the message; the others dropped it according to their
+        queue policy.
+        """
+        if self._server is None:
+            return 0
+
+        cls = message_class(message)
+        targets = list(self.clients) if clients is None else [c for c in clients if c in self.clients]
+
+        start = time.perf_counter()
+        payloads = {encoding: _encode_broadcast(message, encoding)
+                    for encoding in {client.encoding for client in targets} or {ENCODING_JSON}}
+        encode_time = time.perf_counter() - start
+
+        sent = 0
+        bytes_out = 0
+        for client in targets:
+            payload = payloads[client.encoding]
+            if client.outbound.put(payload, cls):
+                sent += 1
+                bytes_out += len(payload)
+
+        with self._broadcast_stats_lock:
+            stats = self._broadcast_stats
+            stats.broadcasts += 1
+            stats.messages_out += sent
+            stats.bytes_out += bytes_out
+            stats.skipped += len(targets) - sent
+            stats.encode_time += encode_time
+            stats.last_encode_time = encode_time
+            stats.last_bytes = sum(len(payload) for payload in payloads.values())
+        return sent
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def broadcast_stats(self) -> BroadcastStats:
+        with self._broadcast_stats_lock:
+            return dataclasses.replace(self._broadcast_stats)
+
+    def reset_broadcast_stats(self):
+        with self._broadcast_stats_lock:
+            self._broadcast_stats = BroadcastStats()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def queue_stats(self) -> dict[tuple, OutboundQueueStats]:
+        """
+        Outbound queue depth, high-water mark and drops per message type for every connected client.
+        """
+        return {client.client['address']: client.outbound.stats() for client in list(self.clients)}
 
     # ------------------------------------------------------------------------------------------------------------------
     def sendToClient(self, client, message):
         """
-        Send a message to a specific client.
+        Send a message to a specific client. Never blocks: the message is queued on the client's OutboundQueue.
         """
-        if isinstance(message, dict):
-            message = jsonEncode(message)
-            # message = json.dumps(message)
+        if isinstance(client, dict):
+            client = next((c for c in self.clients if c.client == client), None)
 
-        if isinstance(client, WebsocketServerClient):
-            if client in self.clients:
-                try:
-                    self._server.send_message(client.client, message)
-                except Exception:
-                    self._force_client_disconnect(client, reason="send error")
-        elif isinstance(client, dict):
-            try:
-                self._server.send_message(client, message)
-            except Exception:
-                ws_client = next((c for c in self.clients if c.client == client), None)
-                if ws_client:
-                    self._force_client_disconnect(ws_client, reason="send error")
+        if isinstance(client, WebsocketServerClient) and client in self.clients:
+            client.outbound.put(message, message_class(message))
 
     # ------------------------------------------------------------------------------------------------------------------
     def _heartbeat_loop(self):
@@ -287,11 +1006,9 @@ class WebsocketServer:
 
                 # Send ping (internal control message)
                 ping_msg = {"__hb__": "ping", "t": now}
-                try:
-                    self.logger.debug(f"Sending ping to {c.client['address']}")
-                    self._server.send_message(c.client, json.dumps(ping_msg))
-                except Exception as e:
-                    self.logger.warning(f"Ping send failed: {e}")
+                self.logger.debug(f"Sending ping to {c.client['address']}")
+                if not c.outbound.put(json.dumps(ping_msg), '__hb__'):
+                    self.logger.warning("Ping send failed: connection closed")
                     self._force_client_disconnect(c, reason="ping send error")
                     continue
 
@@ -357,7 +1074,27 @@ class WebsocketClient:
     _address = ''
 
     # === INIT =========================================================================================================
-    def __init__(self, address=None, port=None, debug=True, reconnect=True):
+    def __init__(self, address=None, port=None, debug=True, reconnect=True, backend: str = 'threaded',
+                 max_send_queue: int = 1000, encoding: str = ENCODING_JSON, compression: str | None = None):
+        """
+        backend:
+          - 'threaded': websocket-client WebSocketApp with a polling reconnect loop (default)
+          - 'asyncio':  one event loop thread that connects, reconnects with backoff and drains a bounded send queue
+
+        encoding: requested from the server in the handshake. Falls back to JSON if the server does not accept it.
+        compression: 'deflate' offers permessage-deflate. Only supported by the asyncio backend.
+        """
+        if backend not in ('threaded', 'asyncio'):
+            raise ValueError(f"Unknown websocket backend: {backend}")
+        if encoding not in SUBPROTOCOLS:
+            raise ValueError(f"Unsupported websocket encoding: {encoding}")
+        self.backend = backend
+        self.max_send_queue = max_send_queue
+        self.requested_encoding = encoding
+        self.encoding = ENCODING_JSON  # Negotiated on every connect
+        self.compression = compression
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._connection: _AsyncioConnection | None = None
 
         self.address = address
         self.port = port
@@ -377,6 +1114,8 @@ class WebsocketClient:
 
         # Disable the internal websocket logger, since it messes with other modules
         self.logger = Logger('Websocket Client', 'DEBUG')
+        if compression is not None and backend != 'asyncio':
+            self.logger.warning("Compression requires the asyncio backend, connecting without")
         logging.getLogger("websocket").setLevel(logging.CRITICAL)
         register_exit_callback(self.close)
 
@@ -403,11 +1142,14 @@ class WebsocketClient:
     # ------------------------------------------------------------------------------------------------------------------
     def close(self, *args, **kwargs):
         self.logger.info("Connection closed")
-        try:
-            self.ws.close()
-        except Exception:
-            pass
         self._exit = True
+        if self.backend == 'asyncio':
+            self._stopAsync()
+        else:
+            try:
+                self.ws.close()
+            except Exception:
+                pass
         if self._thread and self._thread.is_alive():
             self._thread.join()
 
@@ -421,7 +1163,8 @@ class WebsocketClient:
 
     # ------------------------------------------------------------------------------------------------------------------
     def connect(self):
-        self._thread = threading.Thread(target=self.task, daemon=True)
+        target = self._asyncTask if self.backend == 'asyncio' else self.task
+        self._thread = threading.Thread(target=target, daemon=True)
         self._thread.start()
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -437,7 +1180,8 @@ class WebsocketClient:
                 on_open=self.on_open,
                 on_close=self.on_close,
                 on_message=self.on_message,
-                on_error=self.on_error
+                on_error=self.on_error,
+                subprotocols=[self.requested_encoding] if self.requested_encoding != ENCODING_JSON else None
             )
 
             # Run in a separate thread
@@ -480,10 +1224,17 @@ class WebsocketClient:
         Send a message to the server.
         """
         if self.connected:
-            if isinstance(message, dict):
+            if self.encoding == ENCODING_MSGPACK and not isinstance(message, (str, bytes)):
+                message = BinaryFrame(msgpackEncode(message))
+            elif isinstance(message, dict):
                 message = json.dumps(message)
             try:
-                self.ws.send(message)
+                if self.backend == 'asyncio':
+                    self._connection.enqueue(message)
+                elif isinstance(message, BinaryFrame):
+                    self.ws.send(message, opcode=websocket.ABNF.OPCODE_BINARY)
+                else:
+                    self.ws.send(message)
             except Exception as e:
                 self.logger.warning(f"Send failed: {e}")
 
@@ -493,15 +1244,23 @@ class WebsocketClient:
         Close the WebSocket connection.
         """
         if self.connected:
-            try:
-                self.ws.close()
-            except Exception:
-                pass
+            if self.backend == 'asyncio':
+                self._exit = True
+                self._stopAsync()
+            else:
+                try:
+                    self.ws.close()
+                except Exception:
+                    pass
             if self._thread and self._thread.is_alive():
                 self._thread.join()
 
     # ------------------------------------------------------------------------------------------------------------------
     def on_open(self, ws):
+        if self.backend == 'asyncio':
+            self.encoding = self._connection.encoding
+        else:
+            self.encoding = ws.sock.getsubprotocol() or ENCODING_JSON
         self.connected = True
         self.logger.info("Connection successful.")
         self.callbacks.connected.call()
@@ -520,7 +1279,10 @@ class WebsocketClient:
         self.logger.debug(f"Message received: {message}")
         # swallow internal heartbeats (no callbacks/events)
         try:
-            data = json.loads(message)
+            if isinstance(message, bytes) and self.encoding == ENCODING_MSGPACK:
+                data = msgpackDecode(message)
+            else:
+                data = json.loads(message)
         except Exception:
             # non-JSON -> treat as app data
             self.callbacks.message.call(message)
@@ -544,6 +1306,81 @@ class WebsocketClient:
         self.callbacks.error.call(error)
         self.events.error.set(error)
 
+    # === ASYNCIO BACKEND ==============================================================================================
+    def _asyncTask(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._asyncRun())
+        except asyncio.CancelledError:
+            ...  # Closed while connecting
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def _asyncRun(self):
+        from websockets.asyncio.client import connect  # Only needed for this backend
+
+        # Iterating connect() reconnects with exponential backoff whenever the connection fails or drops
+        subprotocols = [self.requested_encoding] if self.requested_encoding != ENCODING_JSON else None
+        connections = connect(self.uri, compression=self.compression, max_size=None, ping_interval=5, ping_timeout=2,
+                              open_timeout=5, subprotocols=subprotocols).__aiter__()
+        try:
+            async for connection_ws in connections:
+                if self._exit:
+                    await connection_ws.close()
+                    return
+
+                self._connection = _AsyncioConnection(connection_ws, 0)
+                self._connection.attach(OutboundQueue(max_size=self.max_send_queue))
+                self.ws = _AsyncioClientSocket(self._connection)
+                self.on_open(self.ws)
+                try:
+                    async for message in connection_ws:
+                        self.on_message(self.ws, message)
+                except Exception as e:
+                    self.on_error(self.ws, e)
+                finally:
+                    self._connection.stop()
+                    self._connection = None
+                    self.on_close(self.ws, None, None)
+
+                if self._exit:
+                    return
+        finally:
+            await connections.aclose()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _stopAsync(self):
+        loop, connection = self._loop, self._connection
+        if loop is None or loop.is_closed():
+            return
+        try:
+            if connection is not None:
+                connection.enqueue(_CLOSE)
+            else:
+                # Still connecting: cancel the connect loop
+                loop.call_soon_threadsafe(lambda: [task.cancel() for task in asyncio.all_tasks(loop)])
+        except RuntimeError:
+            pass  # Loop closed in between
+
+
+class _AsyncioClientSocket:
+    """
+    Stand-in for websocket.WebSocketApp in WebsocketClient's on_* handlers when the asyncio backend is used.
+    Sends are queued on the connection's writer task and can be called from any thread.
+    """
+
+    def __init__(self, connection: _AsyncioConnection):
+        self._connection = connection
+
+    def send(self, message):
+        self._connection.enqueue(message)
+
+    def close(self):
+        self._connection.enqueue(_CLOSE)
+
 
 # ======================================================================================================================
 @dataclasses.dataclass
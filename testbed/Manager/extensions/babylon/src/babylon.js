@@ -553,7 +553,11 @@ export class Babylon extends Scene {
 
     /* === PRIVATE METHODS ========================================================================================== */
     _initializeWebsocket() {
-        this.websocket = new Websocket({host: this.config.websocket_host, port: this.config.websocket_port});
+        this.websocket = new Websocket({
+            host: this.config.websocket_host,
+            port: this.config.websocket_port,
+            options: {encoding: this.config.websocket_encoding ?? 'json'},
+        });
         this.websocket.on('message', this._handleMessage.bind(this));
         this.websocket.on('connected', this._onWebsocketConnect.bind(this));
         this.websocket.on('close', this._onWebsocketDisconnected.bind(this));
@@ -12,11 +12,11 @@ import numpy as np
 
 # === CUSTOM MODULES ===================================================================================================
 from core.utils.callbacks import callback_definition, CallbackContainer
-from core.utils.dataclass_utils import asdict_optimized
+from core.utils.dataclass_utils import asdict_optimized, register_codecs
 from core.utils.dict import update_dict
 from core.utils.exit import register_exit_callback
 from core.utils.logging_utils import Logger
-from core.utils.time import IntervalTimer
+from core.utils.time import get_scheduler, PeriodicJob
 from core.utils.websockets import WebsocketServer
 from extensions.gui.src.lib.objects.objects import Widget
 from extensions.gui.src.lib.utilities import split_path
@@ -364,6 +364,9 @@ class Babylon_UpdateMessage:
     type: str = 'update'
 
 
+register_codecs(Babylon_UpdateMessage)
+
+
 # ======================================================================================================================
 class BabylonVisualization:
     """
@@ -393,6 +396,8 @@ class BabylonVisualization:
 
         babylon_default_config = {
             'websocket_port': port,
+            # 'msgpack' sends scene updates as binary frames with NumPy arrays as typed buffers
+            'websocket_encoding': 'json',
 
             'show_coordinate_system': True,
             'coordinate_system_length': 0.5,
@@ -428,7 +433,7 @@ class BabylonVisualization:
         self.callbacks = BabylonCallbacks()
         self.logger = Logger('BABYLON', 'INFO')
 
-        self.server = WebsocketServer(host=host, port=port, heartbeats=False)
+        self.server = WebsocketServer(host=host, port=port, heartbeats=False, compression='deflate')
         self.server.callbacks.new_client.register(self._new_client_callback)
         self.server.callbacks.client_disconnected.register(self._client_disconnected_callback)
         self.server.callbacks.message.register(self._client_message_callback)
@@ -438,11 +443,9 @@ class BabylonVisualization:
 
         self.update_message = Babylon_UpdateMessage()
 
-        self.timer = IntervalTimer(self.Ts, raise_race_condition_error=False)
-
         register_exit_callback(self.close)
 
-        self._thread = None
+        self._job: PeriodicJob | None = None
 
     # ------------------------------------------------------------------------------------------------------------------
     def init(self):
@@ -461,15 +464,15 @@ class BabylonVisualization:
 
         self.server.start()
 
-        self._thread = threading.Thread(target=self._task, daemon=True)
-        self._thread.start()
+        self._job = get_scheduler().every(self.Ts, self._task, name=f"babylon_{self.id}")
 
     # ------------------------------------------------------------------------------------------------------------------
     def close(self):
         self._exit = True
 
-        if hasattr(self, '_thread') and self._thread is not None and self._thread.is_alive():
-            self._thread.join()
+        if getattr(self, '_job', None) is not None:
+            self._job.cancel()
+            self._job = None
 
         self.server.stop()
         self.logger.important(f"Babylon visualization stopped")
@@ -515,13 +518,10 @@ class BabylonVisualization:
 
     # ------------------------------------------------------------------------------------------------------------------
     def _task(self):
-
-        self.timer.reset()
-        while not self._exit:
-            if self._poll_objects:
-                self._pollObjects()
-            self._sendUpdate()
-            self.timer.sleep_until_next()
+        # Runs on the shared scheduler every Ts seconds
+        if self._poll_objects:
+            self._pollObjects()
+        self._sendUpdate()
 
     # ------------------------------------------------------------------------------------------------------------------
     def addObject(self, obj: BabylonObject):
@@ -0,0 +1,239 @@
+// Minimal MessagePack codec for the websocket msgpack encoding (see core/utils/msgpack_utils.py).
+// Covers the full type set except extension types, which are decoded as {type, data} and cannot be encoded.
+// 64-bit integers are decoded as Number (lossy above 2^53), bin as Uint8Array views into the message.
+
+const textEncoder = new TextEncoder();
+const textDecoder = new TextDecoder();
+
+// === DECODE ==========================================================================================================
+export function decode(buffer) {
+    const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+    const reader = {
+        bytes: bytes,
+        view: new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength),
+        offset: 0,
+    };
+    const value = readValue(reader);
+    if (reader.offset !== bytes.length) {
+        throw new Error(`msgpack: ${bytes.length - reader.offset} extra bytes after the value`);
+    }
+    return value;
+}
+
+function readValue(r) {
+    const type = r.bytes[r.offset++];
+    if (type === undefined) {
+        throw new Error('msgpack: unexpected end of data');
+    }
+    if (type <= 0x7f) return type;
+    if (type >= 0xe0) return type - 0x100;
+    if (type <= 0x8f) return readMap(r, type & 0x0f);
+    if (type <= 0x9f) return readArray(r, type & 0x0f);
+    if (type <= 0xbf) return readString(r, type & 0x1f);
+
+    const view = r.view;
+    let value;
+    switch (type) {
+        case 0xc0: return null;
+        case 0xc2: return false;
+        case 0xc3: return true;
+        case 0xc4: return readBytes(r, view.getUint8(r.offset++));
+        case 0xc5: value = view.getUint16(r.offset); r.offset += 2; return readBytes(r, value);
+        case 0xc6: value = view.getUint32(r.offset); r.offset += 4; return readBytes(r, value);
+        case 0xc7: value = view.getUint8(r.offset++); return readExt(r, value);
+        case 0xc8: value = view.getUint16(r.offset); r.offset += 2; return readExt(r, value);
+        case 0xc9: value = view.getUint32(r.offset); r.offset += 4; return readExt(r, value);
+        case 0xca: value = view.getFloat32(r.offset); r.offset += 4; return value;
+        case 0xcb: value = view.getFloat64(r.offset); r.offset += 8; return value;
+        case 0xcc: return view.getUint8(r.offset++);
+        case 0xcd: value = view.getUint16(r.offset); r.offset += 2; return value;
+        case 0xce: value = view.getUint32(r.offset); r.offset += 4; return value;
+        case 0xcf: value = Number(view.getBigUint64(r.offset)); r.offset += 8; return value;
+        case 0xd0: return view.getInt8(r.offset++);
+        case 0xd1: value = view.getInt16(r.offset); r.offset += 2; return value;
+        case 0xd2: value = view.getInt32(r.offset); r.offset += 4; return value;
+        case 0xd3: value = Number(view.getBigInt64(r.offset)); r.offset += 8; return value;
+        case 0xd4: return readExt(r, 1);
+        case 0xd5: return readExt(r, 2);
+        case 0xd6: return readExt(r, 4);
+        case 0xd7: return readExt(r, 8);
+        case 0xd8: return readExt(r, 16);
+        case 0xd9: return readString(r, view.getUint8(r.offset++));
+        case 0xda: value = view.getUint16(r.offset); r.offset += 2; return readString(r, value);
+        case 0xdb: value = view.getUint32(r.offset); r.offset += 4; return readString(r, value);
+        case 0xdc: value = view.getUint16(r.offset); r.offset += 2; return readArray(r, value);
+        case 0xdd: value = view.getUint32(r.offset); r.offset += 4; return readArray(r, value);
+        case 0xde: value = view.getUint16(r.offset); r.offset += 2; return readMap(r, value);
+        case 0xdf: value = view.getUint32(r.offset); r.offset += 4; return readMap(r, value);
+        default:
+            throw new Error(`msgpack: invalid type byte 0x${type.toString(16)}`);
+    }
+}
+
+function readBytes(r, length) {
+    if (r.offset + length > r.bytes.length) {
+        throw new Error('msgpack: unexpected end of data');
+    }
+    const bytes = r.bytes.subarray(r.offset, r.offset + length);
+    r.offset += length;
+    return bytes;
+}
+
+function readString(r, length) {
+    return textDecoder.decode(readBytes(r, length));
+}
+
+function readExt(r, length) {
+    const type = r.view.getInt8(r.offset++);
+    return {type: type, data: readBytes(r, length)};
+}
+
+function readArray(r, length) {
+    const array = new Array(length);
+    for (let i = 0; i < length; i++) {
+        array[i] = readValue(r);
+    }
+    return array;
+}
+
+function readMap(r, length) {
+    const map = {};
+    for (let i = 0; i < length; i++) {
+        const key = readValue(r);
+        map[key] = readValue(r);
+    }
+    return map;
+}
+
+// === ENCODE ==========================================================================================================
+export function encode(value) {
+    const writer = {bytes: new Uint8Array(256), view: null, offset: 0};
+    writer.view = new DataView(writer.bytes.buffer);
+    writeValue(writer, value);
+    return writer.bytes.subarray(0, writer.offset);
+}
+
+function reserve(w, size) {
+    if (w.offset + size <= w.bytes.length) {
+        return;
+    }
+    let length = w.bytes.length * 2;
+    while (length < w.offset + size) {
+        length *= 2;
+    }
+    const bytes = new Uint8Array(length);
+    bytes.set(w.bytes.subarray(0, w.offset));
+    w.bytes = bytes;
+    w.view = new DataView(bytes.buffer);
+}
+
+function writeHeader(w, length, fix, fixLimit, type8, type16, type32) {
+    reserve(w, 5);
+    if (length < fixLimit) {
+        w.view.setUint8(w.offset++, fix | length);
+    } else if (type8 !== null && length <= 0xff) {
+        w.view.setUint8(w.offset++, type8);
+        w.view.setUint8(w.offset++, length);
+    } else if (length <= 0xffff) {
+        w.view.setUint8(w.offset++, type16);
+        w.view.setUint16(w.offset, length);
+        w.offset += 2;
+    } else {
+        w.view.setUint8(w.offset++, type32);
+        w.view.setUint32(w.offset, length);
+        w.offset += 4;
+    }
+}
+
+function writeRaw(w, bytes) {
+    reserve(w, bytes.length);
+    w.bytes.set(bytes, w.offset);
+    w.offset += bytes.length;
+}
+
+function writeNumber(w, value) {
+    reserve(w, 9);
+    const view = w.view;
+    if (!Number.isSafeInteger(value)) {
+        view.setUint8(w.offset++, 0xcb);
+        view.setFloat64(w.offset, value);
+        w.offset += 8;
+    } else if (value >= 0) {
+        if (value <= 0x7f) {
+            view.setUint8(w.offset++, value);
+        } else if (value <= 0xff) {
+            view.setUint8(w.offset++, 0xcc);
+            view.setUint8(w.offset++, value);
+        } else if (value <= 0xffff) {
+            view.setUint8(w.offset++, 0xcd);
+            view.setUint16(w.offset, value);
+            w.offset += 2;
+        } else if (value <= 0xffffffff) {
+            view.setUint8(w.offset++, 0xce);
+            view.setUint32(w.offset, value);
+            w.offset += 4;
+        } else {
+            view.setUint8(w.offset++, 0xcf);
+            view.setBigUint64(w.offset, BigInt(value));
+            w.offset += 8;
+        }
+    } else if (value >= -0x20) {
+        view.setInt8(w.offset++, value);
+    } else if (value >= -0x80) {
+        view.setUint8(w.offset++, 0xd0);
+        view.setInt8(w.offset++, value);
+    } else if (value >= -0x8000) {
+        view.setUint8(w.offset++, 0xd1);
+        view.setInt16(w.offset, value);
+        w.offset += 2;
+    } else if (value >= -0x80000000) {
+        view.setUint8(w.offset++, 0xd2);
+        view.setInt32(w.offset, value);
+        w.offset += 4;
+    } else {
+        view.setUint8(w.offset++, 0xd3);
+        view.setBigInt64(w.offset, BigInt(value));
+        w.offset += 8;
+    }
+}
+
+function writeValue(w, value) {
+    if (value === null || value === undefined) {
+        reserve(w, 1);
+        w.view.setUint8(w.offset++, 0xc0);
+    } else if (value === false || value === true) {
+        reserve(w, 1);
+        w.view.setUint8(w.offset++, value ? 0xc3 : 0xc2);
+    } else if (typeof value === 'number') {
+        writeNumber(w, value);
+    } else if (typeof value === 'bigint') {
+        reserve(w, 9);
+        w.view.setUint8(w.offset++, value < 0 ? 0xd3 : 0xcf);
+        value < 0 ? w.view.setBigInt64(w.offset, value) : w.view.setBigUint64(w.offset, value);
+        w.offset += 8;
+    } else if (typeof value === 'string') {
+        const bytes = textEncoder.encode(value);
+        writeHeader(w, bytes.length, 0xa0, 32, 0xd9, 0xda, 0xdb);
+        writeRaw(w, bytes);
+    } else if (value instanceof ArrayBuffer || ArrayBuffer.isView(value)) {
+        const bytes = value instanceof ArrayBuffer
+            ? new Uint8Array(value)
+            : new Uint8Array(value.buffer, value.byteOffset, value.byteLength);
+        writeHeader(w, bytes.length, 0, 0, 0xc4, 0xc5, 0xc6);
+        writeRaw(w, bytes);
+    } else if (Array.isArray(value)) {
+        writeHeader(w, value.length, 0x90, 16, null, 0xdc, 0xdd);
+        for (const item of value) {
+            writeValue(w, item);
+        }
+    } else if (typeof value === 'object') {
+        const keys = Object.keys(value).filter(key => value[key] !== undefined);
+        writeHeader(w, keys.length, 0x80, 16, null, 0xde, 0xdf);
+        for (const key of keys) {
+            writeValue(w, key);
+            writeValue(w, value[key]);
+        }
+    } else {
+        throw new Error(`msgpack: cannot encode ${typeof value}`);
+    }
+}
@@ -1,4 +1,54 @@
-import { EventEmitter } from 'events';
+import {EventEmitter} from 'events';
+import {decode, encode} from './msgpack.js';
+
+// NumPy dtypes (with byte order) sent by the Python side in msgpack mode, see core/utils/msgpack_utils.py
+const NDARRAY_TYPES = {
+    '|b1': Uint8Array, '|i1': Int8Array, '|u1': Uint8Array,
+    '<i2': Int16Array, '<u2': Uint16Array, '<i4': Int32Array, '<u4': Uint32Array,
+    '<i8': BigInt64Array, '<u8': BigUint64Array, '<f4': Float32Array, '<f8': Float64Array,
+};
+
+// Replaces {__ndarray__, shape, data} objects with typed arrays. Arrays with more than one dimension become
+// (nested) plain arrays of typed array rows, matching the nesting of the JSON encoding.
+function reviveArrays(value) {
+    if (Array.isArray(value)) {
+        for (let i = 0; i < value.length; i++) {
+            value[i] = reviveArrays(value[i]);
+        }
+        return value;
+    }
+    if (value === null || typeof value !== 'object' || ArrayBuffer.isView(value)) {
+        return value;
+    }
+    if ('__ndarray__' in value) {
+        const type = NDARRAY_TYPES[value.__ndarray__];
+        if (!type) {
+            return value;
+        }
+        // Copy, the payload is not necessarily aligned to the element size within the message
+        const flat = new type(value.data.slice().buffer);
+        return reshape(flat, value.shape);
+    }
+    for (const key in value) {
+        value[key] = reviveArrays(value[key]);
+    }
+    return value;
+}
+
+function reshape(flat, shape) {
+    if (shape.length === 0) {
+        return flat[0];
+    }
+    if (shape.length === 1) {
+        return flat;
+    }
+    const rows = [];
+    const stride = flat.length / shape[0];
+    for (let i = 0; i < shape[0]; i++) {
+        rows.push(reshape(flat.subarray(i * stride, (i + 1) * stride), shape.slice(1)));
+    }
+    return rows;
+}
 
 // const WebSocket = require('ws');
 
@@ -9,6 +59,7 @@ export class Websocket extends EventEmitter {
         const default_options = {
             reconnect_pause: 3000, // ms
             reconnect: true,
+            encoding: 'json', // 'msgpack' to receive binary frames with NumPy arrays as typed arrays
         }
 
         this.options = {
@@ -18,14 +69,28 @@ export class Websocket extends EventEmitter {
 
         this.url = `ws://${host}:${port}`;
         this.connected = false;
+        this.encoding = 'json'; // Negotiated with the server on every connect
         this.txQueue = [];
 
 
     }
 
+    // -----------------------------------------------------------------------------------------------------------------
+    close() {
+        if (this.socket) {
+            this.socket.close();
+            this.socket = null;
+            this.connected = false;
+            this.txQueue = [];
+            console.log("WebSocket closed");
+        }
+    }
     // -----------------------------------------------------------------------------------------------------------------
     connect() {
-        this.socket = new WebSocket(this.url);
+        // The encoding is requested as subprotocol. Servers without msgpack support answer without one -> JSON
+        const protocols = this.options.encoding === 'msgpack' ? ['msgpack'] : [];
+        this.socket = new WebSocket(this.url, protocols);
+        this.socket.binaryType = 'arraybuffer';
 
         if (!this.socket) {
             alert("Cannot start websocket")
@@ -41,6 +106,7 @@ export class Websocket extends EventEmitter {
     onOpen(open) {
         console.log("Websocket connected!");
         this.connected = true;
+        this.encoding = this.socket.protocol || 'json';
         for (let message of this.txQueue) {
             this.send(message);
         }
@@ -49,8 +115,14 @@ export class Websocket extends EventEmitter {
 
     // -----------------------------------------------------------------------------------------------------------------
     onMessage(message) {
-        const msg = JSON.parse(message.data);
-        this.emit('message', msg);
+        try {
+            const msg = message.data instanceof ArrayBuffer
+                ? reviveArrays(decode(message.data))
+                : JSON.parse(message.data);
+            this.emit('message', msg);
+        } catch (e) {
+            console.log("Error parsing message", message.data, e);
+        }
     }
 
     // -----------------------------------------------------------------------------------------------------------------
@@ -76,7 +148,7 @@ export class Websocket extends EventEmitter {
     send(message) {
 
         if (this.connected) {
-            this.socket.send(JSON.stringify(message))
+            this.socket.send(this.encoding === 'msgpack' ? encode(message) : JSON.stringify(message))
         } else {
             this.txQueue.push(message);
         }
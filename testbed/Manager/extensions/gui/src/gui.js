@@ -2245,6 +2245,10 @@ export class GUI {
 
     /* ===============================================================================================================*/
     resetGUI() {
+        // Widget state of the update frames, rebuilt from the full frame after reconnecting
+        this.update_seq = null;
+        this.update_state = {};
+
         // Empty the content
         this.content.innerHTML = '';
         this.category_bar_list.innerHTML = '';
@@ -2733,26 +2737,50 @@ export class GUI {
 
     /* ===============================================================================================================*/
     _handleGuiUpdate(message) {
+        // Frames are numbered and acknowledged. A gap means a frame was dropped on the way, so ask for the full state
+        if (message.seq !== undefined) {
+            const gap = !message.full && this.update_seq !== null && message.seq !== this.update_seq + 1;
+            if (message.full) {
+                this.update_state = {};
+            }
+            this.update_seq = message.seq;
+            if (this.connected) {
+                this.websocket.send({type: 'gui_update_ack', seq: message.seq, resync: gap});
+            }
+        }
+
         const messages = message.messages;
         // messages is an object with keys being the IDs of the objects
-        for (const [id, message] of Object.entries(messages)) {
+        for (const [id, entry] of Object.entries(messages)) {
             const object = this.getObjectByUID(id);
+            const items = Array.isArray(entry) ? entry : [entry];
+            for (const item of items) {
+                const data = this._applyUpdate(id, item);
+                if (object) {
+                    object.update(data);
+                }
+            }
             if (!object) {
                 console.warn(`Object with UID "${id}" not found.`);
-                continue;
-            }
-            // Check if the message is an array, if so, iterate over it
-            if (Array.isArray(message)) {
-                console.warn(`Received array message for object "${id}":`, message);
-                // If it's an array, we assume it's a list of updates
-                for (const item of message) {
-                    object.update(item.data);
-                }
-            } else {
-                object.update(message.data);
             }
+        }
+    }
 
+    _applyUpdate(id, item) {
+        // Important updates are events and bypass the widget state
+        if (item.important) {
+            return item.data;
+        }
+        const previous = this.update_state[id];
+        const isObject = (value) => value !== null && typeof value === 'object' && !Array.isArray(value);
+        let state;
+        if (item.delta && isObject(previous) && isObject(item.data)) {
+            state = {...previous, ...item.data};
+        } else {
+            state = isObject(item.data) ? {...item.data} : item.data;
         }
+        this.update_state[id] = state;
+        return state;
     }
 
     /* ===============================================================================================================*/
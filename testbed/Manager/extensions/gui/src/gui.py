@@ -3,7 +3,6 @@ from __future__ import annotations
 import copy
 import dataclasses
 import threading
-import time
 import uuid
 from dataclasses import is_dataclass
 
@@ -16,8 +15,8 @@ from core.utils.exit import register_exit_callback
 from core.utils.files import relativeToFullPath
 from core.utils.js.vite import run_vite_app
 from core.utils.logging_utils import Logger
-from core.utils.dataclass_utils import asdict_optimized
-from core.utils.time import delayed_execution
+from core.utils.dataclass_utils import asdict_optimized, register_codecs
+from core.utils.time import delayed_execution, get_scheduler, PeriodicJob
 from core.utils.websockets import WebsocketServer, WebsocketClient, WebsocketServerClient
 from extensions.gui.settings import WS_PORT_DESKTOP, PORT_JS_APP, WS_PORT_MOBILE
 from extensions.gui.src.lib.cli_terminal.cli_terminal import CLI_Terminal
@@ -30,6 +29,7 @@ from extensions.gui.src.lib.objects.python.indicators import BatteryIndicatorWid
     JoystickIndicator, ConnectionIndicator
 from extensions.gui.src.lib.objects.python.popup import Popup, PopupInstance
 from extensions.gui.src.lib.objects.python.popup_application import GUI_Popup_Application, Application_Payload
+from extensions.gui.src.lib.updates import UpdateAggregator
 from extensions.gui.src.lib.utilities import check_for_spaces, split_path, addIdPrefix, check_id
 
 
@@ -45,6 +45,9 @@ class GUI_UpdateMessage:
     type: str = 'gui_update'
 
 
+register_codecs(InitMessage, GUI_UpdateMessage)
+
+
 # === CATEGORY =========================================================================================================
 class CategoryHeadbar(Widget_Group):
 
@@ -688,6 +691,7 @@ class Child:
     request_event: Event
 
     child_object_id: str | None
+    update_seq: int | None
 
     def __init__(self,
                  address,
@@ -720,6 +724,9 @@ class Child:
         # self.request_event = Event(flags=[("request_id", str)])
         self.request_event = Event(flags=EventFlag('request_id', str))
 
+        # Sequence number of the last widget update frame, see UpdateAggregator
+        self.update_seq = None
+
     # ------------------------------------------------------------------------------------------------------------------
     def send(self, message):
         if is_dataclass(message):
@@ -730,6 +737,8 @@ class Child:
     # ------------------------------------------------------------------------------------------------------------------
     def _onConnect(self, *args, **kwargs):
 
+        # The child sends a full frame after the handshake
+        self.update_seq = None
         self.callbacks.connect.call()
 
         message = HandshakeMessage(
@@ -866,8 +875,19 @@ class Child:
         """
         Handle a GUI update message from the child GUI.
         This message contains updates for multiple objects in the GUI.
+
+        Frames are numbered and acknowledged like in the frontend. A gap means a frame was lost, so the ack asks the
+        child for a full frame.
         """
         self.gui.logger.debug(f"Handling GUI update message from child GUI {self.id}: {message}")
+        seq = message.get('seq')
+        if seq is not None:
+            gap = not message.get('full', False) and self.update_seq is not None and seq != self.update_seq + 1
+            if gap:
+                self.gui.logger.debug(f"Missed GUI update frames from child GUI {self.id}, requesting a full frame")
+            self.update_seq = seq
+            self.send({'type': 'gui_update_ack', 'seq': seq, 'resync': gap})
+
         # loop through the messages
         for obj_id, updates in message['messages'].items():
             obj_id_adjusted = self.path_in_gui + '/' + obj_id
@@ -1018,7 +1038,8 @@ class GUI:
 
     _exit: bool = False
 
-    update_message_lock: threading.Lock
+    updates: UpdateAggregator
+    update_send_lock: threading.Lock
 
     callbacks: GUI_Callbacks
 
@@ -1050,12 +1071,13 @@ class GUI:
             self.options['name'] = self.id
 
         self.run_task = task
-        self._thread = threading.Thread(target=self._task, daemon=True)  # But only start it if run_task is True
+        self._job: PeriodicJob | None = None  # Only scheduled if run_task is True
 
         self.run_js = run_js
         self.Ts = Ts
 
-        self.update_message = GUI_UpdateMessage()
+        self.updates = UpdateAggregator()
+        self.update_send_lock = threading.Lock()
 
         self.categories = {}
         self.export_category, self.export_page = self._prepareExportCategory()
@@ -1098,8 +1120,6 @@ class GUI:
 
         self.allow_multiple_instances = allow_multiple_instances
 
-        self.update_message_lock = threading.Lock()
-
         register_exit_callback(self.close)
 
     # === PROPERTIES ===================================================================================================
@@ -1123,8 +1143,8 @@ class GUI:
 
         # Start the thread
         if self.run_task:
-            self.logger.debug("Starting GUI task thread")
-            self._thread.start()
+            self.logger.debug("Starting GUI task")
+            self._job = get_scheduler().every(self.Ts, self._task, name=f"gui_{self.id}")
 
         self.logger.info(f"Started GUI \"{self.id}\" on websocket {self.server.host}:{self.server.port}")
 
@@ -1135,9 +1155,10 @@ class GUI:
         if self.js_process is not None:
             self.js_process.terminate()
 
-        if self.run_task and self._thread.is_alive():
+        if self._job is not None:
             self._exit = True
-            self._thread.join(timeout=5)
+            self._job.cancel()
+            self._job = None
 
         self.logger.info("GUI closed")
 
@@ -1149,29 +1170,24 @@ class GUI:
 
     # ------------------------------------------------------------------------------------------------------------------
     def _task(self):
-        while not self._exit:
-            self._sendUpdateMessage()
-            time.sleep(self.Ts)
+        # Runs on the shared scheduler every Ts seconds
+        self._sendUpdateMessage()
 
     # ------------------------------------------------------------------------------------------------------------------
     def _sendUpdateMessage(self):
-
-        # Check if there are any messages to send
-        if not self.update_message.messages or len(self.update_message.messages) == 0:
+        if not self.updates.tick():
             return
 
-        try:
-            # Add a semaphore/mutex to prevent concurrent access
-            self.update_message_lock.acquire()
-            message = asdict_optimized(self.update_message)
-            self.update_message_lock.release()
-        except RuntimeError as e:
-            self.logger.error(f"Error converting update message to dict: {e}")
-            self.update_message = GUI_UpdateMessage()
-            return
-        self.broadcast(message)
-        # Prepare a new empty message
-        self.update_message = GUI_UpdateMessage()
+        # Frames and full frames are numbered; the lock keeps them in order on every client's queue
+        with self.update_send_lock:
+            message = self.updates.frame()
+            if message is not None:
+                self.broadcast(message)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _sendFullUpdate(self, client):
+        with self.update_send_lock:
+            self.server.sendToClient(client, self.updates.full_frame())
 
     # ------------------------------------------------------------------------------------------------------------------
     def runJSApp(self):
@@ -1263,26 +1279,9 @@ class GUI:
         self.application_group.addWidget(button)
 
     # ------------------------------------------------------------------------------------------------------------------
-    def sendUpdate(self, uid: str, message: UpdateMessage):
-
-        self.update_message_lock.acquire()
-        # Check if this object already has a message in the update message
-        if uid in self.update_message.messages:
-            # If it does, update the existing message
-            if message.important:
-                if not isinstance(self.update_message.messages[uid], list):
-                    # If the existing message is not a list, convert it to a list
-                    self.update_message.messages[uid] = [self.update_message.messages[uid]]
-                # Append the new message to the list
-                self.update_message.messages[uid].append(message)
-            else:
-                self.update_message.messages[uid] = message
-
-        else:
-            # If it does not, add it to the update message
-            self.update_message.messages[uid] = message
-
-        self.update_message_lock.release()
+    def sendUpdate(self, uid: str, message: UpdateMessage | dict):
+        # Sent with the next frame, see UpdateAggregator
+        self.updates.add(uid, message)
 
     # ------------------------------------------------------------------------------------------------------------------
     def sendToFrontend(self, frontend, message):
@@ -1304,16 +1303,14 @@ class GUI:
         if is_dataclass(message):
             message = asdict_optimized(message)
 
-        for frontend in self.frontends:
-            self.server.sendToClient(frontend, message)
+        self.server.broadcast(message, clients=self.frontends)
 
     # ------------------------------------------------------------------------------------------------------------------
     def sendToParents(self, message):
         if is_dataclass(message):
             message = asdict_optimized(message)
 
-        for parent in self.parent_guis.values():
-            parent.send(message)
+        self.server.broadcast(message, clients=[parent.client for parent in self.parent_guis.values()])
 
     # ------------------------------------------------------------------------------------------------------------------
     def send(self, message, client=None):
@@ -1331,8 +1328,12 @@ class GUI:
 
     # ------------------------------------------------------------------------------------------------------------------
     def broadcast(self, message):
-        self.sendToAllFrontends(message)
-        self.sendToParents(message)
+        # Frontends and parent GUIs are clients of the same server, so the message is encoded once for all of them
+        if is_dataclass(message):
+            message = asdict_optimized(message)
+
+        parents = [parent.client for parent in self.parent_guis.values()]
+        self.server.broadcast(message, clients=self.frontends + parents)
 
     # ------------------------------------------------------------------------------------------------------------------
     def addChildGUI(self,
@@ -1491,6 +1492,9 @@ class GUI:
             )
             self.server.sendToClient(frontend, asdict_optimized(popup_message))
 
+        # Current state of all widgets, the following frames are deltas against it
+        self._sendFullUpdate(frontend)
+
     # ------------------------------------------------------------------------------------------------------------------
     def _closeFrontend(self, client):
         message = {
@@ -1510,6 +1514,7 @@ class GUI:
         )
 
         parent.send(message)
+        self._sendFullUpdate(parent_client)
 
     # ------------------------------------------------------------------------------------------------------------------
     def _new_client_callback(self, client):
@@ -1519,6 +1524,8 @@ class GUI:
     def _client_disconnected_callback(self, client: WebsocketServerClient):
         self.logger.debug(f"Client disconnected: {client.address}:{client.port}")
 
+        self.updates.forget(client)
+
         if client in self.frontends:
             self.frontends.remove(client)
             self.logger.info(f"Frontend disconnected: {client.address}:{client.port} ({len(self.frontends)})")
@@ -1534,6 +1541,8 @@ class GUI:
                 self._handleHandshakeMessage(client, message)
             case 'event':
                 self._handleEventMessage(message, sender=client)
+            case 'gui_update_ack':
+                self._handleUpdateAck(client, message)
             case 'request':
                 ...
                 # These are handled by the parent objects, so no need to do something here
@@ -1544,6 +1553,14 @@ class GUI:
             case _:
                 self.logger.warning(f"Unknown message type: {message['type']}")
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def _handleUpdateAck(self, client: WebsocketServerClient, message):
+        self.updates.acknowledge(client, message.get('seq', 0))
+        if message.get('resync'):
+            # The frontend missed a frame (dropped from its queue under backpressure)
+            self.logger.debug(f"Resyncing widget state of {client.address}:{client.port}")
+            self._sendFullUpdate(client)
+
     # ------------------------------------------------------------------------------------------------------------------
     def _handleHandshakeMessage(self, client: WebsocketServerClient, message):
         self.logger.debug(f"Received handshake message from {client}: {message}")
@@ -136,7 +136,11 @@ class Map {
         this.buildGroupsFromPayload(payload.groups);
 
         // Websocket connection
-        this.websocket = new Websocket({host: payload.websocket.host, port: payload.websocket.port});
+        this.websocket = new Websocket({
+            host: payload.websocket.host,
+            port: payload.websocket.port,
+            options: {encoding: payload.websocket.encoding ?? 'json'},
+        });
         this.websocket.on('message', this._onWebsocketMessage.bind(this));
         this.websocket.on('connected', this._onWebsocketConnected.bind(this));
         this.websocket.on('close', this._onWebsocketDisconnected.bind(this))
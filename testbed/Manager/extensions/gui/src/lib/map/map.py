@@ -1,13 +1,12 @@
 from __future__ import annotations
 
 import copy
-import threading
-import time
 
 from core.utils.dict import update_dict
 from core.utils.exit import register_exit_callback
 from core.utils.logging_utils import Logger
 from core.utils.network.network import getHostIP
+from core.utils.time import get_scheduler, PeriodicJob
 from core.utils.websockets import WebsocketServer
 from extensions.gui.src.lib.map.map_objects import MapObjectGroup, MapObject
 from extensions.gui.src.lib.objects.objects import Widget
@@ -101,8 +100,9 @@ class Map:
     _exit: bool = False
 
     # === INIT =========================================================================================================
-    def __init__(self, id, server_host, server_port=MAP_DEFAULT_WS_PORT, **kwargs):
+    def __init__(self, id, server_host, server_port=MAP_DEFAULT_WS_PORT, websocket_encoding: str = 'json', **kwargs):
         self.id = id
+        self.websocket_encoding = websocket_encoding
 
         self.logger = Logger(f"Map {id}", 'DEBUG')
         self.config = update_dict(copy.deepcopy(MAP_DEFAULT_CONFIG), kwargs)
@@ -113,11 +113,11 @@ class Map:
         self.update_data = {}
         self.update_config = {}
 
-        self.server = WebsocketServer(server_host, server_port, heartbeats=False)
+        self.server = WebsocketServer(server_host, server_port, heartbeats=False, compression='deflate')
         self.server.callbacks.message.register(self._onMessage)
         self.server.callbacks.new_client.register(self._onNewClient)
 
-        self._thread = threading.Thread(target=self._task, daemon=True)
+        self._job: PeriodicJob | None = None
 
         register_exit_callback(self.close)
 
@@ -130,14 +130,15 @@ class Map:
     def start(self):
         self.logger.info(f'Starting Map {self.id} on {self.server.host}:{self.server.port}')
         self.server.start()
-        self._thread.start()
+        self._job = get_scheduler().every(1 / UPDATE_FREQUENCY, self._task, name=f"map_{self.id}")
 
     # ------------------------------------------------------------------------------------------------------------------
     def close(self, *args, **kwargs):
         self.server.stop()
         self._exit = True
-        if self._thread.is_alive():
-            self._thread.join()
+        if self._job is not None:
+            self._job.cancel()
+            self._job = None
 
     # ------------------------------------------------------------------------------------------------------------------
     def getMap(self):
@@ -280,25 +281,24 @@ class Map:
             'websocket': {
                 'host': self.server.host,
                 'port': self.server.port,
+                'encoding': self.websocket_encoding,
             }
         }
         return payload
 
     # === PRIVATE METHODS ==============================================================================================
     def _task(self):
-        while not self._exit:
+        # Runs on the shared scheduler every 1 / UPDATE_FREQUENCY seconds
 
-            # Send the data update
-            if len(self.update_data) > 0:
-                self._sendDataUpdate()
-                self.update_data = {}
+        # Send the data update
+        if len(self.update_data) > 0:
+            self._sendDataUpdate()
+            self.update_data = {}
 
-            # Send the config update
-            if len(self.update_config) > 0:
-                self._sendConfigUpdate()
-                self.update_config = {}
-
-            time.sleep(1 / UPDATE_FREQUENCY)
+        # Send the config update
+        if len(self.update_config) > 0:
+            self._sendConfigUpdate()
+            self.update_config = {}
 
     # ------------------------------------------------------------------------------------------------------------------
     def sendMessage(self, message: dict, client=None):
@@ -1,6 +1,8 @@
 import dataclasses
 from typing import Any
 
+from core.utils.dataclass_utils import register_codecs
+
 
 @dataclasses.dataclass
 class AddMessageData:
@@ -54,3 +56,7 @@ class ResponseMessage:
 class HandshakeMessage:
     data: dict
     type: str = 'handshake'
+
+
+register_codecs(AddMessageData, AddMessage, RemoveMessageData, RemoveMessage, RequestMessageData, RequestMessage,
+                ResponseMessage, HandshakeMessage)
@@ -8,6 +8,7 @@ import re
 
 # === CUSTOM MODULES ===================================================================================================
 from core.utils.callbacks import callback_definition, CallbackContainer
+from core.utils.dataclass_utils import register_codecs
 from core.utils.dict import replaceField, update_dict, ObservableDict, replaceStringInDict
 from core.utils.logging_utils import Logger
 from core.utils.uuid_utils import generate_uuid
@@ -45,6 +46,9 @@ class FunctionMessage:
     type: str = 'function'  # Type of message
 
 
+register_codecs(ObjectMessage, UpdateMessage, UpdateConfigMessage, FunctionMessage)
+
+
 # ======================================================================================================================
 class GUI_Object(abc.ABC):
     type: str
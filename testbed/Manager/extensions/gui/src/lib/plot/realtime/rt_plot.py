@@ -1,6 +1,5 @@
 import dataclasses
 import enum
-import threading
 import time
 from typing import List, Optional, Any, Callable, Union
 
@@ -8,7 +7,7 @@ from core.utils.callbacks import callback_definition, CallbackContainer
 from core.utils.dataclass_utils import update_dataclass_from_dict
 from core.utils.dict import update_dict
 from core.utils.exit import register_exit_callback
-from core.utils.time import IntervalTimer
+from core.utils.time import get_scheduler, PeriodicJob
 from extensions.gui.src.lib.objects.objects import Widget
 
 
@@ -261,25 +260,23 @@ class RT_Plot_Backend:
 
         self.x_axis = X_Axis(**x_axis_config)
 
-        self._thread: Optional[threading.Thread] = None
-
-        self.interval_timer = IntervalTimer(self.Ts, False)
+        self._job: Optional[PeriodicJob] = None
 
         register_exit_callback(self.stop)
 
     # === METHODS ======================================================================================================
     def start(self):
-        if self._thread is not None:
+        if self._job is not None:
             return
         self._exit = False
-        self._thread = threading.Thread(target=self._task, daemon=True)
-        self._thread.start()
+        self._job = get_scheduler().every(self.Ts, self._task, name=f"rt_plot_{self.id}")
 
     # ------------------------------------------------------------------------------------------------------------------
     def stop(self, *args, **kwargs):
         self._exit = True
-        if self._thread is not None and self._thread.is_alive():
-            self._thread.join()
+        if self._job is not None:
+            self._job.cancel()
+            self._job = None
 
     # ------------------------------------------------------------------------------------------------------------------
     def add_y_axis(self, y_axis: str | Y_Axis, config=None) -> Y_Axis:
@@ -403,10 +400,8 @@ class RT_Plot_Backend:
 
     # === PRIVATE METHODS ==============================================================================================
     def _task(self) -> None:
-        self.interval_timer.reset()
-        while not self._exit:
-            self._send_value_update()
-            self.interval_timer.sleep_until_next()
+        # Runs on the shared scheduler every Ts seconds
+        self._send_value_update()
 
     # ------------------------------------------------------------------------------------------------------------------
     def _send_value_update(self) -> None:
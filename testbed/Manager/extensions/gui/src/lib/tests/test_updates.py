@@ -0,0 +1,110 @@
+from core.utils.logging_utils import Logger
+from extensions.gui.src.gui import Child
+from extensions.gui.src.lib.updates import UpdateAggregator
+
+
+# ================================================================
+# UpdateAggregator
+# ================================================================
+
+def test_frames_send_deltas_and_skip_unchanged():
+    updates = UpdateAggregator()
+    updates.add('gui/a', {'data': {'x': 1, 'y': 2}})
+    updates.add('gui/a', {'data': {'y': 3}})  # Coalesced into the pending update
+    frame = updates.frame()
+    assert frame['seq'] == 1 and not frame['full']
+    assert frame['messages']['gui/a']['data'] == {'x': 1, 'y': 3}
+
+    updates.add('gui/a', {'data': {'x': 1, 'y': 4}})
+    frame = updates.frame()
+    assert frame['seq'] == 2
+    assert frame['messages']['gui/a']['delta']
+    assert frame['messages']['gui/a']['data'] == {'y': 4}
+
+    updates.add('gui/a', {'data': {'x': 1}})
+    assert updates.frame() is None  # Nothing changed
+    stats = updates.stats
+    assert (stats.updates, stats.coalesced, stats.unchanged, stats.frames) == (4, 1, 1, 2)
+
+
+def test_full_frame_holds_the_last_sent_state():
+    updates = UpdateAggregator()
+    updates.add('gui/a', {'data': {'x': 1, 'y': 2}})
+    updates.add('gui/b', {'data': 5})
+    updates.frame()
+    updates.add('gui/a', {'data': {'y': 3}})
+    updates.frame()
+
+    full = updates.full_frame()
+    assert full['full'] and full['seq'] == 2
+    assert full['messages']['gui/a']['data'] == {'x': 1, 'y': 3}
+    assert not full['messages']['gui/a']['delta']
+    assert full['messages']['gui/b']['data'] == 5
+
+
+def test_important_updates_keep_order_and_are_bounded():
+    updates = UpdateAggregator(max_important=2)
+    for i in range(3):
+        updates.add('gui/table', {'important': True, 'data': i})
+    frame = updates.frame()
+    assert [entry['data'] for entry in frame['messages']['gui/table']] == [1, 2]
+    assert updates.stats.important_dropped == 1
+
+
+def test_frames_are_held_while_a_frontend_lags():
+    updates = UpdateAggregator(max_in_flight=2, max_divider=4)
+    client = object()
+    updates.acknowledge(client, 0)
+    for i in range(2):
+        updates.add('gui/a', {'data': i})
+        assert updates.tick()
+        updates.frame()
+
+    assert not updates.tick()  # Two frames unacknowledged
+    assert updates.stats.held == 1
+    assert updates.stats.frame_divider == 2
+
+    updates.acknowledge(client, 2)
+    assert not updates.tick()
+    assert updates.tick()
+    assert updates.stats.frame_divider == 1
+
+
+# ================================================================
+# Child GUI frames
+# ================================================================
+
+class FakeGUI:
+    def __init__(self):
+        self.logger = Logger('test_gui_child')
+        self.updates = []
+
+    def sendUpdate(self, uid, message):
+        self.updates.append((uid, message))
+
+
+def make_child():
+    # Skip __init__, which connects to the child GUI
+    child = Child.__new__(Child)
+    child.gui = FakeGUI()
+    child.id = 'child'
+    child.path_in_gui = 'parent'
+    child.update_seq = None
+    child.sent = []
+    child.send = child.sent.append
+    return child
+
+
+def test_child_acknowledges_frames_and_requests_resync_on_gap():
+    child = make_child()
+    entry = {'id': 'x', 'type': 'update', 'important': False, 'delta': False, 'data': 1}
+
+    child._handleGuiUpdate({'type': 'gui_update', 'seq': 4, 'full': True, 'messages': {'x': entry}})
+    child._handleGuiUpdate({'type': 'gui_update', 'seq': 5, 'full': False, 'messages': {'x': entry}})
+    child._handleGuiUpdate({'type': 'gui_update', 'seq': 7, 'full': False, 'messages': {'x': entry}})
+    child._handleGuiUpdate({'type': 'gui_update', 'seq': 7, 'full': True, 'messages': {'x': entry}})
+
+    assert [(ack['seq'], ack['resync']) for ack in child.sent] == [(4, False), (5, False), (7, True), (7, False)]
+    assert all(ack['type'] == 'gui_update_ack' for ack in child.sent)
+    assert child.gui.updates[0] == ('parent/x', entry)
+    assert len(child.gui.updates) == 4
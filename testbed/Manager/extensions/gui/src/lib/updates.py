@@ -0,0 +1,227 @@
+import collections
+import copy
+import dataclasses
+import threading
+import time
+from dataclasses import is_dataclass
+from typing import Any
+
+from core.utils.dataclass_utils import asdict_optimized
+from extensions.gui.src.lib.objects.objects import UpdateMessage
+
+# ======================================================================================================================
+# Widget update frames
+#
+#   {"type": "gui_update", "seq": <int>, "full": <bool>, "messages": {<uid>: <entry> | [<entry>, ...]}}
+#   entry: {"id": <uid>, "type": "update", "important": <bool>, "delta": <bool>, "data": ...}
+#
+# Regular updates are state: the frontend keeps the last data of every widget, merges a delta entry's top-level keys
+# into it and hands the merged data to the widget. Entries with delta=false replace the state. Important entries are
+# events (table cell changes, group refreshes) and are handed over unchanged and in order.
+# Frames are numbered; the frontend acknowledges every frame and asks for a full frame when it sees a gap.
+# ======================================================================================================================
+_IMMUTABLE = (str, int, float, bool, type(None), bytes)
+
+
+def _equal(a, b) -> bool:
+    if type(a) is not type(b):
+        return False
+    try:
+        equal = a == b
+        return equal if isinstance(equal, bool) else bool(equal.all())  # NumPy arrays compare element-wise
+    except Exception:
+        return False
+
+
+def _snapshot(value):
+    # Values are kept as last sent; containers are copied so that producers can mutate and resend them
+    return value if isinstance(value, _IMMUTABLE) else copy.deepcopy(value)
+
+
+@dataclasses.dataclass
+class UpdateAggregatorStats:
+    updates: int = 0  # Calls to add()
+    coalesced: int = 0  # Updates merged into one that was still pending
+    unchanged: int = 0  # Pending widget updates not sent because nothing changed since the last frame
+    frames: int = 0
+    full_frames: int = 0
+    held: int = 0  # Frames held back because a frontend had not acknowledged the previous ones
+    important_dropped: int = 0
+    frame_divider: int = 1  # Current frame interval in multiples of the GUI's Ts
+
+
+class UpdateAggregator:
+    """
+    Collects widget updates between frames and builds the frames sent to the frontends.
+
+    add() may be called from any thread. Pending updates are double-buffered: frame() swaps the buffer under the lock
+    and computes the deltas against the last sent state outside of it, so producers never wait for a frame to be
+    built. Important updates go to a queue bounded by `max_important`; the oldest are dropped when it is full.
+
+    The frame rate adapts to the frontends: when one that acknowledged within the last `ack_timeout` seconds is
+    `max_in_flight` frames behind, frames are held back (updates keep coalescing) and the interval doubles up to
+    `max_divider` ticks; it recovers one tick at a time once the frontends have caught up.
+    """
+
+    def __init__(self, max_important: int = 256, max_in_flight: int = 3, max_divider: int = 16,
+                 ack_timeout: float = 1.0):
+        self.max_important = max_important
+        self.max_in_flight = max_in_flight
+        self.max_divider = max_divider
+        self.ack_timeout = ack_timeout
+
+        self._lock = threading.Lock()
+        self._pending: dict[str, Any] = {}
+        self._spare: dict[str, Any] = {}
+        self._important: collections.deque = collections.deque()
+
+        # Owned by the frame builder; also read for full frames
+        self._sent_lock = threading.Lock()
+        self._last_sent: dict[str, Any] = {}
+        self._seq = 0
+
+        self._acks: dict[Any, tuple[int, float]] = {}  # client -> (acknowledged seq, time)
+        self._divider = 1
+        self._tick = 0
+
+        self._stats = UpdateAggregatorStats()
+
+    # === PROPERTIES ===================================================================================================
+    @property
+    def stats(self) -> UpdateAggregatorStats:
+        stats = dataclasses.replace(self._stats)
+        stats.frame_divider = self._divider
+        return stats
+
+    # === METHODS ======================================================================================================
+    def add(self, uid: str, message: UpdateMessage | dict):
+        if isinstance(message, dict):
+            important = message.get('important', False)
+            data = message.get('data')
+        else:
+            important = message.important
+            data = message.data
+        if is_dataclass(data) and not isinstance(data, type):
+            data = asdict_optimized(data)
+
+        with self._lock:
+            self._stats.updates += 1
+            if important:
+                if len(self._important) >= self.max_important:
+                    self._important.popleft()
+                    self._stats.important_dropped += 1
+                self._important.append((uid, data))
+                return
+
+            pending = self._pending.get(uid)
+            if pending is None:
+                self._pending[uid] = dict(data) if isinstance(data, dict) else data
+            else:
+                self._stats.coalesced += 1
+                if isinstance(pending, dict) and isinstance(data, dict):
+                    pending.update(data)
+                else:
+                    self._pending[uid] = dict(data) if isinstance(data, dict) else data
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def tick(self) -> bool:
+        """
+        Called once per GUI tick. Returns whether a frame should be built now.
+        """
+        self._tick += 1
+        if self._tick < self._divider:
+            return False
+
+        lag = self._lag()
+        if lag >= self.max_in_flight:
+            self._divider = min(self._divider * 2, self.max_divider)
+            self._stats.held += 1
+            self._tick = 0
+            return False
+        if lag <= 1 and self._divider > 1:
+            self._divider -= 1
+
+        self._tick = 0
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def frame(self) -> dict | None:
+        """
+        The next frame, or None if nothing changed since the last one.
+        """
+        with self._lock:
+            if not self._pending and not self._important:
+                return None
+            pending, self._pending = self._pending, self._spare
+            important = list(self._important)
+            self._important.clear()
+
+        messages = {}
+        for uid, data in important:
+            entry = {'id': uid, 'type': 'update', 'important': True, 'delta': False, 'data': data}
+            messages.setdefault(uid, []).append(entry)
+
+        with self._sent_lock:
+            last_sent = self._last_sent
+            for uid, data in pending.items():
+                last = last_sent.get(uid)
+                if isinstance(data, dict) and isinstance(last, dict):
+                    delta = {key: value for key, value in data.items()
+                             if key not in last or not _equal(last[key], value)}
+                    if not delta:
+                        self._stats.unchanged += 1
+                        continue
+                    for key, value in delta.items():
+                        last[key] = _snapshot(value)
+                    entry = {'id': uid, 'type': 'update', 'important': False, 'delta': True, 'data': delta}
+                else:
+                    if last is not None and _equal(last, data):
+                        self._stats.unchanged += 1
+                        continue
+                    last_sent[uid] = {key: _snapshot(value) for key, value in data.items()} \
+                        if isinstance(data, dict) else _snapshot(data)
+                    entry = {'id': uid, 'type': 'update', 'important': False, 'delta': False, 'data': data}
+
+                if uid in messages:
+                    messages[uid].append(entry)
+                else:
+                    messages[uid] = entry
+
+            pending.clear()
+            self._spare = pending
+
+            if not messages:
+                return None
+            self._seq += 1
+            self._stats.frames += 1
+            return {'type': 'gui_update', 'seq': self._seq, 'full': False, 'messages': messages}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def full_frame(self) -> dict:
+        """
+        The last sent state of every widget, for frontends that connect or lost a frame.
+        """
+        with self._sent_lock:
+            messages = {uid: {'id': uid, 'type': 'update', 'important': False, 'delta': False,
+                              'data': copy.copy(data)}
+                        for uid, data in self._last_sent.items()}
+            self._stats.full_frames += 1
+            return {'type': 'gui_update', 'seq': self._seq, 'full': True, 'messages': messages}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def acknowledge(self, client, seq: int):
+        self._acks[client] = (seq, time.monotonic())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def forget(self, client):
+        self._acks.pop(client, None)
+
+    # === PRIVATE METHODS ==============================================================================================
+    def _lag(self) -> int:
+        # Frames the slowest live frontend is behind. Frontends that stopped acknowledging (closed tab, old client)
+        # do not hold back the others; they resync from a full frame once they notice the gap
+        now = time.monotonic()
+        acknowledged = [seq for seq, t in list(self._acks.values()) if now - t <= self.ack_timeout]
+        if not acknowledged:
+            return 0
+        return self._seq - min(acknowledged)